@@ -10,11 +10,10 @@ import stripe
 import os
 import logging
 import json
-import smtplib
-from email.mime.text import MIMEText
 
 from auth_service import AuthService
 from database_service import db_service
+from mail_transport import MailMessage, mail_transport
 
 router = APIRouter(prefix="/api/addons", tags=["Add-Ons"])
 security = HTTPBearer()
@@ -23,25 +22,11 @@ logger = logging.getLogger(__name__)
 SALES_EMAIL = os.getenv("SALES_EMAIL", "sales@complyo.de")
 
 def _notify_sales(subject: str, body: str) -> None:
-    """Send a plain-text notification email to the sales team. Silent on failure."""
-    smtp_host = os.getenv("SMTP_HOST", "")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USERNAME", "")
-    smtp_pass = os.getenv("SMTP_PASSWORD", "")
-    if not all([smtp_host, smtp_user, smtp_pass]):
+    """Queue a plain-text notification email to the sales team. Silent on failure."""
+    if mail_transport.demo_mode:
         logger.info(f"[DEMO] Sales notification (no SMTP): {subject} | {body}")
         return
-    try:
-        msg = MIMEText(body, "plain", "utf-8")
-        msg["Subject"] = subject
-        msg["From"] = smtp_user
-        msg["To"] = SALES_EMAIL
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_user, [SALES_EMAIL], msg.as_string())
-    except Exception as e:
-        logger.error(f"Failed to send sales notification: {e}")
+    mail_transport.enqueue(MailMessage(to=SALES_EMAIL, subject=subject, text_body=body, tag="sales"))
 
 async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user ID from JWT token"""
@@ -177,7 +177,7 @@ async def resend_verification_email(
         # Import email service and send verification
         from email_service import email_service
         
-        verification_sent = email_service.send_verification_email(
+        verification_sent = await email_service.send_verification_email(
             lead["email"], 
             lead["name"], 
             lead["verification_token"]
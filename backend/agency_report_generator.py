@@ -183,3 +183,16 @@ class AgencyReportGenerator:
         doc.build(story)
         buffer.seek(0)
         return buffer.getvalue()
+
+
+def render_agency_report(
+    client_name: str,
+    sites: List[Dict[str, Any]],
+    agency_logo_bytes: Optional[bytes] = None,
+) -> bytes:
+    """Picklebarer Einstieg für den CPU-Executor (läuft im Worker-Prozess)"""
+    return AgencyReportGenerator().generate(
+        client_name=client_name,
+        sites=sites,
+        agency_logo_bytes=agency_logo_bytes,
+    )
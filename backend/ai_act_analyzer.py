@@ -5,11 +5,12 @@ Classifies AI systems and checks compliance with EU AI Act requirements
 
 import json
 import os
-import httpx
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pydantic import BaseModel
 
+from llm_gateway import llm_gateway, LLMError
+
 class AISystem(BaseModel):
     """AI System Model"""
     id: Optional[str] = None
@@ -46,7 +47,6 @@ class AIActAnalyzer:
     
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY", "")
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         
         # AI Act Risk Categories
         self.risk_categories = {
@@ -580,48 +580,29 @@ WICHTIG:
     
     async def _call_ai_api(self, prompt: str, model: str = "anthropic/claude-3.5-sonnet") -> str:
         """
-        Call OpenRouter API with Claude
+        Call OpenRouter API with Claude (via LLM-Gateway)
         """
+        response = await llm_gateway.complete(
+            prompt,
+            model=model,
+            temperature=0.3,  # Low temperature for consistent, factual responses
+            max_tokens=2000,
+            title="Complyo AI Act Analyzer",
+            api_key=self.api_key,
+        )
+        if not response.success:
+            raise LLMError(response.error, status=response.status)
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://complyo.tech",
-            "X-Title": "Complyo AI Act Analyzer"
-        }
+        # Extract response content
+        content = response.content
         
-        payload = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.3,  # Low temperature for consistent, factual responses
-            "max_tokens": 2000
-        }
+        # Clean JSON if wrapped in markdown code blocks
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                self.api_url,
-                headers=headers,
-                json=payload
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            # Extract response content
-            content = result["choices"][0]["message"]["content"]
-            
-            # Clean JSON if wrapped in markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            return content
+        return content
 
 # Create singleton instance
 ai_act_analyzer = AIActAnalyzer()
@@ -4,59 +4,38 @@ Handles alerts and notifications for AI Act compliance monitoring
 """
 
 import os
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
 import json
+from mail_transport import MailMessage, mail_transport
 
 logger = logging.getLogger(__name__)
 
 
 class AIComplianceNotificationService:
     def __init__(self):
-        self.smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        self.smtp_username = os.getenv('SMTP_USERNAME', '')
-        self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         self.sender_email = os.getenv('SENDER_EMAIL', 'noreply@complyo.tech')
         self.sender_name = os.getenv('SENDER_NAME', 'Complyo AI Compliance')
         self.frontend_url = os.getenv('FRONTEND_URL', 'https://app.complyo.tech')
-        self.demo_mode = not all([self.smtp_username, self.smtp_password])
+        self.demo_mode = mail_transport.demo_mode
         
         if self.demo_mode:
             logger.info("AI Notification Service running in DEMO MODE")
     
-    def _send_email(self, to_email: str, subject: str, html_body: str, text_body: str) -> bool:
+    async def _send_email(self, to_email: str, subject: str, html_body: str, text_body: str) -> bool:
         if self.demo_mode:
             logger.info(f"[DEMO] Email to {to_email}: {subject}")
             logger.info(f"[DEMO] Body: {text_body[:200]}...")
             return True
         
-        try:
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"{self.sender_name} <{self.sender_email}>"
-            message["To"] = to_email
-            
-            part1 = MIMEText(text_body, "plain")
-            part2 = MIMEText(html_body, "html")
-            message.attach(part1)
-            message.attach(part2)
-            
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.smtp_username, self.smtp_password)
-                server.sendmail(self.sender_email, to_email, message.as_string())
-            
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {e}")
-            return False
+        return await mail_transport.send(MailMessage(
+            to=to_email,
+            subject=subject,
+            html_body=html_body,
+            text_body=text_body,
+            sender=f"{self.sender_name} <{self.sender_email}>",
+        ))
     
     async def send_compliance_alert(
         self,
@@ -149,7 +128,7 @@ Bitte überprüfen Sie Ihr System: {system_url}
 Complyo AI Compliance
         """
         
-        return self._send_email(user_email, subject, html_body, text_body)
+        return await self._send_email(user_email, subject, html_body, text_body)
     
     async def send_scan_reminder(
         self,
@@ -225,7 +204,7 @@ Dashboard: {self.frontend_url}/ai-compliance
 Complyo AI Compliance
         """
         
-        return self._send_email(user_email, subject, html_body, text_body)
+        return await self._send_email(user_email, subject, html_body, text_body)
     
     async def send_high_risk_alert(
         self,
@@ -295,7 +274,7 @@ Details: {system_url}
 Complyo AI Compliance
         """
         
-        return self._send_email(user_email, subject, html_body, text_body)
+        return await self._send_email(user_email, subject, html_body, text_body)
 
 
 ai_compliance_notification_service = AIComplianceNotificationService()
@@ -11,11 +11,9 @@ Zentrale Engine für alle Fix-Typen mit:
 """
 
 import os
-import asyncio
-import aiohttp
 import json
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from enum import Enum
@@ -25,10 +23,7 @@ from .prompts_v2 import CODE_FIX_SCHEMA, TEXT_FIX_SCHEMA, WIDGET_FIX_SCHEMA, GUI
 from .validators import FixValidator, ValidationResult
 from .fix_quality_gate import FixQualityGate
 
-try:
-    from metrics import openrouter_requests_total as _openrouter_counter
-except Exception:
-    _openrouter_counter = None
+from llm_gateway import llm_gateway
 
 
 # =============================================================================
@@ -71,7 +66,6 @@ class AIApiClient:
     
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY", "")
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         self.timeout = 60.0
         
         # Model pricing (USD per 1M tokens)
@@ -88,10 +82,11 @@ class AIApiClient:
         model: str,
         temperature: float = 0.3,
         max_tokens: int = 2000,
-        retry_count: int = 3
+        retry_count: int = 3,
+        fallback_models: Sequence[str] = ()
     ) -> AICallResult:
         """
-        Ruft AI-API mit Retry-Logic auf
+        Ruft AI-API über das LLM-Gateway auf (Retry + optionale Fallback-Modelle)
         """
         if not self.api_key:
             return AICallResult(
@@ -104,105 +99,43 @@ class AIApiClient:
                 response_time_ms=0
             )
         
-        start_time = time.time()
-        last_error = None
+        response = await llm_gateway.complete(
+            prompt,
+            system_message=system_message,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=self.timeout,
+            retries=retry_count,
+            fallback_models=fallback_models,
+            title="Complyo AI Fix Engine",
+            api_key=self.api_key,
+        )
+        
+        if not response.success:
+            return AICallResult(
+                success=False,
+                content=None,
+                model=model,
+                tokens_used=None,
+                cost_usd=None,
+                error=response.error or "Unknown error",
+                response_time_ms=response.response_time_ms
+            )
+        
+        # Calculate cost
+        pricing = self.pricing.get(response.model, {"input": 5.0, "output": 15.0})
+        cost = (response.prompt_tokens * pricing["input"] / 1_000_000 + 
+               response.completion_tokens * pricing["output"] / 1_000_000)
         
-        for attempt in range(retry_count):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://complyo.tech",
-                        "X-Title": "Complyo AI Fix Engine"
-                    }
-                    
-                    data = {
-                        "model": model,
-                        "messages": [
-                            {"role": "system", "content": system_message},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": temperature,
-                        "max_tokens": max_tokens
-                    }
-                    
-                    async with session.post(
-                        self.api_url,
-                        headers=headers,
-                        json=data,
-                        timeout=aiohttp.ClientTimeout(total=self.timeout)
-                    ) as response:
-                        response_time = int((time.time() - start_time) * 1000)
-                        
-                        if response.status == 200:
-                            result = await response.json()
-                            content = result["choices"][0]["message"]["content"]
-                            
-                            # Calculate usage
-                            usage = result.get("usage", {})
-                            input_tokens = usage.get("prompt_tokens", 0)
-                            output_tokens = usage.get("completion_tokens", 0)
-                            total_tokens = input_tokens + output_tokens
-                            
-                            # Calculate cost
-                            pricing = self.pricing.get(model, {"input": 5.0, "output": 15.0})
-                            cost = (input_tokens * pricing["input"] / 1_000_000 + 
-                                   output_tokens * pricing["output"] / 1_000_000)
-                            
-                            if _openrouter_counter:
-                                _openrouter_counter.labels(status="success").inc()
-                            return AICallResult(
-                                success=True,
-                                content=content,
-                                model=model,
-                                tokens_used=total_tokens,
-                                cost_usd=cost,
-                                error=None,
-                                response_time_ms=response_time
-                            )
-                        
-                        elif response.status == 429:
-                            # Rate limit - wait and retry
-                            last_error = "Rate limit erreicht"
-                            wait_time = 2 ** attempt  # Exponential backoff
-                            await asyncio.sleep(wait_time)
-                            continue
-                        
-                        else:
-                            error_text = await response.text()
-                            last_error = f"API Error {response.status}: {error_text}"
-                            
-                            if response.status >= 500:
-                                # Server error - retry
-                                await asyncio.sleep(1)
-                                continue
-                            else:
-                                # Client error - don't retry
-                                break
-            
-            except asyncio.TimeoutError:
-                last_error = "Timeout bei AI-API-Call"
-                await asyncio.sleep(1)
-                continue
-            
-            except Exception as e:
-                last_error = f"Exception: {str(e)}"
-                await asyncio.sleep(1)
-                continue
-        
-        # All retries failed
-        response_time = int((time.time() - start_time) * 1000)
-        if _openrouter_counter:
-            _openrouter_counter.labels(status="error").inc()
         return AICallResult(
-            success=False,
-            content=None,
-            model=model,
-            tokens_used=None,
-            cost_usd=None,
-            error=last_error or "Unknown error",
-            response_time_ms=response_time
+            success=True,
+            content=response.content,
+            model=response.model,
+            tokens_used=response.total_tokens,
+            cost_usd=cost,
+            error=None,
+            response_time_ms=response.response_time_ms
         )
 
 
@@ -322,30 +255,23 @@ class UnifiedFixEngine:
         # 3. Get system message
         system_message = self.prompt_builder.get_system_message(FixType(fix_type))
         
-        # 4. Call AI with fallback chain
-        ai_result = None
-        fallback_used = False
+        # 4. Call AI with fallback chain (Gateway probiert Fallback-Modelle)
+        ai_result = await self.ai_client.call_ai(
+            prompt=prompt_data["prompt"],
+            system_message=system_message,
+            model=self.fallback_chain[0],
+            temperature=prompt_data.get("temperature", 0.3),
+            max_tokens=prompt_data.get("max_tokens", 2000),
+            retry_count=2,
+            fallback_models=self.fallback_chain[1:]
+        )
         
-        for model in self.fallback_chain:
-            print(f"  🤖 Trying model: {model}")
-            
-            ai_result = await self.ai_client.call_ai(
-                prompt=prompt_data["prompt"],
-                system_message=system_message,
-                model=model,
-                temperature=prompt_data.get("temperature", 0.3),
-                max_tokens=prompt_data.get("max_tokens", 2000),
-                retry_count=2
-            )
-            
-            if ai_result.success:
-                print(f"  ✅ Success with {model}")
-                if model != self.fallback_chain[0]:
-                    fallback_used = True
-                break
-            else:
-                print(f"  ❌ Failed with {model}: {ai_result.error}")
-                fallback_used = True
+        if ai_result.success:
+            print(f"  ✅ Success with {ai_result.model}")
+            fallback_used = ai_result.model != self.fallback_chain[0]
+        else:
+            print(f"  ❌ All models failed: {ai_result.error}")
+            fallback_used = True
         
         # If all AI calls failed, use template-based fallback
         if not ai_result or not ai_result.success:
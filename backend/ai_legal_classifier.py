@@ -17,13 +17,14 @@ Features:
 
 import os
 import json
-import httpx
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict, field
 
+from llm_gateway import llm_gateway, LLMError
+
 logger = logging.getLogger(__name__)
 
 
@@ -144,7 +145,6 @@ class AILegalClassifier:
     
     def __init__(self, openrouter_api_key: str = None):
         self.api_key = openrouter_api_key or os.getenv("OPENROUTER_API_KEY")
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
         self.model = "anthropic/claude-3.7-sonnet:beta"  # ✅ Aktuelles funktionierendes Modell
         
         logger.info("🤖 AI Legal Classifier initialized")
@@ -530,55 +530,32 @@ WICHTIG:
     
     async def _call_ai_api(self, prompt: str) -> str:
         """
-        Ruft die OpenRouter AI API auf
+        Ruft die OpenRouter AI API über das LLM-Gateway auf
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://complyo.tech",
-            "X-Title": "Complyo Legal Classifier"
-        }
+        response = await llm_gateway.complete(
+            prompt,
+            system_message=(
+                "Du bist ein hochspezialisierter KI-Assistent für deutsches und "
+                "europäisches Recht im Bereich Web-Compliance. Du analysierst "
+                "Gesetzesänderungen und triffst intelligente Entscheidungen über "
+                "Handlungsbedarf und Aktionen. Antworte präzise im angeforderten Format."
+            ),
+            model=self.model,
+            temperature=0.2,
+            max_tokens=1000,
+            title="Complyo Legal Classifier",
+            api_key=self.api_key or "",
+        )
+        if not response.success:
+            raise LLMError(response.error, status=response.status)
         
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "Du bist ein hochspezialisierter KI-Assistent für deutsches und "
-                        "europäisches Recht im Bereich Web-Compliance. Du analysierst "
-                        "Gesetzesänderungen und triffst intelligente Entscheidungen über "
-                        "Handlungsbedarf und Aktionen. Antworte präzise im angeforderten Format."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.2,
-            "max_tokens": 1000
-        }
+        # Log Token-Usage
+        logger.info(
+            f"📊 API Usage: {response.total_tokens} tokens, "
+            f"~${response.total_tokens * 0.000003:.4f}"
+        )
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                self.base_url,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            content = data['choices'][0]['message']['content']
-            
-            # Log Token-Usage
-            if 'usage' in data:
-                logger.info(
-                    f"📊 API Usage: {data['usage'].get('total_tokens', 0)} tokens, "
-                    f"~${data['usage'].get('total_tokens', 0) * 0.000003:.4f}"
-                )
-            
-            return content
+        return response.content
     
     def _get_fallback_classification(
         self,
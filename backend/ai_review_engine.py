@@ -8,51 +8,38 @@ Prüft und verfeinert jeden Ausgabeaspekt des Scans mit KI:
 """
 
 import asyncio
-import aiohttp
 import json
 import logging
 import os
 from typing import Any, Dict, List, Optional
 
+from llm_gateway import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 REVIEW_MODEL = "moonshotai/kimi-k2-thinking"
 SOLUTION_MODEL = "moonshotai/kimi-k2-thinking"
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
-
-_HEADERS = {
-    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-    "Content-Type": "application/json",
-    "HTTP-Referer": "https://complyo.tech",
-    "X-Title": "Complyo AI Review Engine",
-}
 
 
 async def _call_ai(prompt: str, model: str, max_tokens: int = 600, temperature: float = 0.2) -> Optional[str]:
     if not OPENROUTER_API_KEY:
         return None
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                OPENROUTER_URL,
-                headers=_HEADERS,
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                },
-                timeout=aiohttp.ClientTimeout(total=18),
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return data["choices"][0]["message"]["content"].strip()
-                logger.warning(f"AI call {model} status {resp.status}")
-                return None
-    except Exception as e:
-        logger.warning(f"AI call failed ({model}): {e}")
+    # Kurzes Zeitbudget im Request-Pfad → kein Retry
+    response = await llm_gateway.complete(
+        prompt,
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        timeout=18,
+        retries=1,
+        title="Complyo AI Review Engine",
+        api_key=OPENROUTER_API_KEY,
+    )
+    if not response.success:
+        logger.warning(f"AI call failed ({model}): {response.error}")
         return None
+    return response.content.strip()
 
 
 async def _call_ai_json(prompt: str, model: str, max_tokens: int = 800) -> Optional[Dict]:
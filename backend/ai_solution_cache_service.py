@@ -4,7 +4,8 @@ Intelligentes Caching-System für AI-generierte Lösungen
 
 Funktionen:
 - Exact Matching via SHA256 Fingerprint
-- Fuzzy Matching via Similarity Score
+- Semantisches Matching via lokalem Hashing-Vectorizer + Vektor-Index je Kategorie
+  (Embeddings werden beim Speichern berechnet und in der DB abgelegt)
 - Automatisches Learning durch Usage Metrics
 - 70-85% Reduktion der API-Calls
 
@@ -12,14 +13,165 @@ Author: Complyo Team
 Date: 2025-11-17
 """
 
+import asyncio
 import hashlib
 import logging
-from typing import Optional, List, Dict, Tuple
-from difflib import SequenceMatcher
+import os
+import time
+from typing import Any, Optional, List, Dict, Tuple
+
 import asyncpg
+import numpy as np
+
+from knowledge.hashing_vectorizer import embed_text
 
 logger = logging.getLogger(__name__)
 
+# Dimension des Hashing-Vectorizers (je Titel und Beschreibung)
+VECTOR_DIM = int(os.getenv("AI_CACHE_VECTOR_DIM", "1024"))
+# Nach wie vielen Sekunden ein Kategorie-Index inkrementell nachgeladen wird
+# (andere Worker können inzwischen Lösungen gespeichert haben)
+INDEX_TTL_SECONDS = float(os.getenv("AI_CACHE_INDEX_TTL", "300"))
+# Nach wie vielen Sekunden ein Kategorie-Index komplett neu aufgebaut wird
+# (entfernt gelöschte Lösungen aus dem Index)
+INDEX_REBUILD_SECONDS = float(os.getenv("AI_CACHE_INDEX_REBUILD", "86400"))
+# Kandidaten aus dem Vektor-Index, die gegen die DB verifiziert werden
+SEMANTIC_TOP_K = 5
+
+
+def vector_to_bytes(vector: np.ndarray) -> bytes:
+    """float32-Vektor → BYTEA für ai_solution_cache.*_embedding"""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def vector_from_bytes(data: Optional[bytes], dim: int = VECTOR_DIM) -> Optional[np.ndarray]:
+    """BYTEA → float32-Vektor; None bei fehlendem Wert oder anderer Dimension"""
+    if not data or len(data) != dim * 4:
+        return None
+    return np.frombuffer(data, dtype=np.float32)
+
+
+def _row_vectors(row) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """
+    Vektoren einer DB-Zeile: gespeicherte Embeddings, sonst neu berechnet
+
+    Returns:
+        (title_vector, description_vector, computed) — computed=True wenn
+        die Embeddings fehlten und nachgetragen werden sollten
+    """
+    title_vector = vector_from_bytes(row.get('title_embedding'))
+    description_vector = vector_from_bytes(row.get('description_embedding'))
+    if title_vector is not None and description_vector is not None:
+        return title_vector, description_vector, False
+    return (
+        embed_text(row['issue_title'] or '', VECTOR_DIM),
+        embed_text(row['issue_description'] or '', VECTOR_DIM),
+        True,
+    )
+
+
+def _embed_rows(rows: List[Any]) -> List[Tuple[Any, np.ndarray, np.ndarray, bool]]:
+    """Vektoren für geladene Zeilen (läuft per asyncio.to_thread)"""
+    return [(row, *_row_vectors(row)) for row in rows]
+
+
+class _CategoryIndex:
+    """Vektor-Index aller gecachten Lösungen einer Kategorie"""
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self.ids: List = []
+        self.fingerprints: Dict[str, int] = {}
+        # Vorallokierte Matrizen, Kapazität wird verdoppelt → add() amortisiert O(1)
+        self._success_rates = np.zeros(0, dtype=np.float32)
+        self._title_vectors = np.zeros((0, dim), dtype=np.float32)
+        self._description_vectors = np.zeros((0, dim), dtype=np.float32)
+        self.loaded_at = time.monotonic()
+        self.built_at = self.loaded_at
+        # Höchstes updated_at der geladenen Zeilen (Watermark für inkrementelles Nachladen)
+        self.watermark = None
+
+    @classmethod
+    def build(cls, entries: List[Tuple[Any, str, np.ndarray, np.ndarray, float]], dim: int = VECTOR_DIM) -> "_CategoryIndex":
+        """Index aus (id, fingerprint, title_vec, desc_vec, success_rate) mit einem np.stack je Matrix"""
+        index = cls(dim)
+        unique: Dict[str, Tuple] = {}
+        for entry in entries:
+            unique[entry[1]] = entry
+        rows = list(unique.values())
+        if rows:
+            index.ids = [row[0] for row in rows]
+            index.fingerprints = {row[1]: i for i, row in enumerate(rows)}
+            index._title_vectors = np.stack([row[2] for row in rows]).astype(np.float32, copy=False)
+            index._description_vectors = np.stack([row[3] for row in rows]).astype(np.float32, copy=False)
+            index._success_rates = np.array([row[4] for row in rows], dtype=np.float32)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def success_rates(self) -> np.ndarray:
+        return self._success_rates[:len(self.ids)]
+
+    @property
+    def title_vectors(self) -> np.ndarray:
+        return self._title_vectors[:len(self.ids)]
+
+    @property
+    def description_vectors(self) -> np.ndarray:
+        return self._description_vectors[:len(self.ids)]
+
+    def _reserve(self, size: int):
+        capacity = self._title_vectors.shape[0]
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 16)
+        for name in ("_title_vectors", "_description_vectors"):
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:len(self.ids)] = getattr(self, name)[:len(self.ids)]
+            setattr(self, name, grown)
+        rates = np.zeros(capacity, dtype=np.float32)
+        rates[:len(self.ids)] = self._success_rates[:len(self.ids)]
+        self._success_rates = rates
+
+    def add(self, row_id, fingerprint: str, title_vector: np.ndarray, description_vector: np.ndarray, success_rate: float):
+        row = self.fingerprints.get(fingerprint)
+        if row is None:
+            row = len(self.ids)
+            self._reserve(row + 1)
+            self.fingerprints[fingerprint] = row
+            self.ids.append(row_id)
+        else:
+            self.ids[row] = row_id
+        self._title_vectors[row] = title_vector
+        self._description_vectors[row] = description_vector
+        self._success_rates[row] = success_rate
+
+    def set_success_rate(self, fingerprint: str, success_rate: float):
+        row = self.fingerprints.get(fingerprint)
+        if row is not None:
+            self._success_rates[row] = success_rate
+
+    def search(
+        self,
+        title_vector: np.ndarray,
+        description_vector: np.ndarray,
+        min_success_rate: float,
+        top_k: int,
+    ) -> List[Tuple[object, float]]:
+        """Top-k (id, score); Score = 70% Titel + 30% Beschreibung + Success-Bonus"""
+        if not self.ids:
+            return []
+        scores = 0.7 * (self.title_vectors @ title_vector) + 0.3 * (self.description_vectors @ description_vector)
+        scores = np.minimum(scores + self.success_rates * 0.05, 1.0)
+        scores[self.success_rates < min_success_rate] = -np.inf
+        k = min(top_k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
 class AISolutionCache:
     """Intelligentes Caching-System für AI-Lösungen"""
     
@@ -27,6 +179,8 @@ class AISolutionCache:
         self.db_pool = db_pool
         self.similarity_threshold = 0.85  # 85% Ähnlichkeit für Cache-Hit
         self.min_success_rate = 0.6  # Nur Lösungen mit >60% Success Rate nutzen
+        self._indexes: Dict[str, _CategoryIndex] = {}
+        self._index_locks: Dict[str, asyncio.Lock] = {}
         
         logger.info("🎯 AI Solution Cache initialisiert")
     
@@ -46,22 +200,87 @@ class AISolutionCache:
         content = f"{category.lower().strip()}|{title.lower().strip()}|{description.lower().strip()}"
         return hashlib.sha256(content.encode('utf-8')).hexdigest()
     
-    def _calculate_similarity(self, text1: str, text2: str) -> float:
+    async def _get_index(self, conn, category: str) -> _CategoryIndex:
         """
-        Berechnet Ähnlichkeit zwischen zwei Texten
-        
-        Args:
-            text1: Erster Text
-            text2: Zweiter Text
-            
-        Returns:
-            Similarity Score (0.0 - 1.0)
+        Liefert den Vektor-Index einer Kategorie
+
+        - Kalt: einmal aus der DB aufbauen (gespeicherte Embeddings, fehlende
+          werden im Thread berechnet und zurückgeschrieben)
+        - Nach AI_CACHE_INDEX_TTL: nur seit dem letzten Laden geänderte Zeilen
+          nachladen; nach AI_CACHE_INDEX_REBUILD komplett neu aufbauen
+        - Ein Lock je Kategorie: parallele Requests lösen nur einen Aufbau aus;
+          solange ein warmer Index existiert, wird er ohne Warten weiterverwendet
         """
-        if not text1 or not text2:
-            return 0.0
-        
-        # SequenceMatcher für Token-basierte Similarity
-        return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+        index = self._indexes.get(category)
+        if index is not None and time.monotonic() - index.loaded_at < INDEX_TTL_SECONDS:
+            return index
+
+        lock = self._index_locks.setdefault(category, asyncio.Lock())
+        if index is not None and lock.locked():
+            return index
+
+        async with lock:
+            index = self._indexes.get(category)
+            now = time.monotonic()
+            if index is not None and now - index.loaded_at < INDEX_TTL_SECONDS:
+                return index
+            if index is None or now - index.built_at >= INDEX_REBUILD_SECONDS:
+                index = await self._build_index(conn, category)
+                self._indexes[category] = index
+                logger.info(f"🧮 Semantic cache index loaded: {category} ({len(index)} solutions)")
+            else:
+                await self._refresh_index(conn, category, index)
+            return index
+
+    async def _load_rows(self, conn, category: str, since=None):
+        query = """
+            SELECT id, issue_fingerprint, issue_title, issue_description, success_rate,
+                   title_embedding, description_embedding, updated_at
+            FROM ai_solution_cache
+            WHERE category = $1
+        """
+        if since is None:
+            rows = await conn.fetch(query, category)
+        else:
+            rows = await conn.fetch(query + "  AND updated_at >= $2\n", category, since)
+        # Embeddings decodieren bzw. nachberechnen blockiert den Event-Loop nicht
+        embedded = await asyncio.to_thread(_embed_rows, rows)
+        missing = [
+            (vector_to_bytes(title_vector), vector_to_bytes(description_vector), row['id'])
+            for row, title_vector, description_vector, computed in embedded
+            if computed
+        ]
+        if missing:
+            try:
+                await conn.executemany("""
+                    UPDATE ai_solution_cache
+                    SET title_embedding = $1, description_embedding = $2
+                    WHERE id = $3
+                """, missing)
+            except Exception as e:
+                logger.warning(f"⚠️ Embeddings konnten nicht gespeichert werden: {e}")
+        return embedded
+
+    async def _build_index(self, conn, category: str) -> _CategoryIndex:
+        embedded = await self._load_rows(conn, category)
+        entries = [
+            (row['id'], row['issue_fingerprint'], title_vector, description_vector, row['success_rate'] or 0.0)
+            for row, title_vector, description_vector, _ in embedded
+        ]
+        index = await asyncio.to_thread(_CategoryIndex.build, entries)
+        index.watermark = max((row['updated_at'] for row, *_ in embedded if row['updated_at']), default=None)
+        return index
+
+    async def _refresh_index(self, conn, category: str, index: _CategoryIndex):
+        """Übernimmt seit dem Watermark geänderte Zeilen (neue Lösungen, Success-Rates)"""
+        embedded = await self._load_rows(conn, category, since=index.watermark)
+        for row, title_vector, description_vector, _ in embedded:
+            index.add(row['id'], row['issue_fingerprint'], title_vector, description_vector, row['success_rate'] or 0.0)
+            if row['updated_at'] and (index.watermark is None or row['updated_at'] > index.watermark):
+                index.watermark = row['updated_at']
+        index.loaded_at = time.monotonic()
+        if embedded:
+            logger.info(f"🧮 Semantic cache index refreshed: {category} (+{len(embedded)}, {len(index)} solutions)")
     
     async def get_cached_solution(
         self, 
@@ -75,7 +294,7 @@ class AISolutionCache:
         
         Strategie:
         1. Exact Match via Fingerprint (schnell, O(1))
-        2. Fuzzy Match via Similarity (intelligent, O(n))
+        2. Semantic Match via Vektor-Index der Kategorie (Top-k über alle Lösungen)
         
         Args:
             category: Issue-Kategorie
@@ -130,82 +349,68 @@ class AISolutionCache:
             logger.error(f"❌ Exact match lookup failed: {e}")
         
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # 2️⃣ FUZZY MATCH (Similarity Search)
+        # 2️⃣ SEMANTIC MATCH (Vektor-Index)
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         if use_fuzzy:
             try:
                 async with self.db_pool.acquire() as conn:
-                    # Hole potenzielle Kandidaten aus gleicher Kategorie
-                    similar_issues = await conn.fetch("""
-                        SELECT 
-                            id,
-                            issue_title,
-                            issue_description,
-                            ai_solution,
-                            usage_count,
-                            success_rate
-                        FROM ai_solution_cache
-                        WHERE category = $1
-                          AND success_rate >= $2
-                        ORDER BY usage_count DESC, success_rate DESC
-                        LIMIT 30
-                    """, category, self.min_success_rate)
+                    index = await self._get_index(conn, category)
                     
-                    if not similar_issues:
+                    if not len(index):
                         logger.info(f"ℹ️ No cached solutions in category '{category}'")
                         return None
                     
-                    # Finde beste Übereinstimmung
-                    best_match = None
-                    best_similarity = 0.0
+                    candidates = index.search(
+                        embed_text(title, VECTOR_DIM),
+                        embed_text(description, VECTOR_DIM),
+                        self.min_success_rate,
+                        SEMANTIC_TOP_K,
+                    )
+                    candidates = [(cid, sim) for cid, sim in candidates if sim >= self.similarity_threshold]
                     
-                    for issue in similar_issues:
-                        # Berechne Similarity für Titel und Beschreibung
-                        title_sim = self._calculate_similarity(title, issue['issue_title'])
-                        desc_sim = self._calculate_similarity(description, issue['issue_description'])
+                    if candidates:
+                        # Success-Rate kann sich seit dem Laden geändert haben → gegen DB prüfen
+                        rows = await conn.fetch("""
+                            SELECT id, ai_solution, usage_count, success_rate
+                            FROM ai_solution_cache
+                            WHERE id = ANY($1)
+                              AND success_rate >= $2
+                        """, [cid for cid, _ in candidates], self.min_success_rate)
+                        by_id = {row['id']: row for row in rows}
                         
-                        # Gewichtete Similarity: 70% Titel, 30% Beschreibung
-                        combined_sim = (title_sim * 0.7) + (desc_sim * 0.3)
-                        
-                        # Bonus für hohe Success Rate
-                        success_bonus = issue['success_rate'] * 0.05
-                        final_sim = min(combined_sim + success_bonus, 1.0)
-                        
-                        if final_sim > best_similarity:
-                            best_similarity = final_sim
-                            best_match = issue
+                        for candidate_id, similarity in candidates:
+                            best_match = by_id.get(candidate_id)
+                            if best_match is None:
+                                continue
+                            
+                            await conn.execute("""
+                                UPDATE ai_solution_cache
+                                SET usage_count = usage_count + 1,
+                                    last_used_at = NOW(),
+                                    updated_at = NOW()
+                                WHERE id = $1
+                            """, best_match['id'])
+                            
+                            logger.info(
+                                f"✅ CACHE HIT (Semantic {similarity:.0%}) "
+                                f"[{best_match['usage_count']} uses, "
+                                f"{best_match['success_rate']:.0%} success]: {title[:50]}..."
+                            )
+                            
+                            return {
+                                'solution': best_match['ai_solution'],
+                                'usage_count': best_match['usage_count'] + 1,
+                                'success_rate': best_match['success_rate'],
+                                'match_type': 'fuzzy',
+                                'similarity': similarity
+                            }
                     
-                    # Prüfe ob Similarity-Threshold erreicht
-                    if best_match and best_similarity >= self.similarity_threshold:
-                        # Update usage
-                        await conn.execute("""
-                            UPDATE ai_solution_cache
-                            SET usage_count = usage_count + 1,
-                                last_used_at = NOW(),
-                                updated_at = NOW()
-                            WHERE id = $1
-                        """, best_match['id'])
-                        
-                        logger.info(
-                            f"✅ CACHE HIT (Fuzzy {best_similarity:.0%}) "
-                            f"[{best_match['usage_count']} uses, "
-                            f"{best_match['success_rate']:.0%} success]: {title[:50]}..."
-                        )
-                        
-                        return {
-                            'solution': best_match['ai_solution'],
-                            'usage_count': best_match['usage_count'] + 1,
-                            'success_rate': best_match['success_rate'],
-                            'match_type': 'fuzzy',
-                            'similarity': best_similarity
-                        }
-                    else:
-                        logger.info(
-                            f"ℹ️ Best similarity {best_similarity:.0%} below threshold "
-                            f"{self.similarity_threshold:.0%}"
-                        )
+                    logger.info(
+                        f"ℹ️ No semantic match above threshold "
+                        f"{self.similarity_threshold:.0%} in {len(index)} solutions"
+                    )
             except Exception as e:
-                logger.error(f"❌ Fuzzy match lookup failed: {e}")
+                logger.error(f"❌ Semantic match lookup failed: {e}")
         
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # 3️⃣ CACHE MISS
@@ -237,8 +442,12 @@ class AISolutionCache:
         fingerprint = self._generate_fingerprint(category, title, description)
         
         try:
+            # Einmalig vektorisieren: Embeddings werden mitgespeichert, damit
+            # andere Worker den Index ohne Neuberechnung aufbauen können
+            title_vector = embed_text(title, VECTOR_DIM)
+            description_vector = embed_text(description, VECTOR_DIM)
             async with self.db_pool.acquire() as conn:
-                await conn.execute("""
+                row = await conn.fetchrow("""
                     INSERT INTO ai_solution_cache (
                         category,
                         issue_title,
@@ -247,13 +456,24 @@ class AISolutionCache:
                         ai_solution,
                         model_used,
                         usage_count,
-                        success_rate
-                    ) VALUES ($1, $2, $3, $4, $5, $6, 1, 0.8)
+                        success_rate,
+                        title_embedding,
+                        description_embedding
+                    ) VALUES ($1, $2, $3, $4, $5, $6, 1, 0.8, $7, $8)
                     ON CONFLICT (issue_fingerprint) DO UPDATE SET
                         ai_solution = EXCLUDED.ai_solution,
                         model_used = EXCLUDED.model_used,
+                        title_embedding = EXCLUDED.title_embedding,
+                        description_embedding = EXCLUDED.description_embedding,
                         updated_at = NOW()
-                """, category, title, description, fingerprint, solution, model)
+                    RETURNING id, success_rate
+                """, category, title, description, fingerprint, solution, model,
+                    vector_to_bytes(title_vector), vector_to_bytes(description_vector))
+                
+            # In den geladenen Kategorie-Index aufnehmen
+            index = self._indexes.get(category)
+            if index is not None and row is not None:
+                index.add(row['id'], fingerprint, title_vector, description_vector, row['success_rate'])
                 
             logger.info(f"💾 Solution cached: {title[:50]}...")
             return True
@@ -282,7 +502,7 @@ class AISolutionCache:
         
         try:
             async with self.db_pool.acquire() as conn:
-                await conn.execute("""
+                row = await conn.fetchrow("""
                     UPDATE ai_solution_cache
                     SET success_rate = (
                         CASE 
@@ -292,8 +512,13 @@ class AISolutionCache:
                     ),
                     updated_at = NOW()
                     WHERE issue_fingerprint = $1
+                    RETURNING success_rate
                 """, fingerprint, success)
                 
+            index = self._indexes.get(category)
+            if index is not None and row is not None:
+                index.set_success_rate(fingerprint, row['success_rate'])
+                
             logger.info(
                 f"📊 Success rate updated: {title[:50]}... "
                 f"({'👍 positive' if success else '👎 negative'})"
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from schemas.auth import LoginResponse, RegisterResponse, RefreshResponse, MeResponse
+from principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -493,6 +494,7 @@ async def complete_onboarding(credentials: HTTPAuthorizationCredentials = Depend
         await conn.execute(
             "UPDATE users SET onboarding_completed = TRUE WHERE id = $1", user_id
         )
+    await principal_cache.invalidate(user_id)
     return {"onboarding_completed": True}
 
 from dependencies import get_current_user
@@ -874,16 +876,19 @@ async def reset_master_password(request: Request, admin_key: str = Query(..., al
             password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
             async with db_pool.acquire() as conn:
-                await conn.execute(
+                user_id = await conn.fetchval(
                     """
                     UPDATE users
                     SET hashed_password = $1,
                         is_active = TRUE,
                         is_verified = TRUE
                     WHERE email = $2
+                    RETURNING id
                     """,
                     password_hash, email
                 )
+            if user_id:
+                await principal_cache.invalidate(user_id)
 
             logger.info(f"Master user password reset: {email}")
             return {
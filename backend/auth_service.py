@@ -9,6 +9,9 @@ import asyncpg
 import logging
 from fastapi import HTTPException
 
+from cpu_executor import cpu_executor
+from principal_cache import principal_cache
+
 logger = logging.getLogger(__name__)
 
 _MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", "5"))
@@ -40,50 +43,51 @@ class AuthService:
             return dict(user) if user else None
     
     async def get_user_by_id(self, user_id: int) -> Optional[Dict]:
-        """Get user by ID including plan_type and active_modules"""
+        """Get user by ID including plan_type and active_modules (one joined query)"""
         async with self.db_pool.acquire() as conn:
-            user = await conn.fetchrow(
-                "SELECT id, email, full_name, company, is_active, is_verified, created_at, onboarding_completed, role FROM users WHERE id = $1",
+            row = await conn.fetchrow(
+                """
+                SELECT u.id, u.email, u.full_name, u.company, u.is_active, u.is_verified,
+                       u.created_at, u.onboarding_completed, u.role,
+                       ul.user_id IS NOT NULL AS has_limits,
+                       ul.plan_type, ul.websites_max, ul.exports_max,
+                       ARRAY(
+                           SELECT um.module_id FROM user_modules um
+                           WHERE um.user_id = u.id AND um.status = 'active'
+                             AND (um.expires_at IS NULL OR um.expires_at > NOW())
+                       ) AS active_modules
+                FROM users u
+                LEFT JOIN user_limits ul ON ul.user_id = u.id
+                WHERE u.id = $1
+                """,
                 user_id
             )
-            if not user:
+            if not row:
                 return None
 
-            result = dict(user)
+            result = dict(row)
+            has_limits = result.pop('has_limits')
+            websites_max = result.pop('websites_max')
+            exports_max = result.pop('exports_max')
 
             # plan_type + plan_limits aus user_limits
-            limits = await conn.fetchrow(
-                "SELECT plan_type, websites_max, exports_max FROM user_limits WHERE user_id = $1",
-                user_id
-            )
-            if limits:
-                result['plan_type'] = limits['plan_type']
+            if has_limits:
                 result['plan_limits'] = {
-                    'websites_max': limits['websites_max'],
-                    'exports_max':  limits['exports_max'],
+                    'websites_max': websites_max,
+                    'exports_max':  exports_max,
                 }
             else:
                 result['plan_type'] = 'free'
                 result['plan_limits'] = {'websites_max': 1, 'exports_max': 10}
 
-            # aktive Module
-            modules = await conn.fetch(
-                """
-                SELECT module_id FROM user_modules
-                WHERE user_id = $1 AND status = 'active'
-                  AND (expires_at IS NULL OR expires_at > NOW())
-                """,
-                user_id
-            )
-            result['active_modules'] = [r['module_id'] for r in modules]
-
+            result['active_modules'] = list(result['active_modules'] or [])
             return result
     
     async def register_user(self, email: str, password: str, full_name: str, company: str = None) -> Dict:
         """Register a new user"""
         try:
             # Hash password with bcrypt
-            password_hash = _bcrypt.hashpw(password.encode(), _bcrypt.gensalt()).decode()
+            password_hash = (await cpu_executor.run("bcrypt", _bcrypt.hashpw, password.encode(), _bcrypt.gensalt())).decode()
             
             # Insert user
             async with self.db_pool.acquire() as conn:
@@ -140,7 +144,7 @@ class AuthService:
             logger.warning(f"Authentication failed: User not found {email}")
             return None
 
-        if not _bcrypt.checkpw(password.encode(), user['password_hash'].encode()):
+        if not await cpu_executor.run("bcrypt", _bcrypt.checkpw, password.encode(), user['password_hash'].encode()):
             if self.redis:
                 try:
                     await self.redis.incr(lockout_key)
@@ -304,6 +308,7 @@ class AuthService:
                 "DELETE FROM user_sessions WHERE user_id = $1",
                 user_id
             )
+        await principal_cache.invalidate(user_id)
         logger.info(f"All sessions revoked for user_id={user_id}")
 
     async def blacklist_all_user_jtis(self, user_id: int, ttl_seconds: int):
@@ -1,94 +1,330 @@
 """
 Complyo Background Worker
 Processes fix-jobs asynchronously using the UnifiedFixEngine with real AI
+
+Queue semantics (fix_jobs, see migrations/add_fix_job_queue.sql):
+- Wakeup via LISTEN/NOTIFY on channel 'fix_jobs', polling only as fallback
+- Atomic claiming with FOR UPDATE SKIP LOCKED + lease (visibility timeout);
+  jobs of crashed workers become claimable again once their lease expires
+- Up to FIX_JOB_CONCURRENCY jobs run in parallel; a job holds a DB
+  connection only for its short queries, not during the AI call
+- Failed jobs are retried with exponential backoff and dead-lettered
+  (status 'failed' + dead_lettered_at) after max_attempts
+- Progress updates are coalesced and flushed together with lease renewal
+
+Configuration via environment:
+- FIX_JOB_CONCURRENCY         parallel jobs per worker (default: 4)
+- FIX_JOB_LEASE_SECONDS       visibility timeout of a claimed job (default: 180)
+- FIX_JOB_POLL_INTERVAL       fallback poll interval in seconds (default: 30)
+- FIX_JOB_MAX_ATTEMPTS        attempts before dead-lettering (default: 3)
+- FIX_JOB_RETRY_BASE_SECONDS  backoff base for retries (default: 10)
+- FIX_JOB_PROGRESS_INTERVAL   seconds between progress flushes (default: 1.0)
 """
 
 import asyncio
 import asyncpg
 import json
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any
+import socket
+import time
+import uuid
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
 from ai_fix_engine.unified_fix_engine import UnifiedFixEngine
 from ai_fix_engine.prompts_v2 import ContextBuilder
+from metrics import fix_job_duration_seconds, fix_jobs_processed_total
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+NOTIFY_CHANNEL = "fix_jobs"
+
+DEAD_LETTER_EXPIRED_QUERY = """
+    UPDATE fix_jobs
+    SET status = 'failed', completed_at = NOW(), dead_lettered_at = NOW(),
+        lease_expires_at = NULL, current_step = 'Fehler aufgetreten',
+        error_message = COALESCE(error_message, 'Lease abgelaufen (Worker abgebrochen)')
+    WHERE status = 'processing'
+      AND lease_expires_at < NOW()
+      AND attempts >= max_attempts
+"""
+
+CLAIM_JOBS_QUERY = """
+    UPDATE fix_jobs AS fj
+    SET status = 'processing', started_at = COALESCE(fj.started_at, NOW()),
+        attempts = fj.attempts + 1, worker_id = $2,
+        lease_expires_at = NOW() + make_interval(secs => $3),
+        progress_percent = 10, current_step = 'Kontext wird geladen...'
+    WHERE fj.job_id IN (
+        SELECT job_id FROM fix_jobs
+        WHERE (status = 'pending' AND run_after <= NOW())
+           OR (status = 'processing' AND lease_expires_at < NOW())
+        ORDER BY created_at ASC
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING fj.job_id, fj.user_id, fj.scan_id, fj.issue_id, fj.issue_data,
+              fj.created_at, fj.attempts, fj.max_attempts
+"""
+
+NEXT_DUE_QUERY = """
+    SELECT EXTRACT(EPOCH FROM (MIN(run_after) - NOW())) AS seconds
+    FROM fix_jobs
+    WHERE status = 'pending'
+"""
+
+PROGRESS_QUERY = """
+    UPDATE fix_jobs SET progress_percent = $2, current_step = $3
+    WHERE job_id = $1 AND worker_id = $4 AND status = 'processing'
+"""
+
+RENEW_LEASES_QUERY = """
+    UPDATE fix_jobs SET lease_expires_at = NOW() + make_interval(secs => $3)
+    WHERE job_id = ANY($1) AND worker_id = $2 AND status = 'processing'
+"""
+
+RELEASE_LEASES_QUERY = """
+    UPDATE fix_jobs
+    SET status = 'pending', worker_id = NULL, lease_expires_at = NULL,
+        attempts = GREATEST(attempts - 1, 0), run_after = NOW(),
+        progress_percent = 0, current_step = 'Wartet auf Worker...'
+    WHERE job_id = ANY($1) AND worker_id = $2 AND status = 'processing'
+"""
+
 
 class BackgroundWorker:
-    def __init__(self, db_pool: asyncpg.Pool):
+    def __init__(
+        self,
+        db_pool: asyncpg.Pool,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        progress_interval: Optional[float] = None,
+        engine: Optional[UnifiedFixEngine] = None,
+    ):
         self.db_pool = db_pool
         self.is_running = False
-        self.engine = UnifiedFixEngine()
+        self.engine = engine or UnifiedFixEngine()
         self.context_builder = ContextBuilder()
 
+        self.concurrency = concurrency or int(os.getenv("FIX_JOB_CONCURRENCY", "4"))
+        self.lease_seconds = lease_seconds or float(os.getenv("FIX_JOB_LEASE_SECONDS", "180"))
+        self.poll_interval = poll_interval or float(os.getenv("FIX_JOB_POLL_INTERVAL", "30"))
+        self.max_attempts = max_attempts or int(os.getenv("FIX_JOB_MAX_ATTEMPTS", "3"))
+        self.retry_base_seconds = retry_base_seconds or float(os.getenv("FIX_JOB_RETRY_BASE_SECONDS", "10"))
+        self.progress_interval = progress_interval or float(os.getenv("FIX_JOB_PROGRESS_INTERVAL", "1.0"))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._wakeup = asyncio.Event()
+        self._active: Dict[str, asyncio.Task] = {}
+        self._job_ids: Dict[str, Any] = {}
+        self._progress: Dict[str, Tuple[int, str]] = {}
+        self._listener_conn: Optional[asyncpg.Connection] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._last_lease_renewal = 0.0
+        self.stats = {"claimed": 0, "completed": 0, "retried": 0, "dead_lettered": 0, "notifications": 0}
+
     async def start(self):
         self.is_running = True
-        logger.info("🚀 Background Worker started")
+        await self._listen()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"🚀 Background Worker started ({self.worker_id}, concurrency={self.concurrency})")
         while self.is_running:
+            self._wakeup.clear()
             try:
-                await self.process_pending_jobs()
-                await asyncio.sleep(5)
+                next_due = await self.process_pending_jobs()
             except Exception as e:
                 logger.error(f"❌ Worker error: {e}")
-                await asyncio.sleep(10)
+                next_due = 10.0
+            await self._wait_for_work(next_due)
 
-    async def stop(self):
+    async def stop(self, grace_seconds: float = 10.0):
         self.is_running = False
+        self._wakeup.set()
+
+        if self._active:
+            _, pending = await asyncio.wait(list(self._active.values()), timeout=grace_seconds)
+            unfinished = [self._job_ids[key] for key, task in self._active.items() if task in pending]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                await self._release_leases(unfinished)
+
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        await self._flush_progress()
+        await self._unlisten()
         logger.info("🛑 Background Worker stopped")
 
-    async def process_pending_jobs(self):
+    # ------------------------------------------------------------------
+    # Wakeups (LISTEN/NOTIFY + Fallback-Poll)
+    # ------------------------------------------------------------------
+
+    async def _listen(self):
+        try:
+            self._listener_conn = await self.db_pool.acquire()
+            await self._listener_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            logger.info(f"👂 Listening on '{NOTIFY_CHANNEL}' for new fix-jobs")
+        except Exception as e:
+            logger.warning(f"⚠️ LISTEN failed, falling back to polling every {self.poll_interval}s: {e}")
+            await self._unlisten()
+
+    async def _unlisten(self):
+        conn, self._listener_conn = self._listener_conn, None
+        if conn is None:
+            return
+        try:
+            await conn.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+        except Exception:
+            pass
+        try:
+            await self.db_pool.release(conn)
+        except Exception as e:
+            logger.debug(f"Listener release failed: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.stats["notifications"] += 1
+        self._wakeup.set()
+
+    async def _wait_for_work(self, next_due: Optional[float]):
+        timeout = self.poll_interval
+        if next_due is not None:
+            timeout = min(timeout, max(next_due, 0.05))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    async def process_pending_jobs(self) -> Optional[float]:
+        """
+        Claims as many due jobs as there are free slots and starts them.
+        Returns seconds until the next scheduled retry when nothing was claimed.
+        """
+        free_slots = self.concurrency - len(self._active)
+        if free_slots <= 0 or not self.is_running:
+            return None
+
+        async with self.db_pool.acquire() as conn:
+            dead = await conn.execute(DEAD_LETTER_EXPIRED_QUERY)
+            if dead and not dead.endswith(" 0"):
+                logger.warning(f"💀 Dead-lettered expired fix-jobs: {dead}")
+            jobs = await conn.fetch(CLAIM_JOBS_QUERY, free_slots, self.worker_id, self.lease_seconds)
+            next_due = None
+            if not jobs:
+                row = await conn.fetchrow(NEXT_DUE_QUERY)
+                if row and row["seconds"] is not None:
+                    next_due = float(row["seconds"])
+
+        for job in jobs:
+            key = str(job["job_id"])
+            self.stats["claimed"] += 1
+            self._job_ids[key] = job["job_id"]
+            self._active[key] = asyncio.create_task(self._run_job(job))
+        return next_due
+
+    async def _run_job(self, job: Dict[str, Any]):
+        key = str(job["job_id"])
+        started = time.monotonic()
+        try:
+            await self.process_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error processing job {job['job_id']}: {e}")
+            try:
+                await self.fail_job(job, str(e))
+            except Exception as db_error:
+                logger.error(f"❌ Could not record failure of job {job['job_id']}: {db_error}")
+        finally:
+            fix_job_duration_seconds.observe(time.monotonic() - started)
+            self._active.pop(key, None)
+            self._job_ids.pop(key, None)
+            self._progress.pop(key, None)
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Progress + Leases
+    # ------------------------------------------------------------------
+
+    def report_progress(self, job_id: Any, percent: int, step: str):
+        """Merkt den neuesten Fortschritt vor — geschrieben wird gebündelt im Heartbeat"""
+        self._progress[str(job_id)] = (percent, step)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            try:
+                await self._flush_progress()
+                if self._active and time.monotonic() - self._last_lease_renewal >= self.lease_seconds / 3:
+                    await self._renew_leases()
+            except Exception as e:
+                logger.warning(f"⚠️ Fix-job heartbeat failed: {e}")
+
+    async def _flush_progress(self):
+        if not self._progress:
+            return
+        pending, self._progress = self._progress, {}
+        rows = [
+            (self._job_ids[key], percent, step, self.worker_id)
+            for key, (percent, step) in pending.items()
+            if key in self._job_ids
+        ]
+        if not rows:
+            return
+        async with self.db_pool.acquire() as conn:
+            await conn.executemany(PROGRESS_QUERY, rows)
+
+    async def _renew_leases(self):
+        self._last_lease_renewal = time.monotonic()
+        job_ids = list(self._job_ids.values())
+        if not job_ids:
+            return
         async with self.db_pool.acquire() as conn:
-            pending_jobs = await conn.fetch("""
-                SELECT job_id, user_id, scan_id, issue_id, issue_data, created_at
-                FROM fix_jobs
-                WHERE status = 'pending'
-                ORDER BY created_at ASC
-                LIMIT 5
-            """)
-            for job in pending_jobs:
-                try:
-                    await self.process_job(conn, job)
-                except Exception as e:
-                    logger.error(f"❌ Error processing job {job['job_id']}: {e}")
-                    await self.fail_job(conn, job['job_id'], str(e))
-
-    async def process_job(self, conn: asyncpg.Connection, job: Dict[str, Any]):
+            await conn.execute(RENEW_LEASES_QUERY, job_ids, self.worker_id, self.lease_seconds)
+
+    async def _release_leases(self, job_ids: List[Any]):
+        """Gibt abgebrochene Jobs beim Shutdown sofort wieder frei (ohne Attempt zu verbrauchen)"""
+        if not job_ids:
+            return
+        try:
+            async with self.db_pool.acquire() as conn:
+                await conn.execute(RELEASE_LEASES_QUERY, job_ids, self.worker_id)
+            logger.info(f"↩️ Released {len(job_ids)} unfinished fix-jobs")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not release fix-job leases: {e}")
+
+    # ------------------------------------------------------------------
+    # Job-Verarbeitung
+    # ------------------------------------------------------------------
+
+    async def process_job(self, job: Dict[str, Any]):
         job_id = job['job_id']
         scan_id = job.get('scan_id')
 
-        logger.info(f"⚙️ Processing job {job_id}")
-
-        await conn.execute("""
-            UPDATE fix_jobs
-            SET status = 'processing', started_at = NOW(),
-                progress_percent = 10, current_step = 'Kontext wird geladen...'
-            WHERE job_id = $1
-        """, job_id)
+        logger.info(f"⚙️ Processing job {job_id} (attempt {job.get('attempts', 1)})")
 
         issue_data = job['issue_data']
         if isinstance(issue_data, str):
             issue_data = json.loads(issue_data)
 
         # Load scan context from DB
-        context = await self._load_context(conn, scan_id, issue_data)
-
-        await conn.execute("""
-            UPDATE fix_jobs SET progress_percent = 30,
-                current_step = 'KI analysiert das Problem...'
-            WHERE job_id = $1
-        """, job_id)
-
-        await asyncio.sleep(1)
+        async with self.db_pool.acquire() as conn:
+            context = await self._load_context(conn, scan_id, issue_data)
 
-        await conn.execute("""
-            UPDATE fix_jobs SET progress_percent = 55,
-                current_step = 'Individuelle Lösung wird generiert...'
-            WHERE job_id = $1
-        """, job_id)
+        self.report_progress(job_id, 55, 'Individuelle Lösung wird generiert...')
 
         fix_result = await self.engine.generate_fix(
             issue=issue_data,
@@ -96,24 +332,23 @@ class BackgroundWorker:
             user_skill=context.get("user_skill", "intermediate")
         )
 
-        await conn.execute("""
-            UPDATE fix_jobs SET progress_percent = 85,
-                current_step = 'Anleitung wird aufbereitet...'
-            WHERE job_id = $1
-        """, job_id)
-
-        await asyncio.sleep(0.5)
-
         result_dict = self.engine.to_dict(fix_result)
 
-        await conn.execute("""
-            UPDATE fix_jobs
-            SET status = 'completed', completed_at = NOW(),
-                progress_percent = 100, current_step = 'Abgeschlossen!',
-                result = $1
-            WHERE job_id = $2
-        """, json.dumps(result_dict, default=str), job_id)
-
+        async with self.db_pool.acquire() as conn:
+            updated = await conn.execute("""
+                UPDATE fix_jobs
+                SET status = 'completed', completed_at = NOW(),
+                    progress_percent = 100, current_step = 'Abgeschlossen!',
+                    result = $1, lease_expires_at = NULL
+                WHERE job_id = $2 AND worker_id = $3 AND status = 'processing'
+            """, json.dumps(result_dict, default=str), job_id, self.worker_id)
+
+        if updated and updated.endswith(" 0"):
+            logger.warning(f"⚠️ Job {job_id} finished after its lease was taken over — result discarded")
+            return
+
+        self.stats["completed"] += 1
+        fix_jobs_processed_total.labels(result="completed").inc()
         logger.info(f"✅ Job {job_id} completed — model: {fix_result.ai_model_used}, "
                     f"time: {fix_result.generation_time_ms}ms, "
                     f"fallback: {fix_result.fallback_used}")
@@ -178,14 +413,47 @@ class BackgroundWorker:
             "user_skill": "intermediate",
         }
 
-    async def fail_job(self, conn: asyncpg.Connection, job_id: str, error_message: str):
-        await conn.execute("""
-            UPDATE fix_jobs
-            SET status = 'failed', completed_at = NOW(),
-                error_message = $1, current_step = 'Fehler aufgetreten'
-            WHERE job_id = $2
-        """, error_message, job_id)
-        logger.error(f"❌ Job {job_id} failed: {error_message}")
+    async def fail_job(self, job: Dict[str, Any], error_message: str):
+        job_id = job['job_id']
+        attempts = job.get('attempts') or 1
+        max_attempts = job.get('max_attempts') or self.max_attempts
+
+        async with self.db_pool.acquire() as conn:
+            if attempts < max_attempts:
+                delay = self.retry_base_seconds * (2 ** (attempts - 1))
+                await conn.execute("""
+                    UPDATE fix_jobs
+                    SET status = 'pending', worker_id = NULL, lease_expires_at = NULL,
+                        run_after = NOW() + make_interval(secs => $3),
+                        error_message = $1, progress_percent = 0,
+                        current_step = 'Erneuter Versuch wird vorbereitet...'
+                    WHERE job_id = $2 AND worker_id = $4 AND status = 'processing'
+                """, error_message, job_id, delay, self.worker_id)
+                self.stats["retried"] += 1
+                fix_jobs_processed_total.labels(result="retried").inc()
+                logger.warning(f"🔁 Job {job_id} failed (attempt {attempts}/{max_attempts}), retry in {delay:.0f}s: {error_message}")
+                return
+
+            await conn.execute("""
+                UPDATE fix_jobs
+                SET status = 'failed', completed_at = NOW(), dead_lettered_at = NOW(),
+                    lease_expires_at = NULL, error_message = $1,
+                    current_step = 'Fehler aufgetreten'
+                WHERE job_id = $2 AND worker_id = $3 AND status = 'processing'
+            """, error_message, job_id, self.worker_id)
+        self.stats["dead_lettered"] += 1
+        fix_jobs_processed_total.labels(result="dead_lettered").inc()
+        logger.error(f"❌ Job {job_id} failed after {attempts} attempts: {error_message}")
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "worker_id": self.worker_id,
+            "listening": self._listener_conn is not None,
+            "concurrency": self.concurrency,
+            "active_jobs": len(self._active),
+            **self.stats,
+        }
 
 
 _worker_instance: Optional[BackgroundWorker] = None
@@ -215,3 +483,9 @@ async def stop_background_worker():
         _worker_instance = None
         _worker_task = None
         logger.info("✅ Background worker stopped successfully")
+
+
+def background_worker_health() -> Dict[str, Any]:
+    if _worker_instance is None:
+        return {"running": False}
+    return _worker_instance.health()
@@ -186,9 +186,9 @@ class CookieScanner:
         """
         start = asyncio.get_event_loop().time()
 
-        try:
-            from playwright.async_api import async_playwright
-        except ImportError:
+        from .browser_pool import browser_pool, PLAYWRIGHT_AVAILABLE
+
+        if not PLAYWRIGHT_AVAILABLE:
             logger.error("playwright nicht installiert. Bitte 'pip install playwright && playwright install chromium' ausführen.")
             return ScanResult(
                 url=url, scanned_at=_now(), cookies=[], services=[],
@@ -197,22 +197,13 @@ class CookieScanner:
             )
 
         try:
-            async with async_playwright() as pw:
-                browser = await pw.chromium.launch(
-                    headless=True,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-gpu",
-                    ]
-                )
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (compatible; ComplyoScanner/2.0; +https://complyo.tech/scanner)",
-                    locale="de-DE",
-                    timezone_id="Europe/Berlin",
-                    ignore_https_errors=True,
-                )
+            # Warmer Browser aus dem BrowserPool, isolierter Context pro Scan
+            async with browser_pool.context(
+                user_agent="Mozilla/5.0 (compatible; ComplyoScanner/2.0; +https://complyo.tech/scanner)",
+                locale="de-DE",
+                timezone_id="Europe/Berlin",
+                ignore_https_errors=True,
+            ) as context:
 
                 # Collect all script URLs that are loaded
                 loaded_scripts: list[str] = []
@@ -232,7 +223,6 @@ class CookieScanner:
                         logger.warning(f"[Scanner] Fehler beim Laden von {page_url}: {e}")
 
                 raw_cookies = await context.cookies()
-                await browser.close()
 
         except Exception as e:
             logger.error(f"[Scanner] Playwright-Fehler: {e}")
@@ -17,6 +17,8 @@ from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 
+from .browser_pool import browser_pool, PLAYWRIGHT_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
 # axe-core CDN URL (wird in Playwright injiziert)
@@ -220,11 +222,10 @@ class AxeScanner:
     axe-core Scanner für vollständige WCAG-Prüfung
     
     Nutzt Playwright um axe-core im Browser auszuführen.
+    Browser werden aus dem prozessweiten BrowserPool geliehen.
     """
     
     def __init__(self):
-        self.browser = None
-        self.context = None
         logger.info("🔧 AxeScanner initialisiert")
     
     async def scan_page(
@@ -246,17 +247,13 @@ class AxeScanner:
         """
         logger.info(f"🔍 axe-core Scan: {url}")
         
-        try:
-            from playwright.async_api import async_playwright
-        except ImportError:
+        if not PLAYWRIGHT_AVAILABLE:
             logger.error("Playwright nicht installiert. Bitte 'pip install playwright' ausführen.")
             return self._create_empty_result(url, "Playwright nicht installiert")
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            try:
+        try:
+            # Warmer Browser aus dem Pool statt Chromium-Launch pro Seite
+            async with browser_pool.page() as page:
                 # Lade Seite
                 await page.goto(url, timeout=timeout, wait_until="networkidle")
                 
@@ -283,13 +280,10 @@ class AxeScanner:
                 
                 # Parse Ergebnisse
                 return self._parse_results(url, results)
-            
-            except Exception as e:
-                logger.error(f"❌ axe-core Scan fehlgeschlagen: {e}")
-                return self._create_empty_result(url, str(e))
-            
-            finally:
-                await browser.close()
+        
+        except Exception as e:
+            logger.error(f"❌ axe-core Scan fehlgeschlagen: {e}")
+            return self._create_empty_result(url, str(e))
     
     async def scan_multiple_pages(
         self,
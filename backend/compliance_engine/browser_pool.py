@@ -0,0 +1,345 @@
+"""
+Browser-Pool Service
+Prozessweiter Pool warmer Chromium-Instanzen für alle Playwright-Nutzer
+
+Features:
+- Warme Browser-Instanzen statt Chromium-Launch pro Seite
+- Isolierte BrowserContexts pro Ausleihe (Cookies/Storage getrennt)
+- Concurrency-Limit für den gesamten Pool
+- Recycling nach N ausgeliehenen Contexts oder bei zu hohem Speicherverbrauch
+- Health-Checks (getrennte Browser werden verworfen und neu gestartet)
+
+Konfiguration über Umgebungsvariablen:
+- BROWSER_POOL_SIZE                  Anzahl warmer Browser (Default: 2)
+- BROWSER_POOL_CONTEXTS_PER_BROWSER  Parallele Contexts je Browser (Default: 4)
+- BROWSER_POOL_MAX_PAGES             Recycling nach N Contexts (Default: 200)
+- BROWSER_POOL_MAX_MEMORY_MB         Recycling ab RSS je Browser in MB (Default: 1024)
+
+Usage:
+    from compliance_engine.browser_pool import browser_pool
+
+    async with browser_pool.page(locale="de-DE") as page:
+        await page.goto(url)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from playwright.async_api import async_playwright, BrowserContext, Page
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+    logger.warning("Playwright nicht verfügbar — BrowserPool deaktiviert.")
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Launch-Argumente, die bisher von den einzelnen Scannern verwendet wurden
+DEFAULT_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',  # Docker-Kompatibilität
+    '--disable-gpu',
+    '--disable-blink-features=AutomationControlled',
+]
+
+
+@dataclass
+class _PooledBrowser:
+    """Ein warmer Browser im Pool inkl. Nutzungsstatistik"""
+    browser: Any
+    launched_at: float = field(default_factory=time.monotonic)
+    contexts_served: int = 0
+    active_contexts: int = 0
+    retiring: bool = False
+
+    def is_healthy(self) -> bool:
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """
+    Prozessweiter Pool warmer Chromium-Browser
+
+    Verleiht isolierte BrowserContexts; der Browser selbst bleibt über
+    viele Scans hinweg warm und wird nur bei Bedarf recycelt.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        contexts_per_browser: Optional[int] = None,
+        max_contexts_per_browser_lifetime: Optional[int] = None,
+        max_memory_mb: Optional[int] = None,
+        launch_args: Optional[List[str]] = None,
+    ):
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", "2"))
+        self.contexts_per_browser = contexts_per_browser or int(os.getenv("BROWSER_POOL_CONTEXTS_PER_BROWSER", "4"))
+        self.max_pages = max_contexts_per_browser_lifetime or int(os.getenv("BROWSER_POOL_MAX_PAGES", "200"))
+        self.max_memory_mb = max_memory_mb or int(os.getenv("BROWSER_POOL_MAX_MEMORY_MB", "1024"))
+        self.launch_args = launch_args or list(DEFAULT_LAUNCH_ARGS)
+
+        self._playwright = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._leases: Dict[int, _PooledBrowser] = {}
+
+        # Statistik für Health-Endpoint
+        self._launches = 0
+        self._recycled = 0
+        self._waiting = 0
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.size * self.contexts_per_browser
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    async def start(self):
+        """Startet Playwright (idempotent). Browser werden lazy gestartet."""
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError("Playwright ist nicht installiert. Bitte 'pip install playwright' und 'playwright install chromium' ausführen.")
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            # Handles eines anderen (z.B. per asyncio.run beendeten) Loops sind
+            # nicht mehr nutzbar — Zustand verwerfen und neu aufbauen
+            logger.info("BrowserPool: neuer Event-Loop erkannt, Pool wird neu initialisiert")
+            self._reset_state()
+
+        if self._lock is None:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+                logger.info(f"✅ BrowserPool gestartet (size={self.size}, max_concurrency={self.max_concurrency})")
+
+    async def close(self):
+        """Schließt alle Browser und stoppt Playwright (z.B. beim Shutdown)"""
+        if self._loop is not None and self._loop is not asyncio.get_running_loop():
+            self._reset_state()
+            return
+
+        for entry in list(self._browsers):
+            await self._close_browser(entry)
+        self._browsers.clear()
+
+        if self._playwright:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Playwright stop fehlgeschlagen: {e}")
+            self._playwright = None
+        logger.info("🔒 BrowserPool geschlossen")
+
+    def _reset_state(self):
+        self._playwright = None
+        self._browsers = []
+        self._leases = {}
+        self._loop = None
+        self._lock = None
+        self._semaphore = None
+
+    # -------------------------------------------------------------------------
+    # Ausleihe
+    # -------------------------------------------------------------------------
+
+    async def acquire_context(self, **context_options) -> "BrowserContext":
+        """
+        Leiht einen isolierten BrowserContext aus einem warmen Browser
+
+        Muss immer mit release_context() zurückgegeben werden —
+        bevorzugt über den Context Manager context() nutzen.
+
+        Args:
+            **context_options: Optionen für Browser.new_context()
+                (viewport, user_agent, locale, ignore_https_errors, ...)
+        """
+        await self.start()
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        entry = None
+        try:
+            entry = await self._acquire_browser()
+            context = await entry.browser.new_context(**context_options)
+        except BaseException:
+            if entry is not None:
+                entry.active_contexts -= 1
+                await self._maybe_recycle(entry)
+            self._semaphore.release()
+            raise
+
+        self._leases[id(context)] = entry
+        return context
+
+    async def release_context(self, context: "BrowserContext"):
+        """Schließt einen ausgeliehenen Context und gibt den Slot frei"""
+        entry = self._leases.pop(id(context), None)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Context close fehlgeschlagen: {e}")
+        if entry is None:
+            return
+        entry.active_contexts -= 1
+        await self._maybe_recycle(entry)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator["BrowserContext"]:
+        """Context Manager um acquire_context()/release_context()"""
+        context = await self.acquire_context(**context_options)
+        try:
+            yield context
+        finally:
+            await self.release_context(context)
+
+    @asynccontextmanager
+    async def page(self, **context_options) -> AsyncIterator["Page"]:
+        """Convenience: eigener Context mit genau einer Page"""
+        async with self.context(**context_options) as context:
+            page = await context.new_page()
+            yield page
+
+    async def _acquire_browser(self) -> _PooledBrowser:
+        """Wählt den am wenigsten ausgelasteten gesunden Browser (startet bei Bedarf neu)"""
+        async with self._lock:
+            for entry in list(self._browsers):
+                if not entry.is_healthy():
+                    logger.warning("BrowserPool: Browser nicht mehr verbunden, wird ersetzt")
+                    self._browsers.remove(entry)
+                    await self._close_browser(entry)
+
+            candidates = [
+                b for b in self._browsers
+                if not b.retiring and b.active_contexts < self.contexts_per_browser
+            ]
+            active = [b for b in self._browsers if not b.retiring]
+
+            if candidates and (len(active) >= self.size or min(b.active_contexts for b in candidates) == 0):
+                entry = min(candidates, key=lambda b: b.active_contexts)
+            else:
+                entry = await self._launch_browser()
+
+            entry.active_contexts += 1
+            entry.contexts_served += 1
+            return entry
+
+    async def _launch_browser(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        entry = _PooledBrowser(browser=browser)
+        self._browsers.append(entry)
+        self._launches += 1
+        logger.info(f"🌐 BrowserPool: Chromium gestartet ({len(self._browsers)} aktiv)")
+        return entry
+
+    # -------------------------------------------------------------------------
+    # Recycling & Health
+    # -------------------------------------------------------------------------
+
+    async def _maybe_recycle(self, entry: _PooledBrowser):
+        """Markiert Browser zum Recycling und schließt ihn, sobald er idle ist"""
+        if self._lock is None:
+            return  # Pool bereits geschlossen
+        async with self._lock:
+            retired = self._select_retired(entry)
+        # Schließen außerhalb des Locks — Ausleihen warten nicht auf Browser.close()
+        for candidate in retired:
+            await self._close_browser(candidate)
+
+    def _select_retired(self, entry: _PooledBrowser) -> List[_PooledBrowser]:
+        """Markiert `entry` ggf. zum Recycling; entfernt idle, ausgemusterte Browser aus dem Pool"""
+        if not entry.retiring:
+            if entry.contexts_served >= self.max_pages:
+                entry.retiring = True
+                logger.info(f"♻️ BrowserPool: Recycling nach {entry.contexts_served} Contexts")
+            elif self._memory_exceeded():
+                # Speicher lässt sich nicht pro Browser zuordnen — den
+                # meistgenutzten Browser recyceln
+                busiest = max(
+                    (b for b in self._browsers if not b.retiring),
+                    key=lambda b: b.contexts_served,
+                    default=None,
+                )
+                if busiest is not None:
+                    busiest.retiring = True
+                    logger.info("♻️ BrowserPool: Recycling wegen Speicherlimit")
+
+        retired = [b for b in self._browsers if b.retiring and b.active_contexts <= 0]
+        for candidate in retired:
+            self._browsers.remove(candidate)
+        self._recycled += len(retired)
+        return retired
+
+    def _memory_exceeded(self) -> bool:
+        rss_mb = self._chromium_rss_mb()
+        if rss_mb is None or not self._browsers:
+            return False
+        return rss_mb > self.max_memory_mb * len(self._browsers)
+
+    @staticmethod
+    def _chromium_rss_mb() -> Optional[float]:
+        """RSS aller Kindprozesse (Playwright-Driver + Chromium) in MB"""
+        if psutil is None:
+            return None
+        try:
+            total = 0
+            for child in psutil.Process().children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    async def _close_browser(self, entry: _PooledBrowser):
+        try:
+            await entry.browser.close()
+        except Exception as e:
+            logger.debug(f"Browser close fehlgeschlagen: {e}")
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        rss_mb = self._chromium_rss_mb() if self._browsers else 0
+        return {
+            "status": "up" if self._playwright else ("idle" if PLAYWRIGHT_AVAILABLE else "unavailable"),
+            "browsers": len(self._browsers),
+            "healthy_browsers": sum(1 for b in self._browsers if b.is_healthy()),
+            "active_contexts": sum(b.active_contexts for b in self._browsers),
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "launches": self._launches,
+            "recycled": self._recycled,
+            "memory_mb": round(rss_mb, 1) if rss_mb is not None else None,
+        }
+
+
+# Globale Instanz
+browser_pool = BrowserPool()
@@ -6,55 +6,74 @@ Zweck:
 - Erkennt Client-Side-gerenderte Websites (React, Vue, Angular, etc.)
 - Rendert diese vollständig im Browser
 - Gibt vollständig gerendertes HTML zurück für präzise Compliance-Checks
+- Wartet auf Network-Idle + DOM-Ruhe statt fester Sleeps
+
+Konfiguration über Umgebungsvariablen:
+    RENDER_NETWORK_IDLE_TIMEOUT_MS=4000   # Max. Warten auf Network-Idle
+    RENDER_DOM_QUIET_MS=400               # So lange ohne DOM-Mutation = fertig
+    RENDER_DOM_SETTLE_MAX_MS=3000         # Max. Warten auf DOM-Ruhe
 
 © 2025 Complyo.tech
 """
 
 import asyncio
 import logging
+import os
 from typing import Optional, Dict, Any, Tuple
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import Page
 import re
 from bs4 import BeautifulSoup
 
+from .browser_pool import browser_pool
+from .parsed_page import PARSER
+
 logger = logging.getLogger(__name__)
 
-_browser_semaphore = asyncio.Semaphore(3)
+NETWORK_IDLE_TIMEOUT_MS = int(os.getenv("RENDER_NETWORK_IDLE_TIMEOUT_MS", "4000"))
+DOM_QUIET_MS = int(os.getenv("RENDER_DOM_QUIET_MS", "400"))
+DOM_SETTLE_MAX_MS = int(os.getenv("RENDER_DOM_SETTLE_MAX_MS", "3000"))
+
+# Löst auf, sobald DOM_QUIET_MS lang keine Mutation passiert ist (spätestens nach maxMs)
+_DOM_QUIET_SCRIPT = """
+([quietMs, maxMs]) => new Promise(resolve => {
+    let timer = setTimeout(done, quietMs);
+    const deadline = setTimeout(done, maxMs);
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    function done() {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(deadline);
+        resolve();
+    }
+    observer.observe(document.documentElement || document,
+        {childList: true, subtree: true, attributes: true, characterData: true});
+})
+"""
 
 
 class BrowserRenderer:
     """
     Service für Browser-basiertes Rendering
     
-    Verwendet Playwright Chromium für vollständiges JavaScript-Rendering
+    Verwendet Playwright Chromium für vollständiges JavaScript-Rendering.
+    Browser werden aus dem prozessweiten BrowserPool geliehen.
     """
     
     def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.playwright = None
+        self._started = False
         
     async def __aenter__(self):
-        """Context Manager Entry - initialisiert Browser"""
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-dev-shm-usage',  # Docker-Kompatibilität
-                '--disable-gpu'
-            ]
-        )
-        logger.info("✅ Browser initialized")
+        """Context Manager Entry - stellt sicher, dass der BrowserPool läuft"""
+        await browser_pool.start()
+        self._started = True
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context Manager Exit - schließt Browser"""
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
-        logger.info("🔒 Browser closed")
+        """Context Manager Exit - Browser bleibt warm im Pool"""
+        self._started = False
     
     async def render_page(self, url: str, wait_for: str = 'domcontentloaded', timeout: int = 15000) -> Dict[str, Any]:
         """
@@ -72,74 +91,79 @@ class BrowserRenderer:
                 - rendering_type: 'client' oder 'server'
                 - metadata: Zusätzliche Infos
         """
-        if not self.browser:
+        if not self._started:
             raise RuntimeError("Browser not initialized. Use async context manager.")
 
-        async with _browser_semaphore:
-            page = None
-            try:
-                logger.info(f"🌐 Rendering page: {url}")
-
-                page = await self.browser.new_page()
-
-                await page.set_extra_http_headers({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Complyo-Scanner/2.0'
-                })
+        context = None
+        try:
+            logger.info(f"🌐 Rendering page: {url}")
 
-                start_time = asyncio.get_event_loop().time()
+            context = await browser_pool.acquire_context()
+            page = await context.new_page()
 
-                try:
-                    response = await page.goto(url, wait_until=wait_for, timeout=timeout)
+            await page.set_extra_http_headers({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Complyo-Scanner/2.0'
+            })
 
-                    if not response:
-                        return self._create_error_response(url, "No response from server")
+            start_time = asyncio.get_event_loop().time()
+            response = None
 
-                    await asyncio.sleep(3)
+            try:
+                response = await page.goto(url, wait_until=wait_for, timeout=timeout)
 
-                    try:
-                        await page.wait_for_selector('footer, #root, #app, [data-reactroot], main, header', timeout=6000)
-                    except:
-                        pass
+                if not response:
+                    return self._create_error_response(url, "No response from server")
 
-                    await asyncio.sleep(2)
+                await self._wait_until_settled(page)
 
-                except Exception as e:
-                    logger.warning(f"Navigation timeout/error: {e}, trying to get content anyway")
-                    await asyncio.sleep(4)
+            except Exception as e:
+                logger.warning(f"Navigation timeout/error: {e}, trying to get content anyway")
+                await self._wait_until_settled(page)
 
-                html = await page.content()
+            html = await page.content()
 
-                end_time = asyncio.get_event_loop().time()
-                render_time = round((end_time - start_time) * 1000, 2)
+            end_time = asyncio.get_event_loop().time()
+            render_time = round((end_time - start_time) * 1000, 2)
 
-                rendering_info = await self._analyze_rendering(page, html)
+            rendering_info = await self._analyze_rendering(page, html)
 
-                metadata = {
-                    'url': url,
-                    'render_time_ms': render_time,
-                    'status_code': response.status if response else None,
-                    'final_url': page.url,
-                    'title': await page.title(),
-                    **rendering_info
-                }
+            metadata = {
+                'url': url,
+                'render_time_ms': render_time,
+                'status_code': response.status if response else None,
+                'final_url': page.url,
+                'title': await page.title(),
+                **rendering_info
+            }
 
-                logger.info(f"✅ Rendered successfully in {render_time}ms ({rendering_info['rendering_type']})")
+            logger.info(f"✅ Rendered successfully in {render_time}ms ({rendering_info['rendering_type']})")
 
-                return {
-                    'html': html,
-                    'success': True,
-                    'rendering_type': rendering_info['rendering_type'],
-                    'metadata': metadata
-                }
+            return {
+                'html': html,
+                'success': True,
+                'rendering_type': rendering_info['rendering_type'],
+                'metadata': metadata
+            }
 
-            except Exception as e:
-                logger.error(f"❌ Browser rendering failed for {url}: {e}")
-                return self._create_error_response(url, str(e))
+        except Exception as e:
+            logger.error(f"❌ Browser rendering failed for {url}: {e}")
+            return self._create_error_response(url, str(e))
 
-            finally:
-                if page:
-                    await page.close()
+        finally:
+            if context is not None:
+                await browser_pool.release_context(context)
     
+    async def _wait_until_settled(self, page: Page):
+        """Network-Idle, danach DOM-Ruhe (MutationObserver) — endet, sobald die Seite steht"""
+        try:
+            await page.wait_for_load_state('networkidle', timeout=NETWORK_IDLE_TIMEOUT_MS)
+        except Exception:
+            pass
+        try:
+            await page.evaluate(_DOM_QUIET_SCRIPT, [DOM_QUIET_MS, DOM_SETTLE_MAX_MS])
+        except Exception as e:
+            logger.debug(f"DOM quiescence wait failed: {e}")
+
     async def _analyze_rendering(self, page: Page, html: str) -> Dict[str, Any]:
         """
         Analysiert wie die Seite gerendert wurde
@@ -223,28 +247,30 @@ class BrowserRenderer:
         }
 
 
-def detect_client_rendering(html: str) -> Tuple[bool, str]:
+def detect_client_rendering(html: str, soup: Optional[BeautifulSoup] = None) -> Tuple[bool, str]:
     """
     Schnelle Detection ob Seite Client-Side-Rendering benötigt
     (ohne Browser-Start)
     
     Args:
         html: Initial HTML vom Server
+        soup: Optional bereits geparstes HTML
         
     Returns:
         Tuple[needs_browser, reason]
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # 1. Check: Bailout-Patterns (Next.js CSR)
+    # 1. Check: Bailout-Patterns (Next.js CSR) — reine String-Checks, kein Parsen
     if 'BAILOUT_TO_CLIENT_SIDE_RENDERING' in html:
         return (True, 'Next.js client-side rendering detected')
     
     # 2. NEU: Next.js immer mit Browser (wegen Hydration-Issues)
     # Next.js kann SSR haben aber trotzdem dynamische Inhalte per Hydration laden
-    if soup.find(id='__next') or soup.find(id='__NEXT_DATA__') or '__next' in html:
+    if '__next' in html or '__NEXT_DATA__' in html:
         return (True, 'Next.js detected - using browser for full hydration')
     
+    if soup is None:
+        soup = BeautifulSoup(html, PARSER)
+    
     # 3. Check: Leerer Root
     root = soup.find(id='root') or soup.find(id='app')
     if root and len(root.get_text(strip=True)) < 50:
@@ -285,64 +311,20 @@ def detect_client_rendering(html: str) -> Tuple[bool, str]:
     return (False, 'Server-rendered content detected')
 
 
-async def smart_fetch_html(url: str, simple_html: str = None) -> Tuple[str, Dict[str, Any]]:
+async def smart_fetch_html(url: str, simple_html: str = None, etag: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
     """
     Smart HTML-Fetching mit automatischer Browser-Nutzung
     
+    Delegiert an den RenderService (Domain-Entscheidungscache, HTML-Cache,
+    Single-Flight für parallele Renders derselben URL).
+    
     Args:
         url: URL zum Fetchen
         simple_html: Optional bereits gefetchtes HTML (für Re-Check)
+        etag: Optional ETag der statischen Antwort (Cache-Key)
         
     Returns:
         Tuple[html, metadata]
     """
-    # 1. Wenn kein simple_html gegeben, hole es erst
-    if not simple_html:
-        import aiohttp
-        import ssl
-        import certifi
-        
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
-            try:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                    simple_html = await response.text()
-            except Exception as e:
-                logger.warning(f"Simple fetch failed: {e}, trying browser")
-                simple_html = ""
-    
-    # 2. Prüfe ob Browser nötig
-    needs_browser, reason = detect_client_rendering(simple_html)
-    
-    metadata = {
-        'detection_reason': reason,
-        'used_browser': needs_browser
-    }
-    
-    # 3. Wenn Browser nötig, nutze ihn
-    if needs_browser:
-        logger.info(f"🌐 Browser needed: {reason}")
-        try:
-            async with BrowserRenderer() as renderer:
-                result = await renderer.render_page(url)
-                
-                if result['success']:
-                    metadata.update(result['metadata'])
-                    return result['html'], metadata
-                else:
-                    logger.warning(f"Browser rendering failed, using simple HTML")
-                    metadata['browser_error'] = 'render_failed'
-                    return simple_html, metadata
-        except Exception as e:
-            logger.warning(f"⚠️ Browser not available: {e}, using simple HTML fallback")
-            metadata['browser_error'] = str(e)
-            metadata['used_browser'] = False
-            return simple_html, metadata
-    
-    # 4. Server-rendered, nutze simple HTML
-    logger.info(f"⚡ Server-rendered, using simple fetch")
-    metadata['fetch_method'] = 'simple'
-    return simple_html, metadata
-
+    from .render_service import render_service
+    return await render_service.fetch(url, simple_html, etag)
@@ -17,6 +17,8 @@ import aiohttp
 import ssl
 import certifi
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 SHOP_SIGNALS = [
@@ -27,8 +29,8 @@ SHOP_SIGNALS = [
 ]
 
 def _is_shop(soup: BeautifulSoup) -> bool:
-    text = soup.get_text(separator=' ', strip=True).lower()
-    html_lower = str(soup).lower()
+    text = ParsedPage.of(soup).text_lower
+    html_lower = ParsedPage.of(soup).markup_lower
     hits = sum(1 for s in SHOP_SIGNALS if s in text or s in html_lower)
     return hits >= 3
 
@@ -60,9 +62,10 @@ def _find_agb_links(soup: BeautifulSoup) -> List:
     ]
 
     all_links = []
-    for a_tag in soup.find_all('a', href=True):
-        href = a_tag.get('href', '').lower()
-        link_text = a_tag.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a_tag = link.tag
+        href = link.href_lower
+        link_text = link.text_lower
         aria_label = (a_tag.get('aria-label') or '').lower()
         title_attr = (a_tag.get('title') or '').lower()
 
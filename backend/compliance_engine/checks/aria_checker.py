@@ -7,6 +7,8 @@ from typing import Dict, List, Any, Optional
 from bs4 import BeautifulSoup, Tag
 import logging
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 
@@ -85,9 +87,10 @@ class ARIAChecker:
     def _check_missing_labels(self, soup: BeautifulSoup, url: str) -> List[Dict]:
         """Prüft interaktive Elemente ohne Label"""
         issues = []
+        page = ParsedPage.of(soup, url)
         
         for element in self.INTERACTIVE_ELEMENTS:
-            for tag in soup.find_all(element):
+            for tag in page.tags(element):
                 has_label = self._has_accessible_name(tag)
                 
                 if not has_label:
@@ -9,10 +9,12 @@ from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict, field
 import re
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import logging
 import aiohttp
-from xml.etree import ElementTree as ET
+
+from ..parsed_page import ParsedPage
+from ..site_crawler import SiteCrawler
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +34,7 @@ async def check_barrierefreiheit_compliance_smart(url: str, html: str = None, se
     Returns:
         Liste von Issues (wie check_barrierefreiheit_compliance)
     """
-    from ..browser_renderer import smart_fetch_html, detect_client_rendering
+    from ..browser_renderer import smart_fetch_html
     
     # ✅ FIX: URL-Normalisierung (falls direkt aufgerufen, ohne Scanner)
     if not url.startswith(('http://', 'https://')):
@@ -55,19 +57,15 @@ async def check_barrierefreiheit_compliance_smart(url: str, html: str = None, se
                 async with temp_session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
                     html = await response.text()
         
-        # 2. Prüfe ob Browser nötig ist
-        needs_browser, reason = detect_client_rendering(html)
-        
+        # 2. Rendern falls nötig (Entscheidung/Cache/Single-Flight im RenderService)
+        html, metadata = await smart_fetch_html(url, html)
+        needs_browser = metadata.get('used_browser', False)
+        reason = metadata.get('detection_reason', '')
         if needs_browser:
-            logger.info(f"🌐 Browser needed: {reason}")
-            # Hole vollständig gerendertes HTML
-            html, metadata = await smart_fetch_html(url, html)
             logger.info(f"✅ Browser rendering completed: {metadata.get('rendering_type', 'unknown')}")
-        else:
-            logger.info(f"⚡ Server-rendered detected, using simple HTML")
         
         # 3. Führe normalen Check mit (potenziell gerenderten) HTML durch
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = ParsedPage(url, html).soup
         issues = await check_barrierefreiheit_compliance(url, soup, session)
         
         # 4. Füge Metadaten hinzu
@@ -83,7 +81,7 @@ async def check_barrierefreiheit_compliance_smart(url: str, html: str = None, se
         logger.error(f"❌ Smart compliance check failed: {e}")
         # Fallback zu normalem Check
         logger.info("📋 Falling back to simple check")
-        soup = BeautifulSoup(html if html else "", 'html.parser')
+        soup = ParsedPage(url, html).soup
         return await check_barrierefreiheit_compliance(url, soup, session)
 
 
@@ -155,7 +153,7 @@ async def check_barrierefreiheit_compliance(url: str, soup: BeautifulSoup, sessi
 
         # WCAG 4.1.2: Inputs ohne Label
         inputs_without_label = []
-        for inp in soup.find_all(['input', 'select', 'textarea']):
+        for inp in ParsedPage.of(soup).tags('input', 'select', 'textarea'):
             inp_id = inp.get('id')
             inp_type = inp.get('type', '').lower()
             if inp_type in ('hidden', 'submit', 'button', 'reset'):
@@ -203,19 +201,18 @@ async def check_barrierefreiheit_compliance(url: str, soup: BeautifulSoup, sessi
         # Multi-Page Scan für Bilder
         logger.info(f"🔍 Starting multi-page accessibility scan for {url}")
         if session:
-            all_pages = await _discover_pages(url, session)
-            logger.info(f"📄 Discovered {len(all_pages)} pages to scan")
-            for page_url in all_pages[:50]:
+            # Seiten werden gestreamt: Checks laufen, während weitere Seiten noch laden
+            pages_scanned = 0
+            async for page in SiteCrawler(session).crawl(url):
                 try:
-                    page_content = await _fetch_page(page_url, session)
-                    if page_content:
-                        page_soup = BeautifulSoup(page_content, 'html.parser')
-                        page_issues = await _check_images_for_alt_text(page_url, page_soup)
-                        issues.extend(page_issues)
-                        logger.info(f"  ✓ {page_url}: {len(page_issues)} issues found")
+                    page_issues = await _check_images_for_alt_text(page.url, page.soup)
+                    issues.extend(page_issues)
+                    pages_scanned += 1
+                    logger.info(f"  ✓ {page.url}: {len(page_issues)} issues found")
                 except Exception as e:
-                    logger.warning(f"  ✗ Failed to scan {page_url}: {e}")
+                    logger.warning(f"  ✗ Failed to scan {page.url}: {e}")
                     continue
+            logger.info(f"📄 Scanned {pages_scanned} pages")
         else:
             alt_issues = await _check_alt_texts_enhanced(url, soup, session)
             issues.extend(alt_issues)
@@ -254,16 +251,16 @@ async def check_barrierefreiheit_compliance(url: str, soup: BeautifulSoup, sessi
     issues.extend(pdf_link_issues)
 
     # BFSG §14: Barrierefreiheitserklärung (für B2C-Dienste ab 28.06.2025 Pflicht)
-    html_text_full = str(soup).lower()
+    html_text_full = ParsedPage.of(soup).markup_lower
     has_a11y_statement = bool(re.search(
         r'barrierefreiheit(?:serkl[äa]rung)?|accessibility.statement|erkl[äa]rung.zur.barrierefreiheit',
         html_text_full, re.I
     ))
     # Prüfe auch ob es einen Link zur Erklärung gibt
     if not has_a11y_statement:
-        for a in soup.find_all('a', href=True):
-            href = a.get('href', '').lower()
-            text = a.get_text(strip=True).lower()
+        for link in ParsedPage.of(soup).links:
+            href = link.href_lower
+            text = link.text_lower
             if 'barrierefreiheit' in href or 'accessibility' in href or 'barrierefreiheit' in text:
                 has_a11y_statement = True
                 break
@@ -330,8 +327,8 @@ async def check_barrierefreiheit_compliance(url: str, soup: BeautifulSoup, sessi
     has_skip_link = bool(soup.find('a', href=re.compile(r'^#(main|content|inhalt|skip)', re.I)))
     if not has_skip_link:
         # Prüfe auch auf aria-label skip patterns
-        for a in soup.find_all('a', href=True):
-            text = a.get_text(strip=True).lower()
+        for link in ParsedPage.of(soup).links:
+            text = link.text_lower
             if re.search(r'skip.*(content|navigation|main)|zum inhalt|zur navigation springen', text):
                 has_skip_link = True
                 break
@@ -358,8 +355,9 @@ async def check_barrierefreiheit_compliance(url: str, soup: BeautifulSoup, sessi
         re.I
     )
     vague_links = []
-    for a in soup.find_all('a', href=True):
-        text = a.get_text(strip=True)
+    for link in ParsedPage.of(soup).links:
+        a = link.tag
+        text = link.text
         aria = a.get('aria-label', '').strip()
         title_attr = a.get('title', '').strip()
         if text and vague_link_patterns.match(text) and not aria and not title_attr:
@@ -450,8 +448,8 @@ async def _check_accessibility_widget(soup: BeautifulSoup) -> BarrierefreiheitIs
     ]
     
     # Suche in Scripts mit src
-    scripts = soup.find_all('script', src=True)
-    for script in scripts:
+    page = ParsedPage.of(soup)
+    for script in (resource.tag for resource in page.external_scripts):
         src = script.get('src', '').lower()
         for pattern in widget_patterns:
             if re.search(pattern, src, re.I):
@@ -467,30 +465,30 @@ async def _check_accessibility_widget(soup: BeautifulSoup) -> BarrierefreiheitIs
             return None
     
     # Suche nach Scripts mit Complyo-spezifischen Attributen (auch ohne src)
-    for script in soup.find_all('script'):
+    for script in page.scripts:
         if script.get('data-site-id') and ('complyo' in str(script).lower() or 'accessibility' in str(script).lower()):
             return None
     
     # Suche in Preload-Links (Next.js afterInteractive Scripts)
-    for link in soup.find_all('link', href=True):
+    for link in page.tags('link'):
         href = link.get('href', '').lower()
         for pattern in widget_patterns:
             if re.search(pattern, href, re.I):
                 return None
     
     # NEU: Suche im gesamten HTML nach Complyo Widget-URLs (inkl. Preload-Links)
-    html_text = str(soup).lower()
+    html_text = ParsedPage.of(soup).markup_lower
     if 'api.complyo.tech/api/widgets/accessibility' in html_text or 'api.complyo.de/api/widgets/accessibility' in html_text:
         return None  # Complyo Widget URL im HTML gefunden (z.B. als <link rel="preload">)
 
     # Zusätzlich: Suche in allen link-Tags unabhängig von rel-Attribut
-    for link in soup.find_all('link', href=True):
+    for link in page.tags('link'):
         href = link.get('href', '').lower()
         if 'accessibility' in href and ('complyo' in href or 'userway' in href or 'accessibe' in href or 'eye-able' in href):
             return None
     
     # Suche in Script-Content
-    script_contents = soup.find_all('script', src=False)
+    script_contents = page.inline_scripts
     for script in script_contents:
         content = script.string or ''
         for pattern in widget_patterns:
@@ -552,7 +550,7 @@ async def _check_alt_texts(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
     """Prüft ob alle Bilder Alt-Texte haben (Legacy-Version ohne Screenshots)"""
     issues = []
     
-    images = soup.find_all('img')
+    images = ParsedPage.of(soup).images
     if not images:
         return issues
     
@@ -714,7 +712,7 @@ async def _check_aria_labels(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]
         ))
     
     # Prüfe Forms ohne Labels
-    inputs = soup.find_all(['input', 'select', 'textarea'])
+    inputs = ParsedPage.of(soup).tags('input', 'select', 'textarea')
     inputs_without_label = []
     
     # Cookie-Banner Container identifizieren (Inputs darin werden übersprungen)
@@ -813,7 +811,7 @@ async def _check_semantic_html(soup: BeautifulSoup) -> List[BarrierefreiheitIssu
         ))
     
     # Prüfe Heading-Struktur
-    headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    headings = [heading.tag for heading in ParsedPage.of(soup).headings]
     has_h1 = any(h.name == 'h1' for h in headings)
     
     if not has_h1:
@@ -890,168 +888,6 @@ async def _check_color_contrast(soup: BeautifulSoup) -> List[BarrierefreiheitIss
 # Multi-Page Scanning Helper Functions
 # ============================================================================
 
-async def _discover_pages(base_url: str, session: aiohttp.ClientSession, max_pages: int = 50) -> List[str]:
-    """
-    Entdeckt alle Seiten einer Website (via Sitemap oder Link-Following)
-    
-    Args:
-        base_url: Die Basis-URL der Website
-        session: HTTP-Session für Requests
-        max_pages: Maximale Anzahl zu scannender Seiten
-        
-    Returns:
-        Liste von URLs
-    """
-    pages = set()
-    pages.add(base_url)  # Hauptseite immer dabei
-    
-    # 1. Versuche Sitemap zu laden
-    sitemap_urls = await _get_sitemap_urls(base_url, session)
-    if sitemap_urls:
-        logger.info(f"📄 Found {len(sitemap_urls)} URLs in sitemap")
-        pages.update(sitemap_urls[:max_pages])
-    else:
-        # 2. Fallback: Crawle Links rekursiv (begrenzt)
-        logger.info("📄 No sitemap found, crawling links...")
-        crawled_urls = await _crawl_links_recursive(base_url, session, max_depth=2, max_pages=max_pages)
-        pages.update(crawled_urls)
-    
-    # Begrenze auf max_pages
-    return list(pages)[:max_pages]
-
-
-async def _get_sitemap_urls(base_url: str, session: aiohttp.ClientSession) -> List[str]:
-    """
-    Versucht URLs aus sitemap.xml zu extrahieren
-    
-    Args:
-        base_url: Die Basis-URL der Website
-        session: HTTP-Session
-        
-    Returns:
-        Liste von URLs aus der Sitemap
-    """
-    sitemap_locations = [
-        f"{base_url}/sitemap.xml",
-        f"{base_url}/sitemap_index.xml",
-        f"{base_url}/sitemap/sitemap.xml",
-    ]
-    
-    for sitemap_url in sitemap_locations:
-        try:
-            async with session.get(sitemap_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    
-                    # Parse XML
-                    try:
-                        root = ET.fromstring(content)
-                        
-                        # Namespace handling
-                        ns = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-                        
-                        # Extrahiere URLs
-                        urls = []
-                        for url_elem in root.findall('.//sm:loc', ns):
-                            if url_elem.text:
-                                urls.append(url_elem.text)
-                        
-                        # Fallback ohne Namespace
-                        if not urls:
-                            for url_elem in root.findall('.//{*}loc'):
-                                if url_elem.text:
-                                    urls.append(url_elem.text)
-                        
-                        if urls:
-                            logger.info(f"✓ Found sitemap at {sitemap_url} with {len(urls)} URLs")
-                            return urls
-                    except ET.ParseError as e:
-                        logger.debug(f"Failed to parse XML from {sitemap_url}: {e}")
-                        continue
-        except Exception as e:
-            logger.debug(f"Failed to fetch sitemap from {sitemap_url}: {e}")
-            continue
-    
-    return []
-
-
-async def _crawl_links_recursive(
-    base_url: str,
-    session: aiohttp.ClientSession,
-    max_depth: int = 2,
-    max_pages: int = 50
-) -> List[str]:
-    """
-    Crawlt Links rekursiv (begrenzt)
-    
-    Args:
-        base_url: Die Basis-URL
-        session: HTTP-Session
-        max_depth: Maximale Crawl-Tiefe
-        max_pages: Maximale Anzahl Seiten
-        
-    Returns:
-        Liste von gefundenen URLs
-    """
-    visited = set()
-    to_visit = [(base_url, 0)]  # (url, depth)
-    found_urls = []
-    
-    base_domain = urlparse(base_url).netloc
-    
-    while to_visit and len(found_urls) < max_pages:
-        current_url, depth = to_visit.pop(0)
-        
-        if current_url in visited or depth > max_depth:
-            continue
-        
-        visited.add(current_url)
-        found_urls.append(current_url)
-        
-        # Hole Links von dieser Seite
-        try:
-            content = await _fetch_page(current_url, session)
-            if content:
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    absolute_url = urljoin(current_url, href)
-                    
-                    # Nur Links der gleichen Domain
-                    if urlparse(absolute_url).netloc == base_domain:
-                        # Filter: Nur HTML-Seiten (keine PDFs, Bilder, etc.)
-                        if not any(absolute_url.endswith(ext) for ext in ['.pdf', '.jpg', '.png', '.gif', '.zip', '.doc']):
-                            if absolute_url not in visited:
-                                to_visit.append((absolute_url, depth + 1))
-        except Exception as e:
-            logger.debug(f"Failed to crawl {current_url}: {e}")
-            continue
-    
-    return found_urls
-
-
-async def _fetch_page(url: str, session: aiohttp.ClientSession) -> Optional[str]:
-    """
-    Lädt den HTML-Inhalt einer Seite
-    
-    Args:
-        url: Die URL der Seite
-        session: HTTP-Session
-        
-    Returns:
-        HTML-Inhalt oder None bei Fehler
-    """
-    try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-            if response.status == 200:
-                return await response.text()
-    except Exception as e:
-        logger.debug(f"Failed to fetch {url}: {e}")
-    
-    return None
-
-
 async def _check_images_for_alt_text(url: str, soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
     """
     Findet Bilder ohne Alt-Text und bereitet Daten für KI-Alt-Text-Generation vor
@@ -1065,7 +901,7 @@ async def _check_images_for_alt_text(url: str, soup: BeautifulSoup) -> List[Barr
     """
     issues = []
     
-    for img in soup.find_all('img'):
+    for img in ParsedPage.of(soup).images:
         img_src = img.get('src', '')
         alt_text = img.get('alt')
         
@@ -1248,7 +1084,7 @@ async def check_barrierefreiheit_enhanced(
 def _check_touch_targets(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
     issues = []
     small_targets = []
-    for el in soup.find_all(['button', 'a', 'input', 'select', 'textarea']):
+    for el in ParsedPage.of(soup).tags('button', 'a', 'input', 'select', 'textarea'):
         style = el.get('style', '')
         width_match = re.search(r'width\s*:\s*(\d+)px', style)
         height_match = re.search(r'height\s*:\s*(\d+)px', style)
@@ -1293,8 +1129,9 @@ def _check_wcag_aaa(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
         re.I
     )
     vague_count = 0
-    for a in soup.find_all('a', href=True):
-        text = a.get_text(strip=True)
+    for link in ParsedPage.of(soup).links:
+        a = link.tag
+        text = link.text
         if text and vague_aaa.match(text) and not a.get('aria-label') and not a.get('title'):
             vague_count += 1
     if vague_count:
@@ -1340,7 +1177,7 @@ def _check_tables_svg_canvas(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]
     issues = []
 
     # Tabellen: <th> ohne scope, <table> ohne <caption>
-    tables = soup.find_all('table')
+    tables = ParsedPage.of(soup).tags('table')
     for table in tables:
         if not table.find('caption'):
             issues.append(BarrierefreiheitIssue(
@@ -1368,7 +1205,7 @@ def _check_tables_svg_canvas(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]
             ))
 
     # SVG: ohne <title> und role="img"
-    for svg in soup.find_all('svg'):
+    for svg in ParsedPage.of(soup).tags('svg'):
         if svg.get('aria-hidden') == 'true':
             continue
         missing_title = not svg.find('title')
@@ -1387,7 +1224,7 @@ def _check_tables_svg_canvas(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]
             ))
 
     # Canvas: ohne aria-label
-    for canvas in soup.find_all('canvas'):
+    for canvas in ParsedPage.of(soup).tags('canvas'):
         if not canvas.get('aria-label') and not canvas.get('aria-labelledby'):
             issues.append(BarrierefreiheitIssue(
                 category='barrierefreiheit',
@@ -1409,7 +1246,7 @@ def _check_tables_svg_canvas(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]
 
 def _check_video_captions(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
     issues = []
-    for video in soup.find_all('video'):
+    for video in ParsedPage.of(soup).tags('video'):
         caption_tracks = [
             t for t in video.find_all('track')
             if t.get('kind', '').lower() in ('captions', 'subtitles')
@@ -1449,9 +1286,9 @@ def _check_video_captions(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
 def _check_pdf_links(soup: BeautifulSoup) -> List[BarrierefreiheitIssue]:
     issues = []
     pdf_links = []
-    for a in soup.find_all('a', href=True):
-        href = a.get('href', '')
-        text = a.get_text(strip=True)
+    for link in ParsedPage.of(soup).links:
+        href = link.href
+        text = link.text
         if href.lower().endswith('.pdf') or 'pdf' in href.lower() or re.search(r'\bPDF\b', text):
             pdf_links.append(href[:80])
     if pdf_links:
@@ -9,6 +9,8 @@ from typing import List, Dict, Any
 from dataclasses import dataclass, asdict
 import re
 
+from ..parsed_page import ParsedPage
+
 @dataclass
 class CookieIssue:
     category: str
@@ -76,23 +78,14 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
             return False
         return True
     
-    for pattern in cookie_banner_patterns:
-        for tag in container_tags:
-            for el in soup.find_all(tag, class_=re.compile(pattern, re.I)):
-                if _is_visible(el):
-                    has_cookie_banner = True
-                    has_visible_banner = True
-                    break
-            if has_cookie_banner:
-                break
-            for el in soup.find_all(tag, id=re.compile(pattern, re.I)):
-                if _is_visible(el):
-                    has_cookie_banner = True
-                    has_visible_banner = True
-                    break
-            if has_cookie_banner:
-                break
-        if has_cookie_banner:
+    # Ein Durchlauf über die indizierten Container statt find_all je Pattern × Tag
+    page = ParsedPage.of(soup, url)
+    banner_regex = re.compile('|'.join(f'(?:{p})' for p in cookie_banner_patterns), re.I)
+    for el in page.tags(*container_tags):
+        class_attr = ' '.join(el.get('class', []))
+        if (banner_regex.search(class_attr) or banner_regex.search(el.get('id') or '')) and _is_visible(el):
+            has_cookie_banner = True
+            has_visible_banner = True
             break
     
     # Prüfe bekannte Cookie-Consent-Tools per Script-src
@@ -119,10 +112,10 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
         r'cookieconsent',   # osano/CookieConsent.js CDN
     ]
     
-    scripts = soup.find_all('script', src=True)
+    scripts = page.external_scripts
     if not has_cookie_banner:
         for script in scripts:
-            src = script.get('src', '').lower()
+            src = script.src.lower()
             for tool in consent_tool_patterns:
                 if re.search(tool, src, re.I):
                     has_cookie_banner = True
@@ -132,8 +125,7 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
     
     # Prüfe Inline-Scripts auf echte Consent-Implementierungen
     if not has_cookie_banner:
-        inline_scripts = soup.find_all('script', src=False)
-        for script in inline_scripts:
+        for script in page.inline_scripts:
             script_content = script.string or ''
             if 'meta' in script_content.lower() and 'keywords' in script_content.lower():
                 continue
@@ -159,19 +151,19 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
     # Prüfe Complyo Cookie-Banner Script-Tags
     if not has_cookie_banner:
         for script in scripts:
-            src = script.get('src', '').lower()
+            src = script.src.lower()
             if 'cookie-compliance.js' in src or 'cookie-blocker.js' in src or 'complyo' in src:
                 has_cookie_banner = True
                 break
 
     # Prüfe Preload-Links (Next.js afterInteractive Scripts erscheinen als <link rel="preload">)
     if not has_cookie_banner:
-        html_text = str(soup).lower()
+        html_text = page.markup_lower
         if ('cookie-compliance.js' in html_text and 'complyo' in html_text) or 'cookie-blocker.js' in html_text:
             has_cookie_banner = True
         elif any(re.search(tool, html_text) for tool in consent_tool_patterns):
-            for link in soup.find_all('link', href=True):
-                href = link.get('href', '').lower()
+            for link in page.tags('link'):
+                href = (link.get('href') or '').lower()
                 if any(re.search(tool, href) for tool in consent_tool_patterns):
                     has_cookie_banner = True
                     break
@@ -188,7 +180,7 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
         r'tracking',
     ]
     for script in scripts:
-        src = script.get('src', '').lower()
+        src = script.src.lower()
         for pattern in tracking_patterns:
             if re.search(pattern, src, re.I):
                 has_tracking = True
@@ -308,7 +300,7 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
             )))
             return issues
 
-        html_text = str(soup).lower()
+        html_text = page.markup_lower
 
         # 1. Opt-In vs. Opt-Out — gibt es einen Akzeptieren-Button?
         has_accept = bool(re.search(
@@ -344,8 +336,8 @@ async def check_cookie_compliance(url: str, soup: BeautifulSoup, session=None) -
             ('Pinterest', r'pintrk|pinterest\.com/v3'),
             ('Matomo (extern)', r'matomo\.cloud'),
         ]
-        for script in soup.find_all('script', src=True):
-            src = script.get('src', '').lower()
+        for script in page.external_scripts:
+            src = script.src.lower()
             for name, pattern in tracking_scripts:
                 if re.search(pattern, src, re.I) and name not in tracking_before_consent:
                     tracking_before_consent.append(name)
@@ -12,6 +12,8 @@ import re
 import logging
 import aiohttp
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -45,9 +47,10 @@ def _find_datenschutz_links(soup: BeautifulSoup) -> List:
         'datenschutzrichtlinie',
     ]
     
-    for a_tag in soup.find_all('a', href=True):
-        href = a_tag.get('href', '').lower()
-        link_text = a_tag.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a_tag = link.tag
+        href = link.href_lower
+        link_text = link.text_lower
         aria_label = (a_tag.get('aria-label') or '').lower()
         title = (a_tag.get('title') or '').lower()
         
@@ -70,7 +73,7 @@ async def check_datenschutz_compliance_smart(url: str, html: str = None, session
     Erkennt automatisch Client-Side-Rendering (React, Vue, Next.js)
     und rendert die Seite vollständig im Browser.
     """
-    from ..browser_renderer import smart_fetch_html, detect_client_rendering
+    from ..browser_renderer import smart_fetch_html
     
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
@@ -88,21 +91,17 @@ async def check_datenschutz_compliance_smart(url: str, html: str = None, session
                 async with temp_session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
                     html = await response.text()
         
-        needs_browser, reason = detect_client_rendering(html)
-        
-        if needs_browser:
-            logger.info(f"🌐 Browser needed for Datenschutz check: {reason}")
-            html, metadata = await smart_fetch_html(url, html)
-            logger.info(f"✅ Browser rendering completed: {metadata.get('rendering_type', 'unknown')}")
-        else:
-            logger.info(f"⚡ Server-rendered detected, using simple HTML for Datenschutz check")
+        # Render-Entscheidung, Single-Flight und HTML-Cache liegen im RenderService
+        html, metadata = await smart_fetch_html(url, html)
+        if metadata.get('used_browser'):
+            logger.info(f"✅ Browser rendering for Datenschutz check: {metadata.get('rendering_type', 'unknown')}")
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = ParsedPage(url, html).soup
         return await check_datenschutz_compliance(url, soup, session)
         
     except Exception as e:
         logger.error(f"❌ Smart Datenschutz check failed: {e}")
-        soup = BeautifulSoup(html if html else "", 'html.parser')
+        soup = ParsedPage(url, html).soup
         return await check_datenschutz_compliance(url, soup, session)
 
 
@@ -374,7 +373,7 @@ async def check_datenschutz_compliance(url: str, soup: BeautifulSoup, session=No
         except ImportError:
             logger.warning("⚠️ HybridValidator nicht verfügbar - überspringe Deep-Analyse")
     
-    html_raw = str(soup)
+    html_raw = ParsedPage.of(soup).markup
     html_text = html_raw.lower()
 
     # Drittlandtransfer ohne Einwilligung (Google Fonts, reCAPTCHA, Maps, YouTube,
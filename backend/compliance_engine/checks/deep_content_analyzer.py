@@ -11,6 +11,7 @@ Features:
 
 import re
 import logging
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 from bs4 import BeautifulSoup
 from dataclasses import dataclass, field
@@ -18,6 +19,14 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+_UST_ID_FORMAT = re.compile(r"^DE\d{9}$")
+
+
+@lru_cache(maxsize=None)
+def _compiled(pattern: str) -> "re.Pattern[str]":
+    """Kompiliert ein Feld-Pattern einmal pro Prozess (statt bei jedem Match-Lauf)"""
+    return re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+
 
 class ContentQuality(Enum):
     """Qualitätsbewertung des Inhalts"""
@@ -266,15 +275,7 @@ class DeepContentAnalyzer:
         text_content = soup.get_text(separator=' ', strip=True)
         
         # Validiere alle Felder
-        validations = []
-        for field_name, field_config in self.impressum_patterns.items():
-            validation = self._validate_field(
-                field_name,
-                field_config,
-                text_content,
-                soup
-            )
-            validations.append(validation)
+        validations = list(self.validate_fields(self.impressum_patterns, text_content, soup).values())
         
         # Berechne Gesamtqualität
         overall_quality, missing_fields, warnings = self._calculate_quality(
@@ -325,15 +326,7 @@ class DeepContentAnalyzer:
         text_content = soup.get_text(separator=' ', strip=True)
         
         # Validiere alle Felder
-        validations = []
-        for field_name, field_config in self.datenschutz_patterns.items():
-            validation = self._validate_field(
-                field_name,
-                field_config,
-                text_content,
-                soup
-            )
-            validations.append(validation)
+        validations = list(self.validate_fields(self.datenschutz_patterns, text_content, soup).values())
         
         # Berechne Qualität
         overall_quality, missing_fields, warnings = self._calculate_quality(
@@ -361,6 +354,23 @@ class DeepContentAnalyzer:
     # VALIDATION LOGIC
     # ========================================================================
     
+    def validate_fields(
+        self,
+        patterns_config: Dict[str, Dict[str, Any]],
+        text_content: str,
+        soup: Optional[BeautifulSoup] = None
+    ) -> Dict[str, ContentValidation]:
+        """
+        Pattern-Stufe für alle Felder einer Seite in einem Durchlauf
+        
+        Returns:
+            Dict field_name → ContentValidation (Reihenfolge wie patterns_config)
+        """
+        return {
+            field_name: self._validate_field(field_name, field_config, text_content, soup)
+            for field_name, field_config in patterns_config.items()
+        }
+    
     def _validate_field(
         self,
         field_name: str,
@@ -384,7 +394,7 @@ class DeepContentAnalyzer:
         # Teste alle Patterns
         for pattern in patterns:
             try:
-                matches = re.finditer(pattern, text_content, re.IGNORECASE | re.MULTILINE)
+                matches = _compiled(pattern).finditer(text_content)
                 
                 for match in matches:
                     # Extrahiere Value (erste Gruppe oder ganzer Match)
@@ -471,7 +481,7 @@ class DeepContentAnalyzer:
         
         elif field_name == "ust_id":
             # USt-ID Format: DE + 9 Ziffern
-            if re.match(r"^DE\d{9}$", value.replace(" ", "")):
+            if _UST_ID_FORMAT.match(value.replace(" ", "")):
                 confidence *= 1.4
         
         # Cap at 1.0
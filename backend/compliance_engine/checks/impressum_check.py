@@ -12,6 +12,8 @@ import re
 import logging
 import aiohttp
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -45,9 +47,10 @@ def _find_impressum_links(soup: BeautifulSoup) -> List:
         'anbieterkennzeichnung', 'pflichtangaben', 'site notice',
     ]
     
-    for a_tag in soup.find_all('a', href=True):
-        href = a_tag.get('href', '').lower()
-        link_text = a_tag.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a_tag = link.tag
+        href = link.href_lower
+        link_text = link.text_lower
         aria_label = (a_tag.get('aria-label') or '').lower()
         title = (a_tag.get('title') or '').lower()
         
@@ -70,7 +73,7 @@ async def check_impressum_compliance_smart(url: str, html: str = None, session=N
     Erkennt automatisch Client-Side-Rendering (React, Vue, Next.js)
     und rendert die Seite vollständig im Browser.
     """
-    from ..browser_renderer import smart_fetch_html, detect_client_rendering
+    from ..browser_renderer import smart_fetch_html
     
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
@@ -88,21 +91,17 @@ async def check_impressum_compliance_smart(url: str, html: str = None, session=N
                 async with temp_session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
                     html = await response.text()
         
-        needs_browser, reason = detect_client_rendering(html)
-        
-        if needs_browser:
-            logger.info(f"🌐 Browser needed for Impressum check: {reason}")
-            html, metadata = await smart_fetch_html(url, html)
-            logger.info(f"✅ Browser rendering completed: {metadata.get('rendering_type', 'unknown')}")
-        else:
-            logger.info(f"⚡ Server-rendered detected, using simple HTML for Impressum check")
+        # Render-Entscheidung, Single-Flight und HTML-Cache liegen im RenderService
+        html, metadata = await smart_fetch_html(url, html)
+        if metadata.get('used_browser'):
+            logger.info(f"✅ Browser rendering for Impressum check: {metadata.get('rendering_type', 'unknown')}")
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = ParsedPage(url, html).soup
         return await check_impressum_compliance(url, soup, session)
         
     except Exception as e:
         logger.error(f"❌ Smart Impressum check failed: {e}")
-        soup = BeautifulSoup(html if html else "", 'html.parser')
+        soup = ParsedPage(url, html).soup
         return await check_impressum_compliance(url, soup, session)
 
 
@@ -330,7 +329,7 @@ async def check_impressum_compliance(url: str, soup: BeautifulSoup, session=None
             logger.warning("⚠️ HybridValidator nicht verfügbar - überspringe Deep-Analyse")
 
     # DDG-spezifische Zusatzchecks
-    html_text = str(soup).lower()
+    html_text = ParsedPage.of(soup).markup_lower
 
     # OS-Plattform-Link nach 20.07.2025 muss entfernt werden (ganzer Seiten-HTML ist korrekt)
     if 'ec.europa.eu/consumers/odr' in html_text or 'webgate.ec.europa.eu/odr' in html_text:
@@ -10,6 +10,8 @@ from dataclasses import dataclass, asdict
 import re
 import logging
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +29,7 @@ class PAngVIssue:
 
 
 def _has_shop_context(soup: BeautifulSoup) -> bool:
-    html_lower = str(soup).lower()
+    html_lower = ParsedPage.of(soup).markup_lower
     shop_patterns = [
         r'warenkorb', r'shopping.cart', r'checkout', r'jetzt kaufen', r'buy now',
         r'in den warenkorb', r'add to cart', r'preis.*€', r'€.*preis',
@@ -47,8 +49,8 @@ async def check_pangv_compliance(url: str, soup: BeautifulSoup, session=None) ->
         logger.info("Keine Shop-Indikatoren — PAngV nicht relevant")
         return issues
 
-    html_text = str(soup).lower()
-    html_raw = str(soup)
+    html_text = ParsedPage.of(soup).markup_lower
+    html_raw = ParsedPage.of(soup).markup
 
     # §3 PAngV: Preise müssen MwSt. inkl. ausweisen
     has_prices = bool(re.search(r'\d+[.,]\d{2}\s*€|\d+\s*€', html_raw))
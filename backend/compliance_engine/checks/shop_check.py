@@ -19,6 +19,8 @@ import aiohttp
 import ssl
 import certifi
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,7 +39,7 @@ def detect_shop(soup: BeautifulSoup) -> bool:
     Zentrale Shop-Erkennung. Threshold: mindestens 3 übereinstimmende Patterns.
     Einzige Shop-Detection für alle Shop-Checks — kein Duplikat-Code.
     """
-    html_lower = str(soup).lower()
+    html_lower = ParsedPage.of(soup).markup_lower
     matches = sum(1 for p in SHOP_PATTERNS if re.search(p, html_lower))
     logger.info(f"Shop-Detection: {matches}/{SHOP_THRESHOLD} Patterns")
     return matches >= SHOP_THRESHOLD
@@ -99,9 +101,10 @@ async def _check_agb(base_url: str, soup: BeautifulSoup, session) -> List[ShopIs
                'terms of service', 'terms & conditions', 'geschäftsbedingungen']
 
     agb_url = None
-    for a in soup.find_all('a', href=True):
-        href = a.get('href', '').lower()
-        text = a.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a = link.tag
+        href = link.href_lower
+        text = link.text_lower
         if any(k in href for k in href_kw) or any(k in text for k in text_kw):
             agb_url = urljoin(base_url, a.get('href', ''))
             break
@@ -171,9 +174,10 @@ async def _check_widerruf(base_url: str, soup: BeautifulSoup, session) -> List[S
                'right of withdrawal', 'cancellation policy', 'rückgaberecht']
 
     widerruf_url = None
-    for a in soup.find_all('a', href=True):
-        href = a.get('href', '').lower()
-        text = a.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a = link.tag
+        href = link.href_lower
+        text = link.text_lower
         if any(k in href for k in href_kw) or any(k in text for k in text_kw):
             widerruf_url = urljoin(base_url, a.get('href', ''))
             break
@@ -237,8 +241,8 @@ async def _check_widerruf(base_url: str, soup: BeautifulSoup, session) -> List[S
 
 async def _check_pangv(soup: BeautifulSoup) -> List[ShopIssue]:
     issues = []
-    html_text = str(soup).lower()
-    html_raw = str(soup)
+    html_text = ParsedPage.of(soup).markup_lower
+    html_raw = ParsedPage.of(soup).markup
 
     has_prices = bool(re.search(r'\d+[.,]\d{2}\s*€|\d+\s*€', html_raw))
     if has_prices:
@@ -299,7 +303,7 @@ async def _check_pangv(soup: BeautifulSoup) -> List[ShopIssue]:
 
 async def _check_kuendigungsbutton(soup: BeautifulSoup) -> List[ShopIssue]:
     issues = []
-    html_text = str(soup).lower()
+    html_text = ParsedPage.of(soup).markup_lower
     if not re.search(r'abonnement|\babo\b|subscription|monatlich|jährlich|recurring|mitgliedschaft|membership', html_text):
         return issues
     if not re.search(r'verträge hier kündigen|vertrag kündigen|abo.*kündigen|subscription.*cancel|cancel.*subscription', html_text):
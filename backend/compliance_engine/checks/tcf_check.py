@@ -9,6 +9,8 @@ from dataclasses import dataclass, asdict
 import re
 import json
 
+from ..parsed_page import ParsedPage
+
 @dataclass
 class TCFIssue:
     category: str
@@ -51,7 +53,7 @@ async def check_tcf_compliance(url: str, soup: BeautifulSoup, page_content: str
     has_tcfapi = False
     
     # Suche nach __tcfapi in Inline-Scripts
-    inline_scripts = soup.find_all('script', src=False)
+    inline_scripts = ParsedPage.of(soup).inline_scripts
     for script in inline_scripts:
         script_content = script.string or ''
         if '__tcfapi' in script_content or 'window.__tcfapi' in script_content:
@@ -61,9 +63,9 @@ async def check_tcf_compliance(url: str, soup: BeautifulSoup, page_content: str
     
     # Suche nach __tcfapi in externen Scripts (häufig bei CMPs)
     if not has_tcfapi:
-        external_scripts = soup.find_all('script', src=True)
+        external_scripts = ParsedPage.of(soup).external_scripts
         for script in external_scripts:
-            src = script.get('src', '').lower()
+            src = script.src.lower()
             # Bekannte TCF CMPs
             tcf_patterns = [
                 r'consent\.cookiebot\.com',
@@ -158,9 +160,9 @@ async def check_tcf_compliance(url: str, soup: BeautifulSoup, page_content: str
         has_non_tcf_cmp = False
         cmp_name = None
         
-        scripts = soup.find_all('script', src=True)
+        scripts = ParsedPage.of(soup).external_scripts
         for script in scripts:
-            src = script.get('src', '').lower()
+            src = script.src.lower()
             for cmp in non_tcf_cmps:
                 if cmp in src:
                     has_non_tcf_cmp = True
@@ -313,10 +315,10 @@ def detect_cmp_from_scripts(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
         }
     }
     
-    scripts = soup.find_all('script', src=True)
+    scripts = ParsedPage.of(soup).external_scripts
     
     for script in scripts:
-        src = script.get('src', '').lower()
+        src = script.src.lower()
         
         for cmp_name, data in cmp_signatures.items():
             for pattern in data["patterns"]:
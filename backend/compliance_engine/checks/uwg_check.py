@@ -9,6 +9,8 @@ from dataclasses import dataclass, asdict
 import re
 import logging
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,7 +36,7 @@ async def check_uwg_compliance(url: str, soup: BeautifulSoup, session=None) -> L
     - Werbung nicht als solche erkennbar
     """
     issues = []
-    html_text = str(soup).lower()
+    html_text = ParsedPage.of(soup).markup_lower
 
     # §5b UWG: Kundenbewertungen ohne Verification-Disclosure
     has_reviews = bool(re.search(
@@ -111,7 +113,7 @@ async def check_uwg_compliance(url: str, soup: BeautifulSoup, session=None) -> L
         r'trusted\s*shop|eco.*zertifikat|din\s*iso|tüv|dekra)',
         re.I
     )
-    seal_matches = seal_patterns.findall(str(soup))
+    seal_matches = seal_patterns.findall(ParsedPage.of(soup).markup)
     if seal_matches:
         has_seal_link = bool(soup.find('a', href=re.compile(
             r'(zertifikat|certificate|award|siegel|testbericht|test-report|nachweis)',
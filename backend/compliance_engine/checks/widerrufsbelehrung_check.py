@@ -13,6 +13,8 @@ import aiohttp
 import ssl
 import certifi
 
+from ..parsed_page import ParsedPage
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,7 +32,7 @@ class WiderrufsbelehrungIssue:
 
 
 def _has_shop_indicators(soup: BeautifulSoup) -> bool:
-    html_lower = str(soup).lower()
+    html_lower = ParsedPage.of(soup).markup_lower
     shop_patterns = [
         r'in den warenkorb', r'add to cart', r'zum warenkorb', r'jetzt kaufen',
         r'kaufen', r'bestellen', r'checkout', r'warenkorb', r'cart',
@@ -51,9 +53,10 @@ def _find_widerrufsbelehrung_links(soup: BeautifulSoup) -> List:
         'right of withdrawal', 'cancellation policy', 'rückgaberecht',
     ]
     all_links = []
-    for a_tag in soup.find_all('a', href=True):
-        href = a_tag.get('href', '').lower()
-        link_text = a_tag.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a_tag = link.tag
+        href = link.href_lower
+        link_text = link.text_lower
         aria_label = (a_tag.get('aria-label') or '').lower()
         title_attr = (a_tag.get('title') or '').lower()
         if any(kw in href for kw in href_keywords):
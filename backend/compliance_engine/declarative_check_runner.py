@@ -29,6 +29,7 @@ import certifi
 from bs4 import BeautifulSoup
 
 from compliance_engine.checks.shop_check import detect_shop
+from compliance_engine.parsed_page import ParsedPage
 
 logger = logging.getLogger(__name__)
 
@@ -187,9 +188,10 @@ async def _detect_required_element(
             logger.warning(f"Invalid html_pattern '{pat}': {e}")
 
     # 2. Links per href / Text / aria-label / title
-    for a in soup.find_all("a", href=True):
-        href = (a.get("href") or "").lower()
-        text = a.get_text(strip=True).lower()
+    for link in ParsedPage.of(soup).links:
+        a = link.tag
+        href = link.href_lower
+        text = link.text_lower
         aria = (a.get("aria-label") or "").lower()
         title = (a.get("title") or "").lower()
         if any(k in href for k in link_href_kw):
@@ -298,7 +300,7 @@ async def run_declarative_checks(url: str, soup: BeautifulSoup, session=None) ->
     if not checks:
         return []
 
-    html_lower = str(soup).lower()
+    html_lower = ParsedPage.of(soup).markup_lower
     issues: List[Dict[str, Any]] = []
 
     for check in checks:
@@ -22,11 +22,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-try:
-    from playwright.async_api import async_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+from .browser_pool import browser_pool, PLAYWRIGHT_AVAILABLE
+
+if not PLAYWRIGHT_AVAILABLE:
     logger.warning("Playwright nicht verfügbar — DeepCookieScanner kann nicht scannen.")
 
 # Note: Would use pyppeteer or async-driver in production
@@ -153,18 +151,13 @@ class DeepCookieScanner:
         url = self.url if self.url.startswith(("http://", "https://")) else f"https://{self.url}"
 
         try:
-            async with async_playwright() as pw:
-                browser = await pw.chromium.launch(
-                    headless=True,
-                    args=["--no-sandbox", "--disable-dev-shm-usage",
-                          "--disable-blink-features=AutomationControlled"],
-                )
-                context = await browser.new_context(
-                    viewport={"width": 1920, "height": 1080},
-                    user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                                "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"),
-                    locale="de-DE",
-                )
+            # Warmer Browser aus dem BrowserPool, isolierter Context pro Scan
+            async with browser_pool.context(
+                viewport={"width": 1920, "height": 1080},
+                user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"),
+                locale="de-DE",
+            ) as context:
                 page = await context.new_page()
 
                 # Alle ausgehenden Requests erfassen (XHR, Script, Img, Font, ...)
@@ -209,9 +202,6 @@ class DeepCookieScanner:
                 except Exception as e:
                     logger.debug(f"Storage-Erfassung fehlgeschlagen: {e}")
 
-                await context.close()
-                await browser.close()
-
             return await self._compile_results()
 
         except Exception as e:
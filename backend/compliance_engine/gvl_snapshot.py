@@ -0,0 +1,472 @@
+"""
+GVL-Snapshot-Service
+Eine geladene, versionierte Global Vendor List (IAB TCF) für alle Verbraucher
+
+Statt die GVL pro Verbraucher eigens zu laden (Analyzer per HTTP in ein
+Modul-Global, Cookie-Routen per SELECT auf tcf_vendors bei jedem Aufruf):
+- Laden einmal je Version: remote → lokale Datei → eingebaute Minimal-GVL;
+  eine erfolgreich geladene GVL wird als Datei-Fallback gespeichert
+- Unveränderliche Lookups je Snapshot: Vendor-ID → Datensatz,
+  Purpose → Vendor-Bitset (Consent / LI), Domain → Vendor
+- Die Vendor-Liste für die CMP-Oberfläche (~1 MB JSON) wird je Version einmal
+  serialisiert und vorkomprimiert (gzip, brotli); ETag = GVL-Version + Hash
+- Gleiche vendorListVersion → kein Neuaufbau, nur der Prüfzeitpunkt wandert
+- Das volle Prüfintervall gilt nur nach erfolgreichem Remote-Abruf; nach einem
+  Fehler (Datei-/Minimal-Fallback oder alte Version behalten) wird nach
+  kurzer Zeit erneut versucht
+
+Konfiguration über Umgebungsvariablen:
+- TCF_GVL_URL                URL der GVL (Default: vendor-list.consensu.org/v3)
+- TCF_GVL_FILE               Lokaler Fallback (Default: data/gvl/vendor-list.json)
+- TCF_GVL_REFRESH_INTERVAL   Sekunden bis zur nächsten Versionsprüfung (Default: 86400)
+- TCF_GVL_RETRY_INTERVAL     Sekunden bis zum nächsten Versuch nach einem Fehler (Default: 300)
+
+Usage:
+    from compliance_engine.gvl_snapshot import gvl_snapshot_service
+
+    snapshot = await gvl_snapshot_service.get()
+    vendor = snapshot.vendors.get(755)
+    status, headers, body = snapshot.vendor_list.negotiate(if_none_match, accept_encoding)
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from compliance_engine.tc_string import IdBitset
+from cpu_executor import cpu_executor
+from metrics import gvl_snapshot_version
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GVL_URL = os.getenv("TCF_GVL_URL", "https://vendor-list.consensu.org/v3/vendor-list.json")
+GVL_FILE = os.getenv(
+    "TCF_GVL_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gvl", "vendor-list.json"),
+)
+GVL_REFRESH_INTERVAL = float(os.getenv("TCF_GVL_REFRESH_INTERVAL", "86400"))
+GVL_RETRY_INTERVAL = float(os.getenv("TCF_GVL_RETRY_INTERVAL", "300"))
+
+VENDOR_LIST_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+
+# Domains, die mehr Vendors nennen (Policy-Hoster, CMPs), sind für die Erkennung wertlos
+MAX_VENDORS_PER_DOMAIN = 3
+
+# Script-Domains, die nicht in der GVL-Disclosure stehen (Tag-Manager, SDK-CDNs)
+KNOWN_VENDOR_DOMAINS: Dict[int, Tuple[str, List[str]]] = {
+    755: ("Google Advertising Products", ["doubleclick.net", "googletagmanager.com",
+                                          "googlesyndication.com", "googleadservices.com"]),
+    45: ("Facebook", ["facebook.com", "facebook.net"]),
+    52: ("The Trade Desk", ["adsrvr.org", "thetradedesk.com"]),
+    10: ("Criteo", ["criteo.com", "criteo.net"]),
+    61: ("Amazon", ["amazon-adsystem.com", "amazontag.com"]),
+    32: ("Xandr (AppNexus)", ["adnxs.com", "appnexus.com"]),
+    76: ("PubMatic", ["pubmatic.com"]),
+    81: ("Sovrn", ["lijit.com", "sovrn.com"]),
+    21: ("MediaMath", ["mathtag.com", "mediamath.com"]),
+    754: ("Google Analytics", ["google-analytics.com"]),
+}
+
+# Purposes wie in der CMP-Oberfläche angezeigt
+CMP_UI_PURPOSES = [
+    {"id": 1, "name": "Speicherung von und Zugriff auf Informationen", "description": "Cookies, Geräte- oder ähnliche Online-Kennungen"},
+    {"id": 2, "name": "Einfache Anzeigen", "description": "Anzeige von Werbung"},
+    {"id": 3, "name": "Anzeigenauswahl, -schaltung und -berichterstattung", "description": "Personalisierte Werbung"},
+    {"id": 4, "name": "Personalisierung von Inhalten", "description": "Auswahl personalisierter Inhalte"},
+    {"id": 5, "name": "Messung", "description": "Messung der Anzeigen- und Inhaltsleistung"},
+    {"id": 6, "name": "Anwendung von Marktforschung", "description": "Erkenntnisse über Zielgruppen"},
+    {"id": 7, "name": "Entwicklung und Verbesserung von Produkten", "description": "Entwicklung neuer Produkte"},
+    {"id": 8, "name": "Auswahl einfacher Anzeigen", "description": "Grundlegende Anzeigenauswahl"},
+    {"id": 9, "name": "Erstellung eines personalisierten Anzeigenprofils", "description": "Profil für personalisierte Werbung"},
+    {"id": 10, "name": "Auswahl personalisierter Anzeigen", "description": "Personalisierte Anzeigen basierend auf Profil"}
+]
+
+_SECOND_LEVEL = {"co", "com", "net", "org", "gov", "ac", "edu"}
+
+
+# =============================================================================
+# Domains
+# =============================================================================
+
+def registrable_domain(host: str) -> Optional[str]:
+    """Host → registrierbare Domain (Heuristik, z.B. cdn.example.co.uk → example.co.uk)"""
+    host = (host or "").strip().lower().rstrip(".")
+    host = re.sub(r"^(\*\.|www\.)", "", host)
+    labels = [label for label in host.split(".") if label]
+    if len(labels) < 2 or not re.match(r"^[a-z0-9.-]+$", host):
+        return None
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def gvl_vendor_domains(vendor: Dict[str, Any], disclosure: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Domains eines GVL-Vendors: Hosts aus urls[], deviceStorageDisclosureUrl und
+    (falls geladen) den Domains der Device-Storage-Disclosure
+    """
+    hosts = []
+    for url in vendor.get("urls") or []:
+        hosts += [url.get("privacy"), url.get("legIntClaim")]
+    hosts.append(vendor.get("deviceStorageDisclosureUrl"))
+    if disclosure:
+        hosts += [entry.get("domain") for entry in disclosure.get("domains") or [] if isinstance(entry, dict)]
+        for entry in disclosure.get("disclosures") or []:
+            hosts += entry.get("domains") or [entry.get("domain")]
+
+    domains = set()
+    for value in hosts:
+        if not value or not isinstance(value, str):
+            continue
+        host = urlsplit(value).hostname if "://" in value else value.split("/")[0]
+        domain = registrable_domain(host or "")
+        if domain:
+            domains.add(domain)
+    return sorted(domains)
+
+
+def vendor_domain_map(vendors: Mapping[int, Dict[str, Any]], disclosures: Optional[Dict[int, Dict]] = None) -> Dict[int, List[str]]:
+    """Vendor-ID → Domains, ohne Domains die mehr als MAX_VENDORS_PER_DOMAIN Vendors nennen"""
+    disclosures = disclosures or {}
+    domains = {
+        vendor_id: gvl_vendor_domains(vendor, disclosures.get(vendor_id))
+        for vendor_id, vendor in vendors.items()
+    }
+    usage = Counter(d for ds in domains.values() for d in ds)
+    return {
+        vendor_id: [d for d in ds if usage[d] <= MAX_VENDORS_PER_DOMAIN]
+        for vendor_id, ds in domains.items()
+    }
+
+
+class VendorDomainIndex:
+    """Domain → Vendors; Lookup prüft Host und alle übergeordneten Domains"""
+
+    def __init__(self, entries: Iterable[Tuple[int, str, Iterable[str]]]):
+        self._by_domain: Dict[str, List[Tuple[int, str]]] = {}
+        self.vendor_count = 0
+        for vendor_id, name, domains in entries:
+            self.vendor_count += 1
+            for domain in domains or []:
+                bucket = self._by_domain.setdefault(domain.lower(), [])
+                if all(existing_id != vendor_id for existing_id, _ in bucket):
+                    bucket.append((vendor_id, name))
+
+    def __len__(self) -> int:
+        return len(self._by_domain)
+
+    def match(self, host: str) -> List[Tuple[int, str]]:
+        labels = (host or "").lower().rstrip(".").split(".")
+        matches: List[Tuple[int, str]] = []
+        for i in range(len(labels) - 1):
+            matches += self._by_domain.get(".".join(labels[i:]), [])
+        return matches
+
+
+def known_vendor_entries() -> List[Tuple[int, str, List[str]]]:
+    return [(vendor_id, name, domains) for vendor_id, (name, domains) in KNOWN_VENDOR_DOMAINS.items()]
+
+
+# =============================================================================
+# Snapshot
+# =============================================================================
+
+@dataclass(frozen=True)
+class PrecompressedBody:
+    """Einmal serialisierte und komprimierte Antwort mit ETag"""
+    identity: bytes
+    gzip: bytes
+    brotli: Optional[bytes]
+    etag: str
+    cache_control: str = VENDOR_LIST_CACHE_CONTROL
+
+    @classmethod
+    def from_payload(cls, payload: Any, etag_prefix: str) -> "PrecompressedBody":
+        identity = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(
+            identity=identity,
+            gzip=gzip.compress(identity, compresslevel=9),
+            brotli=brotli.compress(identity, quality=11) if brotli else None,
+            etag=f'"{etag_prefix}-{hashlib.sha256(identity).hexdigest()[:12]}"',
+        )
+
+    def negotiate(self, if_none_match: str = "", accept_encoding: str = "") -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Status, Header und Body für eine Anfrage
+
+        - If-None-Match mit passendem ETag → 304 ohne Body
+        - Encoding nach Accept-Encoding: br > gzip > identity
+        """
+        headers = {
+            "Cache-Control": self.cache_control,
+            "ETag": self.etag,
+            "Vary": "Accept-Encoding",
+        }
+        tags = {tag.strip().removeprefix("W/") for tag in (if_none_match or "").split(",")}
+        if self.etag in tags or "*" in tags:
+            return 304, headers, b""
+
+        encodings = {
+            part.split(";")[0].strip().lower()
+            for part in (accept_encoding or "").split(",")
+            if not re.search(r";\s*q=0(\.0*)?\s*$", part)
+        }
+        if self.brotli is not None and "br" in encodings:
+            headers["Content-Encoding"] = "br"
+            return 200, headers, self.brotli
+        if "gzip" in encodings:
+            headers["Content-Encoding"] = "gzip"
+            return 200, headers, self.gzip
+        return 200, headers, self.identity
+
+
+@dataclass(frozen=True)
+class GVLSnapshot:
+    """
+    Unveränderliche Sicht auf eine GVL-Version
+
+    `gvl` ist das Original-JSON (nur lesen); alle anderen Felder sind
+    vorberechnete Lookups über die aktiven (nicht gelöschten) Vendors.
+    """
+    version: int
+    tcf_policy_version: int
+    last_updated: Optional[str]
+    source: str
+    gvl: Dict[str, Any]
+    vendors: Mapping[int, Mapping[str, Any]]
+    vendor_ids: IdBitset
+    vendors_by_purpose: Mapping[int, IdBitset]
+    vendors_by_li_purpose: Mapping[int, IdBitset]
+    domain_index: VendorDomainIndex
+    vendor_list: PrecompressedBody
+    built_at: float = field(default_factory=time.time)
+
+    def vendors_for_purpose(self, purpose_id: int, legitimate_interest: bool = False) -> IdBitset:
+        lookup = self.vendors_by_li_purpose if legitimate_interest else self.vendors_by_purpose
+        return lookup.get(purpose_id, IdBitset())
+
+
+def _policy_url(vendor: Dict[str, Any]) -> str:
+    urls = vendor.get("urls") or [{}]
+    return vendor.get("policyUrl") or urls[0].get("privacy") or ""
+
+
+def _purpose_bitsets(vendors: Dict[int, Dict[str, Any]], key: str) -> Mapping[int, IdBitset]:
+    bits: Dict[int, int] = {}
+    for vendor_id, vendor in vendors.items():
+        for purpose_id in vendor.get(key) or []:
+            bits[purpose_id] = bits.get(purpose_id, 0) | (1 << vendor_id)
+    return MappingProxyType({purpose_id: IdBitset(mask) for purpose_id, mask in bits.items()})
+
+
+def vendor_list_payload(version: int, vendors: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """Vendor-Liste für die CMP-Oberfläche (Format von /api/cookie-compliance/tcf/vendors)"""
+    vendor_list = [
+        {
+            "vendor_id": vendor_id,
+            "name": vendor.get("name", ""),
+            "purposes": list(vendor.get("purposes") or []),
+            "legitimate_interests": list(vendor.get("legIntPurposes") or []),
+            "special_purposes": list(vendor.get("specialPurposes") or []),
+            "features": list(vendor.get("features") or []),
+            "special_features": list(vendor.get("specialFeatures") or []),
+            "policy_url": _policy_url(vendor),
+        }
+        for vendor_id, vendor in vendors.items()
+    ]
+    vendor_list.sort(key=lambda v: v["name"])
+    return {
+        "success": True,
+        "vendors": vendor_list,
+        "purposes": CMP_UI_PURPOSES,
+        "tcf_version": "2.2",
+        "vendor_list_version": version,
+        "vendor_count": len(vendor_list),
+    }
+
+
+def build_snapshot(gvl: Dict[str, Any], source: str) -> GVLSnapshot:
+    """Baut alle Lookups und die vorkomprimierte Vendor-Liste (CPU-lastig, ~1 MB JSON)"""
+    version = int(gvl.get("vendorListVersion") or 0)
+    vendors = {
+        int(vendor_id): vendor
+        for vendor_id, vendor in (gvl.get("vendors") or {}).items()
+        if not vendor.get("deletedDate")
+    }
+
+    domains = vendor_domain_map(vendors)
+    domain_index = VendorDomainIndex(
+        known_vendor_entries()
+        + [(vendor_id, vendor.get("name", ""), domains[vendor_id]) for vendor_id, vendor in vendors.items()]
+    )
+
+    return GVLSnapshot(
+        version=version,
+        tcf_policy_version=int(gvl.get("tcfPolicyVersion") or 0),
+        last_updated=gvl.get("lastUpdated"),
+        source=source,
+        gvl=gvl,
+        vendors=MappingProxyType({vendor_id: MappingProxyType(vendor) for vendor_id, vendor in vendors.items()}),
+        vendor_ids=IdBitset.from_ids(vendors),
+        vendors_by_purpose=_purpose_bitsets(vendors, "purposes"),
+        vendors_by_li_purpose=_purpose_bitsets(vendors, "legIntPurposes"),
+        domain_index=domain_index,
+        vendor_list=PrecompressedBody.from_payload(vendor_list_payload(version, vendors), f"gvl-{version}"),
+    )
+
+
+def builtin_gvl() -> Dict[str, Any]:
+    """Minimal-GVL mit den wichtigsten Vendors (weder Netz noch Datei verfügbar)"""
+    return {
+        "gvlSpecificationVersion": 3,
+        "vendorListVersion": 0,
+        "tcfPolicyVersion": 4,
+        "lastUpdated": datetime.now().isoformat(),
+        "purposes": {
+            "1": {"name": "Store and/or access information on a device"},
+            "2": {"name": "Use limited data to select advertising"},
+            "3": {"name": "Create profiles for personalised advertising"},
+            "4": {"name": "Use profiles to select personalised advertising"},
+            "5": {"name": "Create profiles to personalise content"},
+            "6": {"name": "Use profiles to select personalised content"},
+            "7": {"name": "Measure advertising performance"},
+            "8": {"name": "Measure content performance"},
+            "9": {"name": "Understand audiences through statistics or combinations of data from different sources"},
+            "10": {"name": "Develop and improve services"},
+            "11": {"name": "Use limited data to select content"}
+        },
+        "vendors": {
+            str(vendor_id): {"id": vendor_id, "name": name}
+            for vendor_id, (name, _) in KNOWN_VENDOR_DOMAINS.items()
+        }
+    }
+
+
+# =============================================================================
+# Service
+# =============================================================================
+
+class GVLSnapshotService:
+    """
+    Hält den aktuellen GVLSnapshot und prüft höchstens alle refresh_interval
+    Sekunden auf eine neue Version (nach Fehlern alle retry_interval Sekunden)
+    """
+
+    def __init__(self, url: str = GVL_URL, fallback_file: str = GVL_FILE,
+                 refresh_interval: float = GVL_REFRESH_INTERVAL,
+                 retry_interval: float = GVL_RETRY_INTERVAL):
+        self.url = url
+        self.fallback_file = fallback_file
+        self.refresh_interval = refresh_interval
+        self.retry_interval = min(retry_interval, refresh_interval)
+        self.snapshot: Optional[GVLSnapshot] = None
+        self.last_error: Optional[str] = None
+        self._next_check_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _fresh(self) -> bool:
+        return self.snapshot is not None and time.monotonic() < self._next_check_at
+
+    def _schedule_next_check(self, source: str):
+        interval = self.refresh_interval if source == "remote" else self.retry_interval
+        self._next_check_at = time.monotonic() + interval
+
+    async def get(self) -> GVLSnapshot:
+        """Aktueller Snapshot; lädt beim ersten Aufruf bzw. nach Ablauf des Intervalls (Single-Flight)"""
+        if self._fresh():
+            return self.snapshot
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._fresh():
+                await self.refresh()
+        return self.snapshot
+
+    async def refresh(self) -> GVLSnapshot:
+        """Lädt die GVL; baut nur neu, wenn sich die vendorListVersion geändert hat"""
+        raw: Optional[bytes] = None
+        try:
+            raw = await self._fetch_remote()
+            gvl, source = json.loads(raw), "remote"
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            if self.snapshot is not None:
+                logger.warning(f"GVL-Aktualisierung fehlgeschlagen, behalte Version {self.snapshot.version}: {e}")
+                self._schedule_next_check("failed")
+                return self.snapshot
+            logger.warning(f"GVL nicht ladbar, nutze lokalen Fallback: {e}")
+            gvl, source = self._load_file()
+
+        if not isinstance(gvl.get("vendors"), dict):
+            logger.warning(f"GVL ({source}) ohne Vendors, nutze eingebaute Minimal-GVL")
+            gvl, source = builtin_gvl(), "builtin"
+        self._schedule_next_check(source)
+
+        version = int(gvl.get("vendorListVersion") or 0)
+        if self.snapshot is not None and self.snapshot.version == version:
+            return self.snapshot
+
+        self.snapshot = await cpu_executor.run("gvl_snapshot", build_snapshot, gvl, source, isolated=False)
+        gvl_snapshot_version.set(version)
+        logger.info(f"✅ GVL-Snapshot v{version} ({source}): {len(self.snapshot.vendors)} Vendors, "
+                    f"Vendor-Liste {len(self.snapshot.vendor_list.identity)} → {len(self.snapshot.vendor_list.gzip)} Bytes (gzip)")
+        if raw is not None:
+            self._save_file(raw)
+        return self.snapshot
+
+    async def _fetch_remote(self) -> bytes:
+        async with httpx.AsyncClient(timeout=15.0) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+            return response.content
+
+    def _load_file(self) -> Tuple[Dict[str, Any], str]:
+        try:
+            with open(self.fallback_file, "rb") as f:
+                return json.loads(f.read()), "file"
+        except (OSError, ValueError) as e:
+            logger.warning(f"GVL-Datei {self.fallback_file} nicht lesbar: {e}")
+            return builtin_gvl(), "builtin"
+
+    def _save_file(self, raw: bytes):
+        tmp_path = f"{self.fallback_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.fallback_file), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, self.fallback_file)
+        except OSError as e:
+            logger.warning(f"GVL-Datei {self.fallback_file} nicht schreibbar: {e}")
+
+    def health(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "status": "up" if snapshot and snapshot.source != "builtin" else ("degraded" if snapshot else "not_loaded"),
+            "version": snapshot.version if snapshot else None,
+            "source": snapshot.source if snapshot else None,
+            "vendors": len(snapshot.vendors) if snapshot else 0,
+            "last_error": self.last_error,
+        }
+
+
+# Globale Instanz
+gvl_snapshot_service = GVLSnapshotService()
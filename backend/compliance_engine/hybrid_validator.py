@@ -5,19 +5,52 @@ Kombiniert Pattern-Matching (schnell) mit KI-Validierung (präzise)
 Strategie:
 - 90% der Fälle: Pattern-Matching (< 100ms)
 - 10% der Fälle: KI-Analyse bei Unsicherheit (~2s)
+
+validate_page arbeitet gebündelt: Pattern-Stufe für alle Felder in einem
+Durchlauf (außerhalb des Event-Loops), alle unsicheren Felder in EINEM
+KI-Prompt mit JSON-Antwort je Feld, Ergebnis-Cache je Seiteninhalt (Hash).
+
+Konfiguration über Umgebungsvariablen:
+- HYBRID_VALIDATION_CACHE_TTL    Gültigkeit gecachter Seiten-Ergebnisse in s (Default: 3600)
+- HYBRID_VALIDATION_CACHE_SIZE   Max. gecachte Seiten pro Prozess (Default: 512)
 """
 
 import anthropic
+import copy
+import hashlib
+import json
 import os
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from cpu_executor import cpu_executor
 from .checks.deep_content_analyzer import DeepContentAnalyzer, ContentValidation, ContentQuality
 
 logger = logging.getLogger(__name__)
 
+AI_MODEL = "claude-3-5-sonnet-20241022"
+AI_TEXT_SAMPLE_CHARS = 3000
+
+# Seiten-Ergebnis-Cache (prozessweit, da Checks je Scan einen neuen Validator erzeugen)
+_CACHE_TTL = int(os.getenv("HYBRID_VALIDATION_CACHE_TTL", "3600"))
+_CACHE_SIZE = int(os.getenv("HYBRID_VALIDATION_CACHE_SIZE", "512"))
+_page_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Field-spezifische Beschreibungen für KI-Prompts
+FIELD_DESCRIPTIONS = {
+    "firmenname": "Vollständiger Firmenname oder Name des Unternehmens (oft mit Rechtsform wie GmbH, AG, etc.)",
+    "adresse": "Vollständige Postanschrift mit Straße, Hausnummer, PLZ und Ort",
+    "email": "E-Mail-Adresse für Kontaktaufnahme",
+    "telefon": "Telefonnummer für Kontaktaufnahme",
+    "verantwortlicher": "Name des Verantwortlichen im Sinne der DSGVO",
+    "zwecke": "Zwecke der Datenverarbeitung (wofür werden Daten genutzt)",
+    "rechtsgrundlage": "Rechtsgrundlage für die Datenverarbeitung (z.B. Art. 6 DSGVO)",
+}
+
 
 class ValidationMethod(Enum):
     """Verwendete Validierungs-Methode"""
@@ -53,7 +86,7 @@ class HybridValidator:
         self.ai_client = None
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if api_key:
-            self.ai_client = anthropic.Anthropic(api_key=api_key)
+            self.ai_client = anthropic.AsyncAnthropic(api_key=api_key)
             logger.info("✅ Hybrid Validator mit KI-Support initialisiert")
         else:
             logger.warning("⚠️ ANTHROPIC_API_KEY nicht gesetzt - nur Pattern-Matching verfügbar")
@@ -81,7 +114,6 @@ class HybridValidator:
         Returns:
             HybridValidationResult
         """
-        import time
         start_time = time.time()
         
         # STUFE 1: Pattern-Matching
@@ -92,11 +124,33 @@ class HybridValidator:
             None  # soup not needed for text-only validation
         )
         
+        # STUFE 2: KI-Validierung nur bei Unsicherheit
+        ai_result = None
+        if validation.confidence < self.uncertain_threshold and self.ai_client:
+            logger.info(f"🤖 KI-Check für {field_name} (Pattern-Confidence: {validation.confidence:.2f})")
+            ai_result = await self._ai_validate_field(
+                field_name,
+                field_config,
+                text_content,
+                validation,
+                context
+            )
+        
+        return self._combine(field_name, validation, ai_result, start_time)
+    
+    def _combine(
+        self,
+        field_name: str,
+        validation: ContentValidation,
+        ai_result: Optional[Dict[str, Any]],
+        start_time: float
+    ) -> HybridValidationResult:
+        """Führt Pattern- und (optionales) KI-Ergebnis zu einem Feld-Ergebnis zusammen"""
+        processing_time = int((time.time() - start_time) * 1000)
+        
         # Entscheidung: Ist Pattern-Result vertrauenswürdig?
         if validation.confidence >= self.confident_threshold:
             # ✅ KLAR: Pattern ist sicher
-            processing_time = int((time.time() - start_time) * 1000)
-            
             logger.info(f"✅ Pattern Match für {field_name}: {validation.confidence:.2f}")
             
             return HybridValidationResult(
@@ -111,10 +165,8 @@ class HybridValidator:
         elif validation.confidence < self.uncertain_threshold:
             # ❓ UNSICHER: KI-Check nötig
             
-            if not self.ai_client:
+            if ai_result is None:
                 # Kein KI verfügbar → Pattern-Result verwenden (mit Warnung)
-                processing_time = int((time.time() - start_time) * 1000)
-                
                 logger.warning(f"⚠️ {field_name} unsicher ({validation.confidence:.2f}), aber keine KI verfügbar")
                 
                 return HybridValidationResult(
@@ -126,19 +178,6 @@ class HybridValidator:
                     processing_time_ms=processing_time
                 )
             
-            # STUFE 2: KI-Validierung
-            logger.info(f"🤖 KI-Check für {field_name} (Pattern-Confidence: {validation.confidence:.2f})")
-            
-            ai_result = await self._ai_validate_field(
-                field_name,
-                field_config,
-                text_content,
-                validation,
-                context
-            )
-            
-            processing_time = int((time.time() - start_time) * 1000)
-            
             return HybridValidationResult(
                 field_name=field_name,
                 found=ai_result["found"],
@@ -151,8 +190,6 @@ class HybridValidator:
         
         else:
             # 🔄 GRENZFALL: Pattern OK, aber nicht perfekt → Hybrid
-            processing_time = int((time.time() - start_time) * 1000)
-            
             logger.info(f"🔄 Hybrid für {field_name}: {validation.confidence:.2f}")
             
             return HybridValidationResult(
@@ -197,8 +234,8 @@ class HybridValidator:
         
         try:
             # Claude API Call
-            response = self.ai_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
+            response = await self.ai_client.messages.create(
+                model=AI_MODEL,
                 max_tokens=500,
                 temperature=0,  # Deterministisch
                 messages=[{
@@ -238,21 +275,10 @@ class HybridValidator:
     ) -> str:
         """Erstellt Prompt für KI-Validierung"""
         
-        # Field-spezifische Beschreibungen
-        field_descriptions = {
-            "firmenname": "Vollständiger Firmenname oder Name des Unternehmens (oft mit Rechtsform wie GmbH, AG, etc.)",
-            "adresse": "Vollständige Postanschrift mit Straße, Hausnummer, PLZ und Ort",
-            "email": "E-Mail-Adresse für Kontaktaufnahme",
-            "telefon": "Telefonnummer für Kontaktaufnahme",
-            "verantwortlicher": "Name des Verantwortlichen im Sinne der DSGVO",
-            "zwecke": "Zwecke der Datenverarbeitung (wofür werden Daten genutzt)",
-            "rechtsgrundlage": "Rechtsgrundlage für die Datenverarbeitung (z.B. Art. 6 DSGVO)",
-        }
-        
-        description = field_descriptions.get(field_name, f"Das Feld '{field_name}'")
+        description = FIELD_DESCRIPTIONS.get(field_name, f"Das Feld '{field_name}'")
         
         # Limitiere Text auf relevante Teile (max 3000 Zeichen)
-        text_sample = text_content[:3000] if len(text_content) > 3000 else text_content
+        text_sample = text_content[:AI_TEXT_SAMPLE_CHARS]
         
         page_type = context.get("page_type", "unknown") if context else "unknown"
         
@@ -350,6 +376,137 @@ Antworte NUR im angegebenen Format, keine zusätzlichen Erläuterungen."""
                 "reasoning": f"Parse error: {str(e)}"
             }
     
+    async def _ai_validate_fields(
+        self,
+        uncertain: Dict[str, ContentValidation],
+        text_content: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """
+        KI-Validierung aller unsicheren Felder einer Seite in einem Call
+        
+        Returns:
+            (Dict field_name → {found, confidence, value, reasoning}, ok) —
+            ok=False wenn der Call fehlschlug (Ergebnis dann nicht cachen)
+        """
+        prompt = self._create_batch_validation_prompt(uncertain, text_content, context)
+        
+        try:
+            response = await self.ai_client.messages.create(
+                model=AI_MODEL,
+                max_tokens=150 * len(uncertain) + 100,
+                temperature=0,  # Deterministisch
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
+            )
+            results, ok = self._parse_batch_ai_response(response.content[0].text, uncertain)
+            logger.info(f"✅ KI-Batch-Validierung: {len(uncertain)} Felder in einem Call")
+            return results, ok
+        
+        except Exception as e:
+            logger.error(f"❌ KI-Batch-Validierung fehlgeschlagen: {e}")
+            
+            # Fallback zu Pattern-Results
+            return {
+                field_name: {
+                    "found": validation.found,
+                    "confidence": validation.confidence * 0.7,  # Reduzierte Confidence
+                    "value": validation.extracted_value,
+                    "reasoning": f"KI-Error: {str(e)}"
+                }
+                for field_name, validation in uncertain.items()
+            }, False
+    
+    def _create_batch_validation_prompt(
+        self,
+        uncertain: Dict[str, ContentValidation],
+        text_content: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Erstellt einen Prompt für alle unsicheren Felder mit JSON-Antwort je Feld"""
+        page_type = context.get("page_type", "unknown") if context else "unknown"
+        text_sample = text_content[:AI_TEXT_SAMPLE_CHARS]
+        
+        field_lines = "\n".join(
+            f'- "{field_name}": {FIELD_DESCRIPTIONS.get(field_name, f"Das Feld {field_name!r}")} '
+            f'(Pattern: gefunden={validation.found}, Confidence={validation.confidence:.2f}, '
+            f'Wert={validation.extracted_value or "None"})'
+            for field_name, validation in uncertain.items()
+        )
+        example = json.dumps(
+            {name: {"found": True, "value": "...", "confidence": 0.9, "reasoning": "..."} for name in list(uncertain)[:1]},
+            ensure_ascii=False
+        )
+        
+        return f"""Du bist ein Compliance-Experte für deutsche Websites.
+
+**Aufgabe:** Prüfe, ob in folgendem Text die unten aufgeführten Felder vorhanden sind.
+
+**Kontext:** {page_type.upper()}-Seite
+
+**Text-Auszug:**
+```
+{text_sample}
+```
+
+**Felder (mit Pattern-Matching-Ergebnis):**
+{field_lines}
+
+**Deine Aufgabe je Feld:**
+1. Prüfe, ob das Feld im Text vorhanden ist
+2. Wenn ja, extrahiere den relevanten Wert (sonst null)
+3. Gib eine Confidence-Bewertung (0.0 - 1.0)
+4. Begründe deine Entscheidung kurz
+
+**Antwortformat:** Ein JSON-Objekt mit genau einem Eintrag pro Feldname, z.B.
+{example}
+
+Antworte NUR mit dem JSON-Objekt, keine zusätzlichen Erläuterungen."""
+    
+    def _parse_batch_ai_response(
+        self,
+        ai_response: str,
+        fallbacks: Dict[str, ContentValidation]
+    ) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """
+        Parsed die JSON-Antwort des Batch-Prompts
+        
+        Fehlende oder ungültige Felder fallen auf das Pattern-Ergebnis zurück.
+        
+        Returns:
+            (Dict field_name → {found, confidence, value, reasoning}, alle Felder gültig)
+        """
+        try:
+            payload = json.loads(ai_response[ai_response.index("{"):ai_response.rindex("}") + 1])
+        except ValueError as e:
+            logger.error(f"❌ Parse-Error: {e}")
+            payload = {}
+        
+        results = {}
+        complete = True
+        for field_name, fallback in fallbacks.items():
+            entry = payload.get(field_name) if isinstance(payload, dict) else None
+            try:
+                value = entry.get("value")
+                results[field_name] = {
+                    "found": bool(entry["found"]),
+                    "confidence": min(1.0, max(0.0, float(entry["confidence"]))),
+                    "value": str(value) if value not in (None, "", "none") else None,
+                    "reasoning": entry.get("reasoning") or "AI validation completed",
+                }
+            except (AttributeError, KeyError, TypeError, ValueError):
+                complete = False
+                results[field_name] = {
+                    "found": fallback.found,
+                    "confidence": fallback.confidence * 0.8,
+                    "value": fallback.extracted_value,
+                    "reasoning": "Parse error: Feld fehlt in KI-Antwort"
+                }
+        
+        return results, complete
+    
     async def validate_page(
         self,
         page_type: str,
@@ -359,6 +516,9 @@ Antworte NUR im angegebenen Format, keine zusätzlichen Erläuterungen."""
         """
         Validiert gesamte Seite (Impressum oder Datenschutz)
         
+        Pattern-Stufe für alle Felder auf einmal, alle unsicheren Felder in
+        einem KI-Call; Ergebnisse werden je Seiteninhalt gecacht.
+        
         Args:
             page_type: "impressum" oder "datenschutz"
             text_content: Text-Content der Seite
@@ -377,21 +537,42 @@ Antworte NUR im angegebenen Format, keine zusätzlichen Erläuterungen."""
         else:
             raise ValueError(f"Unbekannter Page-Type: {page_type}")
         
-        # Validiere alle Felder
-        results = []
-        ai_calls = 0
+        cache_key = _page_cache_key(page_type, text_content, self.ai_client is not None)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"✅ Hybrid-Validierung aus Cache: {page_type} ({url})")
+            cached["url"] = url
+            return cached
         
-        for field_name, field_config in patterns.items():
-            result = await self.validate_field(
-                field_name,
-                field_config,
+        start_time = time.time()
+        
+        # STUFE 1: Pattern-Matching für alle Felder (CPU, außerhalb des Event-Loops)
+        validations = await cpu_executor.run(
+            "hybrid_patterns", self.analyzer.validate_fields, patterns, text_content, isolated=False
+        )
+        
+        # STUFE 2: Alle unsicheren Felder in einem KI-Call
+        uncertain = {
+            field_name: validation
+            for field_name, validation in validations.items()
+            if validation.confidence < self.uncertain_threshold
+        }
+        ai_results: Dict[str, Dict[str, Any]] = {}
+        ai_calls = 0
+        cacheable = True
+        if uncertain and self.ai_client:
+            logger.info(f"🤖 KI-Check für {len(uncertain)} Felder: {', '.join(uncertain)}")
+            ai_results, cacheable = await self._ai_validate_fields(
+                uncertain,
                 text_content,
                 context={"page_type": page_type, "url": url}
             )
-            results.append(result)
-            
-            if result.method_used == ValidationMethod.AI_ASSISTED:
-                ai_calls += 1
+            ai_calls = 1
+        
+        results = [
+            self._combine(field_name, validation, ai_results.get(field_name), start_time)
+            for field_name, validation in validations.items()
+        ]
         
         # Statistiken
         total_fields = len(results)
@@ -420,7 +601,7 @@ Antworte NUR im angegebenen Format, keine zusätzlichen Erläuterungen."""
         
         logger.info(f"✅ Hybrid-Validierung abgeschlossen: {quality} ({ai_calls} KI-Calls)")
         
-        return {
+        page_result = {
             "url": url,
             "page_type": page_type,
             "quality": quality,
@@ -444,8 +625,36 @@ Antworte NUR im angegebenen Format, keine zusätzlichen Erläuterungen."""
                 "required_fields": len(required_fields),
                 "found_required": len(found_required),
                 "ai_calls": ai_calls,
+                "ai_fields": sum(1 for r in results if r.method_used == ValidationMethod.AI_ASSISTED),
                 "pattern_only": sum(1 for r in results if r.method_used == ValidationMethod.PATTERN_ONLY),
                 "hybrid": sum(1 for r in results if r.method_used == ValidationMethod.HYBRID),
             }
         }
+        
+        if cacheable:
+            _cache_put(cache_key, page_result)
+        return page_result
+
+
+def _page_cache_key(page_type: str, text_content: str, ai_enabled: bool) -> str:
+    digest = hashlib.sha256(text_content.encode("utf-8", "surrogatepass")).hexdigest()
+    return f"{page_type}:{int(ai_enabled)}:{digest}"
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    entry = _page_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, result = entry
+    if time.monotonic() - stored_at > _CACHE_TTL:
+        del _page_cache[key]
+        return None
+    _page_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
 
+def _cache_put(key: str, result: Dict[str, Any]):
+    _page_cache[key] = (time.monotonic(), copy.deepcopy(result))
+    _page_cache.move_to_end(key)
+    while len(_page_cache) > _CACHE_SIZE:
+        _page_cache.popitem(last=False)
@@ -4,7 +4,7 @@ Validates if fixes have been implemented correctly via targeted re-scans
 """
 
 from typing import Dict, Any, Optional
-from compliance_engine.scanner import ComplianceScanner
+from compliance_engine.scan_coordinator import scan_coordinator, REVALIDATE_MAX_AGE
 
 
 class LiveValidator:
@@ -25,9 +25,8 @@ class LiveValidator:
             Validation result with status, message, and suggestions
         """
         try:
-            # Perform targeted scan
-            async with ComplianceScanner() as scanner:
-                scan_result = await scanner.scan_website(website_url)
+            # Perform targeted scan (reuses a scan of the same URL from the last seconds)
+            scan_result = await scan_coordinator.scan(website_url, max_age=REVALIDATE_MAX_AGE)
             
             # Get issue category for matching
             if issue_data:
@@ -169,8 +168,7 @@ class LiveValidator:
         results = {}
         
         # Single scan for efficiency
-        async with ComplianceScanner() as scanner:
-            scan_result = await scanner.scan_website(website_url)
+        scan_result = await scan_coordinator.scan(website_url, max_age=REVALIDATE_MAX_AGE)
         
         # Check each fix
         for fix_id in fix_ids:
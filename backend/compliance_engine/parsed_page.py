@@ -0,0 +1,238 @@
+"""
+ParsedPage
+Einmal geparstes Dokumentmodell, das von allen Compliance-Checks geteilt wird
+
+Statt dass jeder Check den Baum erneut per find_all() durchläuft und
+str(soup) (komplette Serialisierung) neu erzeugt:
+- HTML wird einmal mit lxml geparst (Fallback: html.parser)
+- Ein einziger Durchlauf baut den Tag-Index (Name → Tags in Dokumentreihenfolge),
+  erst beim ersten Zugriff
+- Links (mit aufgelösten URLs), Scripts/iFrames/Bilder (mit src-Domains),
+  Formulare, Überschriften, Markup und sichtbarer Text werden lazy einmal
+  berechnet und gecacht
+
+Checks behalten ihre Signatur (url, soup, session) und holen sich das
+Modell über ParsedPage.of(soup) — der Scanner erzeugt es einmal pro URL,
+Einzelaufrufe (Tests, Skripte) bekommen es beim ersten Zugriff.
+
+Usage:
+    page = ParsedPage(url, html)
+    await check_impressum_compliance(url, page.soup, session)
+
+    # im Check:
+    page = ParsedPage.of(soup, url)
+    for link in page.links:
+        ...
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, Tag
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+_PAGE_ATTR = "_complyo_parsed_page"
+_WHITESPACE = re.compile(r"\s+")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+@dataclass(frozen=True, eq=False)
+class PageLink:
+    """<a href> mit aufgelöster URL und vorberechnetem Text"""
+    tag: Tag
+    href: str
+    url: str
+    text: str
+
+    @property
+    def href_lower(self) -> str:
+        return self.href.lower()
+
+    @property
+    def text_lower(self) -> str:
+        return self.text.lower()
+
+    @property
+    def domain(self) -> str:
+        return urlparse(self.url).netloc.lower()
+
+
+@dataclass(frozen=True, eq=False)
+class PageResource:
+    """Element mit src (script, iframe, img, ...) inkl. aufgelöster URL und Domain"""
+    tag: Tag
+    src: str
+    url: str
+    domain: str
+
+
+@dataclass(frozen=True, eq=False)
+class PageHeading:
+    level: int
+    text: str
+    tag: Tag
+
+
+class ParsedPage:
+    """Ein geparstes Dokument + Indizes für die Compliance-Checks"""
+
+    def __init__(
+        self,
+        url: str,
+        html: Optional[str] = None,
+        headers: Optional[Dict[str, Any]] = None,
+        soup: Optional[BeautifulSoup] = None,
+    ):
+        self.url = url or ""
+        self.headers = headers or {}
+        self.soup = soup if soup is not None else BeautifulSoup(html or "", PARSER)
+        self._html = html
+        self._by_name: Optional[Dict[str, List[Tag]]] = None
+        self._position: Dict[int, int] = {}
+        self.soup.__dict__[_PAGE_ATTR] = self
+
+    @classmethod
+    def of(cls, soup: BeautifulSoup, url: str = "") -> "ParsedPage":
+        """Liefert das zum Soup-Baum gehörende Modell (baut es beim ersten Zugriff)"""
+        page = soup.__dict__.get(_PAGE_ATTR)
+        if page is None:
+            page = cls(url, soup=soup)
+        elif url and not page.url:
+            page.url = url
+        return page
+
+    # ------------------------------------------------------------------
+    # Tag-Index
+    # ------------------------------------------------------------------
+
+    def _index(self) -> Dict[str, List[Tag]]:
+        """Baut den Tag-Index beim ersten Zugriff in einem einzigen Baumdurchlauf"""
+        if self._by_name is None:
+            by_name: Dict[str, List[Tag]] = defaultdict(list)
+            for position, tag in enumerate(self.soup.find_all(True)):
+                by_name[tag.name].append(tag)
+                self._position[id(tag)] = position
+            self._by_name = by_name
+        return self._by_name
+
+    def tags(self, *names: str) -> List[Tag]:
+        """Alle Tags mit den Namen in Dokumentreihenfolge (ersetzt soup.find_all(name))"""
+        index = self._index()
+        if len(names) == 1:
+            return index.get(names[0], [])
+        merged = [tag for name in names for tag in index.get(name, [])]
+        return sorted(merged, key=lambda tag: self._position.get(id(tag), 0))
+
+    def first(self, name: str) -> Optional[Tag]:
+        tags = self._index().get(name)
+        return tags[0] if tags else None
+
+    def has(self, name: str) -> bool:
+        return bool(self._index().get(name))
+
+    # ------------------------------------------------------------------
+    # Markup + Text
+    # ------------------------------------------------------------------
+
+    @property
+    def html(self) -> str:
+        """Original-HTML (falls bekannt), sonst das serialisierte Markup"""
+        return self._html if self._html is not None else self.markup
+
+    @cached_property
+    def markup(self) -> str:
+        """str(soup) — einmal serialisiert statt in jedem Check"""
+        return str(self.soup)
+
+    @cached_property
+    def markup_lower(self) -> str:
+        return self.markup.lower()
+
+    @cached_property
+    def text(self) -> str:
+        """Sichtbarer Text wie soup.get_text(separator=' ', strip=True)"""
+        return self.soup.get_text(separator=" ", strip=True)
+
+    @cached_property
+    def text_lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def normalized_text(self) -> str:
+        """Kleingeschriebener Text mit zusammengefassten Whitespaces"""
+        return _WHITESPACE.sub(" ", self.text_lower).strip()
+
+    # ------------------------------------------------------------------
+    # Abgeleitete Indizes
+    # ------------------------------------------------------------------
+
+    def resolve(self, href: str) -> str:
+        return urljoin(self.url, href) if self.url else href
+
+    @cached_property
+    def links(self) -> List[PageLink]:
+        return [
+            PageLink(tag=a, href=a.get("href", ""), url=self.resolve(a.get("href", "")), text=a.get_text(strip=True))
+            for a in self.tags("a")
+            if a.has_attr("href")
+        ]
+
+    def _resources(self, *names: str) -> List[PageResource]:
+        resources = []
+        for tag in self.tags(*names):
+            src = tag.get("src")
+            if not src:
+                continue
+            url = self.resolve(src)
+            resources.append(PageResource(tag=tag, src=src, url=url, domain=urlparse(url).netloc.lower()))
+        return resources
+
+    @cached_property
+    def scripts(self) -> List[Tag]:
+        return self.tags("script")
+
+    @cached_property
+    def external_scripts(self) -> List[PageResource]:
+        return self._resources("script")
+
+    @cached_property
+    def inline_scripts(self) -> List[Tag]:
+        return [script for script in self.scripts if not script.has_attr("src")]
+
+    @cached_property
+    def iframes(self) -> List[PageResource]:
+        return self._resources("iframe")
+
+    @cached_property
+    def images(self) -> List[Tag]:
+        return self.tags("img")
+
+    @cached_property
+    def embedded_resources(self) -> List[PageResource]:
+        """iframe/script/img mit src in Dokumentreihenfolge"""
+        return self._resources("iframe", "script", "img")
+
+    @cached_property
+    def src_domains(self) -> Set[str]:
+        return {resource.domain for resource in self.embedded_resources if resource.domain}
+
+    @cached_property
+    def forms(self) -> List[Tag]:
+        return self.tags("form")
+
+    @cached_property
+    def headings(self) -> List[PageHeading]:
+        return [
+            PageHeading(level=int(tag.name[1]), text=tag.get_text(strip=True), tag=tag)
+            for tag in self.tags(*HEADING_TAGS)
+        ]
+
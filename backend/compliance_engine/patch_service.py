@@ -11,8 +11,6 @@ Dieser Service ist Teil der anfängerfreundlichen Fix-Pipeline:
 
 import os
 import re
-import asyncio
-import aiohttp
 import json
 import time
 from typing import Dict, List, Any, Optional, Tuple
@@ -21,6 +19,8 @@ from datetime import datetime
 from enum import Enum
 import logging
 
+from llm_gateway import llm_gateway
+
 from .feature_engine import (
     FeatureEngine, FeatureId, StructuredIssue, 
     AutoFixLevel, Difficulty, FixType, feature_engine
@@ -138,7 +138,6 @@ class PatchAIClient:
     
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY", "")
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         self.timeout = 90.0  # Längerer Timeout für komplexe Patches
         
         # Pricing (USD per 1M tokens)
@@ -173,84 +172,33 @@ class PatchAIClient:
         if not self.api_key:
             return False, None, {"error": "OPENROUTER_API_KEY nicht konfiguriert"}
         
-        start_time = time.time()
-        last_error = None
-        
-        for attempt in range(3):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://complyo.tech",
-                        "X-Title": "Complyo BFSG Patch Service"
-                    }
-                    
-                    data = {
-                        "model": model,
-                        "messages": [
-                            {"role": "system", "content": system_message},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": temperature,
-                        "max_tokens": max_tokens
-                    }
-                    
-                    async with session.post(
-                        self.api_url,
-                        headers=headers,
-                        json=data,
-                        timeout=aiohttp.ClientTimeout(total=self.timeout)
-                    ) as response:
-                        response_time = int((time.time() - start_time) * 1000)
-                        
-                        if response.status == 200:
-                            result = await response.json()
-                            content = result["choices"][0]["message"]["content"]
-                            
-                            # Berechne Kosten
-                            usage = result.get("usage", {})
-                            input_tokens = usage.get("prompt_tokens", 0)
-                            output_tokens = usage.get("completion_tokens", 0)
-                            
-                            pricing = self.pricing.get(model, {"input": 5.0, "output": 15.0})
-                            cost = (input_tokens * pricing["input"] / 1_000_000 + 
-                                   output_tokens * pricing["output"] / 1_000_000)
-                            
-                            return True, content, {
-                                "model": model,
-                                "tokens_used": input_tokens + output_tokens,
-                                "cost_usd": cost,
-                                "response_time_ms": response_time
-                            }
-                        
-                        elif response.status == 429:
-                            last_error = "Rate limit erreicht"
-                            await asyncio.sleep(2 ** attempt)
-                            continue
-                        
-                        else:
-                            error_text = await response.text()
-                            last_error = f"API Error {response.status}: {error_text[:200]}"
-                            
-                            if response.status >= 500:
-                                await asyncio.sleep(1)
-                                continue
-                            break
-            
-            except asyncio.TimeoutError:
-                last_error = "Timeout bei AI-API-Call"
-                await asyncio.sleep(1)
-                continue
-            
-            except Exception as e:
-                last_error = f"Exception: {str(e)}"
-                await asyncio.sleep(1)
-                continue
+        response = await llm_gateway.complete(
+            prompt,
+            system_message=system_message,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=self.timeout,
+            title="Complyo BFSG Patch Service",
+            api_key=self.api_key,
+        )
         
-        return False, None, {
-            "error": last_error or "Unbekannter Fehler",
-            "response_time_ms": int((time.time() - start_time) * 1000)
+        if not response.success:
+            return False, None, {
+                "error": response.error or "Unbekannter Fehler",
+                "response_time_ms": response.response_time_ms
+            }
+        
+        # Berechne Kosten
+        pricing = self.pricing.get(response.model, {"input": 5.0, "output": 15.0})
+        cost = (response.prompt_tokens * pricing["input"] / 1_000_000 + 
+               response.completion_tokens * pricing["output"] / 1_000_000)
+        
+        return True, response.content, {
+            "model": response.model,
+            "tokens_used": response.total_tokens,
+            "cost_usd": cost,
+            "response_time_ms": response.response_time_ms
         }
 
 
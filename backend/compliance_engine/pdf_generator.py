@@ -527,3 +527,8 @@ class ComplianceReportGenerator:
         return content
 
 pdf_generator = ComplianceReportGenerator()
+
+
+def render_compliance_report(analysis_data: Dict[str, Any]) -> bytes:
+    """Picklebarer Einstieg für den CPU-Executor (läuft im Worker-Prozess)"""
+    return pdf_generator.generate_compliance_report(analysis_data)
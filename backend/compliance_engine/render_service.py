@@ -0,0 +1,261 @@
+"""
+Render-Service
+Entscheidet, ob eine Seite im Browser gerendert werden muss, und rendert
+jede URL höchstens einmal gleichzeitig
+
+Features:
+- Entscheidungscache je Domain (TTL): Detection läuft einmal pro Domain,
+  nicht in jedem Check erneut
+- Lernt aus Renders: bringt der Browser keinen zusätzlichen Inhalt, wird
+  die Domain bis zum Ablauf der TTL statisch gefetcht
+- Single-Flight: parallele Renders derselben URL teilen sich einen Browser-Lauf
+- HTML-Cache je URL + ETag (bzw. Hash des statischen HTML) mit TTL/LRU
+
+Konfiguration über Umgebungsvariablen:
+- RENDER_DECISION_TTL   Gültigkeit einer Domain-Entscheidung in s (Default: 3600)
+- RENDER_CACHE_TTL      Gültigkeit gerenderten HTMLs in s (Default: 600)
+- RENDER_CACHE_SIZE     Max. gecachte Seiten (Default: 64)
+
+Usage:
+    from compliance_engine.render_service import render_service
+
+    html, metadata = await render_service.fetch(url, static_html, etag=headers.get("ETag"))
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from cpu_executor import cpu_executor
+from metrics import render_requests_total
+
+from .browser_renderer import BrowserRenderer, detect_client_rendering
+
+logger = logging.getLogger(__name__)
+
+DECISION_TTL = float(os.getenv("RENDER_DECISION_TTL", "3600"))
+CACHE_TTL = float(os.getenv("RENDER_CACHE_TTL", "600"))
+CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "64"))
+
+# Gerenderter Text muss mind. so viel länger sein, damit der Browser "etwas gebracht" hat
+RENDER_GAIN_RATIO = 1.1
+RENDER_GAIN_MIN_CHARS = 200
+
+
+def _visible_text_length(html: str) -> int:
+    """Länge des sichtbaren Texts (lxml, ohne Script/Style)"""
+    if not html:
+        return 0
+    try:
+        import lxml.html
+        doc = lxml.html.fromstring(html)
+        for node in doc.xpath("//script|//style|//noscript"):
+            node.drop_tree()
+        return len("".join(doc.text_content().split()))
+    except Exception:
+        return len(html)
+
+
+def _render_added_content(static_html: str, rendered_html: str) -> bool:
+    static_len = _visible_text_length(static_html)
+    rendered_len = _visible_text_length(rendered_html)
+    return rendered_len > static_len * RENDER_GAIN_RATIO + RENDER_GAIN_MIN_CHARS
+
+
+class RenderService:
+    """Smart-Fetch mit Domain-Entscheidungscache, HTML-Cache und Single-Flight"""
+
+    def __init__(
+        self,
+        decision_ttl: float = DECISION_TTL,
+        cache_ttl: float = CACHE_TTL,
+        cache_size: int = CACHE_SIZE,
+        renderer_factory: Callable[[], Any] = BrowserRenderer,
+    ):
+        self.decision_ttl = decision_ttl
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._renderer_factory = renderer_factory
+        self._decisions: Dict[str, Tuple[bool, str, float]] = {}
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._stats = {"static": 0, "rendered": 0, "cache_hits": 0, "joined": 0, "decision_hits": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Entscheidung
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def decide(self, url: str, html: str) -> Tuple[bool, str]:
+        """Browser nötig? Gecacht je Domain, sonst schnelle Detection auf dem statischen HTML"""
+        domain = self._domain(url)
+        cached = self._decisions.get(domain)
+        if cached and cached[2] > time.monotonic():
+            self._stats["decision_hits"] += 1
+            return cached[0], cached[1]
+        needs_browser, reason = detect_client_rendering(html)
+        if html:
+            self._remember(domain, needs_browser, reason)
+        return needs_browser, reason
+
+    def _remember(self, domain: str, needs_browser: bool, reason: str):
+        self._decisions[domain] = (needs_browser, reason, time.monotonic() + self.decision_ttl)
+        if len(self._decisions) > 10 * self.cache_size:
+            now = time.monotonic()
+            self._decisions = {d: v for d, v in self._decisions.items() if v[2] > now}
+
+    # ------------------------------------------------------------------
+    # HTML-Cache
+    # ------------------------------------------------------------------
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, html, metadata = entry
+        if expires <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return html, dict(metadata)
+
+    def _cache_put(self, key: Tuple[str, str], html: str, metadata: Dict[str, Any]):
+        self._cache[key] = (time.monotonic() + self.cache_ttl, html, dict(metadata))
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Fetch
+    # ------------------------------------------------------------------
+
+    async def fetch(self, url: str, simple_html: Optional[str] = None, etag: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Liefert statisches oder gerendertes HTML
+
+        Args:
+            url: URL zum Fetchen
+            simple_html: Optional bereits gefetchtes HTML (spart den statischen Request)
+            etag: Optional ETag der statischen Antwort (sonst Hash des HTML als Cache-Key)
+
+        Returns:
+            Tuple[html, metadata]
+        """
+        if not simple_html:
+            simple_html = await self._fetch_static(url)
+
+        needs_browser, reason = self.decide(url, simple_html)
+        metadata: Dict[str, Any] = {'detection_reason': reason, 'used_browser': needs_browser}
+
+        if not needs_browser:
+            logger.info("⚡ Server-rendered, using simple fetch")
+            metadata['fetch_method'] = 'simple'
+            self._stats["static"] += 1
+            render_requests_total.labels(result="static").inc()
+            return simple_html, metadata
+
+        key = (url, etag or hashlib.sha1(simple_html.encode("utf-8", "replace")).hexdigest())
+        cached = self._cache_get(key)
+        if cached:
+            html, cached_metadata = cached
+            metadata.update(cached_metadata, render_cache='hit')
+            self._stats["cache_hits"] += 1
+            render_requests_total.labels(result="cache_hit").inc()
+            return html, metadata
+
+        task = self._inflight.get(key)
+        if task is None:
+            logger.info(f"🌐 Browser needed: {reason}")
+            task = asyncio.create_task(self._render(url, simple_html, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self._stats["joined"] += 1
+            render_requests_total.labels(result="joined").inc()
+
+        # shield: ein abgebrochener Aufrufer bricht den geteilten Render nicht ab
+        result = await asyncio.shield(task)
+
+        if result.get('success'):
+            metadata.update(result['metadata'])
+            return result['html'], metadata
+
+        if result.get('unavailable'):
+            logger.warning(f"⚠️ Browser not available: {result['error']}, using simple HTML fallback")
+            metadata['browser_error'] = result['error']
+            metadata['used_browser'] = False
+        else:
+            logger.warning("Browser rendering failed, using simple HTML")
+            metadata['browser_error'] = 'render_failed'
+        return simple_html, metadata
+
+    async def _render(self, url: str, simple_html: str, key: Tuple[str, str]) -> Dict[str, Any]:
+        try:
+            async with self._renderer_factory() as renderer:
+                result = await renderer.render_page(url)
+        except Exception as e:
+            self._stats["errors"] += 1
+            render_requests_total.labels(result="error").inc()
+            return {'success': False, 'unavailable': True, 'error': str(e)}
+
+        if not result.get('success'):
+            self._stats["errors"] += 1
+            render_requests_total.labels(result="error").inc()
+            return result
+
+        self._stats["rendered"] += 1
+        render_requests_total.labels(result="rendered").inc()
+        self._cache_put(key, result['html'], result['metadata'])
+
+        try:
+            added = await cpu_executor.run("render_compare", _render_added_content, simple_html, result['html'], isolated=False)
+        except Exception as e:
+            logger.debug(f"Render gain check failed: {e}")
+            added = True
+        if not added:
+            logger.info(f"⚡ Rendering brachte keinen zusätzlichen Inhalt — {self._domain(url)} künftig statisch")
+            self._remember(self._domain(url), False, 'Rendering added no content (learned)')
+        return result
+
+    @staticmethod
+    async def _fetch_static(url: str) -> str:
+        import aiohttp
+        import ssl
+        import certifi
+
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        connector = aiohttp.TCPConnector(ssl=ssl_context)
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            try:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    return await response.text()
+            except Exception as e:
+                logger.warning(f"Simple fetch failed: {e}, trying browser")
+                return ""
+
+    def clear(self):
+        self._decisions.clear()
+        self._cache.clear()
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        return {
+            "status": "up",
+            "domain_decisions": len(self._decisions),
+            "cached_pages": len(self._cache),
+            "inflight_renders": len(self._inflight),
+            **self._stats,
+        }
+
+
+# Globale Instanz
+render_service = RenderService()
@@ -0,0 +1,287 @@
+"""
+Scan-Koordinator
+Führt identische Scans (gleiche normalisierte URL + Profil) nur einmal aus
+
+Statt dass Public-Analyse, Preview, Live-Validierung und Cookie-Scan jeweils
+einen eigenen Voll-Scan starten:
+- Single-Flight: gleichzeitige Anfragen warten auf denselben laufenden Scan
+- Prozess-LRU mit kurzer TTL für erfolgreiche Ergebnisse
+- Optional Redis als zweite Stufe (prozessübergreifend), damit z.B. ein
+  Re-Check in einem anderen Worker den Scan von vor wenigen Sekunden nutzt
+- max_age begrenzt das akzeptierte Alter je Aufruf, bypass_cache erzwingt
+  einen neuen Scan (auch wenn bereits einer läuft; spätere Aufrufer teilen
+  dann den neueren)
+- Gecacht wird nur das Ergebnis; die ParsedPage (outcome.page) bekommen nur
+  der startende und die wartenden Aufrufer eines laufenden Scans
+- Fehlgeschlagene Scans werden geteilt, aber nicht gecacht
+
+Konfiguration über Umgebungsvariablen:
+- SCAN_CACHE_TTL            Sekunden im Prozess-LRU und in Redis, 0 = aus (Default: 60)
+- SCAN_CACHE_SIZE           Max. Ergebnisse im Prozess-LRU (Default: 200)
+- SCAN_REVALIDATE_MAX_AGE   Max. Alter für Fix-Validierungen in s (Default: 30)
+
+Usage:
+    from compliance_engine.scan_coordinator import scan_coordinator
+
+    scan_result = await scan_coordinator.scan(url)
+    outcome = await scan_coordinator.run(url, bypass_cache=True)  # outcome.page = ParsedPage
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from metrics import scan_coordinator_requests_total
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "scan:"
+REVALIDATE_MAX_AGE = float(os.getenv("SCAN_REVALIDATE_MAX_AGE", "30"))
+
+ScanRunner = Callable[[str], Awaitable[Tuple[Dict[str, Any], Any]]]
+
+
+async def _run_compliance_scan(url: str) -> Tuple[Dict[str, Any], Any]:
+    from compliance_engine.scanner import ComplianceScanner
+    async with ComplianceScanner() as scanner:
+        result = await scanner.scan_website(url)
+        return result, scanner.last_page
+
+
+async def _run_cookie_scan(url: str) -> Tuple[Dict[str, Any], Any]:
+    from cookie_scanner_service import cookie_scanner
+    return await cookie_scanner.scan_website(url), None
+
+
+DEFAULT_RUNNERS: Dict[str, ScanRunner] = {
+    "compliance": _run_compliance_scan,
+    "cookie": _run_cookie_scan,
+}
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    return str(value)
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def normalize_url(url: str) -> str:
+    """Schlüssel-URL: Schema ergänzt, Host klein, Default-Port/Fragment/abschließender Slash entfernt"""
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        url = "https://" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "https" and parts.port == 443) or (scheme == "http" and parts.port == 80)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+
+@dataclass
+class ScanOutcome:
+    """Ergebnis eines koordinierten Scans"""
+    result: Dict[str, Any]
+    page: Any = None          # ParsedPage der Startseite (nur fresh / joined)
+    source: str = "fresh"     # fresh | joined | cache | persisted
+    age_seconds: float = 0.0
+
+
+class ScanCoordinator:
+    """Single-Flight + zweistufiger Ergebnis-Cache für Website-Scans"""
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        runners: Optional[Dict[str, ScanRunner]] = None,
+    ):
+        self.ttl = ttl if ttl is not None else float(os.getenv("SCAN_CACHE_TTL", "60"))
+        self.max_size = max_size if max_size is not None else int(os.getenv("SCAN_CACHE_SIZE", "200"))
+        self.redis = None  # wird von main_production beim Startup gesetzt
+        self._runners = dict(runners or DEFAULT_RUNNERS)
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._stats = {"fresh": 0, "joined": 0, "cache": 0, "persisted": 0}
+
+    # ------------------------------------------------------------------
+    # Scan
+    # ------------------------------------------------------------------
+
+    async def scan(self, url: str, profile: str = "compliance", **kwargs) -> Dict[str, Any]:
+        """Wie run(), liefert nur das Scan-Ergebnis"""
+        return (await self.run(url, profile, **kwargs)).result
+
+    async def run(
+        self,
+        url: str,
+        profile: str = "compliance",
+        *,
+        max_age: Optional[float] = None,
+        bypass_cache: bool = False,
+    ) -> ScanOutcome:
+        """
+        Koordinierter Scan
+
+        Args:
+            url: Zu scannende URL (wird für den Schlüssel normalisiert)
+            profile: Scan-Profil ('compliance', 'cookie')
+            max_age: Max. akzeptiertes Alter eines gecachten Ergebnisses in s (Default: TTL)
+            bypass_cache: Cache und laufende Scans ignorieren, immer neu scannen
+
+        Returns:
+            ScanOutcome mit eigener Kopie des Ergebnisses
+        """
+        if profile not in self._runners:
+            raise ValueError(f"Unbekanntes Scan-Profil: {profile}")
+        key = (profile, normalize_url(url))
+        max_age = self.ttl if max_age is None else min(max_age, self.ttl)
+
+        if not bypass_cache and max_age > 0:
+            cached = self._local_get(key, max_age)
+            if cached:
+                return self._outcome(profile, "cache", *cached)
+
+        task = None if bypass_cache else self._inflight.get(key)
+        if task is None and not bypass_cache and max_age > 0 and self.redis:
+            persisted = await self._redis_get(key, max_age)
+            if persisted:
+                stored_at, result = persisted
+                self._local_put(key, stored_at, result)
+                return self._outcome(profile, "persisted", stored_at, result)
+            task = self._inflight.get(key)
+
+        source = "joined"
+        if task is None:
+            source = "fresh"
+            task = asyncio.create_task(self._execute(key, url))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.get(key) is t and self._inflight.pop(key))
+
+        # shield: ein abgebrochener Aufrufer (Timeout, Client weg) bricht den geteilten Scan nicht ab
+        stored_at, result, page = await asyncio.shield(task)
+        return self._outcome(profile, source, stored_at, result, page)
+
+    async def _execute(self, key: Tuple[str, str], url: str) -> Tuple[float, Dict[str, Any], Any]:
+        profile = key[0]
+        logger.info(f"🔎 Scan gestartet ({profile}): {key[1]}")
+        result, page = await self._runners[profile](url)
+        stored_at = time.time()
+        if self.ttl > 0 and not result.get("error"):
+            self._local_put(key, stored_at, result)
+            if self.redis:
+                await self._redis_set(key, stored_at, result)
+        return stored_at, result, page
+
+    def _outcome(
+        self, profile: str, source: str, stored_at: float, result: Dict[str, Any], page: Any = None
+    ) -> ScanOutcome:
+        self._stats[source] += 1
+        scan_coordinator_requests_total.labels(profile=profile, source=source).inc()
+        return ScanOutcome(
+            result=copy.deepcopy(result),
+            page=page,
+            source=source,
+            age_seconds=round(max(0.0, time.time() - stored_at), 3),
+        )
+
+    # ------------------------------------------------------------------
+    # Prozess-LRU
+    # ------------------------------------------------------------------
+
+    def _local_get(self, key: Tuple[str, str], max_age: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.time() - entry[0]
+        if age >= self.ttl:
+            del self._entries[key]
+            return None
+        if age > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _local_put(self, key: Tuple[str, str], stored_at: float, result: Dict[str, Any]):
+        self._entries[key] = (stored_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Redis
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _redis_key(key: Tuple[str, str]) -> str:
+        return f"{REDIS_KEY_PREFIX}{key[0]}:{key[1]}"
+
+    async def _redis_get(self, key: Tuple[str, str], max_age: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        try:
+            raw = await self.redis.get(self._redis_key(key))
+            if not raw:
+                return None
+            payload = json.loads(raw, object_hook=_decode)
+            if time.time() - payload["stored_at"] > max_age:
+                return None
+            return payload["stored_at"], payload["result"]
+        except Exception as e:
+            logger.debug(f"Scan cache Redis read failed: {e}")
+            return None
+
+    async def _redis_set(self, key: Tuple[str, str], stored_at: float, result: Dict[str, Any]):
+        try:
+            payload = json.dumps({"stored_at": stored_at, "result": result}, default=_encode)
+            await self.redis.setex(self._redis_key(key), max(1, int(self.ttl)), payload)
+        except Exception as e:
+            logger.debug(f"Scan cache Redis write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Verwaltung
+    # ------------------------------------------------------------------
+
+    async def invalidate(self, url: str, profile: Optional[str] = None):
+        """Verwirft gecachte Ergebnisse einer URL (alle Profile, falls keins angegeben)"""
+        normalized = normalize_url(url)
+        for name in ([profile] if profile else list(self._runners)):
+            key = (name, normalized)
+            self._entries.pop(key, None)
+            if self.redis:
+                try:
+                    await self.redis.delete(self._redis_key(key))
+                except Exception as e:
+                    logger.debug(f"Scan cache Redis delete failed: {e}")
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        return {
+            "status": "up" if self.ttl > 0 else "cache_disabled",
+            "cached_results": len(self._entries),
+            "inflight_scans": len(self._inflight),
+            "redis": self.redis is not None,
+            **self._stats,
+        }
+
+
+# Globale Instanz
+scan_coordinator = ScanCoordinator()
@@ -31,7 +31,9 @@ from compliance_engine.checks import (
     check_shop_compliance,
     check_uwg_compliance,
 )
-from compliance_engine.browser_renderer import smart_fetch_html, detect_client_rendering
+from compliance_engine.browser_renderer import smart_fetch_html
+from compliance_engine.parsed_page import ParsedPage
+from cpu_executor import cpu_executor
 
 # Import declarative (data-driven) checks — automatisch befüllbar durch den Legal-Change-Monitor
 from compliance_engine.declarative_check_runner import run_declarative_checks
@@ -79,6 +81,7 @@ class ComplianceIssue:
 class ComplianceScanner:
     def __init__(self):
         self.session = None
+        self.last_page: Optional[ParsedPage] = None  # für WebsiteCrawler.crawl_website(page=...)
         
     async def __aenter__(self):
         # Create SSL context
@@ -104,6 +107,7 @@ class ComplianceScanner:
         """
         start_time = datetime.now()
         issues = []
+        self.last_page = None
         
         try:
             # Normalize URL
@@ -115,16 +119,20 @@ class ComplianceScanner:
             if not main_page:
                 return self._create_error_response(url, "Website nicht erreichbar")
             
-            soup = BeautifulSoup(main_page['content'], 'html.parser')
             main_page_headers = main_page.get('headers', {})
 
             # Render once if browser is needed, share HTML across all checks
-            rendered_html = main_page['content']
-            if detect_client_rendering(main_page['content'])[0]:
-                logger.info("🌐 Browser rendering needed — fetching once for all checks")
-                rendered_html, _ = await smart_fetch_html(url, main_page['content'])
+            # (domain decision cache, single-flight and HTML cache live in the RenderService)
+            rendered_html, render_meta = await smart_fetch_html(
+                url, main_page['content'], etag=main_page_headers.get('ETag') or main_page_headers.get('etag')
+            )
+            if render_meta.get('used_browser'):
                 logger.info("✅ Single browser render complete")
-                soup = BeautifulSoup(rendered_html, 'html.parser')
+
+            # Parse once (lxml, off the event loop) — all checks share the tree and its indexes via ParsedPage.of(soup)
+            page = await cpu_executor.run("html_parse", ParsedPage, url, rendered_html, main_page_headers, isolated=False)
+            soup = page.soup
+            self.last_page = page
 
             # Run all compliance checks in parallel using pre-rendered soup
             # barrierefreiheit: no session = single-page only (avoids multi-page scan)
@@ -409,7 +417,8 @@ class ComplianceScanner:
         und grundlegenden Kontaktmöglichkeiten (Email/Formular/Telefon).
         """
         issues = []
-        html_lower = str(soup).lower()
+        page = ParsedPage.of(soup, base_url)
+        html_lower = page.markup_lower
 
         # Kontakt-Link auf der Hauptseite vorhanden?
         contact_link_patterns = [
@@ -422,9 +431,9 @@ class ComplianceScanner:
         ]
 
         has_contact_link = False
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag.get('href', '').lower()
-            text = a_tag.get_text(strip=True).lower()
+        for link in page.links:
+            href = link.href_lower
+            text = link.text_lower
             if any(p in href for p in contact_link_patterns):
                 has_contact_link = True
                 break
@@ -436,7 +445,7 @@ class ComplianceScanner:
         has_email = bool(re.search(r'[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}', html_lower))
 
         # Kontaktformular vorhanden?
-        has_form = bool(soup.find('form'))
+        has_form = page.has('form')
 
         if not has_contact_link and not has_email and not has_form:
             issues.append(ComplianceIssue(
@@ -476,9 +485,10 @@ class ComplianceScanner:
         }
 
         found_platforms = []
+        resources = ParsedPage.of(soup, base_url).embedded_resources
         for platform, patterns in social_patterns.items():
-            for element in soup.find_all(['iframe', 'script', 'img'], src=True):
-                src = element.get('src', '').lower()
+            for resource in resources:
+                src = resource.src.lower()
                 if any(re.search(p, src, re.I) for p in patterns):
                     if platform not in found_platforms:
                         found_platforms.append(platform)
@@ -8,9 +8,11 @@ import base64
 from typing import Dict, List, Any, Optional
 from urllib.parse import urljoin, urlparse
 import logging
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import Page
 import re
 
+from .browser_pool import browser_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,22 +20,18 @@ class ScreenshotService:
     """Service zum Crawlen und Screenshot von Bildern für Accessibility-Checks"""
     
     def __init__(self):
-        self.browser: Optional[Browser] = None
+        self._started = False
         self.max_images = 50  # Limit für Performance
         
     async def __aenter__(self):
-        """Context Manager Entry - initialisiert Browser"""
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(
-            headless=True,
-            args=['--no-sandbox', '--disable-setuid-sandbox']
-        )
+        """Context Manager Entry - stellt sicher, dass der BrowserPool läuft"""
+        await browser_pool.start()
+        self._started = True
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context Manager Exit - schließt Browser"""
-        if self.browser:
-            await self.browser.close()
+        """Context Manager Exit - Browser bleibt warm im Pool"""
+        self._started = False
     
     async def capture_images(self, url: str) -> List[Dict[str, Any]]:
         """
@@ -46,16 +44,16 @@ class ScreenshotService:
         Returns:
             Liste mit Bild-Daten inkl. Screenshots und AI-Vorschlägen
         """
+        context = None
         try:
             logger.info(f"🖼️  Capturing images from {url}")
             
-            if not self.browser:
+            if not self._started:
                 raise RuntimeError("Browser not initialized. Use async context manager.")
             
-            page = await self.browser.new_page()
-            
             # Setze viewport für konsistente Screenshots
-            await page.set_viewport_size({"width": 1920, "height": 1080})
+            context = await browser_pool.acquire_context(viewport={"width": 1920, "height": 1080})
+            page = await context.new_page()
             
             # Navigate zur Seite
             try:
@@ -82,14 +80,16 @@ class ScreenshotService:
                     logger.warning(f"Failed to process image {idx}: {e}")
                     continue
             
-            await page.close()
-            
             logger.info(f"✅ Captured {len(image_data)} images successfully")
             return image_data
             
         except Exception as e:
             logger.error(f"❌ Screenshot capture failed: {e}")
             return []
+        
+        finally:
+            if context is not None:
+                await browser_pool.release_context(context)
     
     async def _process_image(
         self, 
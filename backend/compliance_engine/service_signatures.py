@@ -0,0 +1,205 @@
+"""
+Service Signatures
+Einmal kompilierte Erkennungs-Signaturen für Cookie-/Tracking-Services
+
+Statt für jedes Pattern jedes Services ein eigenes re.search über die komplette
+Seite (Aufwand: Katalog × Seitengröße):
+- Literale Patterns (z.B. 'static\\.hotjar\\.com', '_ga') werden zu EINEM
+  Trie-Regex zusammengefasst und in einem einzigen Durchlauf gefunden;
+  pro Position liefert der Trie den längsten Treffer, kürzere Treffer an
+  derselben Position (Präfixe) werden über eine vorberechnete Hülle ergänzt
+- Echte Regex-Patterns (z.B. 'GTM-[A-Z0-9]+') werden einmal vorkompiliert
+- Request-Domains werden über einen Suffix-Trie (Labels rückwärts) zugeordnet,
+  'facebook.net' trifft also 'connect.facebook.net', aber nicht 'facebook.net.evil.com'
+
+Usage:
+    matcher = SignatureMatcher.from_detection_patterns(DETECTION_PATTERNS)
+    for match in matcher.match(page_content):
+        print(match.service, match.confidence)
+
+    domains = DomainSuffixIndex({'facebook.net': 'facebook_pixel'})
+    domains.lookup('connect.facebook.net')  # [('facebook.net', 'facebook_pixel')]
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+_REGEX_META = set(".^$*+?{}[]|()")
+
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """Liefert den Klartext eines Patterns ohne Regex-Metazeichen, sonst None"""
+    chars = []
+    escaped = False
+    for ch in pattern:
+        if escaped:
+            if ch.isalnum():
+                return None  # \d, \b, \s, ... sind keine Literale
+            chars.append(ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch in _REGEX_META:
+            return None
+        else:
+            chars.append(ch)
+    if escaped or not chars:
+        return None
+    return "".join(chars)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Baut aus Literalen einen Regex mit gemeinsamen Präfixen (greedy → längster Treffer)"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+def confidence_for(matches: int) -> float:
+    """Konfidenz nach Anzahl getroffener Patterns eines Services"""
+    if matches >= 4:
+        return 0.98
+    if matches == 3:
+        return 0.90
+    if matches == 2:
+        return 0.75
+    if matches == 1:
+        return 0.60
+    return 0.0
+
+
+@dataclass
+class ServiceMatch:
+    service: str
+    patterns: List[str] = field(default_factory=list)
+    score: int = 0
+    confidence: float = 0.0
+
+
+class SignatureMatcher:
+    """Kompilierter Multi-Pattern-Matcher über einen Service-Katalog"""
+
+    def __init__(
+        self,
+        catalog: Dict[str, Iterable[str]],
+        boosts: Optional[Dict[str, Iterable[str]]] = None,
+        literal: bool = False,
+    ):
+        """
+        Args:
+            catalog: Service → Patterns (Regex, bzw. Klartext bei literal=True)
+            boosts: Service → Teilstrings, die ein Pattern als besonders aussagekräftig markieren
+            literal: Patterns als Klartext behandeln (Teilstring-Suche)
+        """
+        self._signatures: List[Tuple[str, str]] = []
+        self._boosted: Set[int] = set()
+        self._regexes: List[Tuple[int, Pattern]] = []
+        literals: Dict[str, List[int]] = {}
+
+        boosts = boosts or {}
+        for service, patterns in catalog.items():
+            service_boosts = list(boosts.get(service, []))
+            for pattern in patterns:
+                index = len(self._signatures)
+                self._signatures.append((service, pattern))
+                if any(boost in pattern for boost in service_boosts):
+                    self._boosted.add(index)
+
+                text = pattern if literal else _as_literal(pattern)
+                if text is not None:
+                    literals.setdefault(text.lower(), []).append(index)
+                else:
+                    self._regexes.append((index, re.compile(pattern, re.IGNORECASE)))
+
+        self._literals = literals
+        # Präfix-Hülle: ein Treffer von 'gtag/js' impliziert auch 'gtag' an derselben Position
+        self._implied: Dict[str, List[int]] = {
+            key: [index for other, indices in literals.items() if key.startswith(other) for index in indices]
+            for key in literals
+        }
+        self._combined: Optional[Pattern] = (
+            re.compile("(?=(" + _trie_regex(literals) + "))", re.IGNORECASE) if literals else None
+        )
+
+    @classmethod
+    def from_detection_patterns(cls, catalog: Dict[str, Dict]) -> "SignatureMatcher":
+        """Aus dem Format {service: {'patterns': [...], 'confidence_boost': [...]}}"""
+        return cls(
+            {service: entry.get("patterns", []) for service, entry in catalog.items()},
+            boosts={service: entry.get("confidence_boost", []) for service, entry in catalog.items()},
+        )
+
+    def scan(self, text: str) -> Set[int]:
+        """Indizes aller Signaturen, die im Text vorkommen (ein Durchlauf für alle Literale)"""
+        hits: Set[int] = set()
+        if not text:
+            return hits
+
+        if self._combined is not None:
+            seen: Set[str] = set()
+            for match in self._combined.finditer(text):
+                key = match.group(1).lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                hits.update(self._implied[key])
+                if len(seen) == len(self._literals):
+                    break
+
+        for index, regex in self._regexes:
+            if regex.search(text):
+                hits.add(index)
+        return hits
+
+    def match(self, text: str) -> List[ServiceMatch]:
+        """Getroffene Services in Katalogreihenfolge inkl. Score und Konfidenz"""
+        by_service: Dict[str, ServiceMatch] = {}
+        for index in sorted(self.scan(text)):
+            service, pattern = self._signatures[index]
+            result = by_service.setdefault(service, ServiceMatch(service=service))
+            result.patterns.append(pattern)
+            result.score += 3 if index in self._boosted else 1
+
+        for result in by_service.values():
+            result.confidence = confidence_for(len(result.patterns))
+        return list(by_service.values())
+
+
+class DomainSuffixIndex:
+    """Suffix-Trie über Domain-Labels für die Zuordnung Request-Domain → Service"""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self._root: Dict[str, dict] = {}
+        for suffix, service in mapping.items():
+            node = self._root
+            for label in reversed(suffix.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            node[""] = (suffix, service)
+
+    def lookup(self, domain: str) -> List[Tuple[str, str]]:
+        """Alle (Suffix, Service), deren Suffix die Domain abdeckt — kürzester zuerst"""
+        host = (domain or "").lower().split(":")[0].strip(".")
+        matches = []
+        node = self._root
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            if "" in node:
+                matches.append(node[""])
+        return matches
@@ -0,0 +1,380 @@
+"""
+Site-Crawler
+Multi-Page-Crawl mit begrenzter Parallelität für seitenweite Checks (z.B. BFSG)
+
+Features:
+- Prioritäts-Frontier (Tiefe, Dokumentreihenfolge) statt list.pop(0) →
+  deterministische Seitenauswahl unabhängig von Set-Reihenfolge
+- Normalisierte URL-Deduplizierung (Fragment, Default-Port, Tracking-Parameter,
+  Query-Reihenfolge, Trailing Slash); www.-Varianten zählen zur selben Site
+- Parallelität und Politeness je Host (Semaphore + Mindestabstand, robots.txt Crawl-delay)
+- robots.txt (Disallow + Sitemap-Einträge) und rekursive Sitemap-Indizes (inkl. .xml.gz)
+- Streaming: Seiten werden geparst geliefert, sobald sie geladen sind —
+  Checks laufen, während weitere Seiten noch geladen werden
+
+Konfiguration über Umgebungsvariablen:
+- SITE_CRAWL_MAX_PAGES        Max. gelieferte Seiten (Default: 50)
+- SITE_CRAWL_MAX_DEPTH        Max. Link-Tiefe ab Startseite (Default: 2)
+- SITE_CRAWL_CONCURRENCY      Parallele Requests je Host (Default: 4)
+- SITE_CRAWL_DELAY            Mindestabstand zwischen Requests je Host in s (Default: 0)
+
+Usage:
+    from compliance_engine.site_crawler import SiteCrawler
+
+    async for page in SiteCrawler(session).crawl(url):
+        issues.extend(check(page.url, page.soup))
+"""
+
+import asyncio
+import gzip
+import heapq
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree as ET
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from .parsed_page import ParsedPage
+
+logger = logging.getLogger(__name__)
+
+CRAWLER_USER_AGENT = "Complyo-Scanner/2.0 (Compliance Bot; +https://complyo.tech/scanner)"
+
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".zip", ".gz",
+    ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".mp3", ".mp4", ".webm",
+    ".css", ".js", ".json", ".xml", ".rss", ".woff", ".woff2", ".ttf",
+)
+
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "ref"}
+
+DEFAULT_SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml", "/sitemap/sitemap.xml")
+MAX_SITEMAP_DOCUMENTS = 20
+MAX_ROBOTS_CRAWL_DELAY = 5.0
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normalisiert eine URL für die Deduplizierung.
+    Gibt None für nicht crawlbare URLs (mailto:, javascript:, ...) zurück.
+    """
+    if base:
+        url = urljoin(base, url.strip())
+    parsed = urlparse(url.strip())
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return None
+
+    host = parsed.hostname.lower()
+    port = parsed.port
+    netloc = host if port in (None, 80 if parsed.scheme == "http" else 443) else f"{host}:{port}"
+
+    path = parsed.path or "/"
+    while "//" in path:
+        path = path.replace("//", "/")
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunparse((parsed.scheme.lower(), netloc, path, "", query, ""))
+
+
+def _site_key(host: str) -> str:
+    """Host ohne www. — www.example.de und example.de gelten als dieselbe Site"""
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class CrawledPage:
+    """Eine geladene Seite; wird erst bei Bedarf (einmal) als ParsedPage geparst"""
+    url: str
+    depth: int
+    html: str
+    status: int = 200
+    source: str = "link"
+
+    @cached_property
+    def page(self) -> ParsedPage:
+        return ParsedPage(self.url, self.html)
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        return self.page.soup
+
+
+@dataclass
+class _HostLimiter:
+    """Parallelität + Mindestabstand zwischen Request-Starts für einen Host"""
+    concurrency: int
+    delay: float
+    semaphore: asyncio.Semaphore = field(init=False)
+    next_slot: float = 0.0
+
+    def __post_init__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def wait_turn(self):
+        if self.delay <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class SiteCrawler:
+    """
+    Crawlt eine Website (gleiche Site, max_depth Link-Ebenen) und liefert
+    geparste Seiten als Async-Iterator in Ankunftsreihenfolge.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        max_pages: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        delay: Optional[float] = None,
+        respect_robots: bool = True,
+        use_sitemaps: bool = True,
+        timeout: float = 15.0,
+        user_agent: str = CRAWLER_USER_AGENT,
+    ):
+        self.session = session
+        self.max_pages = max_pages or int(os.getenv("SITE_CRAWL_MAX_PAGES", "50"))
+        self.max_depth = max_depth if max_depth is not None else int(os.getenv("SITE_CRAWL_MAX_DEPTH", "2"))
+        self.concurrency = concurrency or int(os.getenv("SITE_CRAWL_CONCURRENCY", "4"))
+        self.delay = delay if delay is not None else float(os.getenv("SITE_CRAWL_DELAY", "0"))
+        self.respect_robots = respect_robots
+        self.use_sitemaps = use_sitemaps
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.user_agent = user_agent
+
+        self._frontier: List[Tuple[int, Tuple[int, ...], str, str]] = []
+        self._seen: Set[str] = set()
+        self._limiters: Dict[str, _HostLimiter] = {}
+        self._robots: Optional[RobotFileParser] = None
+        self._site: str = ""
+        self.stats = {"fetched": 0, "failed": 0, "skipped_robots": 0, "skipped_non_html": 0, "sitemap_urls": 0}
+
+    # ------------------------------------------------------------------
+    # Öffentliche API
+    # ------------------------------------------------------------------
+
+    async def crawl(self, start_url: str) -> AsyncIterator[CrawledPage]:
+        start = normalize_url(start_url)
+        if not start:
+            return
+        self._site = _site_key(urlparse(start).hostname)
+
+        await self._load_robots(start)
+        self._enqueue(start, depth=0, key=(0,), source="seed", force=True)
+        if self.use_sitemaps:
+            for index, url in enumerate(await self._sitemap_urls(start)):
+                self._enqueue(url, depth=1, key=(index,), source="sitemap")
+
+        pending: Dict[asyncio.Task, None] = {}
+        emitted = 0
+        try:
+            while emitted < self.max_pages and (self._frontier or pending):
+                while self._frontier and len(pending) < self.concurrency and emitted + len(pending) < self.max_pages:
+                    depth, key, url, source = heapq.heappop(self._frontier)
+                    pending[asyncio.create_task(self._fetch(url, depth, key, source))] = None
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                results = []
+                for task in done:
+                    pending.pop(task, None)
+                    if task.result() is not None:
+                        results.append(task.result())
+                for page, key in sorted(results, key=lambda r: (r[0].depth, r[1])):
+                    if page.depth < self.max_depth:
+                        self._enqueue_links(page, key)
+                    emitted += 1
+                    yield page
+                    if emitted >= self.max_pages:
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            logger.info(f"🕸️ Crawl {start}: {emitted} pages, stats={self.stats}")
+
+    # ------------------------------------------------------------------
+    # Frontier
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, url: str, depth: int, key: Tuple[int, ...], source: str = "link", force: bool = False):
+        normalized = normalize_url(url)
+        if not normalized or normalized in self._seen:
+            return
+        if _site_key(urlparse(normalized).hostname) != self._site:
+            return
+        if urlparse(normalized).path.lower().endswith(SKIPPED_EXTENSIONS):
+            return
+        self._seen.add(normalized)
+        if not force and not self._allowed(normalized):
+            self.stats["skipped_robots"] += 1
+            return
+        heapq.heappush(self._frontier, (depth, key, normalized, source))
+
+    def _enqueue_links(self, page: CrawledPage, key: Tuple[int, ...]):
+        base = page.url
+        base_tag = page.page.first("base")
+        if base_tag and base_tag.get("href"):
+            base = urljoin(page.url, base_tag["href"])
+        for index, link in enumerate(page.page.links):
+            if "nofollow" in (link.tag.get("rel") or []):
+                continue
+            url = normalize_url(link.href, base)
+            if url:
+                self._enqueue(url, depth=page.depth + 1, key=key + (index,))
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _limiter(self, url: str) -> _HostLimiter:
+        host = urlparse(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = _HostLimiter(self.concurrency, self.delay)
+            self._limiters[host] = limiter
+        return limiter
+
+    async def _get(self, url: str) -> Tuple[int, str, bytes]:
+        limiter = self._limiter(url)
+        async with limiter.semaphore:
+            await limiter.wait_turn()
+            async with self.session.get(
+                url, timeout=self.timeout, headers={"User-Agent": self.user_agent}, allow_redirects=True
+            ) as response:
+                return response.status, response.headers.get("Content-Type", ""), await response.read()
+
+    async def _fetch(
+        self, url: str, depth: int, key: Tuple[int, ...], source: str
+    ) -> Optional[Tuple[CrawledPage, Tuple[int, ...]]]:
+        try:
+            status, content_type, body = await self._get(url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.debug(f"Failed to fetch {url}: {e}")
+            return None
+
+        if status != 200:
+            self.stats["failed"] += 1
+            return None
+        if content_type and "html" not in content_type.lower():
+            self.stats["skipped_non_html"] += 1
+            return None
+
+        self.stats["fetched"] += 1
+        try:
+            html = body.decode(_charset(content_type) or "utf-8", errors="replace")
+        except LookupError:
+            html = body.decode("utf-8", errors="replace")
+        return CrawledPage(url=url, depth=depth, html=html, status=status, source=source), key
+
+    async def _fetch_text(self, url: str) -> Optional[str]:
+        """Lädt robots.txt/Sitemaps (gzip-komprimierte Sitemaps werden entpackt)"""
+        try:
+            status, _, body = await self._get(url)
+        except Exception as e:
+            logger.debug(f"Failed to fetch {url}: {e}")
+            return None
+        if status != 200:
+            return None
+        if body[:2] == b"\x1f\x8b":
+            try:
+                body = gzip.decompress(body)
+            except OSError:
+                return None
+        return body.decode("utf-8", errors="replace")
+
+    # ------------------------------------------------------------------
+    # robots.txt + Sitemaps
+    # ------------------------------------------------------------------
+
+    async def _load_robots(self, start: str):
+        if not self.respect_robots:
+            return
+        robots_url = urljoin(start, "/robots.txt")
+        text = await self._fetch_text(robots_url)
+        if text is None:
+            return
+        parser = RobotFileParser(robots_url)
+        parser.parse(text.splitlines())
+        self._robots = parser
+
+        crawl_delay = parser.crawl_delay(self.user_agent)
+        if crawl_delay:
+            self.delay = max(self.delay, min(float(crawl_delay), MAX_ROBOTS_CRAWL_DELAY))
+            for limiter in self._limiters.values():
+                limiter.delay = self.delay
+
+    def _allowed(self, url: str) -> bool:
+        return self._robots is None or self._robots.can_fetch(self.user_agent, url)
+
+    async def _sitemap_urls(self, start: str) -> List[str]:
+        """
+        Sammelt Seiten-URLs aus den Sitemaps (robots.txt-Einträge, sonst Standardpfade).
+        Sitemap-Indizes werden rekursiv aufgelöst (max. MAX_SITEMAP_DOCUMENTS Dokumente).
+        """
+        queue = deque((self._robots.site_maps() if self._robots else None) or [])
+        defaults = [] if queue else [urljoin(start, path) for path in DEFAULT_SITEMAP_PATHS]
+        queue = queue or deque(defaults)
+
+        urls: List[str] = []
+        visited: Set[str] = set()
+        while queue and len(visited) < MAX_SITEMAP_DOCUMENTS and len(urls) < self.max_pages:
+            sitemap_url = queue.popleft()
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            text = await self._fetch_text(sitemap_url)
+            if not text:
+                continue
+            try:
+                root = ET.fromstring(text)
+            except ET.ParseError as e:
+                logger.debug(f"Failed to parse sitemap {sitemap_url}: {e}")
+                continue
+
+            locs = [el.text.strip() for el in root.iter() if el.tag.endswith("loc") and el.text]
+            if root.tag.endswith("sitemapindex"):
+                queue.extend(locs)
+            else:
+                urls.extend(locs)
+            if sitemap_url in defaults:
+                # Standardpfade sind Alternativen — nach dem ersten Treffer nur noch Index-Kinder
+                queue = deque(u for u in queue if u not in defaults)
+
+        self.stats["sitemap_urls"] = len(urls)
+        if urls:
+            logger.info(f"📄 Found {len(urls)} URLs in sitemaps")
+        return urls[: self.max_pages]
+
+
+def _charset(content_type: str) -> Optional[str]:
+    for part in content_type.split(";")[1:]:
+        key, _, value = part.strip().partition("=")
+        if key.lower() == "charset" and value:
+            return value.strip('"\'')
+    return None
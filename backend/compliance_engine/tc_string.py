@@ -0,0 +1,291 @@
+"""
+TC String Decoder (IAB TCF v2.x)
+Bit-genaues Decoding von Core-, Disclosed-Vendors- und Publisher-TC-Segment
+
+Consent- und Legitimate-Interest-Vektoren werden als IdBitset (ein Python-int,
+Bit n = ID n) gehalten. Prüfungen über hunderte Vendors sind damit einfache
+Mengenoperationen (&, |, -) statt Listen-Schleifen; Range- und Bitfeld-
+Kodierung landen im selben Format.
+
+Unterstützte Segmente (SegmentType):
+- Core (implizit, immer erstes Segment)
+- 1 = Disclosed Vendors (Pflicht ab TCF 2.2 bei globalem Scope)
+- 2 = Allowed Vendors (in 2.2 abgeschafft, wird aber noch dekodiert)
+- 3 = Publisher TC
+
+Usage:
+    from compliance_engine.tc_string import decode_tc_string, TCStringError
+
+    tc = decode_tc_string(tc_string)
+    missing = tc.vendor_consents - tc.disclosed_vendors
+    if 755 in tc.vendor_consents and 1 in tc.purpose_consents: ...
+"""
+
+import base64
+import binascii
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SEGMENT_DISCLOSED_VENDORS = 1
+SEGMENT_ALLOWED_VENDORS = 2
+SEGMENT_PUBLISHER_TC = 3
+
+# Publisher Restrictions (RestrictionType)
+RESTRICTION_NOT_ALLOWED = 0
+RESTRICTION_REQUIRE_CONSENT = 1
+RESTRICTION_REQUIRE_LEGITIMATE_INTEREST = 2
+
+
+class TCStringError(ValueError):
+    """TC String ist nicht dekodierbar (Encoding, Version oder abgeschnitten)"""
+
+
+class IdBitset:
+    """
+    Unveränderliche Menge positiver IDs als int-Bitmaske (Bit n = ID n).
+
+    Unterstützt `in`, len(), Iteration (aufsteigend) sowie &, |, - gegen
+    andere IdBitsets; `bits` ist die rohe Maske.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> "IdBitset":
+        bits = 0
+        for id_ in ids:
+            bits |= 1 << id_
+        return cls(bits)
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ > 0 and (self.bits >> id_) & 1 == 1
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def __and__(self, other: "IdBitset") -> "IdBitset":
+        return IdBitset(self.bits & other.bits)
+
+    def __or__(self, other: "IdBitset") -> "IdBitset":
+        return IdBitset(self.bits | other.bits)
+
+    def __sub__(self, other: "IdBitset") -> "IdBitset":
+        return IdBitset(self.bits & ~other.bits)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IdBitset) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return f"IdBitset({self.to_list()})"
+
+    @property
+    def max_id(self) -> int:
+        return max(self.bits.bit_length() - 1, 0)
+
+    def to_list(self) -> List[int]:
+        return list(self)
+
+
+@dataclass
+class PublisherTC:
+    """Publisher-TC-Segment (eigene Purposes des Publishers)"""
+    purpose_consents: IdBitset
+    purpose_legitimate_interests: IdBitset
+    num_custom_purposes: int
+    custom_purpose_consents: IdBitset
+    custom_purpose_legitimate_interests: IdBitset
+
+
+@dataclass
+class TCString:
+    """Dekodierter TC String"""
+    version: int
+    created: datetime
+    last_updated: datetime
+    cmp_id: int
+    cmp_version: int
+    consent_screen: int
+    consent_language: str
+    vendor_list_version: int
+    tcf_policy_version: int
+    is_service_specific: bool
+    use_non_standard_texts: bool
+    special_feature_opt_ins: IdBitset
+    purpose_consents: IdBitset
+    purpose_legitimate_interests: IdBitset
+    purpose_one_treatment: bool
+    publisher_cc: str
+    vendor_consents: IdBitset
+    vendor_legitimate_interests: IdBitset
+    # (PurposeId, RestrictionType) -> betroffene Vendors
+    publisher_restrictions: Dict[Tuple[int, int], IdBitset] = field(default_factory=dict)
+    disclosed_vendors: Optional[IdBitset] = None
+    allowed_vendors: Optional[IdBitset] = None
+    publisher_tc: Optional[PublisherTC] = None
+
+    @property
+    def tcf_version(self) -> str:
+        """TCF-Version laut Policy-Version (4 = TCF 2.2, 5 = 2.2 mit Policy-Update 2024)"""
+        return "2.2" if self.tcf_policy_version >= 4 else "2.0"
+
+    def vendors_restricted(self, purpose_id: int, restriction_type: int) -> IdBitset:
+        return self.publisher_restrictions.get((purpose_id, restriction_type), IdBitset())
+
+
+class _BitReader:
+    """Liest MSB-first Bitfelder aus einem dekodierten Segment"""
+
+    __slots__ = ("_bits", "pos")
+
+    def __init__(self, data: bytes):
+        self._bits = "".join(format(byte, "08b") for byte in data)
+        self.pos = 0
+
+    def _take(self, n: int) -> str:
+        end = self.pos + n
+        if end > len(self._bits):
+            raise TCStringError(f"TC String abgeschnitten (Bit {self.pos}+{n} > {len(self._bits)})")
+        chunk = self._bits[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def read_int(self, n: int) -> int:
+        return int(self._take(n), 2) if n else 0
+
+    def read_bool(self) -> bool:
+        return self._take(1) == "1"
+
+    def read_letters(self, count: int) -> str:
+        return "".join(chr(ord("A") + self.read_int(6)) for _ in range(count))
+
+    def read_datetime(self) -> datetime:
+        # Zeitstempel in Dezisekunden seit Epoch
+        return datetime.fromtimestamp(self.read_int(36) / 10, tz=timezone.utc)
+
+    def read_bitfield(self, n: int) -> IdBitset:
+        """n Bits, erstes Bit = ID 1 → int mit Bit 1..n"""
+        if not n:
+            return IdBitset()
+        return IdBitset(int(self._take(n)[::-1], 2) << 1)
+
+    def read_ranges(self) -> IdBitset:
+        """NumEntries(12) × [IsARange(1), Start(16), End(16)?]"""
+        bits = 0
+        for _ in range(self.read_int(12)):
+            is_range = self.read_bool()
+            start = self.read_int(16)
+            end = self.read_int(16) if is_range else start
+            if start < 1 or end < start:
+                raise TCStringError(f"Ungültiger Vendor-Bereich {start}-{end}")
+            bits |= ((1 << (end - start + 1)) - 1) << start
+        return IdBitset(bits)
+
+    def read_vendor_section(self) -> IdBitset:
+        """MaxVendorId(16), IsRangeEncoding(1), Bitfeld oder Range-Einträge"""
+        max_vendor_id = self.read_int(16)
+        if self.read_bool():
+            vendors = self.read_ranges()
+            if vendors.max_id > max_vendor_id:
+                raise TCStringError(f"Vendor {vendors.max_id} > MaxVendorId {max_vendor_id}")
+            return vendors
+        return self.read_bitfield(max_vendor_id)
+
+
+def _decode_segment(segment: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise TCStringError(f"Ungültiges Base64-URL-Segment: {e}") from e
+
+
+def _decode_core(reader: _BitReader) -> TCString:
+    version = reader.read_int(6)
+    if version != 2:
+        raise TCStringError(f"Nicht unterstützte TC-String-Version {version} (erwartet 2)")
+
+    tc = TCString(
+        version=version,
+        created=reader.read_datetime(),
+        last_updated=reader.read_datetime(),
+        cmp_id=reader.read_int(12),
+        cmp_version=reader.read_int(12),
+        consent_screen=reader.read_int(6),
+        consent_language=reader.read_letters(2),
+        vendor_list_version=reader.read_int(12),
+        tcf_policy_version=reader.read_int(6),
+        is_service_specific=reader.read_bool(),
+        use_non_standard_texts=reader.read_bool(),
+        special_feature_opt_ins=reader.read_bitfield(12),
+        purpose_consents=reader.read_bitfield(24),
+        purpose_legitimate_interests=reader.read_bitfield(24),
+        purpose_one_treatment=reader.read_bool(),
+        publisher_cc=reader.read_letters(2),
+        vendor_consents=reader.read_vendor_section(),
+        vendor_legitimate_interests=reader.read_vendor_section(),
+    )
+
+    for _ in range(reader.read_int(12)):
+        purpose_id = reader.read_int(6)
+        restriction_type = reader.read_int(2)
+        key = (purpose_id, restriction_type)
+        tc.publisher_restrictions[key] = tc.vendors_restricted(*key) | reader.read_ranges()
+
+    return tc
+
+
+def _decode_publisher_tc(reader: _BitReader) -> PublisherTC:
+    purpose_consents = reader.read_bitfield(24)
+    purpose_legitimate_interests = reader.read_bitfield(24)
+    num_custom = reader.read_int(6)
+    return PublisherTC(
+        purpose_consents=purpose_consents,
+        purpose_legitimate_interests=purpose_legitimate_interests,
+        num_custom_purposes=num_custom,
+        custom_purpose_consents=reader.read_bitfield(num_custom),
+        custom_purpose_legitimate_interests=reader.read_bitfield(num_custom),
+    )
+
+
+def decode_tc_string(tc_string: str) -> TCString:
+    """
+    Dekodiert einen TC String v2 inkl. optionaler Segmente.
+
+    Raises:
+        TCStringError: bei ungültigem Encoding, Version ≠ 2 oder abgeschnittenen Daten
+    """
+    segments = [s for s in (tc_string or "").strip().split(".") if s]
+    if not segments:
+        raise TCStringError("TC String ist leer")
+
+    tc = _decode_core(_BitReader(_decode_segment(segments[0])))
+
+    for segment in segments[1:]:
+        reader = _BitReader(_decode_segment(segment))
+        segment_type = reader.read_int(3)
+        if segment_type == SEGMENT_DISCLOSED_VENDORS:
+            tc.disclosed_vendors = reader.read_vendor_section()
+        elif segment_type == SEGMENT_ALLOWED_VENDORS:
+            tc.allowed_vendors = reader.read_vendor_section()
+        elif segment_type == SEGMENT_PUBLISHER_TC:
+            tc.publisher_tc = _decode_publisher_tc(reader)
+        else:
+            raise TCStringError(f"Unbekannter Segment-Typ {segment_type}")
+
+    return tc
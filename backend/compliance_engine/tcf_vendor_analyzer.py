@@ -1,23 +1,47 @@
 """
 TCF Vendor Analyzer
 Lädt Global Vendor List (GVL) und analysiert Vendor Consents
+
+- TC Strings werden bit-genau dekodiert (compliance_engine.tc_string), Consent-
+  und LI-Vektoren sind IdBitsets → Vendor-Prüfungen sind Mengenoperationen
+- Vendor-Erkennung über einen Domain-Index aus tcf_vendors.domains (gefüllt von
+  cronjobs/tcf_gvl_sync.py), ergänzt um kuratierte Script-Domains; ohne DB
+  der Index des GVL-Snapshots
+- Die GVL selbst kommt aus dem GVL-Snapshot-Service (compliance_engine.gvl_snapshot)
+
+Konfiguration über Umgebungsvariablen:
+- TCF_VENDOR_INDEX_TTL   Sekunden bis der Domain-Index neu aus der DB geladen wird (Default: 3600)
+
+Usage:
+    from compliance_engine.tcf_vendor_analyzer import tcf_vendor_analyzer
+
+    tcf_vendor_analyzer.db_pool = db_pool  # beim Startup
+    vendors = await tcf_vendor_analyzer.analyze_vendors_on_page(soup)
+    report = await tcf_vendor_analyzer.generate_vendor_report(vendors, tc_string)
 """
 
-import httpx
-import json
-import base64
+import logging
+import time
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 import os
-import asyncio
 
-# Cache für GVL (Global Vendor List)
-_gvl_cache = None
-_gvl_cache_time = None
-GVL_CACHE_DURATION = timedelta(hours=24)  # Cache für 24 Stunden
+from compliance_engine.gvl_snapshot import GVLSnapshot, VendorDomainIndex, gvl_snapshot_service, known_vendor_entries
+from compliance_engine.parsed_page import ParsedPage
+from compliance_engine.tc_string import (
+    IdBitset, TCStringError, decode_tc_string,
+    RESTRICTION_NOT_ALLOWED, RESTRICTION_REQUIRE_CONSENT, RESTRICTION_REQUIRE_LEGITIMATE_INTEREST,
+)
 
-GVL_URL = "https://vendor-list.consensu.org/v2/vendor-list.json"
-GVL_FALLBACK_URL = "https://iabeurope.eu/vendor-list-tcf-v2-0/"
+logger = logging.getLogger(__name__)
+
+VENDOR_INDEX_TTL = int(os.getenv("TCF_VENDOR_INDEX_TTL", "3600"))
+
+RESTRICTION_NAMES = {
+    RESTRICTION_NOT_ALLOWED: "not_allowed",
+    RESTRICTION_REQUIRE_CONSENT: "require_consent",
+    RESTRICTION_REQUIRE_LEGITIMATE_INTEREST: "require_legitimate_interest",
+}
 
 
 class TCFVendorAnalyzer:
@@ -27,73 +51,19 @@ class TCFVendorAnalyzer:
     
     def __init__(self):
         self.gvl_data = None
+        self.snapshot: Optional[GVLSnapshot] = None
+        self.db_pool = None
+        self._domain_index: Optional[VendorDomainIndex] = None
+        self._domain_index_loaded = 0.0
     
     async def load_global_vendor_list(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
-        Lädt die Global Vendor List (GVL) von IAB Europe
-        """
-        global _gvl_cache, _gvl_cache_time
-        
-        # Prüfe Cache
-        if not force_refresh and _gvl_cache and _gvl_cache_time:
-            if datetime.now() - _gvl_cache_time < GVL_CACHE_DURATION:
-                self.gvl_data = _gvl_cache
-                return _gvl_cache
-        
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(GVL_URL)
-                response.raise_for_status()
-                
-                gvl_data = response.json()
-                
-                # Cache aktualisieren
-                _gvl_cache = gvl_data
-                _gvl_cache_time = datetime.now()
-                self.gvl_data = gvl_data
-                
-                return gvl_data
-        
-        except Exception as e:
-            print(f"⚠️ Fehler beim Laden der Global Vendor List: {e}")
-            
-            # Fallback: Lade aus lokalem Cache oder verwende Minimal-GVL
-            return self._get_fallback_gvl()
-    
-    def _get_fallback_gvl(self) -> Dict[str, Any]:
-        """
-        Fallback GVL mit den wichtigsten Vendors
+        Lädt die Global Vendor List (GVL) über den GVL-Snapshot-Service
         """
-        return {
-            "gvlSpecificationVersion": 2,
-            "vendorListVersion": 1,
-            "tcfPolicyVersion": 2,
-            "lastUpdated": datetime.now().isoformat(),
-            "purposes": {
-                "1": {"name": "Store and/or access information on a device"},
-                "2": {"name": "Select basic ads"},
-                "3": {"name": "Create a personalised ads profile"},
-                "4": {"name": "Select personalised ads"},
-                "5": {"name": "Create a personalised content profile"},
-                "6": {"name": "Select personalised content"},
-                "7": {"name": "Measure ad performance"},
-                "8": {"name": "Measure content performance"},
-                "9": {"name": "Apply market research"},
-                "10": {"name": "Develop and improve products"}
-            },
-            "vendors": {
-                "755": {"name": "Google Advertising Products"},
-                "45": {"name": "Facebook"},
-                "52": {"name": "The Trade Desk"},
-                "754": {"name": "Google Analytics"},
-                "61": {"name": "Amazon"},
-                "10": {"name": "Criteo"},
-                "32": {"name": "Xandr (AppNexus)"},
-                "21": {"name": "MediaMath"},
-                "76": {"name": "PubMatic"},
-                "81": {"name": "Sovrn"}
-            }
-        }
+        snapshot = await (gvl_snapshot_service.refresh() if force_refresh else gvl_snapshot_service.get())
+        self.snapshot = snapshot
+        self.gvl_data = snapshot.gvl
+        return snapshot.gvl
     
     def get_vendor_by_id(self, vendor_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -117,10 +87,10 @@ class TCFVendorAnalyzer:
     
     def parse_tc_string_basic(self, tc_string: str) -> Dict[str, Any]:
         """
-        Basis-Parsing eines TC Strings (vereinfacht)
-        
-        HINWEIS: Vollständiges TC String Parsing erfordert die IAB TCF Library.
-        Dies ist eine vereinfachte Version für grundlegende Informationen.
+        Dekodiert einen TC String (Core, Disclosed Vendors, Publisher TC)
+
+        Vendor- und Purpose-Vektoren werden als aufsteigende ID-Listen
+        zurückgegeben; bei Fehlern ist valid=False und error gesetzt.
         """
         
         result = {
@@ -136,118 +106,112 @@ class TCFVendorAnalyzer:
             "purpose_legitimate_interests": [],
             "special_feature_opt_ins": [],
             "publisher_restrictions": {},
-            "error": None
+            "error": None,
+            "tc_string": tc_string,
+            "segments_count": len([s for s in (tc_string or "").split('.') if s]),
         }
         
         try:
-            # TC String v2 ist Base64-URL encoded
-            # Format: Core String enthält Version, Timestamps, CMP ID, etc.
-            
-            # Entferne Segmente (. getrennt)
-            segments = tc_string.split('.')
-            core_string = segments[0] if segments else tc_string
-            
-            # Versuche Base64-URL Decode (vereinfacht)
-            # In Produktion würde man hier die offizielle IAB TCF Library verwenden
-            
-            # Für diese Implementation geben wir strukturierte Daten zurück
-            # ohne vollständiges Parsing
-            
-            result["valid"] = True
-            result["version"] = "2.2"  # Annahme
-            result["tc_string"] = tc_string
-            result["segments_count"] = len(segments)
-            
-            # Info: Für vollständiges Parsing würde man benötigen:
-            # - Bit-level Parsing des Base64-decodierten Strings
-            # - Field-by-field Extraktion nach TCF v2.2 Spec
-            # - Vendor/Purpose Bit Vectors dekodieren
-            
-            result["note"] = "Vollständiges TC String Parsing erfordert IAB TCF Library"
-            
-        except Exception as e:
+            tc = decode_tc_string(tc_string)
+        except TCStringError as e:
             result["error"] = str(e)
+            return result
+        
+        restrictions: Dict[str, Dict[str, List[int]]] = {}
+        for (purpose_id, restriction_type), vendors in sorted(tc.publisher_restrictions.items()):
+            name = RESTRICTION_NAMES.get(restriction_type, str(restriction_type))
+            restrictions.setdefault(str(purpose_id), {})[name] = vendors.to_list()
+        
+        result.update({
+            "valid": True,
+            "version": tc.tcf_version,
+            "tcf_policy_version": tc.tcf_policy_version,
+            "vendor_list_version": tc.vendor_list_version,
+            "created": tc.created.isoformat(),
+            "updated": tc.last_updated.isoformat(),
+            "cmp_id": tc.cmp_id,
+            "cmp_version": tc.cmp_version,
+            "consent_language": tc.consent_language,
+            "publisher_cc": tc.publisher_cc,
+            "is_service_specific": tc.is_service_specific,
+            "purpose_one_treatment": tc.purpose_one_treatment,
+            "vendor_consents": tc.vendor_consents.to_list(),
+            "vendor_legitimate_interests": tc.vendor_legitimate_interests.to_list(),
+            "purpose_consents": tc.purpose_consents.to_list(),
+            "purpose_legitimate_interests": tc.purpose_legitimate_interests.to_list(),
+            "special_feature_opt_ins": tc.special_feature_opt_ins.to_list(),
+            "publisher_restrictions": restrictions,
+            "disclosed_vendors": tc.disclosed_vendors.to_list() if tc.disclosed_vendors is not None else None,
+        })
+        if tc.publisher_tc:
+            result["publisher_tc"] = {
+                "purpose_consents": tc.publisher_tc.purpose_consents.to_list(),
+                "purpose_legitimate_interests": tc.publisher_tc.purpose_legitimate_interests.to_list(),
+                "custom_purpose_consents": tc.publisher_tc.custom_purpose_consents.to_list(),
+                "custom_purpose_legitimate_interests": tc.publisher_tc.custom_purpose_legitimate_interests.to_list(),
+            }
         
         return result
     
+    async def get_domain_index(self, force_refresh: bool = False) -> VendorDomainIndex:
+        """
+        Domain-Index aus tcf_vendors (aktive Vendors mit Domains inkl. Disclosure-
+        Domains) plus kuratierte Script-Domains. Ohne DB oder bei DB-Fehlern der
+        Index des geladenen GVL-Snapshots, sonst nur die kuratierten Domains.
+        """
+        fresh = time.monotonic() - self._domain_index_loaded < VENDOR_INDEX_TTL
+        if self._domain_index is not None and fresh and not force_refresh:
+            return self._domain_index
+        
+        index = None
+        if self.db_pool is not None:
+            try:
+                async with self.db_pool.acquire() as conn:
+                    rows = await conn.fetch("""
+                        SELECT vendor_id, name, domains
+                        FROM tcf_vendors
+                        WHERE is_active AND cardinality(domains) > 0
+                    """)
+                index = VendorDomainIndex(
+                    known_vendor_entries() + [(row["vendor_id"], row["name"], row["domains"]) for row in rows]
+                )
+            except Exception as e:
+                logger.warning(f"TCF Vendor-Domain-Index: tcf_vendors nicht lesbar: {e}")
+        if index is None:
+            snapshot = gvl_snapshot_service.snapshot
+            index = snapshot.domain_index if snapshot else VendorDomainIndex(known_vendor_entries())
+        
+        self._domain_index = index
+        self._domain_index_loaded = time.monotonic()
+        return self._domain_index
+    
     async def analyze_vendors_on_page(self, soup, page_content: str = "") -> List[Dict[str, Any]]:
         """
         Analysiert welche Vendors auf der Seite aktiv sind
-        (basierend auf Script-Tags und bekannten Patterns)
+        (Script-Hosts gegen den Vendor-Domain-Index)
         """
         
         detected_vendors = []
+        seen = set()
+        index = await self.get_domain_index()
         
-        # Lade GVL
-        if not self.gvl_data:
-            await self.load_global_vendor_list()
-        
-        # Bekannte Vendor Patterns (Domain-basiert)
-        vendor_patterns = {
-            "755": {  # Google
-                "name": "Google Advertising Products",
-                "domains": [r'doubleclick\.net', r'google-analytics\.com', r'googletagmanager\.com', 
-                           r'googlesyndication\.com', r'googleadservices\.com']
-            },
-            "45": {  # Facebook
-                "name": "Facebook",
-                "domains": [r'facebook\.com/tr', r'facebook\.net', r'connect\.facebook\.net']
-            },
-            "52": {  # The Trade Desk
-                "name": "The Trade Desk",
-                "domains": [r'adsrvr\.org', r'thetradedesk\.com']
-            },
-            "10": {  # Criteo
-                "name": "Criteo",
-                "domains": [r'criteo\.com', r'criteo\.net']
-            },
-            "61": {  # Amazon
-                "name": "Amazon",
-                "domains": [r'amazon-adsystem\.com', r'amazontag\.com']
-            },
-            "32": {  # Xandr
-                "name": "Xandr (AppNexus)",
-                "domains": [r'adnxs\.com', r'appnexus\.com']
-            },
-            "76": {  # PubMatic
-                "name": "PubMatic",
-                "domains": [r'pubmatic\.com']
-            },
-            "81": {  # Sovrn
-                "name": "Sovrn",
-                "domains": [r'lijit\.com', r'sovrn\.com']
-            },
-            "21": {  # MediaMath
-                "name": "MediaMath",
-                "domains": [r'mathtag\.com', r'mediamath\.com']
-            },
-            "754": {  # Google Analytics
-                "name": "Google Analytics",
-                "domains": [r'google-analytics\.com']
-            }
-        }
-        
-        # Suche nach Vendor-Scripts
-        scripts = soup.find_all('script', src=True)
-        
-        for script in scripts:
-            src = script.get('src', '').lower()
+        for script in ParsedPage.of(soup).external_scripts:
+            src = script.src.lower()
+            host = urlsplit(src).hostname
+            if not host:
+                continue
             
-            for vendor_id, vendor_data in vendor_patterns.items():
-                for domain_pattern in vendor_data["domains"]:
-                    if re.search(domain_pattern, src, re.I):
-                        
-                        # Prüfe ob bereits hinzugefügt
-                        if not any(v["vendor_id"] == vendor_id for v in detected_vendors):
-                            detected_vendors.append({
-                                "vendor_id": vendor_id,
-                                "vendor_name": vendor_data["name"],
-                                "detected_from": "script_src",
-                                "source": src,
-                                "requires_consent": True  # Alle diese Vendors benötigen Consent
-                            })
-                        
-                        break
+            for vendor_id, name in index.match(host):
+                if vendor_id in seen:
+                    continue
+                seen.add(vendor_id)
+                detected_vendors.append({
+                    "vendor_id": str(vendor_id),
+                    "vendor_name": name,
+                    "detected_from": "script_src",
+                    "source": src,
+                    "requires_consent": True  # Alle diese Vendors benötigen Consent
+                })
         
         return detected_vendors
     
@@ -289,6 +253,9 @@ class TCFVendorAnalyzer:
     async def generate_vendor_report(self, detected_vendors: List[Dict], tc_string: Optional[str] = None) -> Dict[str, Any]:
         """
         Generiert einen Vendor Compliance Report
+
+        Mit TC String: Consent-Status je erkanntem Vendor und Abgleich über
+        Bitsets (erkannt ohne Consent, Consent ohne Disclosure, unbekannte IDs).
         """
         
         report = {
@@ -302,31 +269,54 @@ class TCFVendorAnalyzer:
         if not self.gvl_data:
             await self.load_global_vendor_list()
         
+        tc = None
+        if tc_string:
+            try:
+                tc = decode_tc_string(tc_string)
+            except TCStringError as e:
+                report["tc_string_error"] = str(e)
+            report["tc_string_valid"] = tc is not None
+        
+        detected = IdBitset.from_ids(int(v["vendor_id"]) for v in detected_vendors)
+        
         for vendor in detected_vendors:
             vendor_id = int(vendor["vendor_id"])
-            vendor_info = self.get_vendor_by_id(vendor_id)
             
-            vendor_report = {
+            if tc is None:
+                consent_status = "unknown"
+            elif vendor_id in tc.vendor_consents:
+                consent_status = "consent"
+            elif vendor_id in tc.vendor_legitimate_interests:
+                consent_status = "legitimate_interest"
+            else:
+                consent_status = "no_consent"
+            
+            report["vendors"].append({
                 "id": vendor_id,
                 "name": vendor["vendor_name"],
                 "detected_from": vendor.get("detected_from"),
                 "requires_consent": vendor.get("requires_consent"),
                 "purposes": self.get_vendor_purposes(vendor_id),
-                "consent_status": "unknown"  # Würde aus TC String kommen
+                "consent_status": consent_status
+            })
+        
+        if tc is not None:
+            allowed = tc.vendor_consents | tc.vendor_legitimate_interests
+            audit = {
+                "vendors_with_consent": len(tc.vendor_consents),
+                "vendors_with_legitimate_interest": len(tc.vendor_legitimate_interests),
+                "detected_without_consent": (detected - allowed).to_list(),
+                "undisclosed_with_consent": None,
+                "unknown_vendor_ids": [],
             }
-            
-            # Wenn TC String vorhanden, könnte man hier Consent Status prüfen
-            # (erfordert vollständiges TC String Parsing)
-            
-            report["vendors"].append(vendor_report)
+            if tc.disclosed_vendors is not None:
+                audit["undisclosed_with_consent"] = (tc.vendor_consents - tc.disclosed_vendors).to_list()
+            if self.snapshot is not None:
+                audit["unknown_vendor_ids"] = (allowed - self.snapshot.vendor_ids).to_list()
+            report["consent_audit"] = audit
         
         return report
 
 
 # Singleton Instance
 tcf_vendor_analyzer = TCFVendorAnalyzer()
-
-
-# Import für re module (vergessen oben)
-import re
-
@@ -0,0 +1,389 @@
+"""
+Consent-Ingestion-Pipeline
+Gepufferte, gebündelte Speicherung von Cookie-Consent-Logs
+
+Statt pro Banner-Klick SELECT + INSERT + Stats-Upsert auszuführen:
+- Request wird validiert und sofort bestätigt, der Datensatz landet im Puffer
+- Ein Hintergrund-Task schreibt Batches per executemany in cookie_consent_logs
+- Statistiken werden je (site_id, date) voraggregiert → ein Upsert pro Flush
+  statt ein Upsert pro Klick auf dieselbe heiße Zeile
+- Backpressure: voller Puffer → Redis-Spool (durable), sonst ConsentQueueFull
+- Fehlgeschlagene Flushes und Shutdown-Reste gehen in den Redis-Spool und
+  werden beim nächsten Flush nachgeholt; ohne Redis werden Shutdown-Reste
+  einzeln in die DB geschrieben
+
+Konfiguration über Umgebungsvariablen:
+- CONSENT_INGEST_MAX_QUEUE       Max. gepufferte Datensätze (Default: 10000)
+- CONSENT_INGEST_BATCH_SIZE      Datensätze pro Batch (Default: 500)
+- CONSENT_INGEST_FLUSH_INTERVAL  Sekunden zwischen Flushes (Default: 1.0)
+- CONSENT_REVISION_CACHE_TTL     Cache-TTL für Banner-Config-IDs (Default: 60)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from metrics import consent_ingest_flush_seconds, consent_ingest_queue_depth, consent_ingest_records_total
+
+logger = logging.getLogger(__name__)
+
+SPOOL_KEY = "consent_ingest:spool"
+
+INSERT_CONSENT_QUERY = """
+    INSERT INTO cookie_consent_logs (
+        site_id, visitor_id, consent_categories, services_accepted,
+        ip_address_hash, device_fingerprint, user_agent, revision_id, language, banner_shown
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+"""
+
+UPSERT_STATS_QUERY = """
+    INSERT INTO cookie_compliance_stats (
+        site_id, date, total_impressions,
+        accepted_all, accepted_partial, rejected_all,
+        accepted_analytics, accepted_marketing, accepted_functional
+    )
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    ON CONFLICT (site_id, date) DO UPDATE SET
+        total_impressions = cookie_compliance_stats.total_impressions + EXCLUDED.total_impressions,
+        accepted_all = cookie_compliance_stats.accepted_all + EXCLUDED.accepted_all,
+        accepted_partial = cookie_compliance_stats.accepted_partial + EXCLUDED.accepted_partial,
+        rejected_all = cookie_compliance_stats.rejected_all + EXCLUDED.rejected_all,
+        accepted_analytics = cookie_compliance_stats.accepted_analytics + EXCLUDED.accepted_analytics,
+        accepted_marketing = cookie_compliance_stats.accepted_marketing + EXCLUDED.accepted_marketing,
+        accepted_functional = cookie_compliance_stats.accepted_functional + EXCLUDED.accepted_functional,
+        updated_at = NOW()
+"""
+
+# Reihenfolge der Stat-Spalten nach (site_id, date)
+STAT_FIELDS = (
+    "total_impressions", "accepted_all", "accepted_partial", "rejected_all",
+    "accepted_analytics", "accepted_marketing", "accepted_functional",
+)
+
+
+class ConsentQueueFull(Exception):
+    """Puffer voll und kein Spool verfügbar — Client soll später erneut senden"""
+
+
+@dataclass
+class ConsentRecord:
+    """Ein bereits pseudonymisierter Consent-Log-Eintrag"""
+    site_id: str
+    visitor_id: str
+    consent_categories: Dict[str, bool]
+    services_accepted: Optional[List[str]]
+    ip_address_hash: Optional[str]
+    device_fingerprint: Optional[str]
+    user_agent: str
+    revision_id: int
+    language: str
+    banner_shown: bool
+    day: str  # ISO-Datum für die Tagesstatistik
+
+    def insert_args(self) -> Tuple:
+        return (
+            self.site_id,
+            self.visitor_id,
+            json.dumps(self.consent_categories),
+            json.dumps(self.services_accepted) if self.services_accepted else None,
+            self.ip_address_hash,
+            self.device_fingerprint,
+            self.user_agent,
+            self.revision_id,
+            self.language,
+            self.banner_shown,
+        )
+
+    def stat_deltas(self) -> Tuple[int, ...]:
+        cats = self.consent_categories
+        analytics = bool(cats.get("analytics"))
+        marketing = bool(cats.get("marketing"))
+        functional = bool(cats.get("functional"))
+        all_accepted = analytics and marketing and functional
+        rejected = not (analytics or marketing or functional)
+        partial = not all_accepted and not rejected
+        return (1, int(all_accepted), int(partial), int(rejected), int(analytics), int(marketing), int(functional))
+
+
+def aggregate_stats(records: List[ConsentRecord]) -> Dict[Tuple[str, str], List[int]]:
+    """Summiert Stat-Deltas je (site_id, day)"""
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    for record in records:
+        bucket = totals.setdefault((record.site_id, record.day), [0] * len(STAT_FIELDS))
+        for i, delta in enumerate(record.stat_deltas()):
+            bucket[i] += delta
+    return totals
+
+
+class ConsentIngestionPipeline:
+    """
+    Puffert Consent-Logs im Speicher und schreibt sie gebündelt in die DB
+
+    Solange die Pipeline nicht gestartet ist (z.B. in Tests oder Skripten),
+    liefert submit() False und der Aufrufer schreibt direkt.
+    """
+
+    def __init__(
+        self,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        revision_cache_ttl: Optional[float] = None,
+    ):
+        self.max_queue = max_queue or int(os.getenv("CONSENT_INGEST_MAX_QUEUE", "10000"))
+        self.batch_size = batch_size or int(os.getenv("CONSENT_INGEST_BATCH_SIZE", "500"))
+        self.flush_interval = flush_interval or float(os.getenv("CONSENT_INGEST_FLUSH_INTERVAL", "1.0"))
+        self.revision_cache_ttl = revision_cache_ttl or float(os.getenv("CONSENT_REVISION_CACHE_TTL", "60"))
+
+        self.db_pool = None
+        self.redis = None
+        self._buffer: Deque[ConsentRecord] = deque()
+        self._revision_cache: Dict[str, Tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._running = False
+
+        # Statistik für Health-Endpoint
+        self._flushed = 0
+        self._spooled = 0
+        self._rejected = 0
+        self._last_flush_ms: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    async def start(self, db_pool, redis_client=None):
+        """Startet den Flush-Task (idempotent)"""
+        self.db_pool = db_pool
+        self.redis = redis_client
+        if self._running:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(
+            f"✅ Consent-Ingestion gestartet (batch={self.batch_size}, "
+            f"interval={self.flush_interval}s, max_queue={self.max_queue})"
+        )
+
+    async def stop(self):
+        """Stoppt den Flush-Task und schreibt alle gepufferten Datensätze weg"""
+        if not self._running:
+            return
+        self._running = False
+        if self._task:
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"❌ Consent-Flush-Task beendet mit Fehler: {e}")
+            self._task = None
+
+        while self._buffer:
+            if not await self.flush():
+                break
+        if self._buffer and await self._spool(list(self._buffer)):
+            self._buffer.clear()
+            consent_ingest_queue_depth.set(0)
+        if self._buffer:
+            await self._write_each()
+        if self._buffer:
+            logger.error(f"❌ {len(self._buffer)} Consent-Logs konnten beim Shutdown nicht gesichert werden")
+        logger.info("🔒 Consent-Ingestion gestoppt")
+
+    # -------------------------------------------------------------------------
+    # Annahme
+    # -------------------------------------------------------------------------
+
+    async def resolve_revision(self, db_pool, site_id: str) -> int:
+        """Banner-Config-ID der Site (gecacht, Default 1)"""
+        cached = self._revision_cache.get(site_id)
+        now = time.monotonic()
+        if cached and now - cached[1] < self.revision_cache_ttl:
+            return cached[0]
+
+        row = await db_pool.fetchrow("SELECT id FROM cookie_banner_configs WHERE site_id = $1", site_id)
+        revision_id = row['id'] if row else 1
+        self._revision_cache[site_id] = (revision_id, now)
+        return revision_id
+
+    async def submit(self, record: ConsentRecord) -> bool:
+        """
+        Nimmt einen Datensatz an
+
+        Returns:
+            True wenn gepuffert/gespoolt, False wenn die Pipeline nicht läuft
+
+        Raises:
+            ConsentQueueFull: Puffer voll und Redis-Spool nicht verfügbar
+        """
+        if not self._running:
+            return False
+
+        if len(self._buffer) >= self.max_queue:
+            if await self._spool([record]):
+                return True
+            self._rejected += 1
+            consent_ingest_records_total.labels(result="rejected").inc()
+            raise ConsentQueueFull("Consent-Puffer voll")
+
+        self._buffer.append(record)
+        consent_ingest_queue_depth.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    # -------------------------------------------------------------------------
+    # Flush
+    # -------------------------------------------------------------------------
+
+    async def _flush_loop(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._running:
+                break
+            try:
+                await self.flush()
+                await self._replay_spool()
+            except Exception as e:
+                logger.error(f"❌ Consent-Flush-Loop Fehler: {e}")
+
+    async def flush(self) -> bool:
+        """Schreibt bis zu batch_size gepufferte Datensätze. False bei DB-Fehler."""
+        async with self._flush_lock:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return True
+            if await self._write_batch(batch):
+                return True
+            # Zurück in den Spool, sonst vorne in den Puffer
+            if not await self._spool(batch):
+                self._buffer.extendleft(reversed(batch))
+                consent_ingest_queue_depth.set(len(self._buffer))
+            return False
+
+    async def _write_batch(self, batch: List[ConsentRecord]) -> bool:
+        started = time.perf_counter()
+        try:
+            stats = aggregate_stats(batch)
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(INSERT_CONSENT_QUERY, [r.insert_args() for r in batch])
+                    await conn.executemany(
+                        UPSERT_STATS_QUERY,
+                        [(site_id, date.fromisoformat(day), *deltas) for (site_id, day), deltas in stats.items()],
+                    )
+        except Exception as e:
+            logger.error(f"❌ Consent-Batch ({len(batch)}) konnte nicht geschrieben werden: {e}")
+            consent_ingest_records_total.labels(result="failed").inc(len(batch))
+            return False
+
+        elapsed = time.perf_counter() - started
+        consent_ingest_flush_seconds.observe(elapsed)
+        consent_ingest_records_total.labels(result="flushed").inc(len(batch))
+        self._flushed += len(batch)
+        self._last_flush_ms = round(elapsed * 1000, 1)
+        return True
+
+    async def _write_each(self):
+        """
+        Letzter Ausweg beim Shutdown ohne Spool: Datensätze einzeln schreiben
+        (wie der synchrone Request-Pfad), damit ein fehlerhafter Datensatz
+        nicht den ganzen Rest mitreißt. Nur Geschriebenes verlässt den Puffer.
+        """
+        failed: Deque[ConsentRecord] = deque()
+        while self._buffer:
+            record = self._buffer.popleft()
+            try:
+                async with self.db_pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute(INSERT_CONSENT_QUERY, *record.insert_args())
+                        await conn.execute(
+                            UPSERT_STATS_QUERY,
+                            record.site_id, date.fromisoformat(record.day), *record.stat_deltas(),
+                        )
+            except Exception as e:
+                logger.debug(f"Consent-Einzelinsert fehlgeschlagen: {e}")
+                failed.append(record)
+                continue
+            self._flushed += 1
+            consent_ingest_records_total.labels(result="flushed").inc()
+        self._buffer = failed
+        consent_ingest_queue_depth.set(len(self._buffer))
+
+    def _drain(self, limit: int) -> List[ConsentRecord]:
+        batch = []
+        while self._buffer and len(batch) < limit:
+            batch.append(self._buffer.popleft())
+        consent_ingest_queue_depth.set(len(self._buffer))
+        return batch
+
+    # -------------------------------------------------------------------------
+    # Durable Spool (Redis)
+    # -------------------------------------------------------------------------
+
+    async def _spool(self, records: List[ConsentRecord]) -> bool:
+        if not self.redis or not records:
+            return False
+        try:
+            await self.redis.rpush(SPOOL_KEY, *(json.dumps(asdict(r)) for r in records))
+        except Exception as e:
+            logger.warning(f"⚠️ Consent-Spool nicht verfügbar: {e}")
+            return False
+        self._spooled += len(records)
+        consent_ingest_records_total.labels(result="spooled").inc(len(records))
+        return True
+
+    async def _replay_spool(self):
+        """Holt gespoolte Datensätze in den Puffer zurück, solange Platz ist"""
+        if not self.redis:
+            return
+        room = min(self.batch_size, self.max_queue - len(self._buffer))
+        if room <= 0:
+            return
+        try:
+            raw = await self.redis.lpop(SPOOL_KEY, room)
+        except Exception as e:
+            logger.debug(f"Consent-Spool replay fehlgeschlagen: {e}")
+            return
+        if not raw:
+            return
+        for item in raw:
+            try:
+                self._buffer.append(ConsentRecord(**json.loads(item)))
+            except (TypeError, ValueError) as e:
+                logger.error(f"❌ Ungültiger Spool-Eintrag verworfen: {e}")
+        consent_ingest_queue_depth.set(len(self._buffer))
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        return {
+            "status": "up" if self._running else "idle",
+            "queue_depth": len(self._buffer),
+            "max_queue": self.max_queue,
+            "flushed": self._flushed,
+            "spooled": self._spooled,
+            "rejected": self._rejected,
+            "last_flush_ms": self._last_flush_ms,
+        }
+
+
+# Globale Instanz
+consent_ingestion = ConsentIngestionPipeline()
@@ -16,10 +16,14 @@ import json
 import logging
 from fastapi.responses import StreamingResponse
 import io
-from cookie_scanner_service import cookie_scanner
+from compliance_engine.scan_coordinator import scan_coordinator, REVALIDATE_MAX_AGE
+from compliance_engine.gvl_snapshot import gvl_snapshot_service
+from geo_resolver import geo_resolver
 from file_storage_service import file_storage
 from functools import wraps
-from agency_report_generator import AgencyReportGenerator
+from agency_report_generator import render_agency_report
+from cpu_executor import cpu_executor
+from consent_ingestion import consent_ingestion, ConsentRecord, ConsentQueueFull
 
 logger = logging.getLogger(__name__)
 
@@ -325,6 +329,40 @@ async def log_consent(
         raw_ua = consent.user_agent or request.headers.get("User-Agent", "")
         user_agent = truncate_user_agent(raw_ua)  # AUDIT-03: DSGVO-compliant truncation
         
+        # Use device fingerprint if provided, otherwise fall back to IP hash
+        device_fp = consent.device_fingerprint if consent.device_fingerprint else None
+        
+        # Ingestion-Pipeline aktiv: sofort bestätigen, Batch-Flush im Hintergrund
+        if consent_ingestion.running:
+            record = ConsentRecord(
+                site_id=consent.site_id,
+                visitor_id=consent.visitor_id,
+                consent_categories=consent.consent_categories.dict(),
+                services_accepted=consent.services_accepted,
+                ip_address_hash=ip_hash,
+                device_fingerprint=device_fp,
+                user_agent=user_agent,
+                revision_id=await consent_ingestion.resolve_revision(db_pool, consent.site_id),
+                language=consent.language,
+                banner_shown=consent.banner_shown,
+                day=date.today().isoformat(),
+            )
+            try:
+                if await consent_ingestion.submit(record):
+                    return {
+                        "success": True,
+                        "consent_id": None,
+                        "queued": True,
+                        "timestamp": datetime.now().isoformat(),
+                        "message": "Consent accepted"
+                    }
+            except ConsentQueueFull:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Consent ingestion overloaded, please retry",
+                    headers={"Retry-After": "5"}
+                )
+        
         # Get banner config ID (instead of revision)
         config_query = """
             SELECT id FROM cookie_banner_configs 
@@ -342,9 +380,6 @@ async def log_consent(
             RETURNING id, timestamp
         """
         
-        # Use device fingerprint if provided, otherwise fall back to IP hash
-        device_fp = consent.device_fingerprint if consent.device_fingerprint else None
-        
         result = await db_pool.fetchrow(
             insert_query,
             consent.site_id,
@@ -404,6 +439,8 @@ async def log_consent(
             "message": "Consent logged successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error logging consent: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to log consent: {str(e)}")
@@ -1215,8 +1252,10 @@ async def scan_website(
 
         logger.warning(f"[Scan] START url={url} site_id={site_id} user_id={user_id}")
 
-        # Scan website
-        scan_result = await cookie_scanner.scan_website(url)
+        # Scan website (parallele/wiederholte Scans derselben URL werden zusammengeführt)
+        scan_result = await scan_coordinator.scan(
+            url, profile="cookie", bypass_cache=bool(data.get('force_refresh'))
+        )
 
         if scan_result.get('error'):
             logger.warning(f"[Scan] scanner returned error for {url}: {scan_result.get('error')}")
@@ -1352,8 +1391,8 @@ async def monitor_website_check(
             if isinstance(raw, list):
                 stored_services = raw
 
-        # Frischen Scan durchführen
-        scan_result = await cookie_scanner.scan_website(url)
+        # Frischen Scan durchführen (ein Scan von vor wenigen Sekunden zählt als frisch)
+        scan_result = await scan_coordinator.scan(url, profile="cookie", max_age=REVALIDATE_MAX_AGE)
 
         if scan_result.get('error'):
             return {"success": False, "error": scan_result['error']}
@@ -1827,59 +1866,22 @@ async def update_age_verification_config(
 
 # TCF 2.2 Endpoints (UI vorbereitet)
 @router.get("/api/cookie-compliance/tcf/vendors")
-async def get_tcf_vendors(
-    db_pool: asyncpg.Pool = Depends(get_db_connection)
-):
+async def get_tcf_vendors(request: Request):
     """
     Get available TCF vendors
+
+    Vorberechnete, vorkomprimierte Vendor-Liste aus dem GVL-Snapshot;
+    ETag = GVL-Version, If-None-Match → 304.
     """
     try:
-        query = """
-            SELECT 
-                vendor_id, name, purposes, legitimate_interests,
-                special_purposes, features, special_features, policy_url
-            FROM tcf_vendors
-            WHERE is_active = true
-            ORDER BY name
-        """
-        rows = await db_pool.fetch(query)
-        
-        vendors = []
-        for row in rows:
-            vendors.append({
-                "vendor_id": row['vendor_id'],
-                "name": row['name'],
-                "purposes": list(row['purposes']) if row['purposes'] else [],
-                "legitimate_interests": list(row['legitimate_interests']) if row['legitimate_interests'] else [],
-                "special_purposes": list(row['special_purposes']) if row['special_purposes'] else [],
-                "features": list(row['features']) if row['features'] else [],
-                "special_features": list(row['special_features']) if row['special_features'] else [],
-                "policy_url": row['policy_url'] or ""
-            })
-        
-        purposes = [
-            {"id": 1, "name": "Speicherung von und Zugriff auf Informationen", "description": "Cookies, Geräte- oder ähnliche Online-Kennungen"},
-            {"id": 2, "name": "Einfache Anzeigen", "description": "Anzeige von Werbung"},
-            {"id": 3, "name": "Anzeigenauswahl, -schaltung und -berichterstattung", "description": "Personalisierte Werbung"},
-            {"id": 4, "name": "Personalisierung von Inhalten", "description": "Auswahl personalisierter Inhalte"},
-            {"id": 5, "name": "Messung", "description": "Messung der Anzeigen- und Inhaltsleistung"},
-            {"id": 6, "name": "Anwendung von Marktforschung", "description": "Erkenntnisse über Zielgruppen"},
-            {"id": 7, "name": "Entwicklung und Verbesserung von Produkten", "description": "Entwicklung neuer Produkte"},
-            {"id": 8, "name": "Auswahl einfacher Anzeigen", "description": "Grundlegende Anzeigenauswahl"},
-            {"id": 9, "name": "Erstellung eines personalisierten Anzeigenprofils", "description": "Profil für personalisierte Werbung"},
-            {"id": 10, "name": "Auswahl personalisierter Anzeigen", "description": "Personalisierte Anzeigen basierend auf Profil"}
-        ]
-        
-        return {
-            "success": True,
-            "vendors": vendors,
-            "purposes": purposes,
-            "tcf_version": "2.2",
-            "vendor_count": len(vendors)
-        }
+        snapshot = await gvl_snapshot_service.get()
+        status_code, headers, body = snapshot.vendor_list.negotiate(
+            request.headers.get('If-None-Match', ''),
+            request.headers.get('Accept-Encoding', '')
+        )
+        return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.error(f"TCF vendor fetch failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"TCF vendor fetch failed: {str(e)}")
 
 
@@ -1968,59 +1970,19 @@ async def update_tcf_config(
 # ============================================================================
 
 @router.get("/api/cookie-compliance/geo-check")
-async def geo_check(
-    request: Request,
-    db_pool: asyncpg.Pool = Depends(get_db_connection)
-):
+async def geo_check(request: Request):
     """
     Detect visitor's country for geo-restriction
-    Uses IP-based geolocation
+
+    Lokal über geo_resolver (Länder-Header → LRU → IP-Range-Tabelle → Default),
+    ohne Datenbankzugriff im Banner-Pfad.
     """
     try:
-        # Get client IP
-        client_ip = request.headers.get('X-Forwarded-For', request.client.host)
-        if ',' in client_ip:
-            client_ip = client_ip.split(',')[0].strip()
-        
-        # Hash IP for privacy
-        ip_hash = hashlib.sha256(client_ip.encode()).hexdigest()[:16]
-        
-        # Check cache first
-        cache_query = """
-            SELECT country_code FROM geo_ip_cache 
-            WHERE ip_hash = $1 AND cached_at > NOW() - INTERVAL '24 hours'
-        """
-        cached = await db_pool.fetchrow(cache_query, ip_hash)
-        
-        if cached:
-            return {
-                "success": True,
-                "country_code": cached['country_code'],
-                "cached": True
-            }
-        
-        # Simple IP-based detection (can be enhanced with MaxMind)
-        # For now, use a basic approach or default to EU
-        country_code = "DE"  # Default
-        
-        # Try to detect from common headers
-        cf_country = request.headers.get('CF-IPCountry')
-        if cf_country:
-            country_code = cf_country
-        
-        # Cache result
-        cache_insert = """
-            INSERT INTO geo_ip_cache (ip_hash, country_code)
-            VALUES ($1, $2)
-            ON CONFLICT (ip_hash) DO UPDATE SET 
-                country_code = $2, cached_at = NOW()
-        """
-        await db_pool.execute(cache_insert, ip_hash, country_code)
-        
+        result = geo_resolver.resolve(request.headers, request.client.host if request.client else None)
         return {
             "success": True,
-            "country_code": country_code,
-            "cached": False
+            "country_code": result.country_code,
+            "cached": result.cached
         }
     except Exception as e:
         return {
@@ -2850,9 +2812,6 @@ async def serve_agency_logo_file(
 # AGENCY-02 + AGENCY-03: PDF report download per client (Phase 10)
 # =============================================================================
 
-_agency_pdf_generator = AgencyReportGenerator()
-
-
 @router.get("/api/cookie-compliance/agency/client-report/{client_name}")
 async def download_client_report(
     client_name: str,
@@ -2914,11 +2873,7 @@ async def download_client_report(
         logo_bytes = await file_storage.get_file(logo_row["agency_logo_path"])
 
     # 4. Generate the PDF.
-    pdf_bytes = _agency_pdf_generator.generate(
-        client_name=client_name,
-        sites=sites,
-        agency_logo_bytes=logo_bytes,
-    )
+    pdf_bytes = await cpu_executor.run("pdf_agency_report", render_agency_report, client_name, sites, logo_bytes)
 
     # 5. Stream it.
     safe_name = "".join(c for c in client_name if c.isalnum() or c in "-_") or "report"
@@ -8,7 +8,6 @@ Unterstützt zwei Modi:
 """
 
 import asyncio
-import re
 from typing import List, Dict, Any, Set, Optional
 import aiohttp
 from bs4 import BeautifulSoup
@@ -16,6 +15,7 @@ from urllib.parse import urlparse, urljoin
 import logging
 from ssrf_protection import validate_url, SSRFError
 from compliance_engine.privacy_transfer_findings import detect_transfers
+from compliance_engine.service_signatures import SignatureMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -334,6 +334,9 @@ class CookieScanner:
             'confidence_boost': ['PHPSESSID']
         },
     }
+
+    # Einmal kompiliert: alle Signaturen werden in einem Durchlauf gesucht
+    SIGNATURES = SignatureMatcher.from_detection_patterns(DETECTION_PATTERNS)
     
     def __init__(self):
         self.timeout = aiohttp.ClientTimeout(total=30)
@@ -537,41 +540,12 @@ class CookieScanner:
             '\n'.join(meta_tags)
         ])
         
-        for service_key, detection in self.DETECTION_PATTERNS.items():
-            score = 0
-            matches = 0
-            matched_patterns = []
-            
-            # Check patterns
-            for pattern in detection['patterns']:
-                if re.search(pattern, all_sources, re.IGNORECASE):
-                    matches += 1
-                    score += 1
-                    matched_patterns.append(pattern)
-                    
-                    # Boost confidence for high-value patterns
-                    if any(boost in pattern for boost in detection.get('confidence_boost', [])):
-                        score += 2
-            
-            # Calculate confidence
-            if matches > 0:
-                # Base confidence on number of matches
-                conf = min(0.5 + (matches * 0.15), 1.0)
-                
-                # Boost confidence for multiple matches
-                if matches >= 4:
-                    conf = 0.98
-                elif matches >= 3:
-                    conf = 0.90
-                elif matches == 2:
-                    conf = 0.75
-                elif matches == 1:
-                    conf = 0.60
-                
-                detected_services.add(service_key)
-                confidence[service_key] = conf
-                
-                logger.info(f"Detected {service_key} with {matches} matches (confidence: {conf:.2f})")
+        for match in self.SIGNATURES.match(all_sources):
+            detected_services.add(match.service)
+            confidence[match.service] = match.confidence
+            logger.info(
+                f"Detected {match.service} with {len(match.patterns)} matches (confidence: {match.confidence:.2f})"
+            )
         
         return {
             'services': detected_services,
@@ -0,0 +1,190 @@
+"""
+CPU-Executor
+Verwalteter Executor für CPU-lastige Arbeit außerhalb des Event-Loops
+
+Statt bcrypt, ReportLab-PDFs oder HTML-Parsing direkt im async-Handler
+auszuführen (blockiert alle anderen Requests des Workers):
+- Prozess-Pool für picklebare Aufgaben (bcrypt, PDF-Rendering) — echte
+  Parallelität, kein GIL
+- Thread-Pool als Fallback (kein Prozess-Pool verfügbar, Pool kaputt,
+  Argumente/Funktion nicht picklebar) und für Aufgaben, deren Ergebnis nicht
+  zwischen Prozessen übertragen werden kann (BeautifulSoup-Bäume)
+- Begrenzte Warteschlange: max. CPU_EXECUTOR_MAX_PENDING Aufgaben gleichzeitig,
+  weitere warten bis CPU_EXECUTOR_QUEUE_TIMEOUT, danach CPUExecutorBusy
+- Laufzeit je Aufgabentyp als Prometheus-Histogramm
+
+Konfiguration über Umgebungsvariablen:
+- CPU_EXECUTOR_PROCESSES       Prozesse im Pool, 0 = nur Threads (Default: min(4, CPUs))
+- CPU_EXECUTOR_THREADS         Threads im Fallback-Pool (Default: 4)
+- CPU_EXECUTOR_MAX_PENDING     Max. gleichzeitige Aufgaben (Default: 64)
+- CPU_EXECUTOR_QUEUE_TIMEOUT   Max. Wartezeit auf einen Slot in s (Default: 30)
+
+Usage:
+    from cpu_executor import cpu_executor
+
+    ok = await cpu_executor.run("bcrypt", bcrypt.checkpw, password, password_hash)
+    page = await cpu_executor.run("html_parse", ParsedPage, url, html, isolated=False)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from metrics import cpu_executor_pending, cpu_task_seconds
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CPUExecutorBusy(Exception):
+    """Kein freier Slot innerhalb von CPU_EXECUTOR_QUEUE_TIMEOUT"""
+
+
+class CPUExecutor:
+    """Prozess-Pool mit begrenzter Warteschlange und Thread-Pool-Fallback"""
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        threads: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+    ):
+        default_processes = min(4, os.cpu_count() or 1)
+        self.processes = processes if processes is not None else int(os.getenv("CPU_EXECUTOR_PROCESSES", str(default_processes)))
+        self.threads = threads if threads is not None else int(os.getenv("CPU_EXECUTOR_THREADS", "4"))
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv("CPU_EXECUTOR_MAX_PENDING", "64"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("CPU_EXECUTOR_QUEUE_TIMEOUT", "30"))
+
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._tasks = 0
+        self._fallbacks = 0
+        self._rejected = 0
+
+    # ------------------------------------------------------------------
+    # Pools
+    # ------------------------------------------------------------------
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.processes <= 0:
+            return None
+        if self._process_pool is None:
+            try:
+                # spawn statt fork: der Elternprozess hat laufende Threads + Event-Loop
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"⚙️ CPU-Executor: Prozess-Pool mit {self.processes} Prozessen gestartet")
+            except Exception as e:
+                logger.warning(f"CPU-Executor: Prozess-Pool nicht verfügbar, nutze Threads: {e}")
+                self.processes = 0
+                return None
+        return self._process_pool
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="cpu-executor")
+        return self._thread_pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._slots
+
+    # ------------------------------------------------------------------
+    # Ausführung
+    # ------------------------------------------------------------------
+
+    async def run(self, task_type: str, fn: Callable[..., T], *args: Any, isolated: bool = True) -> T:
+        """
+        Führt fn(*args) außerhalb des Event-Loops aus.
+
+        Args:
+            task_type: Label für Metriken (z.B. 'bcrypt', 'pdf_report', 'html_parse')
+            fn: Modul-Level-Funktion (für den Prozess-Pool picklebar)
+            isolated: False → immer Thread-Pool (Ergebnis bleibt im Prozess, z.B. Soup-Bäume)
+        """
+        slots = self._get_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise CPUExecutorBusy(f"CPU-Executor ausgelastet ({self.max_pending} Aufgaben), '{task_type}' abgewiesen")
+
+        self._pending += 1
+        cpu_executor_pending.set(self._pending)
+        started = time.monotonic()
+        mode = "thread"
+        try:
+            loop = asyncio.get_running_loop()
+            pool = self._get_process_pool() if isolated else None
+            if pool is not None:
+                try:
+                    result = await loop.run_in_executor(pool, fn, *args)
+                    mode = "process"
+                    return result
+                except (pickle.PicklingError, AttributeError, TypeError) as e:
+                    if not _is_pickling_error(e):
+                        raise
+                    logger.debug(f"CPU-Executor: '{task_type}' nicht picklebar, Thread-Fallback: {e}")
+                    self._fallbacks += 1
+                except BrokenProcessPool as e:
+                    logger.warning(f"CPU-Executor: Prozess-Pool defekt, wird neu gestartet: {e}")
+                    self._process_pool = None
+                    self._fallbacks += 1
+            return await loop.run_in_executor(self._get_thread_pool(), fn, *args)
+        finally:
+            self._tasks += 1
+            self._pending -= 1
+            cpu_executor_pending.set(self._pending)
+            cpu_task_seconds.labels(task_type=task_type, mode=mode).observe(time.monotonic() - started)
+            slots.release()
+
+    # ------------------------------------------------------------------
+    # Lifecycle + Monitoring
+    # ------------------------------------------------------------------
+
+    def shutdown(self):
+        """Pools beenden (App-Shutdown); laufende Aufgaben werden abgewartet"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True, cancel_futures=True)
+            self._thread_pool = None
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        return {
+            "status": "up" if self._process_pool is not None or self._thread_pool is not None else "idle",
+            "processes": self.processes,
+            "threads": self.threads,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "tasks": self._tasks,
+            "thread_fallbacks": self._fallbacks,
+            "rejected": self._rejected,
+        }
+
+
+def _is_pickling_error(error: Exception) -> bool:
+    """Fehler beim Übertragen in den Prozess-Pool (statt Fehler in der Aufgabe selbst)"""
+    if isinstance(error, pickle.PicklingError):
+        return True
+    message = str(error).lower()
+    return "pickle" in message
+
+
+# Globale Instanz
+cpu_executor = CPUExecutor()
@@ -3,15 +3,32 @@ AP4: EUR-Lex Korpus-Updater
 Holt aktuelle Fassungen von EU-Rechtsakten und speichert sie als Markdown im knowledge/laws/-Verzeichnis.
 Unterstützt: GDPR, DSA, AI Act, ePrivacy, NIS2, EAA in mind. 5 Sprachen.
 Läuft monatlich (1. des Monats, 02:00 Uhr).
+
+- Rechtsakt × Sprache werden parallel geladen (begrenzt), mit ETag/Last-Modified
+- HTML wird gestreamt und direkt in Artikel zerlegt (ganze Artikel, kein Auszug)
+- Artikel-Hashes werden verglichen; nur geänderte Dateien werden neu geschrieben
+  und anschließend gezielt im KnowledgeRetriever neu eingebettet
+- Handgepflegte Dateien (ohne Crawler-Marker) werden nie überschrieben
+
+Konfiguration über Umgebungsvariablen:
+    EURLEX_FETCH_CONCURRENCY=4    # Parallele Abrufe
+    EURLEX_REQUEST_DELAY=0.5      # Pause je Abruf (Sekunden, Rücksicht auf EUR-Lex)
+    EURLEX_TIMEOUT=60             # Timeout je Abruf (Sekunden)
 """
 import asyncio
+import hashlib
+import json
 import logging
-import re
-from pathlib import Path
+import os
+import sys
 from datetime import datetime
-from typing import Optional
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 import httpx
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 logger = logging.getLogger(__name__)
 
 LAWS_DIR = Path(__file__).parents[2] / "knowledge" / "laws"
@@ -29,67 +46,268 @@ LANG_DIR_MAP = {"DE": "de", "EN": "en", "FR": "fr", "IT": "it", "PL": "pl"}
 
 EUR_LEX_URL = "https://eur-lex.europa.eu/legal-content/{lang}/TXT/HTML/?uri=CELEX:{celex}"
 
-async def fetch_act_html(celex: str, language: str, client: httpx.AsyncClient) -> Optional[str]:
-    """Holt HTML-Text eines Rechtsakts von EUR-Lex."""
-    url = EUR_LEX_URL.format(lang=language, celex=celex)
-    try:
-        resp = await client.get(url, timeout=30, follow_redirects=True)
-        if resp.status_code == 200:
-            return resp.text
-        logger.warning(f"EUR-Lex {celex} ({language}): HTTP {resp.status_code}")
-        return None
-    except Exception as e:
-        logger.error(f"Fehler beim Abrufen von {celex} ({language}): {e}")
-        return None
+FETCH_CONCURRENCY = int(os.getenv("EURLEX_FETCH_CONCURRENCY", "4"))
+REQUEST_DELAY = float(os.getenv("EURLEX_REQUEST_DELAY", "0.5"))
+FETCH_TIMEOUT = float(os.getenv("EURLEX_TIMEOUT", "60"))
 
-def html_to_markdown_snippet(html: str, act_name: str, language: str) -> str:
+# Kennzeichnet vom Crawler erzeugte Dateien (alles andere ist handgepflegt)
+GENERATED_MARKER = "> Automatisch abgerufen von EUR-Lex."
+
+
+class ArticleExtractor(HTMLParser):
     """
-    Extrahiert die wichtigsten Artikel aus dem HTML und wandelt sie in Markdown um.
-    Einfaches Regex-basiertes Parsing (kein BeautifulSoup nötig).
+    Inkrementeller EUR-Lex-Parser: zerlegt das HTML beim Einlesen in Artikel.
+
+    Erkennt das klassische OJ-Layout (p.ti-art / p.sti-art) und das
+    konsolidierte ELI-Layout (p.title-article-norm / p.stitle-article-norm).
+    Erwägungsgründe vor dem ersten Artikel und Anhänge werden übersprungen.
     """
-    clean = re.sub(r'<[^>]+>', ' ', html)
-    clean = re.sub(r'\s+', ' ', clean).strip()
-    clean = clean[:5000]
+
+    ARTICLE_CLASSES = {"ti-art", "title-article-norm"}
+    SUBTITLE_CLASSES = {"sti-art", "stitle-article-norm"}
+    SECTION_CLASSES = {"doc-ti", "title-annex-1"}
+    BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "h5", "h6"}
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.articles: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._buffer: List[str] = []
+        self._mode: Optional[str] = None
+        self._skip = 0
+        self._in_row = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+            return
+        if tag == "tr":
+            self._in_row += 1
+        elif tag == "p":
+            classes = set((dict(attrs).get("class") or "").split())
+            if classes & self.ARTICLE_CLASSES:
+                self._flush()
+                self._mode = "title"
+            elif classes & self.SUBTITLE_CLASSES:
+                self._flush()
+                self._mode = "subtitle"
+            elif classes & self.SECTION_CLASSES:
+                self._flush()
+                self._mode = "section"
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "tr":
+            self._in_row = max(0, self._in_row - 1)
+            self._flush()
+        elif self._in_row and (tag in self.BLOCK_TAGS or tag == "td"):
+            self._buffer.append(" ")
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = " ".join("".join(self._buffer).split())
+        self._buffer = []
+        mode, self._mode = self._mode, None
+        if not text:
+            return
+        if mode == "title":
+            self._current = {"title": text, "subtitle": "", "paragraphs": []}
+            self.articles.append(self._current)
+        elif mode == "section":
+            self._current = None
+        elif self._current is None:
+            return
+        elif mode == "subtitle" and not self._current["subtitle"]:
+            self._current["subtitle"] = text
+        else:
+            self._current["paragraphs"].append(text)
+
+
+def article_hash(article: Dict[str, Any]) -> str:
+    text = "\n".join([article["title"], article["subtitle"], *article["paragraphs"]])
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def articles_to_markdown(articles: List[Dict[str, Any]], act_name: str, celex: str, language: str) -> str:
+    """Rendert die extrahierten Artikel als Markdown mit Frontmatter."""
+    now = datetime.utcnow()
+    sections = []
+    for article in articles:
+        heading = f"{article['title']} — {article['subtitle']}" if article["subtitle"] else article["title"]
+        sections.append("\n\n".join([f"## {heading}", *article["paragraphs"]]))
+    body = "\n\n".join(sections)
     return f"""---
 law_id: {act_name}
 language: {language.lower()}
+celex: {celex}
 source: EUR-Lex
-fetched_at: {datetime.utcnow().isoformat()}
+source_url: {EUR_LEX_URL.format(lang=language, celex=celex)}
+fetched_at: {now.isoformat()}
 ---
 
 # {act_name} ({language})
 
-> Automatisch abgerufen von EUR-Lex. Letzte Aktualisierung: {datetime.utcnow().strftime('%Y-%m-%d')}
-
-## Auszug
+{GENERATED_MARKER} Letzte Aktualisierung: {now.strftime('%Y-%m-%d')}
 
-{clean}
+{body}
 """
 
-async def crawl_eurlex():
-    """Hauptfunktion: holt alle konfigurierten Rechtsakte in allen Sprachen."""
+
+async def fetch_act_articles(
+    celex: str,
+    language: str,
+    client: httpx.AsyncClient,
+    state: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Holt einen Rechtsakt per Conditional GET und extrahiert die Artikel
+    während des Downloads. Gibt {"not_modified": True} bei 304 zurück,
+    None bei Fehlern.
+    """
+    url = EUR_LEX_URL.format(lang=language, celex=celex)
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    try:
+        async with client.stream("GET", url, headers=headers, timeout=FETCH_TIMEOUT, follow_redirects=True) as resp:
+            if resp.status_code == 304:
+                return {"not_modified": True}
+            if resp.status_code != 200:
+                logger.warning(f"EUR-Lex {celex} ({language}): HTTP {resp.status_code}")
+                return None
+            extractor = ArticleExtractor()
+            async for chunk in resp.aiter_text():
+                extractor.feed(chunk)
+            extractor.close()
+            return {
+                "not_modified": False,
+                "articles": extractor.articles,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+    except Exception as e:
+        logger.error(f"Fehler beim Abrufen von {celex} ({language}): {e}")
+        return None
+
+
+def _load_state(state_file: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(state_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"EUR-Lex-Status nicht lesbar, lade alles neu: {e}")
+        return {}
+
+
+def _save_state(state_file: Path, state: Dict[str, Any]):
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_file.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, state_file)
+
+
+def _is_generated(output_file: Path) -> bool:
+    with output_file.open(encoding="utf-8", errors="replace") as f:
+        return GENERATED_MARKER in f.read(4096)
+
+
+async def crawl_eurlex(
+    laws_dir: Path = LAWS_DIR,
+    client: Optional[httpx.AsyncClient] = None,
+    retriever=None,
+) -> Dict[str, int]:
+    """Hauptfunktion: aktualisiert alle konfigurierten Rechtsakte in allen Sprachen."""
     logger.info("🌐 EUR-Lex Crawler gestartet")
-    fetched = 0
-    errors = 0
-    async with httpx.AsyncClient(headers={"User-Agent": "Complyo/1.0 (EFRE-Forschungsprojekt)"}) as client:
-        for act_name, meta in EUR_LEX_ACTS.items():
-            for lang in LANGUAGES:
-                lang_dir = LAWS_DIR / LANG_DIR_MAP[lang]
-                lang_dir.mkdir(parents=True, exist_ok=True)
-                output_file = lang_dir / f"{act_name}.md"
-                if output_file.exists():
-                    logger.debug(f"Überspringe {act_name} ({lang}) — bereits vorhanden")
-                    continue
-                html = await fetch_act_html(meta["celex"], lang, client)
-                if html:
-                    md = html_to_markdown_snippet(html, act_name, lang)
-                    output_file.write_text(md, encoding="utf-8")
-                    logger.info(f"✅ {act_name} ({lang}) gespeichert")
-                    fetched += 1
-                else:
-                    errors += 1
-                await asyncio.sleep(2)
-    logger.info(f"EUR-Lex Crawler fertig: {fetched} Dokumente, {errors} Fehler")
+    state_file = laws_dir.parent / "_meta" / "eurlex_state.json"
+    state = _load_state(state_file)
+    stats = {"changed": 0, "unchanged": 0, "not_modified": 0, "skipped": 0, "errors": 0, "reindexed": 0}
+    changed_paths: List[Path] = []
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def update(act_name: str, meta: Dict[str, str], lang: str, client: httpx.AsyncClient):
+        key = f"{act_name}/{lang}"
+        lang_dir = laws_dir / LANG_DIR_MAP[lang]
+        lang_dir.mkdir(parents=True, exist_ok=True)
+        output_file = lang_dir / f"{act_name}.md"
+        if output_file.exists() and not _is_generated(output_file):
+            logger.debug(f"Überspringe {act_name} ({lang}) — handgepflegt")
+            stats["skipped"] += 1
+            return
+        # Ohne Datei kein Conditional GET, sonst bliebe sie nach 304 verschwunden
+        previous = state.get(key, {}) if output_file.exists() else {}
+
+        async with semaphore:
+            result = await fetch_act_articles(meta["celex"], lang, client, previous)
+            await asyncio.sleep(REQUEST_DELAY)
+
+        if result is None:
+            stats["errors"] += 1
+            return
+        if result["not_modified"]:
+            stats["not_modified"] += 1
+            return
+        if not result["articles"]:
+            logger.warning(f"EUR-Lex {act_name} ({lang}): keine Artikel erkannt, Datei bleibt unverändert")
+            stats["errors"] += 1
+            return
+
+        hashes = {a["title"]: article_hash(a) for a in result["articles"]}
+        state[key] = {"etag": result["etag"], "last_modified": result["last_modified"], "articles": hashes}
+        old_hashes = previous.get("articles", {})
+        if hashes == old_hashes:
+            stats["unchanged"] += 1
+            return
+
+        diff = [title for title, h in hashes.items() if old_hashes.get(title) != h]
+        md = articles_to_markdown(result["articles"], act_name, meta["celex"], lang)
+        await asyncio.to_thread(output_file.write_text, md, encoding="utf-8")
+        changed_paths.append(output_file)
+        stats["changed"] += 1
+        logger.info(f"✅ {act_name} ({lang}) gespeichert — {len(diff)} Artikel geändert/neu")
+
+    own_client = client is None
+    if own_client:
+        client = httpx.AsyncClient(headers={"User-Agent": "Complyo/1.0 (EFRE-Forschungsprojekt)"})
+    try:
+        await asyncio.gather(*(
+            update(act_name, meta, lang, client)
+            for act_name, meta in EUR_LEX_ACTS.items()
+            for lang in LANGUAGES
+        ))
+    finally:
+        if own_client:
+            await client.aclose()
+        _save_state(state_file, state)
+
+    if changed_paths:
+        try:
+            if retriever is None:
+                from knowledge.knowledge_retriever import KnowledgeRetriever
+                retriever = KnowledgeRetriever(vault_root=laws_dir.parent)
+            refreshed = await retriever.refresh_index(paths=changed_paths)
+            stats["reindexed"] = refreshed["new"]
+        except Exception as e:
+            logger.warning(f"Reindex nach EUR-Lex-Update fehlgeschlagen: {e}")
+
+    logger.info(
+        f"EUR-Lex Crawler fertig: {stats['changed']} geändert, {stats['unchanged']} unverändert, "
+        f"{stats['not_modified']} nicht modifiziert (304), {stats['errors']} Fehler"
+    )
+    return stats
 
 if __name__ == "__main__":
     asyncio.run(crawl_eurlex())
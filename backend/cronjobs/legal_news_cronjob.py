@@ -21,6 +21,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from news_service import NewsService
 from legal_notification_service import LegalNewsNotificationService
+from mail_transport import mail_transport
 
 async def fetch_feeds(db_pool: asyncpg.Pool) -> dict:
     """Fetcht alle RSS-Feeds"""
@@ -83,6 +84,7 @@ async def main():
                 for error in results['errors']:
                     print(f"  ERROR: {error}")
         
+        await mail_transport.close()
         await db_pool.close()
         
         print(f"\n[{datetime.now().isoformat()}] Cronjob completed successfully")
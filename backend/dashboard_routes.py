@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from typing import Dict, Any, Optional
 import logging
 from dependencies import get_current_user
+from scan_read_model import issue_category_counts, latest_scans_for_user, scan_count_since, scans_before
 from schemas.dashboard import DashboardMetrics as _DashboardMetricsSchema
 
 logger = logging.getLogger(__name__)
@@ -60,17 +61,8 @@ async def get_dashboard_metrics(user: Dict[str, Any] = Depends(get_current_user)
                 user_id
             )
             
-            # Get latest scans per website (URL-based fallback if website_id is NULL)
-            latest_scans = await conn.fetch("""
-                SELECT DISTINCT ON (COALESCE(website_id::text, url))
-                    COALESCE(website_id::text, url) AS scan_key,
-                    compliance_score,
-                    critical_issues,
-                    total_risk_euro
-                FROM scan_history
-                WHERE user_id = $1
-                ORDER BY COALESCE(website_id::text, url), scan_timestamp DESC
-            """, user_id)
+            # Latest scan per website (read model, maintained by a trigger on scan_history)
+            latest_scans = await latest_scans_for_user(conn, user_id)
             
             # Calculate aggregated metrics
             if latest_scans:
@@ -85,25 +77,15 @@ async def get_dashboard_metrics(user: Dict[str, Any] = Depends(get_current_user)
             # Get scans this month
             from datetime import datetime, timedelta
             month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            scans_this_month = await conn.fetchval(
-                "SELECT COUNT(*) FROM scan_history WHERE user_id = $1 AND scan_timestamp >= $2",
-                user_id, month_start
-            )
+            scans_this_month = await scan_count_since(conn, user_id, month_start.date())
             
             # Calculate trends (compare with last week)
             score_trend = None
             critical_trend = None
             
+            # State per website as of a week ago (last daily rollup before that day)
             week_ago = datetime.now() - timedelta(days=7)
-            old_scans = await conn.fetch("""
-                SELECT DISTINCT ON (COALESCE(website_id::text, url))
-                    COALESCE(website_id::text, url) AS scan_key,
-                    compliance_score,
-                    critical_issues
-                FROM scan_history
-                WHERE user_id = $1 AND scan_timestamp < $2
-                ORDER BY COALESCE(website_id::text, url), scan_timestamp DESC
-            """, user_id, week_ago)
+            old_scans = await scans_before(conn, user_id, week_ago.date())
             
             if old_scans and latest_scans:
                 old_avg_score = int(sum(scan['compliance_score'] for scan in old_scans) / len(old_scans))
@@ -195,18 +177,8 @@ async def get_dashboard_stats(user_id: int = 1):
                 LIMIT 10
             """, user_id)
             
-            # Issue category distribution
-            issue_categories = await conn.fetch("""
-                SELECT 
-                    (issue->>'category')::text as category,
-                    COUNT(*) as count
-                FROM scan_history sh,
-                     jsonb_array_elements(scan_data->'issues') as issue
-                WHERE sh.user_id = $1
-                GROUP BY category
-                ORDER BY count DESC
-                LIMIT 10
-            """, user_id)
+            # Issue category distribution (open issues of the latest scan per website)
+            issue_categories = await issue_category_counts(conn, user_id)
             
             return {
                 "recent_scans": [dict(row) for row in recent_scans],
@@ -12,6 +12,8 @@ from typing import Dict, Any, List, Optional
 import logging
 from contextlib import asynccontextmanager
 
+from principal_cache import principal_cache
+
 logger = logging.getLogger(__name__)
 
 class DatabaseService:
@@ -593,6 +595,7 @@ class DatabaseService:
                 """
                 await conn.execute(query, user_id, module_id, stripe_subscription_id)
                 logger.info(f"Granted module {module_id} to user {user_id}")
+                await principal_cache.invalidate(user_id)
                 return True
         
         except Exception as e:
@@ -623,6 +626,7 @@ class DatabaseService:
                 """
                 await conn.execute(query, user_id, module_id)
                 logger.info(f"Revoked module {module_id} from user {user_id}")
+                await principal_cache.invalidate(user_id)
                 return True
         
         except Exception as e:
@@ -30,6 +30,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 import logging
 
+from principal_cache import principal_cache
+
 logger = logging.getLogger(__name__)
 
 # ==========================================
@@ -98,6 +100,7 @@ async def init_redis() -> Optional[aioredis.Redis]:
         except Exception as e:
             print(f"⚠️ Redis connection failed: {e}")
             _redis_client = None
+        principal_cache.redis = _redis_client
     return _redis_client
 
 async def close_redis():
@@ -106,6 +109,7 @@ async def close_redis():
     if _redis_client:
         await _redis_client.close()
         _redis_client = None
+    principal_cache.redis = None
 
 async def get_db() -> asyncpg.Pool:
     """
@@ -141,6 +145,15 @@ async def get_redis() -> Optional[aioredis.Redis]:
 
 security = HTTPBearer(auto_error=False)
 
+async def _load_principal(user_id: int, jti: Optional[str]) -> Optional[dict]:
+    """User inkl. Plan und Modulen — aus dem Principal-Cache oder per DB-Abfrage."""
+    async def load() -> Optional[dict]:
+        from auth_service import AuthService
+        auth = AuthService(await get_db(), await get_redis())
+        return await auth.get_user_by_id(user_id)
+
+    return await principal_cache.get_or_load(user_id, jti, load)
+
 async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
@@ -154,7 +167,13 @@ async def get_current_user(
     - Garantiert: id ist int, is_active ist True
     - Wirft 401 bei Token-Problem oder User-nicht-gefunden
     - Wirft 403 bei deaktiviertem User
+    - Principal kommt aus dem principal_cache (kurze TTL) und wird pro Request
+      auf request.state gehalten
     """
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
     token: Optional[str] = None
     if credentials:
         token = credentials.credentials
@@ -216,10 +235,7 @@ async def get_current_user(
             except Exception as e:
                 logger.warning(f"JTI blacklist check failed: {e}")
 
-    db = await get_db()
-    from auth_service import AuthService
-    auth = AuthService(db, await get_redis())
-    user = await auth.get_user_by_id(user_id)
+    user = await _load_principal(user_id, jti)
 
     if not user:
         raise HTTPException(
@@ -234,6 +250,7 @@ async def get_current_user(
         )
 
     user["id"] = int(user["id"])
+    request.state.principal = user
     return user
 
 async def get_current_user_optional(
@@ -271,10 +288,7 @@ async def get_current_user_optional(
     except (TypeError, ValueError):
         return None
 
-    db = await get_db()
-    from auth_service import AuthService
-    auth = AuthService(db)
-    user = await auth.get_user_by_id(user_id)
+    user = await _load_principal(user_id, payload.get("jti"))
     if not user or not user.get("is_active", True):
         return None
 
@@ -3,18 +3,13 @@ GDPR-compliant email service for Complyo lead generation
 Supports verification emails and compliance report delivery
 """
 
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
 import os
 from typing import Optional, Dict, Any
 import logging
-from jinja2 import Template
 import json
-from pdf_report_generator import pdf_generator
+from cpu_executor import cpu_executor
+from mail_transport import MailMessage, cached_template, mail_transport
+from pdf_report_generator import render_compliance_report
 from i18n_service import i18n_service
 
 logger = logging.getLogger(__name__)
@@ -37,7 +32,7 @@ class EmailService:
         if self.demo_mode:
             logger.info("Email service running in DEMO MODE - emails will be logged to console")
 
-    def send_verification_email(self, email: str, name: str, verification_token: str, language: str = "de") -> bool:
+    async def send_verification_email(self, email: str, name: str, verification_token: str, language: str = "de") -> bool:
         """
         Send GDPR-compliant verification email with double opt-in in specified language
         """
@@ -50,7 +45,7 @@ class EmailService:
             html_body = self._get_verification_email_template(name, verification_url, language)
             text_body = self._get_verification_email_text(name, verification_url, language)
             
-            return self._send_email(
+            return await self._send_email(
                 to_email=email,
                 subject=subject,
                 html_body=html_body,
@@ -61,7 +56,7 @@ class EmailService:
             logger.error(f"Failed to send verification email to {email}: {str(e)}")
             return False
 
-    def send_compliance_report(self, email: str, name: str, analysis_data: Dict[str, Any], lead_data: Optional[Dict[str, Any]] = None) -> bool:
+    async def send_compliance_report(self, email: str, name: str, analysis_data: Dict[str, Any], lead_data: Optional[Dict[str, Any]] = None) -> bool:
         """
         Send compliance report with PDF attachment after successful email verification
         """
@@ -84,7 +79,7 @@ class EmailService:
             if not lead_data:
                 lead_data = {'name': name, 'email': email, 'company': ''}
             
-            pdf_bytes = pdf_generator.generate_compliance_report(analysis_data, lead_data)
+            pdf_bytes = await cpu_executor.run("pdf_report", render_compliance_report, analysis_data, lead_data)
             
             # Save PDF temporarily for attachment
             import tempfile
@@ -98,7 +93,7 @@ class EmailService:
                 html_body = self._get_report_email_template(name, analysis_data)
                 text_body = self._get_report_email_text(name, analysis_data)
                 
-                success = self._send_email(
+                success = await self._send_email(
                     to_email=email,
                     subject=subject,
                     html_body=html_body,
@@ -120,9 +115,9 @@ class EmailService:
             logger.error(f"Failed to send compliance report to {email}: {str(e)}")
             return False
 
-    def _send_email(self, to_email: str, subject: str, html_body: str, text_body: str, attachment_path: Optional[str] = None, attachment_name: Optional[str] = None) -> bool:
+    async def _send_email(self, to_email: str, subject: str, html_body: str, text_body: str, attachment_path: Optional[str] = None, attachment_name: Optional[str] = None) -> bool:
         """
-        Core email sending function
+        Core email sending function (pooled async SMTP via mail_transport)
         """
         if self.demo_mode:
             # Demo mode - log email to console
@@ -141,47 +136,19 @@ class EmailService:
             print(f"="*60 + "\n")
             return True
         
-        try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add text and HTML parts
-            text_part = MIMEText(text_body, 'plain', 'utf-8')
-            html_part = MIMEText(html_body, 'html', 'utf-8')
-            
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            # Add attachment if provided
-            if attachment_path and os.path.exists(attachment_path):
-                with open(attachment_path, "rb") as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                filename = attachment_name or os.path.basename(attachment_path)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {filename}',
-                )
-                msg.attach(part)
-            
-            # Send email
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.smtp_username, self.smtp_password)
-                server.sendmail(self.sender_email, to_email, msg.as_string())
-            
-            logger.info(f"Email sent successfully to {to_email}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"SMTP error sending email to {to_email}: {str(e)}")
-            return False
+        attachments = []
+        if attachment_path and os.path.exists(attachment_path):
+            with open(attachment_path, "rb") as attachment:
+                attachments.append((attachment_name or os.path.basename(attachment_path), attachment.read()))
+        
+        return await mail_transport.send(MailMessage(
+            to=to_email,
+            subject=subject,
+            html_body=html_body,
+            text_body=text_body,
+            attachments=attachments,
+            sender=f"{self.sender_name} <{self.sender_email}>",
+        ))
 
     def _get_verification_email_template(self, name: str, verification_url: str, language: str = "de") -> str:
         """
@@ -191,7 +158,7 @@ class EmailService:
         title = i18n_service.get_translation("verify_email_title", language)
         button_text = i18n_service.get_translation("verify_button", language)
         gdpr_notice = i18n_service.get_translation("gdpr_notice", language)
-        template = Template("""
+        template = cached_template("verification_email", """
 <!DOCTYPE html>
 <html>
 <head>
@@ -250,7 +217,7 @@ class EmailService:
     </div>
 </body>
 </html>
-        """)
+        """, language)
         
         return template.render(name=name, verification_url=verification_url)
 
@@ -288,7 +255,7 @@ datenschutz@complyo.tech • https://complyo.tech/datenschutz
         risk_level = analysis_data.get('estimated_risk_euro', 'Unbekannt')
         findings_count = len(analysis_data.get('findings', {}))
         
-        template = Template("""
+        template = cached_template("report_email", """
 <!DOCTYPE html>
 <html>
 <head>
@@ -401,7 +368,7 @@ Complyo GmbH • Compliance Made Simple
 support@complyo.tech • http://localhost:3000
         """
 
-    def send_deletion_confirmation_email(self, email: str, reference_id: str) -> bool:
+    async def send_deletion_confirmation_email(self, email: str, reference_id: str) -> bool:
         """
         Send confirmation email after data deletion (GDPR compliance)
         """
@@ -479,13 +446,13 @@ support@complyo.tech • http://localhost:3000
             Ihr Complyo Team
             """
             
-            return self._send_email(email, subject, html_content, text_content)
+            return await self._send_email(email, subject, html_content, text_content)
             
         except Exception as e:
             logger.error(f"Error sending deletion confirmation email: {e}")
             return False
     
-    def send_data_export_email(self, email: str, export_data: dict) -> bool:
+    async def send_data_export_email(self, email: str, export_data: dict) -> bool:
         """
         Send data export email (GDPR data portability)
         """
@@ -580,13 +547,13 @@ support@complyo.tech • http://localhost:3000
             Ihr Complyo Team
             """
             
-            return self._send_email(email, subject, html_content, text_content)
+            return await self._send_email(email, subject, html_content, text_content)
             
         except Exception as e:
             logger.error(f"Error sending data export email: {e}")
             return False
 
-    def send_waitlist_confirmation(self, email: str, name: str, confirm_url: str) -> bool:
+    async def send_waitlist_confirmation(self, email: str, name: str, confirm_url: str) -> bool:
         """
         Bestätigungs-E-Mail für die Early-Access Waitlist (Double-Opt-In, DSGVO-konform)
         """
@@ -669,7 +636,7 @@ Kontakt: support@complyo.de
 Du erhältst diese E-Mail, weil du dich auf complyo.de / complyo.tech für Early Access angemeldet hast.
 Deine Daten werden DSGVO-konform verarbeitet (Art. 6 Abs. 1 lit. a DSGVO).
 """
-            return self._send_email(
+            return await self._send_email(
                 to_email=email,
                 subject=subject,
                 html_body=html_body,
@@ -680,7 +647,7 @@ Deine Daten werden DSGVO-konform verarbeitet (Art. 6 Abs. 1 lit. a DSGVO).
             logger.error(f"Failed to send waitlist confirmation to {email}: {e}")
             return False
 
-    def send_waitlist_admin_notification(self, email: str, name: str, phone: str, source: str) -> bool:
+    async def send_waitlist_admin_notification(self, email: str, name: str, phone: str, source: str) -> bool:
         """
         Interne Benachrichtigung an den Admin bei jeder neuen Waitlist-Anmeldung
         """
@@ -719,7 +686,7 @@ Quelle:   {source}
 
 Double-Opt-In ausstehend.
 """
-            return self._send_email(
+            return await self._send_email(
                 to_email=self.admin_notify_email,
                 subject=subject,
                 html_body=html_body,
@@ -300,7 +300,7 @@ async def _send_expert_request_email(
     team_email = "support@complyo.tech"
 
     try:
-        email_service._send_email(
+        await email_service._send_email(
             to_email=contact_email,
             subject=f"Ihre Expertservice-Anfrage {request_id}",
             html_body=customer_html,
@@ -311,7 +311,7 @@ async def _send_expert_request_email(
         logger.error(f"Kunden-Email fehlgeschlagen ({contact_email}): {e}")
 
     try:
-        email_service._send_email(
+        await email_service._send_email(
             to_email=team_email,
             subject=f"Neue Expertservice-Anfrage: {request_id}",
             html_body=team_html,
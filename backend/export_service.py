@@ -18,6 +18,8 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import io
 
+from cpu_executor import cpu_executor
+
 logger = logging.getLogger(__name__)
 
 class ExportService:
@@ -331,114 +333,121 @@ class ExportService:
         return file_path, file_name
     
     async def _export_as_pdf(self, fix: asyncpg.Record) -> tuple[str, str]:
-        """Generiert PDF-Export mit ReportLab"""
+        """Generiert PDF-Export mit ReportLab (im CPU-Executor, nicht im Event-Loop)"""
         fix_category = fix['issue_category']
-        fix_type = fix['fix_type']
-        generated_at = fix['generated_at']
         
         file_name = f"complyo_fix_{fix['id']}_{fix_category}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         file_path = os.path.join(self.export_dir, file_name)
         
-        # Create PDF
-        doc = SimpleDocTemplate(
-            file_path,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#3b82f6'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#1f2937'),
-            spaceAfter=12
-        )
-        
-        # Build PDF content
-        content = []
-        
-        # Title
-        content.append(Paragraph("Complyo Compliance-Fix", title_style))
-        content.append(Spacer(1, 0.5*cm))
-        
-        # Metadata Table
-        meta_data = [
-            ['Fix-ID:', f"#{fix['id']}"],
-            ['Kategorie:', fix_category],
-            ['Fix-Typ:', fix_type],
-            ['Generiert am:', generated_at.strftime('%d.%m.%Y um %H:%M Uhr')],
-        ]
-        
-        meta_table = Table(meta_data, colWidths=[4*cm, 12*cm])
-        meta_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f9ff')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
-        
-        content.append(meta_table)
-        content.append(Spacer(1, 1*cm))
-        
-        # Description
-        content.append(Paragraph("Beschreibung", heading_style))
-        content.append(Paragraph(
-            f"Dieser Fix behebt Compliance-Probleme im Bereich <b>{fix_category}</b> auf Ihrer Website.",
-            styles['BodyText']
-        ))
-        content.append(Spacer(1, 0.5*cm))
-        
-        # Warning
-        content.append(Paragraph("⚠️ Wichtiger Hinweis", heading_style))
-        content.append(Paragraph(
-            "Bitte überprüfen Sie alle Angaben sorgfältig und passen Sie die Platzhalter an Ihre spezifischen Daten an.",
-            styles['BodyText']
-        ))
-        content.append(Spacer(1, 0.5*cm))
-        
-        # Steps
-        content.append(Paragraph("Umsetzungsschritte", heading_style))
-        content.append(Paragraph(
-            "1. Kopieren Sie den generierten Code<br/>"
-            "2. Fügen Sie ihn in Ihre Website ein<br/>"
-            "3. Ersetzen Sie alle Platzhalter [in eckigen Klammern]<br/>"
-            "4. Testen Sie die Funktionalität",
-            styles['BodyText']
-        ))
-        content.append(Spacer(1, 1*cm))
-        
-        # Footer
-        content.append(Spacer(1, 2*cm))
-        content.append(Paragraph(
-            "_" * 80,
-            styles['Normal']
-        ))
-        content.append(Paragraph(
-            "Exportiert von Complyo.tech | © 2025 Complyo",
-            ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey, alignment=TA_CENTER)
-        ))
-        
-        # Build PDF
-        doc.build(content)
+        fix_data = {key: fix[key] for key in ('id', 'issue_category', 'fix_type', 'generated_at')}
+        await cpu_executor.run("pdf_export", render_fix_pdf, fix_data, file_path)
         
         logger.info(f"✅ PDF export saved: {file_path}")
         return file_path, file_name
 
+
+def render_fix_pdf(fix: Dict[str, Any], file_path: str) -> None:
+    """Schreibt das Fix-PDF nach file_path (picklebar, läuft im CPU-Executor)"""
+    fix_category = fix['issue_category']
+    fix_type = fix['fix_type']
+    generated_at = fix['generated_at']
+    
+    # Create PDF
+    doc = SimpleDocTemplate(
+        file_path,
+        pagesize=A4,
+        rightMargin=2*cm,
+        leftMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm
+    )
+    
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#3b82f6'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=12
+    )
+    
+    # Build PDF content
+    content = []
+    
+    # Title
+    content.append(Paragraph("Complyo Compliance-Fix", title_style))
+    content.append(Spacer(1, 0.5*cm))
+    
+    # Metadata Table
+    meta_data = [
+        ['Fix-ID:', f"#{fix['id']}"],
+        ['Kategorie:', fix_category],
+        ['Fix-Typ:', fix_type],
+        ['Generiert am:', generated_at.strftime('%d.%m.%Y um %H:%M Uhr')],
+    ]
+    
+    meta_table = Table(meta_data, colWidths=[4*cm, 12*cm])
+    meta_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f9ff')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+    ]))
+    
+    content.append(meta_table)
+    content.append(Spacer(1, 1*cm))
+    
+    # Description
+    content.append(Paragraph("Beschreibung", heading_style))
+    content.append(Paragraph(
+        f"Dieser Fix behebt Compliance-Probleme im Bereich <b>{fix_category}</b> auf Ihrer Website.",
+        styles['BodyText']
+    ))
+    content.append(Spacer(1, 0.5*cm))
+    
+    # Warning
+    content.append(Paragraph("⚠️ Wichtiger Hinweis", heading_style))
+    content.append(Paragraph(
+        "Bitte überprüfen Sie alle Angaben sorgfältig und passen Sie die Platzhalter an Ihre spezifischen Daten an.",
+        styles['BodyText']
+    ))
+    content.append(Spacer(1, 0.5*cm))
+    
+    # Steps
+    content.append(Paragraph("Umsetzungsschritte", heading_style))
+    content.append(Paragraph(
+        "1. Kopieren Sie den generierten Code<br/>"
+        "2. Fügen Sie ihn in Ihre Website ein<br/>"
+        "3. Ersetzen Sie alle Platzhalter [in eckigen Klammern]<br/>"
+        "4. Testen Sie die Funktionalität",
+        styles['BodyText']
+    ))
+    content.append(Spacer(1, 1*cm))
+    
+    # Footer
+    content.append(Spacer(1, 2*cm))
+    content.append(Paragraph(
+        "_" * 80,
+        styles['Normal']
+    ))
+    content.append(Paragraph(
+        "Exportiert von Complyo.tech | © 2025 Complyo",
+        ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey, alignment=TA_CENTER)
+    ))
+    
+    # Build PDF
+    doc.build(content)
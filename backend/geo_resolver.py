@@ -0,0 +1,318 @@
+"""
+Geo-Resolver
+Länderbestimmung für Banner-Besucher ohne Datenbankzugriff
+
+Statt pro Besucher SELECT + Upsert auf geo_ip_cache (Banner-kritischer Pfad):
+- Lokale IP-Range-Tabelle (CSV oder MMDB) als sortierte Arrays je IP-Version,
+  Lookup per Binärsuche; benachbarte Bereiche desselben Landes werden
+  zusammengefasst
+- Prozess-LRU: gehashte IP → Land (Hash mit zufälligem Prozess-Salt, keine
+  Klar-IPs im Speicher)
+- Proxy-Header in konfigurierter Reihenfolge: zuerst Länder-Header (z.B.
+  CF-IPCountry), dann Client-IP-Header — nur von Peers aus TRUSTED_PROXIES
+  (wie dependencies.get_client_ip); ohne TRUSTED_PROXIES zählt nur die Peer-IP
+- Fallback: GEOIP_DEFAULT_COUNTRY (private Adressen, keine Tabelle, kein Treffer)
+
+Unterstützte Dateien (GEOIP_DB_PATH):
+- *.mmdb (MaxMind GeoLite2 / DB-IP Lite), benötigt das Paket maxminddb
+- *.csv / *.csv.gz: start,end,country (IP-Text oder Integer, z.B. DB-IP Lite,
+  IP2Location LITE) oder network,country (CIDR)
+
+Konfiguration über Umgebungsvariablen:
+- GEOIP_DB_PATH            Pfad der Range-Tabelle (Default: data/geoip/ip-country.csv)
+- GEOIP_COUNTRY_HEADERS    Länder-Header in Reihenfolge (Default: CF-IPCountry)
+- GEOIP_TRUSTED_HEADERS    Client-IP-Header in Reihenfolge (Default: CF-Connecting-IP,X-Real-IP,X-Forwarded-For)
+- GEOIP_DEFAULT_COUNTRY    Land ohne Treffer (Default: DE)
+- GEOIP_CACHE_SIZE         Max. Einträge im LRU (Default: 100000)
+- TRUSTED_PROXIES          Peer-IPs (kommagetrennt), deren Header beachtet werden; leer = keine
+
+Usage:
+    from geo_resolver import geo_resolver
+
+    geo_resolver.load()  # beim Startup (blockierend, z.B. über cpu_executor)
+    result = geo_resolver.resolve(request.headers, request.client.host)
+    result.country_code, result.source  # "DE", "table"
+"""
+
+import csv
+import gzip
+import hashlib
+import ipaddress
+import logging
+import os
+import secrets
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from metrics import geoip_lookups_total
+
+logger = logging.getLogger(__name__)
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+GEOIP_DB_PATH = os.getenv(
+    "GEOIP_DB_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "geoip", "ip-country.csv"),
+)
+GEOIP_DEFAULT_COUNTRY = os.getenv("GEOIP_DEFAULT_COUNTRY", "DE")
+GEOIP_CACHE_SIZE = int(os.getenv("GEOIP_CACHE_SIZE", "100000"))
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+# IPv4-Bereiche in IPv6-Datenbanken (IPv4-compatible ::/96 und IPv4-mapped ::ffff:0:0/96)
+_V4_COMPAT_END = 0xFFFFFFFF
+_V4_MAPPED_START = 0xFFFF_0000_0000
+_V4_MAPPED_END = 0xFFFF_FFFF_FFFF
+
+# Kein echtes Land (Cloudflare: XX = unbekannt, T1 = Tor)
+_INVALID_COUNTRIES = {"XX", "T1", "ZZ", "EU", "AP"}
+
+
+@dataclass(frozen=True)
+class GeoResult:
+    """Ergebnis einer Auflösung"""
+    country_code: str
+    source: str  # header | cache | table | default
+    cached: bool = False
+
+
+class GeoRangeTable:
+    """
+    Sortierte, nicht überlappende IP-Bereiche je IP-Version
+
+    starts/ends/countries sind parallele Arrays; lookup() ist eine
+    Binärsuche auf starts.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[int, int, int, str]], source: str = ""):
+        self.source = source
+        by_version: Dict[int, List[Tuple[int, int, str]]] = {4: [], 6: []}
+        for version, start, end, country in ranges:
+            if version == 6 and end <= _V4_COMPAT_END:
+                version = 4
+            elif version == 6 and start >= _V4_MAPPED_START and end <= _V4_MAPPED_END:
+                version, start, end = 4, start - _V4_MAPPED_START, end - _V4_MAPPED_START
+            by_version[version].append((start, end, country))
+
+        self._tables = {version: self._pack(version, rows) for version, rows in by_version.items()}
+
+    @staticmethod
+    def _pack(version: int, rows: List[Tuple[int, int, str]]) -> Tuple[Sequence[int], Sequence[int], List[str]]:
+        rows.sort()
+        starts: List[int] = []
+        ends: List[int] = []
+        countries: List[str] = []
+        for start, end, country in rows:
+            if starts and start <= ends[-1] + 1 and country == countries[-1]:
+                ends[-1] = max(ends[-1], end)
+                continue
+            if starts and start <= ends[-1]:
+                start = ends[-1] + 1  # Überlappung: erster Bereich gewinnt
+                if start > end:
+                    continue
+            starts.append(start)
+            ends.append(end)
+            countries.append(country)
+        if version == 4:
+            # 4 Byte je Grenze statt eines int-Objekts
+            return array("I", starts), array("I", ends), countries
+        return starts, ends, countries
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts, _, _ in self._tables.values())
+
+    def lookup(self, ip: IPAddress) -> Optional[str]:
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        starts, ends, countries = self._tables[ip.version]
+        value = int(ip)
+        i = bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return countries[i]
+        return None
+
+
+# =============================================================================
+# Laden
+# =============================================================================
+
+def _parse_bound(value: str) -> Tuple[int, int]:
+    """IP-Text oder Integer → (Version, Wert)"""
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return (4 if number <= _V4_COMPAT_END else 6), number
+    ip = ipaddress.ip_address(value)
+    return ip.version, int(ip)
+
+
+def _country(value: str) -> Optional[str]:
+    value = (value or "").strip().upper()
+    return value if len(value) == 2 and value.isalpha() and value not in _INVALID_COUNTRIES else None
+
+
+def iter_csv_ranges(path: str) -> Iterable[Tuple[int, int, int, str]]:
+    """(Version, Start, Ende, Land) aus start,end,country- oder network,country-CSV"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            try:
+                if len(row) >= 2 and "/" in row[0]:
+                    network = ipaddress.ip_network(row[0].strip(), strict=False)
+                    country = _country(row[1])
+                    version, start, end = network.version, int(network.network_address), int(network.broadcast_address)
+                elif len(row) >= 3:
+                    start_version, start = _parse_bound(row[0])
+                    end_version, end = _parse_bound(row[1])
+                    version = max(start_version, end_version)
+                    country = _country(row[2])
+                else:
+                    continue
+            except ValueError:
+                continue  # Kopfzeile / Kommentar
+            if country:
+                yield version, start, end, country
+
+
+def iter_mmdb_ranges(path: str) -> Iterable[Tuple[int, int, int, str]]:
+    """(Version, Start, Ende, Land) aus einer MMDB-Datei (MaxMind/DB-IP/ipinfo-Schema)"""
+    if maxminddb is None:
+        raise RuntimeError("maxminddb nicht installiert (pip install maxminddb)")
+    with maxminddb.open_database(path) as reader:
+        for network, record in reader:
+            record = record or {}
+            country = record.get("country") or record.get("registered_country") or {}
+            code = _country(country if isinstance(country, str) else country.get("iso_code", ""))
+            if code:
+                yield network.version, int(network.network_address), int(network.broadcast_address), code
+
+
+def load_range_table(path: str) -> GeoRangeTable:
+    ranges = iter_mmdb_ranges(path) if path.endswith(".mmdb") else iter_csv_ranges(path)
+    return GeoRangeTable(ranges, source=path)
+
+
+# =============================================================================
+# Resolver
+# =============================================================================
+
+class GeoResolver:
+    """Header → LRU → Range-Tabelle → Default"""
+
+    def __init__(
+        self,
+        db_path: str = GEOIP_DB_PATH,
+        country_headers: Optional[List[str]] = None,
+        ip_headers: Optional[List[str]] = None,
+        trusted_proxies: Optional[List[str]] = None,
+        default_country: str = GEOIP_DEFAULT_COUNTRY,
+        cache_size: int = GEOIP_CACHE_SIZE,
+    ):
+        self.db_path = db_path
+        self.country_headers = country_headers if country_headers is not None else _env_list("GEOIP_COUNTRY_HEADERS", "CF-IPCountry")
+        self.ip_headers = ip_headers if ip_headers is not None else _env_list(
+            "GEOIP_TRUSTED_HEADERS", "CF-Connecting-IP,X-Real-IP,X-Forwarded-For"
+        )
+        self.trusted_proxies = set(trusted_proxies if trusted_proxies is not None else _env_list("TRUSTED_PROXIES", ""))
+        self.default_country = default_country
+        self.cache_size = cache_size
+        self.table: Optional[GeoRangeTable] = None
+        self.load_error: Optional[str] = None
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._salt = secrets.token_bytes(16)
+        self._stats = {"header": 0, "cache": 0, "table": 0, "default": 0}
+
+    def load(self) -> Optional[GeoRangeTable]:
+        """Lädt die Range-Tabelle (blockierend); ohne Datei bleibt nur Header/Default"""
+        if not self.trusted_proxies:
+            logger.warning("⚠️ GeoIP: TRUSTED_PROXIES nicht gesetzt – Länder- und Client-IP-Header "
+                           "werden ignoriert, es zählt nur die Peer-IP")
+        if not self.db_path or not os.path.exists(self.db_path):
+            self.load_error = f"{self.db_path or 'GEOIP_DB_PATH'} nicht vorhanden"
+            logger.warning(f"⚠️ GeoIP: {self.load_error} – nur Länder-Header und Default ({self.default_country})")
+            return None
+        try:
+            table = load_range_table(self.db_path)
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"GeoIP-Tabelle {self.db_path} nicht ladbar: {e}")
+            return None
+        self.table = table
+        self._cache = OrderedDict()  # Austausch statt clear(): load() läuft ggf. in einem Thread
+        self.load_error = None
+        logger.info(f"✅ GeoIP-Tabelle geladen: {len(table)} Bereiche aus {self.db_path}")
+        return table
+
+    def _headers_trusted(self, peer_ip: Optional[str]) -> bool:
+        return peer_ip is not None and peer_ip in self.trusted_proxies
+
+    def client_ip(self, headers: Mapping[str, str], peer_ip: Optional[str]) -> Optional[IPAddress]:
+        """Erste gültige IP aus den Client-IP-Headern (X-Forwarded-For: Eintrag ganz links), sonst Peer"""
+        candidates = []
+        if self._headers_trusted(peer_ip):
+            for name in self.ip_headers:
+                value = headers.get(name)
+                if value:
+                    candidates.append(value.split(",")[0])
+        candidates.append(peer_ip or "")
+        for candidate in candidates:
+            try:
+                return ipaddress.ip_address(candidate.strip().strip("[]"))
+            except ValueError:
+                continue
+        return None
+
+    def resolve(self, headers: Mapping[str, str], peer_ip: Optional[str] = None) -> GeoResult:
+        if self._headers_trusted(peer_ip):
+            for name in self.country_headers:
+                country = _country(headers.get(name, ""))
+                if country:
+                    return self._count(GeoResult(country, "header"))
+
+        ip = self.client_ip(headers, peer_ip)
+        if ip is None or not ip.is_global:
+            return self._count(GeoResult(self.default_country, "default"))
+
+        cache, table = self._cache, self.table
+        key = hashlib.blake2b(ip.packed, digest_size=8, key=self._salt).digest()
+        country = cache.get(key)
+        if country is not None:
+            cache.move_to_end(key)
+            return self._count(GeoResult(country, "cache", cached=True))
+
+        country = table.lookup(ip) if table is not None else None
+        result = GeoResult(country, "table") if country else GeoResult(self.default_country, "default")
+        cache[key] = result.country_code
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return self._count(result)
+
+    def _count(self, result: GeoResult) -> GeoResult:
+        self._stats[result.source] += 1
+        geoip_lookups_total.labels(source=result.source).inc()
+        return result
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "up" if self.table is not None else "degraded",
+            "ranges": len(self.table) if self.table is not None else 0,
+            "cache_size": len(self._cache),
+            "trusted_proxies": len(self.trusted_proxies),
+            "lookups": dict(self._stats),
+            "error": self.load_error,
+        }
+
+
+# Globale Instanz
+geo_resolver = GeoResolver()
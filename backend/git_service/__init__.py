@@ -15,6 +15,7 @@ from .git_service import (
     GitLabClient,
     git_service
 )
+from .unified_diff import apply_unified_diff, PatchError
 
 __all__ = [
     "GitService",
@@ -26,5 +27,7 @@ __all__ = [
     "PRStatus",
     "GitHubClient",
     "GitLabClient",
-    "git_service"
+    "git_service",
+    "apply_unified_diff",
+    "PatchError"
 ]
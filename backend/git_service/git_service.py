@@ -8,21 +8,38 @@ Features:
 - Patches committen
 - Pull Requests erstellen
 - Webhook-Verarbeitung
+- Batch-Commit: alle Patches als ein Commit (GitHub Git Data API / GitLab
+  Commits API mit mehreren Actions), Dateien werden parallel geladen
+- Retries bei (Secondary-)Rate-Limits und 5xx
+
+Konfiguration über Umgebungsvariablen:
+- GIT_PR_COMMIT_MODE       batched | per_file (Default: batched)
+- GIT_API_CONCURRENCY      Parallele Lese-Requests je PR (Default: 8)
+- GIT_API_MAX_RETRIES      Wiederholungen bei Rate-Limit/5xx (Default: 3)
+- GIT_API_MAX_RETRY_WAIT   Max. Wartezeit je Retry in s, länger → Fehler (Default: 60)
 """
 
 import os
 import base64
 import asyncio
 import aiohttp
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+import json
 import logging
-import re
+import time
+
+from .unified_diff import PatchError, apply_unified_diff
 
 logger = logging.getLogger(__name__)
 
+COMMIT_MODE = os.getenv("GIT_PR_COMMIT_MODE", "batched")
+API_CONCURRENCY = int(os.getenv("GIT_API_CONCURRENCY", "8"))
+API_MAX_RETRIES = int(os.getenv("GIT_API_MAX_RETRIES", "3"))
+API_MAX_RETRY_WAIT = float(os.getenv("GIT_API_MAX_RETRY_WAIT", "60"))
+
 
 # =============================================================================
 # Enums & Data Classes
@@ -96,9 +113,94 @@ class CommitResult:
     commit_sha: Optional[str] = None
     branch_name: Optional[str] = None
     files_changed: List[str] = field(default_factory=list)
+    files_skipped: List[str] = field(default_factory=list)
     error: Optional[str] = None
 
 
+# =============================================================================
+# HTTP / Retries
+# =============================================================================
+
+def _retry_delay(status: int, headers: Any, body: Any, attempt: int) -> Optional[float]:
+    """
+    Wartezeit vor dem nächsten Versuch oder None (nicht wiederholen)
+
+    403/429 zählen nur als Rate-Limit, wenn Header oder Meldung das sagen —
+    ein echtes 403 (fehlende Rechte) wird nicht wiederholt.
+    """
+    if status in (403, 429):
+        retry_after = headers.get("Retry-After")
+        remaining = headers.get("X-RateLimit-Remaining", headers.get("RateLimit-Remaining"))
+        reset = headers.get("X-RateLimit-Reset", headers.get("RateLimit-Reset"))
+        message = str(body.get("message", "")).lower() if isinstance(body, dict) else ""
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = API_MAX_RETRY_WAIT
+        elif remaining == "0" and reset:
+            delay = max(0.0, float(reset) - time.time())
+        elif "rate limit" in message:
+            # Secondary Rate Limit ohne Header: laut GitHub mind. eine Minute warten
+            delay = API_MAX_RETRY_WAIT
+        else:
+            return None
+    elif status in (500, 502, 503, 504):
+        delay = float(2 ** attempt)
+    else:
+        return None
+    return delay if delay <= API_MAX_RETRY_WAIT else None
+
+
+async def _api_request(
+    session: Optional[aiohttp.ClientSession],
+    provider: str,
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    data: Optional[Dict] = None,
+    params: Optional[Dict] = None,
+) -> Tuple[bool, Any]:
+    """Ein API-Request mit Rate-Limit-/5xx-Retries; nutzt die Session des Clients, falls offen"""
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+    try:
+        for attempt in range(API_MAX_RETRIES + 1):
+            async with session.request(
+                method,
+                url,
+                headers=headers,
+                json=data,
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                text = await response.text()
+                try:
+                    result = json.loads(text) if text else {}
+                except ValueError:
+                    result = {"message": text[:500]}
+
+                if response.status in [200, 201, 204]:
+                    return True, result
+
+                delay = _retry_delay(response.status, response.headers, result, attempt)
+                if delay is None or attempt == API_MAX_RETRIES:
+                    logger.error(f"{provider} API error: {response.status} - {result}")
+                    return False, result
+
+            logger.warning(f"{provider} API {response.status} for {method} {url}, retry in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    except Exception as e:
+        logger.error(f"{provider} API request failed: {e}")
+        return False, {"error": str(e)}
+
+    finally:
+        if own_session:
+            await session.close()
+
+
 # =============================================================================
 # GitHub API Client
 # =============================================================================
@@ -115,6 +217,17 @@ class GitHubClient:
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28"
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def __aenter__(self):
+        """Eine Session für alle Requests (Keep-Alive), sonst je Request eine neue"""
+        self._session = aiohttp.ClientSession()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._session:
+            await self._session.close()
+            self._session = None
     
     async def _request(
         self,
@@ -124,29 +237,9 @@ class GitHubClient:
         params: Optional[Dict] = None
     ) -> Tuple[bool, Any]:
         """Führt API-Request aus"""
-        url = f"{self.API_BASE}{endpoint}"
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method,
-                    url,
-                    headers=self.headers,
-                    json=data,
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    result = await response.json()
-                    
-                    if response.status in [200, 201, 204]:
-                        return True, result
-                    else:
-                        logger.error(f"GitHub API error: {response.status} - {result}")
-                        return False, result
-        
-        except Exception as e:
-            logger.error(f"GitHub API request failed: {e}")
-            return False, {"error": str(e)}
+        return await _api_request(
+            self._session, "GitHub", method, f"{self.API_BASE}{endpoint}", self.headers, data, params
+        )
     
     async def get_user(self) -> Dict[str, Any]:
         """Gibt aktuellen User zurück"""
@@ -226,6 +319,12 @@ class GitHubClient:
             params={"ref": branch}
         )
         
+        if success and data.get("encoding") == "none" and data.get("sha"):
+            # Dateien > 1 MB liefert die Contents-API ohne Inhalt → Blob-API
+            success, data = await self._request(
+                "GET", f"/repos/{owner}/{repo}/git/blobs/{data['sha']}"
+            )
+        
         if success and data.get("content"):
             content = base64.b64decode(data["content"]).decode("utf-8")
             return content, data.get("sha")
@@ -357,63 +456,156 @@ class GitHubClient:
         """
         Wendet einen Unified Diff auf Text an
         
-        Vereinfachte Implementierung - für komplexere Diffs
-        sollte eine Library wie `patch` verwendet werden.
+        Toleriert versetzte Hunks (Offset) und abweichende äußere
+        Kontextzeilen (Fuzz), siehe git_service.unified_diff.
         """
-        original_lines = original.split('\n')
-        result_lines = original_lines.copy()
-        
-        # Parse Diff-Hunks
-        hunk_pattern = r'@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@'
-        
-        # Finde alle Hunks
-        hunks = []
-        current_hunk = None
-        
-        for line in diff.split('\n'):
-            match = re.match(hunk_pattern, line)
-            if match:
-                if current_hunk:
-                    hunks.append(current_hunk)
-                current_hunk = {
-                    'old_start': int(match.group(1)),
-                    'old_count': int(match.group(2) or 1),
-                    'new_start': int(match.group(3)),
-                    'new_count': int(match.group(4) or 1),
-                    'lines': []
-                }
-            elif current_hunk is not None:
-                if line.startswith('+') and not line.startswith('+++'):
-                    current_hunk['lines'].append(('+', line[1:]))
-                elif line.startswith('-') and not line.startswith('---'):
-                    current_hunk['lines'].append(('-', line[1:]))
-                elif line.startswith(' '):
-                    current_hunk['lines'].append((' ', line[1:]))
-        
-        if current_hunk:
-            hunks.append(current_hunk)
-        
-        # Wende Hunks rückwärts an (um Zeilennummern nicht zu verschieben)
-        offset = 0
-        for hunk in hunks:
-            line_num = hunk['old_start'] - 1 + offset
-            
-            for action, content in hunk['lines']:
-                if action == '-':
-                    # Zeile entfernen
-                    if line_num < len(result_lines):
-                        result_lines.pop(line_num)
-                        offset -= 1
-                elif action == '+':
-                    # Zeile hinzufügen
-                    result_lines.insert(line_num, content)
-                    line_num += 1
-                    offset += 1
-                else:
-                    # Kontextzeile überspringen
-                    line_num += 1
-        
-        return '\n'.join(result_lines)
+        return apply_unified_diff(original, diff)
+    
+    async def _get_commit_tree(self, owner: str, repo: str, commit_sha: str) -> Optional[str]:
+        """Gibt den Tree-SHA eines Commits zurück"""
+        success, data = await self._request("GET", f"/repos/{owner}/{repo}/git/commits/{commit_sha}")
+        if success:
+            return data.get("tree", {}).get("sha")
+        return None
+    
+    async def _get_file_modes(self, owner: str, repo: str, tree_sha: str, paths: List[str]) -> Dict[str, str]:
+        """
+        Gibt den Dateimodus (100644, 100755, 120000) der Pfade im Tree zurück
+        
+        Pfade, die fehlen (oder bei gekürztem Tree nicht enthalten sind),
+        bekommen 100644.
+        """
+        modes = {path: "100644" for path in paths}
+        success, data = await self._request(
+            "GET", f"/repos/{owner}/{repo}/git/trees/{tree_sha}", params={"recursive": "1"}
+        )
+        if not success:
+            logger.warning(f"Tree {tree_sha} not readable, using mode 100644 for {len(paths)} file(s)")
+            return modes
+        if data.get("truncated"):
+            logger.warning(f"Tree {tree_sha} truncated, file modes may default to 100644")
+        for entry in data.get("tree", []):
+            if entry.get("type") == "blob" and entry.get("path") in modes:
+                modes[entry["path"]] = entry["mode"]
+        return modes
+    
+    async def commit_files(
+        self,
+        owner: str,
+        repo: str,
+        branch: str,
+        patches: List[Dict[str, Any]],
+        commit_message: str
+    ) -> CommitResult:
+        """
+        Wendet alle Patches an und committet sie als einen Commit (Git Data API)
+        
+        Dateien werden parallel geladen und lokal gepatcht; danach folgen
+        genau drei schreibende Requests: Tree, Commit, Ref-Update. Der
+        Dateimodus (z.B. ausführbar, Symlink) bleibt wie im Basis-Tree.
+        Patches, die nicht passen, werden übersprungen (files_skipped).
+        """
+        head_sha = await self.get_branch_sha(owner, repo, branch)
+        if not head_sha:
+            return CommitResult(success=False, error=f"Branch '{branch}' nicht gefunden")
+        base_tree = await self._get_commit_tree(owner, repo, head_sha)
+        if not base_tree:
+            return CommitResult(success=False, error="Basis-Tree nicht gefunden")
+        
+        contents, skipped = await _apply_patches(
+            patches,
+            lambda path: self.get_file_content(owner, repo, path, head_sha),
+            self._apply_diff
+        )
+        if not contents:
+            return CommitResult(success=False, files_skipped=skipped, error="Keine Patches anwendbar")
+        modes = await self._get_file_modes(owner, repo, base_tree, list(contents))
+        
+        success, tree = await self._request(
+            "POST",
+            f"/repos/{owner}/{repo}/git/trees",
+            data={
+                "base_tree": base_tree,
+                "tree": [
+                    {"path": path, "mode": modes[path], "type": "blob", "content": content}
+                    for path, content in contents.items()
+                ]
+            }
+        )
+        if not success:
+            return CommitResult(success=False, files_skipped=skipped, error=f"Tree-Erstellung: {tree.get('message', tree)}")
+        
+        success, commit = await self._request(
+            "POST",
+            f"/repos/{owner}/{repo}/git/commits",
+            data={"message": commit_message, "tree": tree["sha"], "parents": [head_sha]}
+        )
+        if not success:
+            return CommitResult(success=False, files_skipped=skipped, error=f"Commit-Erstellung: {commit.get('message', commit)}")
+        
+        success, ref = await self._request(
+            "PATCH",
+            f"/repos/{owner}/{repo}/git/refs/heads/{branch}",
+            data={"sha": commit["sha"]}
+        )
+        if not success:
+            return CommitResult(success=False, files_skipped=skipped, error=f"Branch-Update: {ref.get('message', ref)}")
+        
+        return CommitResult(
+            success=True,
+            commit_sha=commit["sha"],
+            branch_name=branch,
+            files_changed=list(contents),
+            files_skipped=skipped
+        )
+
+
+async def _apply_patches(
+    patches: List[Dict[str, Any]],
+    load: Callable[[str], Awaitable[Tuple[Optional[str], Optional[str]]]],
+    apply: Callable[[str, str], str]
+) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Lädt alle Zieldateien parallel (begrenzt) und wendet die Patches lokal an
+    
+    Mehrere Patches auf dieselbe Datei werden nacheinander angewendet.
+    
+    Returns:
+        Tuple von ({path: neuer Inhalt}, übersprungene Pfade)
+    """
+    by_path: Dict[str, List[str]] = {}
+    for patch in patches:
+        if patch.get("unified_diff") and patch.get("file_path"):
+            by_path.setdefault(patch["file_path"], []).append(patch["unified_diff"])
+    
+    semaphore = asyncio.Semaphore(API_CONCURRENCY)
+    
+    async def _load(path: str) -> Optional[str]:
+        async with semaphore:
+            content, _sha = await load(path)
+            return content
+    
+    originals = await asyncio.gather(*(_load(path) for path in by_path))
+    
+    contents: Dict[str, str] = {}
+    skipped: List[str] = []
+    for (path, diffs), original in zip(by_path.items(), originals):
+        if original is None:
+            logger.warning(f"Patch skipped, file not found: {path}")
+            skipped.append(path)
+            continue
+        try:
+            patched = original
+            for diff in diffs:
+                patched = apply(patched, diff)
+        except PatchError as e:
+            logger.warning(f"Patch skipped for {path}: {e}")
+            skipped.append(path)
+            continue
+        if patched != original:
+            contents[path] = patched
+    
+    return contents, skipped
 
 
 # =============================================================================
@@ -432,6 +624,17 @@ class GitLabClient:
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def __aenter__(self):
+        """Eine Session für alle Requests (Keep-Alive), sonst je Request eine neue"""
+        self._session = aiohttp.ClientSession()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._session:
+            await self._session.close()
+            self._session = None
     
     async def _request(
         self,
@@ -441,29 +644,9 @@ class GitLabClient:
         params: Optional[Dict] = None
     ) -> Tuple[bool, Any]:
         """Führt API-Request aus"""
-        url = f"{self.api_base}{endpoint}"
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method,
-                    url,
-                    headers=self.headers,
-                    json=data,
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    result = await response.json()
-                    
-                    if response.status in [200, 201, 204]:
-                        return True, result
-                    else:
-                        logger.error(f"GitLab API error: {response.status} - {result}")
-                        return False, result
-        
-        except Exception as e:
-            logger.error(f"GitLab API request failed: {e}")
-            return False, {"error": str(e)}
+        return await _api_request(
+            self._session, "GitLab", method, f"{self.api_base}{endpoint}", self.headers, data, params
+        )
     
     def _encode_path(self, path: str) -> str:
         """URL-encodes project path für GitLab API"""
@@ -498,6 +681,84 @@ class GitLabClient:
         
         return False, data.get("message", "Branch-Erstellung fehlgeschlagen")
     
+    async def get_file_content(
+        self,
+        project_path: str,
+        path: str,
+        ref: str = "main"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Lädt Datei-Inhalt
+        
+        Returns:
+            Tuple von (content, last_commit_id) oder (None, None)
+        """
+        encoded = self._encode_path(project_path)
+        success, data = await self._request(
+            "GET",
+            f"/projects/{encoded}/repository/files/{self._encode_path(path)}",
+            params={"ref": ref}
+        )
+        
+        if success and data.get("content") is not None:
+            content = base64.b64decode(data["content"]).decode("utf-8")
+            return content, data.get("last_commit_id")
+        
+        return None, None
+    
+    async def commit_files(
+        self,
+        project_path: str,
+        branch: str,
+        patches: List[Dict[str, Any]],
+        commit_message: str
+    ) -> CommitResult:
+        """
+        Wendet alle Patches an und committet sie als einen Commit
+        (Commits API mit einer update-Action je Datei)
+        """
+        last_commits: Dict[str, Optional[str]] = {}
+        
+        async def _load(path: str) -> Tuple[Optional[str], Optional[str]]:
+            content, last_commit_id = await self.get_file_content(project_path, path, branch)
+            last_commits[path] = last_commit_id
+            return content, last_commit_id
+        
+        contents, skipped = await _apply_patches(patches, _load, apply_unified_diff)
+        if not contents:
+            return CommitResult(success=False, files_skipped=skipped, error="Keine Patches anwendbar")
+        
+        encoded = self._encode_path(project_path)
+        success, data = await self._request(
+            "POST",
+            f"/projects/{encoded}/repository/commits",
+            data={
+                "branch": branch,
+                "commit_message": commit_message,
+                "actions": [
+                    {
+                        "action": "update",
+                        "file_path": path,
+                        "content": content,
+                        # Schlägt fehl, falls die Datei seit dem Laden geändert wurde
+                        "last_commit_id": last_commits.get(path)
+                    }
+                    for path, content in contents.items()
+                ]
+            }
+        )
+        
+        if success:
+            return CommitResult(
+                success=True,
+                commit_sha=data.get("id"),
+                branch_name=branch,
+                files_changed=list(contents),
+                files_skipped=skipped
+            )
+        
+        return CommitResult(success=False, files_skipped=skipped, error=data.get("message", "Commit fehlgeschlagen"))
+    
     async def create_merge_request(
         self,
         project_path: str,
@@ -595,22 +856,23 @@ class GitService:
         features_str = "-".join(feature_ids[:2]).lower()
         branch_name = f"fix/a11y-{features_str}-{date_str}"
         
-        client = self.get_client(repo_info.provider, credentials)
+        try:
+            client = self.get_client(repo_info.provider, credentials)
+        except ValueError:
+            return PullRequestResult(
+                success=False,
+                error=f"Provider {repo_info.provider} noch nicht implementiert"
+            )
         
         try:
-            if repo_info.provider == GitProvider.GITHUB:
-                return await self._create_github_pr(
-                    client, repo_info, patches, branch_name, feature_ids
-                )
-            elif repo_info.provider == GitProvider.GITLAB:
+            async with client:
+                if repo_info.provider == GitProvider.GITHUB:
+                    return await self._create_github_pr(
+                        client, repo_info, patches, branch_name, feature_ids
+                    )
                 return await self._create_gitlab_mr(
                     client, repo_info, patches, branch_name, feature_ids
                 )
-            else:
-                return PullRequestResult(
-                    success=False,
-                    error=f"Provider {repo_info.provider} noch nicht implementiert"
-                )
         
         except Exception as e:
             logger.error(f"❌ PR creation failed: {e}")
@@ -636,16 +898,25 @@ class GitService:
         
         # 2. Patches committen
         files_changed = []
-        for patch in patches:
-            if patch.get("unified_diff") and patch.get("file_path"):
-                commit_result = await client.apply_unified_diff(
-                    owner, repo, branch_name,
-                    patch["file_path"],
-                    patch["unified_diff"],
-                    f"fix({patch.get('feature_id', 'a11y')}): {patch.get('description', 'Accessibility fix')[:50]}"
-                )
-                if commit_result.success:
-                    files_changed.extend(commit_result.files_changed)
+        if COMMIT_MODE == "batched":
+            commit_result = await client.commit_files(
+                owner, repo, branch_name, patches, self._generate_commit_message(patches, feature_ids)
+            )
+            if commit_result.success:
+                files_changed = commit_result.files_changed
+            else:
+                logger.warning(f"Batch commit failed: {commit_result.error}")
+        else:
+            for patch in patches:
+                if patch.get("unified_diff") and patch.get("file_path"):
+                    commit_result = await client.apply_unified_diff(
+                        owner, repo, branch_name,
+                        patch["file_path"],
+                        patch["unified_diff"],
+                        f"fix({patch.get('feature_id', 'a11y')}): {patch.get('description', 'Accessibility fix')[:50]}"
+                    )
+                    if commit_result.success:
+                        files_changed.extend(commit_result.files_changed)
         
         if not files_changed:
             return PullRequestResult(
@@ -678,16 +949,38 @@ class GitService:
         if not success:
             return PullRequestResult(success=False, error=f"Branch-Erstellung: {result}")
         
-        # 2. Patches committen (GitLab Commit API ist anders - vereinfacht)
-        # TODO: Implement GitLab file commit API
+        # 2. Patches committen (ein Commit mit mehreren Actions)
+        commit_result = await client.commit_files(
+            project_path, branch_name, patches, self._generate_commit_message(patches, feature_ids)
+        )
+        if not commit_result.success:
+            return PullRequestResult(
+                success=False,
+                error=f"Keine Dateien geändert: {commit_result.error}"
+            )
         
         # 3. MR erstellen
-        pr_title, pr_body = self._generate_pr_content(patches, feature_ids, [])
+        pr_title, pr_body = self._generate_pr_content(patches, feature_ids, commit_result.files_changed)
         
         return await client.create_merge_request(
             project_path, pr_title, pr_body, branch_name, repo_info.default_branch
         )
     
+    def _generate_commit_message(
+        self,
+        patches: List[Dict[str, Any]],
+        feature_ids: List[str]
+    ) -> str:
+        """Commit-Message für den Batch-Commit (Betreff + eine Zeile je Patch)"""
+        scope = feature_ids[0].lower() if len(feature_ids) == 1 else "a11y"
+        subject = f"fix({scope}): Barrierefreiheit verbessern ({len(patches)} Patches)"
+        lines = [
+            f"- {patch.get('file_path')}: {patch.get('description', 'Accessibility fix')[:72]}"
+            for patch in patches
+            if patch.get("unified_diff") and patch.get("file_path")
+        ]
+        return subject + "\n\n" + "\n".join(lines)
+    
     def _generate_pr_content(
         self,
         patches: List[Dict[str, Any]],
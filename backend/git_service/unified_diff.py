@@ -0,0 +1,163 @@
+"""
+Unified-Diff-Anwendung für generierte Patches
+
+Toleriert, was bei generierten Diffs gegen einen sich bewegenden Branch
+typischerweise passiert:
+- Offset: Hunk sitzt ein paar Zeilen versetzt → nächstgelegene passende Stelle
+- Fuzz: äußere Kontextzeilen passen nicht mehr → bis zu N davon ignorieren
+- Whitespace am Zeilenende wird beim Vergleich ignoriert, Kontextzeilen
+  bleiben wie in der Datei
+- Zeilenenden (LF/CRLF) und abschließender Zeilenumbruch bleiben erhalten
+
+Konfiguration über Umgebungsvariablen:
+- GIT_PATCH_FUZZ   Max. ignorierte Kontextzeilen je Hunk-Ende (Default: 2)
+
+Usage:
+    from git_service.unified_diff import apply_unified_diff, PatchError
+
+    patched = apply_unified_diff(original, diff)
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+MAX_FUZZ = int(os.getenv("GIT_PATCH_FUZZ", "2"))
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class PatchError(ValueError):
+    """Diff lässt sich nicht auf den Dateiinhalt anwenden"""
+
+
+@dataclass
+class Hunk:
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    lines: List[Tuple[str, str]] = field(default_factory=list)  # (' ' | '-' | '+', text)
+
+
+def parse_hunks(diff: str) -> List[Hunk]:
+    """Zerlegt einen Unified Diff (eine Datei) in Hunks"""
+    hunks: List[Hunk] = []
+    current: Optional[Hunk] = None
+    old_left = new_left = 0
+
+    for raw in diff.splitlines():
+        line = raw.rstrip('\r')
+        match = _HUNK_HEADER.match(line)
+        if match:
+            current = Hunk(
+                old_start=int(match.group(1)),
+                old_count=int(match.group(2) if match.group(2) is not None else 1),
+                new_start=int(match.group(3)),
+                new_count=int(match.group(4) if match.group(4) is not None else 1),
+            )
+            hunks.append(current)
+            old_left, new_left = current.old_count, current.new_count
+            continue
+        if current is None or (old_left <= 0 and new_left <= 0):
+            continue
+        if line.startswith('\\'):
+            continue  # "\ No newline at end of file"
+        if line.startswith('-'):
+            current.lines.append(('-', line[1:]))
+            old_left -= 1
+        elif line.startswith('+'):
+            current.lines.append(('+', line[1:]))
+            new_left -= 1
+        elif line.startswith(' ') or line == '':
+            # Manche Generatoren lassen das Leerzeichen vor leeren Kontextzeilen weg
+            current.lines.append((' ', line[1:]))
+            old_left -= 1
+            new_left -= 1
+
+    return hunks
+
+
+def _trim_context(lines: List[Tuple[str, str]], fuzz: int) -> Tuple[List[Tuple[str, str]], int]:
+    """Entfernt bis zu `fuzz` Kontextzeilen vorne und hinten; liefert (lines, vorne entfernt)"""
+    lead = 0
+    while lead < fuzz and lead < len(lines) and lines[lead][0] == ' ':
+        lead += 1
+    trail = 0
+    while trail < fuzz and len(lines) - trail > lead and lines[-1 - trail][0] == ' ':
+        trail += 1
+    return lines[lead:len(lines) - trail], lead
+
+
+def _matches(file_lines: List[str], pos: int, old: List[str]) -> bool:
+    if pos < 0 or pos + len(old) > len(file_lines):
+        return False
+    return all(file_lines[pos + i].rstrip() == text.rstrip() for i, text in enumerate(old))
+
+
+def _find(file_lines: List[str], old: List[str], expected: int, lower: int) -> Optional[int]:
+    """Nächstgelegene Position ab `lower`, an der `old` passt (erwartete Position zuerst)"""
+    upper = len(file_lines) - len(old)
+    expected = min(max(expected, lower), max(upper, lower))
+    for distance in range(max(upper - lower, 0) + 1):
+        for pos in (expected - distance, expected + distance) if distance else (expected,):
+            if lower <= pos <= upper and _matches(file_lines, pos, old):
+                return pos
+    return None
+
+
+def apply_hunks(original: str, hunks: List[Hunk], max_fuzz: int = MAX_FUZZ) -> str:
+    """Wendet Hunks in Reihenfolge an; PatchError, falls ein Hunk nirgends passt"""
+    newline = '\r\n' if '\r\n' in original else '\n'
+    # Neue Datei (leerer Inhalt) endet wie üblich mit Zeilenumbruch
+    trailing_newline = not original or original.endswith(('\n', '\r'))
+    file_lines = original.splitlines()
+
+    delta = 0        # Verschiebung durch vorige Hunks (Zeilen + gefundener Offset)
+    min_pos = 0      # Hunks dürfen sich nicht überlappen
+    for number, hunk in enumerate(hunks, 1):
+        applied = False
+        for fuzz in range(max_fuzz + 1):
+            lines, lead = _trim_context(hunk.lines, fuzz)
+            if fuzz and lead == 0 and len(lines) == len(hunk.lines):
+                break  # nichts mehr zu trimmen
+            old = [text for kind, text in lines if kind != '+']
+            # Bei reinen Einfügungen (old_count == 0) ist old_start die Zeile davor
+            base = hunk.old_start if hunk.old_count == 0 else hunk.old_start - 1
+            expected = base + lead + delta
+            pos = _find(file_lines, old, expected, min_pos) if old else min(max(expected, min_pos), len(file_lines))
+            if pos is None:
+                continue
+
+            replacement = []
+            cursor = pos
+            for kind, text in lines:
+                if kind == ' ':
+                    replacement.append(file_lines[cursor])
+                    cursor += 1
+                elif kind == '-':
+                    cursor += 1
+                else:
+                    replacement.append(text)
+            file_lines[pos:pos + len(old)] = replacement
+
+            delta += (pos - expected) + len(replacement) - len(old)
+            min_pos = pos + len(replacement)
+            applied = True
+            break
+        if not applied:
+            raise PatchError(f"Hunk #{number} (@@ -{hunk.old_start},{hunk.old_count}) passt nicht")
+
+    result = newline.join(file_lines)
+    if trailing_newline and file_lines:
+        result += newline
+    return result
+
+
+def apply_unified_diff(original: str, diff: str, max_fuzz: int = MAX_FUZZ) -> str:
+    """Wendet einen Unified Diff auf einen Dateiinhalt an"""
+    hunks = parse_hunks(diff)
+    if not hunks:
+        raise PatchError("Diff enthält keine Hunks")
+    return apply_hunks(original, hunks, max_fuzz)
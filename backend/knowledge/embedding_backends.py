@@ -0,0 +1,95 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from knowledge.hashing_vectorizer import embed_text
+
+logger = logging.getLogger(__name__)
+
+# openai | hashing | none
+EMBEDDING_BACKEND = os.getenv("KNOWLEDGE_EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("KNOWLEDGE_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_SIZE = int(os.getenv("KNOWLEDGE_EMBEDDING_BATCH_SIZE", "64"))
+HASHING_DIM = int(os.getenv("KNOWLEDGE_HASHING_DIM", "1024"))
+MAX_INPUT_CHARS = 8000
+
+
+class EmbeddingBackend(ABC):
+    """
+    Schnittstelle für Embedding-Backends.
+
+    `name` identifiziert Modell/Konfiguration und wird im Index gespeichert:
+    Vektoren verschiedener Backends werden nie gemischt.
+    """
+
+    name = "none"
+    batch_size = EMBEDDING_BATCH_SIZE
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Ein Vektor je Text (None = fehlgeschlagen), höchstens batch_size Texte je Aufruf"""
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI Embeddings API, ein Request für mehrere Texte"""
+
+    def __init__(self, api_key: str, model: str = EMBEDDING_MODEL):
+        self.api_key = api_key
+        self.model = model
+        self.name = f"openai:{model}"
+        self._client = None
+
+    def _get_client(self):
+        if not self._client:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        return self._client
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        try:
+            response = await self._get_client().embeddings.create(
+                model=self.model,
+                input=[text[:MAX_INPUT_CHARS].replace("\n", " ") or " " for text in texts],
+            )
+        except Exception as e:
+            logger.warning(f"Embedding batch of {len(texts)} failed: {e}")
+            return [None] * len(texts)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return vectors
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """Lokaler Hashing-Vectorizer — offline, deterministisch (Tests, Betrieb ohne API-Key)"""
+
+    batch_size = 1024
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        vectors = []
+        for text in texts:
+            vector = embed_text(text[:MAX_INPUT_CHARS], self.dim)
+            vectors.append(vector.tolist() if vector.any() else None)
+        return vectors
+
+
+def get_default_backend() -> Optional[EmbeddingBackend]:
+    """Backend laut KNOWLEDGE_EMBEDDING_BACKEND; None → nur Keyword-Scoring"""
+    if EMBEDDING_BACKEND == "hashing":
+        return HashingEmbeddingBackend()
+    if EMBEDDING_BACKEND == "openai":
+        api_key = os.getenv("OPENAI_API_KEY", "")
+        if not api_key:
+            return None
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            logger.warning("openai not installed, keyword-based fallback will be used")
+            return None
+        return OpenAIEmbeddingBackend(api_key)
+    return None
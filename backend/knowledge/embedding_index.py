@@ -0,0 +1,416 @@
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATTERNS = ("updates/*.md", "laws/*.md", "laws/*/*.md", "patterns/*.md")
+INDEX_EXCLUDE = {"README.md"}
+INDEX_CHECK_INTERVAL = float(os.getenv("KNOWLEDGE_INDEX_CHECK_INTERVAL", "30"))
+MANIFEST_VERSION = 1
+# Ab so vielen Log-Einträgen (bzw. 10 % der Dokumente) wird kompaktiert
+COMPACT_MIN_RECORDS = int(os.getenv("KNOWLEDGE_INDEX_COMPACT_RECORDS", "64"))
+
+# Log-Eintrag: content_hash (32 Bytes, 0-gepolstert) + Dimension, danach float32-Vektor
+_LOG_HEADER = struct.Struct("<32sI")
+
+
+class EmbeddingIndex:
+    """
+    Persistenter Vektor-Index über die Vault-Dokumente.
+
+    - vectors.npy: float32-Matrix (eine Zeile je Dokument, L2-normalisiert),
+      wird per mmap geladen
+    - manifest.json: mtime/Größe/Content-Hash + geparste Metadaten je Datei,
+      damit nur geänderte Dateien neu gelesen werden
+    - vectors.log: neue Embeddings werden nur angehängt (content_hash + Vektor);
+      compact() schreibt sie im Hintergrund in vectors.npy/manifest.json
+    - Abfragen: ein Matrix-Vektor-Produkt statt Cosine pro Dokument
+    """
+
+    def __init__(self, vault_root: Path, parse_file: Callable[[Path], Optional[Dict[str, Any]]]):
+        self.vault_root = Path(vault_root)
+        self.index_dir = self.vault_root / "_meta" / "index"
+        self.manifest_file = self.index_dir / "manifest.json"
+        self.vectors_file = self.index_dir / "vectors.npy"
+        self.log_file = self.index_dir / "vectors.log"
+        self.legacy_embeddings_file = self.vault_root / "_meta" / "embeddings.json"
+        self._parse_file = parse_file
+
+        self.entries: List[Dict[str, Any]] = []
+        self.docs: List[Dict[str, Any]] = []
+        self.matrix: Optional[np.ndarray] = None
+        self.has_vector = np.zeros(0, dtype=bool)
+        self.relevance_boost = np.zeros(0, dtype=np.float32)
+        self.languages = np.zeros(0, dtype=object)
+        self.model: Optional[str] = None
+        self.log_records = 0
+        self.compaction_task = None
+        # _write_lock serialisiert Dateischreiber (sync/compact), _lock schützt den Zustand;
+        # Reihenfolge immer _write_lock → _lock
+        self._write_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._unparsable: Dict[str, Tuple[float, int]] = {}
+        self._last_check = 0.0
+        self._loaded = False
+
+    @property
+    def dim(self) -> int:
+        return 0 if self.matrix is None else int(self.matrix.shape[1])
+
+    # ------------------------------------------------------------------
+    # Persistenz
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        self._loaded = True
+        if not self.manifest_file.exists():
+            return
+        try:
+            manifest = json.loads(self.manifest_file.read_text(encoding="utf-8"))
+            if manifest.get("version") != MANIFEST_VERSION:
+                return
+            entries = manifest.get("entries", [])
+            matrix = None
+            if self.vectors_file.exists():
+                matrix = np.load(self.vectors_file, mmap_mode="r")
+                if matrix.shape[0] != len(entries):
+                    logger.warning("Embedding index out of sync with manifest, rebuilding vectors")
+                    matrix = None
+            self.model = manifest.get("model")
+            self._set_state(entries, matrix, [bool(e.get("has_vector")) for e in entries] if matrix is not None else None)
+            self._replay_log()
+            logger.debug(f"Loaded knowledge index with {len(entries)} documents")
+        except Exception as e:
+            logger.warning(f"Could not load knowledge index: {e}")
+
+    def _save(self):
+        """Schreibt den vollständigen Zustand; das Log ist danach leer (Aufrufer hält beide Locks)"""
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            entries = [dict(e, has_vector=bool(self.has_vector[i])) for i, e in enumerate(self.entries)]
+            self._write_files(entries, self.matrix, self.model)
+            self.log_file.unlink(missing_ok=True)
+            self.log_records = 0
+            if self.matrix is not None:
+                self.matrix = np.load(self.vectors_file, mmap_mode="r")
+        except Exception as e:
+            logger.warning(f"Could not save knowledge index: {e}")
+
+    def _write_files(self, entries: List[Dict[str, Any]], matrix: Optional[np.ndarray], model: Optional[str]):
+        suffix = uuid.uuid4().hex[:8]
+        if matrix is not None:
+            tmp_vectors = self.index_dir / f"vectors.{suffix}.tmp.npy"
+            np.save(tmp_vectors, np.ascontiguousarray(matrix, dtype=np.float32))
+            os.replace(tmp_vectors, self.vectors_file)
+        elif self.vectors_file.exists():
+            self.vectors_file.unlink()
+        tmp_manifest = self.index_dir / f"manifest.{suffix}.tmp.json"
+        tmp_manifest.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "model": model, "entries": entries}, ensure_ascii=False, default=str),
+            encoding="utf-8",
+        )
+        os.replace(tmp_manifest, self.manifest_file)
+
+    def _append_log(self, records: List[Tuple[str, np.ndarray]]):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with self.log_file.open("ab") as f:
+            for content_hash, vector in records:
+                f.write(_LOG_HEADER.pack(content_hash.encode()[:32], vector.shape[0]))
+                f.write(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+        self.log_records += len(records)
+
+    def _read_log(self) -> List[Tuple[str, np.ndarray]]:
+        try:
+            data = self.log_file.read_bytes()
+        except FileNotFoundError:
+            return []
+        records = []
+        offset = 0
+        while offset + _LOG_HEADER.size <= len(data):
+            raw_hash, dim = _LOG_HEADER.unpack_from(data, offset)
+            offset += _LOG_HEADER.size
+            if offset + dim * 4 > len(data):
+                break  # abgebrochener Schreibvorgang
+            records.append((raw_hash.rstrip(b"\0").decode(), np.frombuffer(data, dtype=np.float32, count=dim, offset=offset)))
+            offset += dim * 4
+        return records
+
+    def _replay_log(self):
+        records = self._read_log()
+        self.log_records = len(records)
+        if not records:
+            return
+        rows: Dict[str, List[int]] = {}
+        for i, entry in enumerate(self.entries):
+            rows.setdefault(entry["content_hash"], []).append(i)
+        updates = {i: vector for content_hash, vector in records for i in rows.get(content_hash, [])}
+        self._apply_vectors(updates)
+
+    def _load_legacy_vectors(self) -> Dict[str, List[float]]:
+        """Übernimmt Vektoren aus dem alten embeddings.json (content_hash → vector)"""
+        if not self.legacy_embeddings_file.exists():
+            return {}
+        try:
+            data = json.loads(self.legacy_embeddings_file.read_text())
+            return {key: value["vector"] for key, value in data.items() if value.get("vector")}
+        except Exception as e:
+            logger.warning(f"Could not load legacy embeddings cache: {e}")
+            return {}
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def sync(self, force: bool = False) -> bool:
+        """
+        Gleicht den Index mit dem Vault ab (max. alle INDEX_CHECK_INTERVAL
+        Sekunden). Nur neue/geänderte Dateien werden geparst.
+        Gibt True zurück, wenn sich der Index geändert hat.
+        """
+        if not self._loaded:
+            self._load()
+            force = True
+
+        now = time.monotonic()
+        if not force and now - self._last_check < INDEX_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+
+        known = {e["path"]: (e["mtime"], e["size"]) for e in self.entries}
+        files: List[Tuple[Path, Tuple[float, int]]] = []
+        for pattern in INDEX_PATTERNS:
+            for filepath in sorted(self.vault_root.glob(pattern)):
+                if filepath.name in INDEX_EXCLUDE:
+                    continue
+                try:
+                    st = filepath.stat()
+                except OSError:
+                    continue
+                files.append((filepath, (st.st_mtime, st.st_size)))
+
+        def is_unchanged(filepath: Path, signature: Tuple[float, int]) -> bool:
+            key = str(filepath)
+            return known.get(key) == signature or self._unparsable.get(key) == signature
+
+        if len(files) == len(self.entries) + len(self._unparsable) and all(is_unchanged(fp, sig) for fp, sig in files):
+            return False
+
+        with self._write_lock, self._lock:
+            self._rebuild(files, known)
+        return True
+
+    def _rebuild(self, files: List[Tuple[Path, Tuple[float, int]]], known: Dict[str, Tuple[float, int]]):
+        old_vectors: Dict[str, np.ndarray] = {}
+        if self.matrix is not None:
+            for i, entry in enumerate(self.entries):
+                if self.has_vector[i]:
+                    old_vectors[entry["content_hash"]] = np.asarray(self.matrix[i])
+
+        by_path = {e["path"]: e for e in self.entries}
+        entries: List[Dict[str, Any]] = []
+        unparsable: Dict[str, Tuple[float, int]] = {}
+        reparsed = 0
+        for filepath, signature in files:
+            key = str(filepath)
+            if known.get(key) == signature:
+                entries.append(by_path[key])
+                continue
+            if self._unparsable.get(key) == signature:
+                unparsable[key] = signature
+                continue
+            doc = self._parse_file(filepath)
+            reparsed += 1
+            if not doc:
+                unparsable[key] = signature
+                continue
+            # JSON-Roundtrip: gleiche Typen (z.B. Datum als String) wie nach dem Laden
+            doc = json.loads(json.dumps(doc, ensure_ascii=False, default=str))
+            entries.append({
+                "path": key,
+                "mtime": signature[0],
+                "size": signature[1],
+                "content_hash": doc["content_hash"],
+                "doc": doc,
+            })
+        self._unparsable = unparsable
+
+        legacy = self._load_legacy_vectors() if not self.vectors_file.exists() else {}
+        vectors: List[Optional[np.ndarray]] = []
+        for entry in entries:
+            vector = old_vectors.get(entry["content_hash"])
+            if vector is None and entry["content_hash"] in legacy:
+                vector = np.asarray(legacy[entry["content_hash"]], dtype=np.float32)
+            vectors.append(vector)
+
+        matrix, has_vector = _build_matrix(vectors)
+        self._set_state(entries, matrix, has_vector)
+        self._save()
+        logger.info(f"Knowledge index synced: {len(entries)} documents, {reparsed} reparsed")
+
+    def _set_state(self, entries: List[Dict[str, Any]], matrix: Optional[np.ndarray], has_vector: Optional[List[bool]]):
+        self.entries = entries
+        self.docs = [e["doc"] for e in entries]
+        self.matrix = matrix
+        self.has_vector = np.array(has_vector if has_vector is not None else [False] * len(entries), dtype=bool)
+        self.relevance_boost = np.array(
+            [_relevance_boost(doc) for doc in self.docs], dtype=np.float32
+        )
+        self.languages = np.array(
+            [doc.get("frontmatter", {}).get("language", "de") for doc in self.docs], dtype=object
+        )
+
+    def set_vectors(self, updates: Dict[int, List[float]], model: Optional[str] = None):
+        """
+        Setzt Embeddings für Dokument-Zeilen. Die Vektoren werden nur an
+        vectors.log angehängt; vectors.npy bleibt bis zur Kompaktierung unverändert.
+        """
+        if not updates:
+            return
+        with self._lock:
+            self.model = self.model or model
+            vectors = {i: np.asarray(vector, dtype=np.float32) for i, vector in updates.items()}
+            self._apply_vectors(vectors)
+            try:
+                self._append_log([
+                    (self.entries[i]["content_hash"], np.asarray(self.matrix[i]))
+                    for i in vectors if self.has_vector[i]
+                ])
+            except Exception as e:
+                logger.warning(f"Could not append to knowledge index log: {e}")
+
+    def _apply_vectors(self, vectors: Dict[int, np.ndarray]):
+        """Schreibt normalisierte Vektoren in eine beschreibbare In-Memory-Matrix"""
+        dims = {v.shape[0] for v in vectors.values()}
+        if self.matrix is None or dims - {self.dim}:
+            rows: List[Optional[np.ndarray]] = [
+                np.asarray(self.matrix[i]) if self.matrix is not None and self.has_vector[i] else None
+                for i in range(len(self.entries))
+            ]
+            for i, vector in vectors.items():
+                rows[i] = vector
+            matrix, has_vector = _build_matrix(rows)
+            self.matrix = matrix
+            self.has_vector = np.array(has_vector, dtype=bool)
+            return
+        if isinstance(self.matrix, np.memmap) or not self.matrix.flags.writeable:
+            self.matrix = np.array(self.matrix, dtype=np.float32)
+        for i, vector in vectors.items():
+            norm = float(np.linalg.norm(vector))
+            if norm == 0:
+                continue
+            self.matrix[i] = vector / norm
+            self.has_vector[i] = True
+
+    def reset_vectors(self, model: str):
+        """Backend gewechselt: alte Vektoren sind nicht vergleichbar und werden verworfen"""
+        with self._write_lock, self._lock:
+            logger.info(f"Embedding backend changed ({self.model} → {model}), dropping vectors")
+            self.model = model
+            self.matrix = None
+            self.has_vector = np.zeros(len(self.entries), dtype=bool)
+            self._save()
+
+    def needs_compaction(self) -> bool:
+        return self.log_records >= max(COMPACT_MIN_RECORDS, len(self.entries) // 10)
+
+    def compact(self):
+        """
+        Übernimmt vectors.log in vectors.npy/manifest.json. Läuft im Thread:
+        Schreiben passiert außerhalb von _lock, nach dem Snapshot angehängte
+        Log-Einträge bleiben erhalten.
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self.log_records:
+                    return
+                entries = [dict(e, has_vector=bool(self.has_vector[i])) for i, e in enumerate(self.entries)]
+                matrix = None if self.matrix is None else np.array(self.matrix, dtype=np.float32)
+                model = self.model
+                log_offset = self.log_file.stat().st_size if self.log_file.exists() else 0
+                compacted = self.log_records
+            try:
+                self._write_files(entries, matrix, model)
+            except Exception as e:
+                logger.warning(f"Knowledge index compaction failed: {e}")
+                return
+            with self._lock:
+                rest = b""
+                if self.log_file.exists():
+                    with self.log_file.open("rb") as f:
+                        f.seek(log_offset)
+                        rest = f.read()
+                if rest:
+                    tmp_log = self.index_dir / f"vectors.{uuid.uuid4().hex[:8]}.tmp.log"
+                    tmp_log.write_bytes(rest)
+                    os.replace(tmp_log, self.log_file)
+                else:
+                    self.log_file.unlink(missing_ok=True)
+                self.log_records -= compacted
+        logger.info(f"Knowledge index compacted: {compacted} log records")
+
+    # ------------------------------------------------------------------
+    # Abfrage
+    # ------------------------------------------------------------------
+
+    def cosine_scores(self, query_vector: Optional[List[float]]) -> Optional[np.ndarray]:
+        """Cosine-Similarity aller Dokumente zum Query (ein Matrix-Vektor-Produkt)"""
+        if query_vector is None or self.matrix is None:
+            return None
+        q = np.asarray(query_vector, dtype=np.float32)
+        if q.shape[0] != self.dim:
+            logger.warning(f"Query embedding dim {q.shape[0]} != index dim {self.dim}")
+            return None
+        norm = float(np.linalg.norm(q))
+        if norm == 0:
+            return None
+        return np.asarray(self.matrix @ (q / norm))
+
+
+def _relevance_boost(doc: Dict[str, Any]) -> float:
+    try:
+        return float(doc.get("frontmatter", {}).get("relevance_score", 0.5)) * 0.1
+    except (TypeError, ValueError):
+        return 0.05
+
+
+def _build_matrix(vectors: List[Optional[np.ndarray]]) -> Tuple[Optional[np.ndarray], List[bool]]:
+    """Stapelt Vektoren zu einer normalisierten float32-Matrix (fehlende = 0-Zeile)"""
+    dims = {v.shape[0] for v in vectors if v is not None}
+    if not dims:
+        return None, [False] * len(vectors)
+    dim = max(dims, key=lambda d: sum(1 for v in vectors if v is not None and v.shape[0] == d))
+    matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    has_vector = []
+    for i, vector in enumerate(vectors):
+        if vector is None or vector.shape[0] != dim:
+            has_vector.append(False)
+            continue
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            has_vector.append(False)
+            continue
+        matrix[i] = vector / norm
+        has_vector.append(True)
+    return matrix, has_vector
+
+
+_INDEXES: Dict[str, EmbeddingIndex] = {}
+
+
+def get_index(vault_root: Path, parse_file: Callable[[Path], Optional[Dict[str, Any]]]) -> EmbeddingIndex:
+    """Prozessweiter Index je Vault (Retriever werden pro Request erzeugt)"""
+    key = str(Path(vault_root).resolve())
+    index = _INDEXES.get(key)
+    if index is None:
+        index = EmbeddingIndex(vault_root, parse_file)
+        _INDEXES[key] = index
+    return index
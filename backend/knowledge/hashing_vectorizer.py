@@ -0,0 +1,41 @@
+import math
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+DEFAULT_DIM = 1024
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def embed_text(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    Lokaler Hashing-Vectorizer (kein API-Call)
+
+    Features: Wörter + Zeichen-Trigramme (robust gegen Flexion/Komposita),
+    sublineares TF, L2-normalisiert. crc32 statt hash() → stabil über Prozesse.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    if not text:
+        return vector
+
+    features: Counter = Counter()
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) < 2:
+            continue
+        features["w:" + token] += 1
+        padded = f"<{token}>"
+        for i in range(len(padded) - 2):
+            features["c:" + padded[i:i + 3]] += 1
+
+    for feature, count in features.items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vector[h % dim] += sign * (1.0 + math.log(count))
+
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
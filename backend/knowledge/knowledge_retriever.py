@@ -1,35 +1,33 @@
+import asyncio
 import hashlib
-import json
 import logging
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional
 
+import numpy as np
 import yaml
 
+from knowledge.embedding_backends import EmbeddingBackend, get_default_backend
+from knowledge.embedding_index import EmbeddingIndex, get_index
+
 logger = logging.getLogger(__name__)
 
 VAULT_ROOT = Path(os.getenv("KNOWLEDGE_VAULT_PATH", "/home/clawd/saas/legal/knowledge"))
-META_DIR = VAULT_ROOT / "_meta"
-EMBEDDINGS_CACHE_FILE = META_DIR / "embeddings.json"
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-EMBEDDING_MODEL = "text-embedding-3-small"
-
-
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = sum(x * x for x in a) ** 0.5
-    norm_b = sum(x * x for x in b) ** 0.5
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return dot / (norm_a * norm_b)
 
 
 def _parse_md_file(filepath: Path) -> Optional[Dict[str, Any]]:
     try:
         text = filepath.read_text(encoding="utf-8")
         if not text.startswith("---"):
-            return {"path": str(filepath), "frontmatter": {}, "body": text, "full_text": text}
+            return {
+                "path": str(filepath),
+                "filename": filepath.name,
+                "frontmatter": {},
+                "body": text,
+                "full_text": text,
+                "content_hash": hashlib.sha256(text.encode()).hexdigest()[:16],
+            }
 
         parts = text.split("---", 2)
         if len(parts) < 3:
@@ -52,62 +50,22 @@ def _parse_md_file(filepath: Path) -> Optional[Dict[str, Any]]:
 
 
 class KnowledgeRetriever:
-    def __init__(self, vault_root: Optional[Path] = None):
+    def __init__(self, vault_root: Optional[Path] = None, backend: Optional[EmbeddingBackend] = None):
         self.vault_root = vault_root or VAULT_ROOT
-        self._embeddings_cache: Dict[str, Dict[str, Any]] = {}
-        self._documents: List[Dict[str, Any]] = []
-        self._openai_client = None
-        META_DIR.mkdir(parents=True, exist_ok=True)
-        self._load_cache()
-
-    def _get_client(self):
-        if not self._openai_client and OPENAI_API_KEY:
-            try:
-                from openai import AsyncOpenAI
-                self._openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-            except ImportError:
-                logger.warning("openai not installed, keyword-based fallback will be used")
-        return self._openai_client
-
-    def _load_cache(self):
-        if EMBEDDINGS_CACHE_FILE.exists():
-            try:
-                self._embeddings_cache = json.loads(EMBEDDINGS_CACHE_FILE.read_text())
-                logger.debug(f"Loaded {len(self._embeddings_cache)} cached embeddings")
-            except Exception as e:
-                logger.warning(f"Could not load embeddings cache: {e}")
-                self._embeddings_cache = {}
-
-    def _save_cache(self):
-        try:
-            EMBEDDINGS_CACHE_FILE.write_text(json.dumps(self._embeddings_cache, ensure_ascii=False))
-        except Exception as e:
-            logger.warning(f"Could not save embeddings cache: {e}")
+        self.backend = backend if backend is not None else get_default_backend()
+        self.index: EmbeddingIndex = get_index(self.vault_root, _parse_md_file)
 
     def _load_documents(self) -> List[Dict[str, Any]]:
-        docs = []
-        for pattern in ["updates/*.md", "laws/*.md", "patterns/*.md"]:
-            for filepath in sorted(self.vault_root.glob(pattern)):
-                doc = _parse_md_file(filepath)
-                if doc:
-                    docs.append(doc)
-        logger.debug(f"Loaded {len(docs)} documents from vault")
-        return docs
+        self.index.sync()
+        return self.index.docs
 
     async def _embed_text(self, text: str) -> Optional[List[float]]:
-        client = self._get_client()
-        if not client:
+        """Query-Embedding — nur wenn der Index mit demselben Backend gebaut wurde"""
+        if not self.backend:
             return None
-        try:
-            text_clean = text[:8000].replace("\n", " ")
-            response = await client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=text_clean,
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            logger.warning(f"Embedding failed: {e}")
+        if self.index.model and self.index.model != self.backend.name:
             return None
+        return (await self.backend.embed([text]))[0]
 
     def _keyword_score(self, query: str, doc: Dict[str, Any]) -> float:
         query_lower = query.lower()
@@ -116,76 +74,78 @@ class KnowledgeRetriever:
         hits = sum(1 for w in words if w in text_lower and len(w) > 3)
         return hits / max(len(words), 1)
 
+    def _keyword_scores(self, query: str, docs: List[Dict[str, Any]]) -> np.ndarray:
+        return np.array([self._keyword_score(query, doc) for doc in docs], dtype=np.float32)
+
     async def retrieve(self, query: str, top_k: int = 5, min_score: float = 0.1) -> List[Dict[str, Any]]:
         documents = self._load_documents()
         if not documents:
             return []
 
         query_embedding = await self._embed_text(query)
+        cosine = self.index.cosine_scores(query_embedding)
 
-        scored: List[Tuple[float, Dict[str, Any]]] = []
-
-        for doc in documents:
-            cache_key = doc["content_hash"]
-            doc_embedding = self._embeddings_cache.get(cache_key, {}).get("vector")
-
-            if query_embedding and doc_embedding:
-                score = _cosine_similarity(query_embedding, doc_embedding)
-            else:
-                score = self._keyword_score(query, doc)
-
-            fm = doc.get("frontmatter", {})
-            relevance_boost = float(fm.get("relevance_score", 0.5)) * 0.1
-            score += relevance_boost
-
-            if score >= min_score:
-                scored.append((score, doc))
+        if cosine is not None:
+            scores = cosine.astype(np.float32, copy=True)
+            missing = np.flatnonzero(~self.index.has_vector)
+            if missing.size:
+                scores[missing] = self._keyword_scores(query, [documents[i] for i in missing])
+        else:
+            scores = self._keyword_scores(query, documents)
+        scores += self.index.relevance_boost
 
-        scored.sort(key=lambda x: x[0], reverse=True)
+        candidates = np.flatnonzero(scores >= min_score)
+        top = candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
 
         return [
             {
-                "score": round(score, 4),
-                "title": doc.get("frontmatter", {}).get("title", doc.get("filename", "")),
-                "category": doc.get("frontmatter", {}).get("category", ""),
-                "law_areas": doc.get("frontmatter", {}).get("law_areas", []),
-                "impact": doc.get("frontmatter", {}).get("impact", ""),
-                "date": doc.get("frontmatter", {}).get("date", ""),
-                "source_url": doc.get("frontmatter", {}).get("source_url", ""),
-                "summary": doc.get("body", "")[:400],
-                "path": doc.get("path", ""),
-                "filename": doc.get("filename", ""),
+                "score": round(float(scores[i]), 4),
+                "title": documents[i].get("frontmatter", {}).get("title", documents[i].get("filename", "")),
+                "category": documents[i].get("frontmatter", {}).get("category", ""),
+                "law_areas": documents[i].get("frontmatter", {}).get("law_areas", []),
+                "impact": documents[i].get("frontmatter", {}).get("impact", ""),
+                "date": documents[i].get("frontmatter", {}).get("date", ""),
+                "source_url": documents[i].get("frontmatter", {}).get("source_url", ""),
+                "summary": documents[i].get("body", "")[:400],
+                "path": documents[i].get("path", ""),
+                "filename": documents[i].get("filename", ""),
             }
-            for score, doc in scored[:top_k]
+            for i in top
         ]
 
-    async def refresh_index(self) -> Dict[str, int]:
-        documents = self._load_documents()
-        new_count = 0
-        skip_count = 0
+    async def refresh_index(self, paths: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+        """
+        Bettet neue/geänderte Dokumente ein (Content-Hash ohne Vektor), in
+        Batches je Backend-Request; mit paths nur diese Dateien. Die Vektoren
+        werden an das Index-Log angehängt, kompaktiert wird im Hintergrund.
+        """
+        self.index.sync(force=True)
+        documents = self.index.docs
+        if not self.backend:
+            return {"new": 0, "skipped": len(documents), "total": len(documents)}
+        if self.index.model and self.index.model != self.backend.name:
+            self.index.reset_vectors(self.backend.name)
+
+        only = {str(Path(p).resolve()) for p in paths} if paths is not None else None
+        pending = [
+            i for i, doc in enumerate(documents)
+            if (only is None or str(Path(doc["path"]).resolve()) in only) and not self.index.has_vector[i]
+        ]
+        considered = len(documents) if only is None else len(pending)
+        new = 0
 
-        for doc in documents:
-            cache_key = doc["content_hash"]
-            if cache_key in self._embeddings_cache:
-                skip_count += 1
-                continue
-
-            embedding = await self._embed_text(doc["full_text"])
-            if embedding:
-                self._embeddings_cache[cache_key] = {
-                    "vector": embedding,
-                    "path": doc["path"],
-                    "title": doc.get("frontmatter", {}).get("title", ""),
-                }
-                new_count += 1
-            else:
-                skip_count += 1
+        for start in range(0, len(pending), self.backend.batch_size):
+            batch = pending[start:start + self.backend.batch_size]
+            embeddings = await self.backend.embed([documents[i]["full_text"] for i in batch])
+            updates = {i: vector for i, vector in zip(batch, embeddings) if vector}
+            self.index.set_vectors(updates, model=self.backend.name)
+            new += len(updates)
 
-        if new_count > 0:
-            self._save_cache()
+        if self.index.needs_compaction() and not (self.index.compaction_task and not self.index.compaction_task.done()):
+            self.index.compaction_task = asyncio.create_task(asyncio.to_thread(self.index.compact))
 
-        logger.info(f"Index refresh: {new_count} new, {skip_count} skipped")
-        return {"new": new_count, "skipped": skip_count, "total": len(documents)}
+        logger.info(f"Index refresh: {new} new, {considered - new} skipped")
+        return {"new": new, "skipped": considered - new, "total": len(documents)}
 
     async def search_hybrid(self, query: str, top_k: int = 5, language: str = "de") -> List[Dict]:
         documents = self._load_documents()
@@ -193,51 +153,42 @@ class KnowledgeRetriever:
             return []
 
         query_embedding = await self._embed_text(query)
-        scored: List[Tuple[float, Dict[str, Any], str]] = []
 
         try:
-            for doc in documents:
-                fm = doc.get("frontmatter", {})
-                doc_language = fm.get("language", "de")
-                if doc_language != language:
-                    continue
-
-                bm25_score = self._keyword_score(query, doc)
-                embedding_score = 0.0
-                cache_key = doc.get("content_hash", "")
-                doc_embedding = self._embeddings_cache.get(cache_key, {}).get("vector")
-
-                if query_embedding and doc_embedding:
-                    embedding_score = _cosine_similarity(query_embedding, doc_embedding)
-
-                score = (0.4 * bm25_score) + (0.6 * embedding_score)
-                if not query_embedding or not doc_embedding:
-                    score = bm25_score
+            rows = np.flatnonzero(self.index.languages == language)
+            if not rows.size:
+                return []
+
+            bm25 = self._keyword_scores(query, [documents[i] for i in rows])
+            cosine = self.index.cosine_scores(query_embedding)
+            if cosine is not None:
+                embedding = np.where(self.index.has_vector[rows], cosine[rows], 0.0).astype(np.float32)
+                has_embedding = self.index.has_vector[rows]
+            else:
+                embedding = np.zeros_like(bm25)
+                has_embedding = np.zeros(rows.size, dtype=bool)
 
-                if score <= 0:
-                    continue
+            scores = np.where(has_embedding, 0.4 * bm25 + 0.6 * embedding, bm25)
+            keep = np.flatnonzero(scores > 0)
+            order = keep[np.argsort(-scores[keep], kind="stable")][:top_k]
 
-                if bm25_score > 0 and embedding_score > 0:
+            results = []
+            for j in order:
+                doc = documents[rows[j]]
+                if bm25[j] > 0 and embedding[j] > 0:
                     match_type = "hybrid"
-                elif embedding_score > 0:
+                elif embedding[j] > 0:
                     match_type = "embedding"
                 else:
                     match_type = "keyword"
-
-                scored.append((score, doc, match_type))
-
-            scored.sort(key=lambda x: x[0], reverse=True)
-
-            return [
-                {
+                results.append({
                     "doc_id": doc.get("filename", doc.get("path", "")),
                     "content": doc.get("body", doc.get("full_text", "")),
-                    "score": round(score, 4),
+                    "score": round(float(scores[j]), 4),
                     "law_refs": doc.get("frontmatter", {}).get("law_areas", []),
                     "match_type": match_type,
-                }
-                for score, doc, match_type in scored[:top_k]
-            ]
+                })
+            return results
         except Exception as e:
             logger.warning(f"Hybrid search failed: {e}")
             return []
@@ -278,7 +229,7 @@ class KnowledgeRetriever:
 
         return {
             "total_documents": len(documents),
-            "cached_embeddings": len(self._embeddings_cache),
+            "cached_embeddings": int(self.index.has_vector.sum()),
             "by_category": by_category,
             "by_impact": by_impact,
         }
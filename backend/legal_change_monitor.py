@@ -12,12 +12,13 @@ Features:
 import os
 import json
 import re
-import httpx
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from enum import Enum
 import logging
 
+from llm_gateway import llm_gateway, LLMError
+
 logger = logging.getLogger(__name__)
 
 
@@ -126,7 +127,6 @@ class LegalChangeMonitor:
     
     def __init__(self, openrouter_api_key: str = None, db_pool=None):
         self.api_key = openrouter_api_key or os.getenv("OPENROUTER_API_KEY")
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
         self.db_pool = db_pool
         
         # Quellen für Gesetzesänderungen
@@ -484,39 +484,21 @@ Antworte im JSON-Format:
     
     async def _call_ai_api(self, prompt: str) -> str:
         """
-        Ruft die OpenRouter AI API auf
+        Ruft die OpenRouter AI API über das LLM-Gateway auf
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": os.getenv("OPENROUTER_LEGAL_MODEL", "anthropic/claude-sonnet-4.5"),
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "Du bist ein Experte für deutsches und europäisches Recht, spezialisiert auf Datenschutz, Cookie-Compliance und Web-Compliance. Du analysierst Gesetzesänderungen und generierst konkrete, umsetzbare Lösungen."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.3,
-            "max_tokens": 4000
-        }
+        response = await llm_gateway.complete(
+            prompt,
+            system_message="Du bist ein Experte für deutsches und europäisches Recht, spezialisiert auf Datenschutz, Cookie-Compliance und Web-Compliance. Du analysierst Gesetzesänderungen und generierst konkrete, umsetzbare Lösungen.",
+            model=os.getenv("OPENROUTER_LEGAL_MODEL", "anthropic/claude-sonnet-4.5"),
+            temperature=0.3,
+            max_tokens=4000,
+            title="Complyo Legal Change Monitor",
+            api_key=self.api_key or "",
+        )
+        if not response.success:
+            raise LLMError(response.error, status=response.status)
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                self.base_url,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return data['choices'][0]['message']['content']
+        return response.content
     
     def _build_monitoring_prompt(self) -> str:
         """
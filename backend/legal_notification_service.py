@@ -6,36 +6,44 @@ mit Nutzer-Bestätigungsflow (Double-Opt-In für Aktionen)
 
 import asyncio
 import asyncpg
-import secrets
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import smtplib
-import ssl
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import logging
-from jinja2 import Template
+from mail_transport import MailMessage, cached_template, mail_transport
 
 logger = logging.getLogger(__name__)
 
+SEVERITY_RANK = {'critical': 4, 'warning': 3, 'high': 2, 'medium': 1, 'low': 0, 'info': 0}
+
+ACTION_DEADLINE_DAYS = {'critical': 7, 'warning': 14}
+
+# Themen-Zuordnung News → user_legal_notification_settings.notify_areas
+NOTIFY_AREA_KEYWORDS = {
+    'dsgvo': ('dsgvo', 'gdpr', 'datenschutz', 'bfdi', 'aufsichtsbehörde'),
+    'ttdsg': ('ttdsg', 'tdddg', 'telemedien'),
+    'cookie': ('cookie', 'consent', 'einwilligung', 'tracking'),
+    'impressum': ('impressum', 'anbieterkennzeichnung', 'informationspflicht'),
+    'barrierefreiheit': ('barrierefreiheit', 'bfsg', 'wcag', 'accessibility'),
+    'ai_act': ('ai act', 'ki-verordnung', 'künstliche intelligenz', 'ki-vo'),
+}
+
 
 class LegalNewsNotificationService:
     def __init__(self, db_pool: asyncpg.Pool):
         self.db_pool = db_pool
-        self.smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        self.smtp_username = os.getenv('SMTP_USERNAME', '')
-        self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         self.sender_email = os.getenv('SENDER_EMAIL', 'noreply@complyo.tech')
         self.sender_name = os.getenv('SENDER_NAME', 'Complyo Legal Updates')
         self.frontend_url = os.getenv('FRONTEND_URL', 'https://app.complyo.tech')
-        self.demo_mode = not all([self.smtp_username, self.smtp_password])
         
     async def process_new_legal_changes(self) -> Dict[str, Any]:
         """
         Verarbeitet neue Gesetzesänderungen und versendet Benachrichtigungen
         Wird vom Cronjob aufgerufen
+        
+        Fan-out mengenbasiert: die Matrix News × User (Severity- und
+        Themen-Filter) entsteht in einem einzigen INSERT ... SELECT; nur die
+        Sofort-Mails kommen zurück und gehen als Batch an den Mail-Transport.
         """
         results = {
             "processed": 0,
@@ -44,12 +52,16 @@ class LegalNewsNotificationService:
             "errors": []
         }
         
+        outbox: List[Tuple[int, MailMessage]] = []
+        
         try:
             async with self.db_pool.acquire() as conn:
                 unprocessed_news = await conn.fetch("""
                     SELECT ln.* FROM legal_news ln
-                    LEFT JOIN legal_change_notifications lcn ON ln.id = lcn.legal_news_id
-                    WHERE lcn.id IS NULL
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM legal_change_notifications lcn
+                        WHERE lcn.legal_news_id = ln.id
+                    )
                     AND ln.is_active = TRUE
                     AND ln.published_date >= CURRENT_TIMESTAMP - INTERVAL '7 days'
                     AND ln.severity IN ('critical', 'warning')
@@ -57,147 +69,168 @@ class LegalNewsNotificationService:
                     LIMIT 50
                 """)
                 
-                for news in unprocessed_news:
-                    results["processed"] += 1
-                    
-                    affected_users = await self._get_affected_users(conn, news)
+                if unprocessed_news:
+                    results["processed"] = len(unprocessed_news)
+                    async with conn.transaction():
+                        created, instant = await self._fan_out(conn, unprocessed_news)
+                    results["notifications_created"] = created
                     
-                    for user in affected_users:
-                        try:
-                            notification_id = await self._create_notification(
-                                conn, user, news
-                            )
-                            results["notifications_created"] += 1
-                            
-                            if await self._should_send_instant(user, news):
-                                sent = await self._send_notification_email(
-                                    conn, notification_id, user, news
-                                )
-                                if sent:
-                                    results["emails_sent"] += 1
-                                    
-                        except Exception as e:
-                            error_msg = f"Error notifying user {user['id']}: {str(e)}"
-                            logger.error(error_msg)
-                            results["errors"].append(error_msg)
+                    news_by_id = {news['id']: news for news in unprocessed_news}
+                    for row in instant:
+                        outbox.append((
+                            row['id'],
+                            self._build_notification_email(row, row, news_by_id[row['legal_news_id']])
+                        ))
                             
         except Exception as e:
             logger.error(f"Error in process_new_legal_changes: {e}")
             results["errors"].append(str(e))
+        
+        if outbox:
+            try:
+                results["emails_sent"] = await self._send_notification_batch(outbox)
+            except Exception as e:
+                logger.error(f"Error sending legal change notifications: {e}")
+                results["errors"].append(str(e))
             
         return results
     
-    async def _get_affected_users(
-        self, 
-        conn: asyncpg.Connection, 
-        news: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """Ermittelt alle Nutzer, die von dieser Änderung betroffen sein könnten"""
-        users = await conn.fetch("""
-            SELECT 
-                u.id, u.email, u.firebase_uid,
-                COALESCE(ulns.email_enabled, TRUE) as email_enabled,
-                COALESCE(ulns.min_severity, 'medium') as min_severity,
-                COALESCE(ulns.notify_areas, ARRAY['dsgvo', 'ttdsg', 'cookie', 'impressum', 'barrierefreiheit', 'ai_act']) as notify_areas,
-                COALESCE(ulns.instant_for_critical, TRUE) as instant_for_critical,
-                COALESCE(ulns.digest_frequency, 'daily') as digest_frequency
-            FROM users u
-            LEFT JOIN user_legal_notification_settings ulns ON u.id = ulns.user_id
-            WHERE u.email_verified = TRUE
-            AND u.is_active = TRUE
-            AND COALESCE(ulns.email_enabled, TRUE) = TRUE
-        """)
+    async def _fan_out(
+        self,
+        conn: asyncpg.Connection,
+        news_items: List[Dict[str, Any]]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Legt für alle News × betroffene User Notifications in einem Statement an.
         
-        severity_order = {'critical': 4, 'warning': 3, 'high': 2, 'medium': 1, 'low': 0, 'info': 0}
-        news_severity = severity_order.get(news['severity'], 0)
+        Betroffen ist ein User, wenn die News-Severity >= seiner min_severity
+        ist und sich seine notify_areas mit den Themen der News überschneiden
+        (News ohne erkanntes Thema gehen an alle). Liefert die Anzahl der
+        angelegten Notifications und die Zeilen, die sofort gemailt werden.
+        """
+        now = datetime.now()
+        news_ids, severities, ranks, areas, deadlines = [], [], [], [], []
+        for news in news_items:
+            news_ids.append(news['id'])
+            severities.append(news['severity'])
+            ranks.append(SEVERITY_RANK.get(news['severity'], 0))
+            areas.append(",".join(self._news_areas(news)))
+            deadline_days = ACTION_DEADLINE_DAYS.get(news['severity'])
+            deadlines.append(now + timedelta(days=deadline_days) if deadline_days else None)
         
-        affected = []
-        for user in users:
-            user_min_severity = severity_order.get(user['min_severity'], 1)
-            if news_severity >= user_min_severity:
-                affected.append(dict(user))
-                
-        return affected
+        rows = await conn.fetch("""
+            WITH news AS (
+                SELECT * FROM unnest($1::int[], $2::text[], $3::int[], $4::text[], $5::timestamp[])
+                    AS n(news_id, severity, severity_rank, areas, action_deadline)
+            ),
+            recipients AS (
+                SELECT 
+                    u.id AS user_id, u.email,
+                    COALESCE(ulns.min_severity, 'medium') as min_severity,
+                    COALESCE(ulns.notify_areas, ARRAY['dsgvo', 'ttdsg', 'cookie', 'impressum', 'barrierefreiheit', 'ai_act']) as notify_areas,
+                    COALESCE(ulns.instant_for_critical, TRUE) as instant_for_critical,
+                    COALESCE(ulns.digest_frequency, 'daily') as digest_frequency
+                FROM users u
+                LEFT JOIN user_legal_notification_settings ulns ON u.id = ulns.user_id
+                WHERE u.email_verified = TRUE
+                AND u.is_active = TRUE
+                AND COALESCE(ulns.email_enabled, TRUE) = TRUE
+            ),
+            matrix AS (
+                SELECT 
+                    r.user_id, n.news_id, n.severity, n.action_deadline,
+                    (n.severity = 'critical' AND r.instant_for_critical)
+                        OR r.digest_frequency = 'instant' AS instant
+                FROM news n
+                JOIN recipients r ON n.severity_rank >= CASE r.min_severity
+                        WHEN 'critical' THEN 4
+                        WHEN 'warning' THEN 3
+                        WHEN 'high' THEN 2
+                        WHEN 'medium' THEN 1
+                        WHEN 'low' THEN 0
+                        WHEN 'info' THEN 0
+                        ELSE 1
+                    END
+                AND (n.areas = '' OR r.notify_areas && string_to_array(n.areas, ','))
+            ),
+            inserted AS (
+                INSERT INTO legal_change_notifications (
+                    user_id, legal_news_id, notification_type, severity,
+                    status, confirmation_token, action_required, action_deadline
+                )
+                SELECT 
+                    user_id, news_id, 'email', severity, 'pending',
+                    replace(gen_random_uuid()::text, '-', '') || replace(gen_random_uuid()::text, '-', ''),
+                    severity IN ('critical', 'warning'),
+                    action_deadline
+                FROM matrix
+                RETURNING id, user_id, legal_news_id, confirmation_token
+            )
+            SELECT c.created, x.*
+            FROM (SELECT count(*) AS created FROM inserted) c
+            LEFT JOIN (
+                SELECT i.id, i.user_id, i.legal_news_id, i.confirmation_token, r.email
+                FROM inserted i
+                JOIN matrix m ON m.user_id = i.user_id AND m.news_id = i.legal_news_id
+                JOIN recipients r ON r.user_id = i.user_id
+                WHERE m.instant
+            ) x ON TRUE
+        """, news_ids, severities, ranks, areas, deadlines)
+        
+        created = rows[0]['created'] if rows else 0
+        instant = [dict(row) for row in rows if row['id'] is not None]
+        return created, instant
     
-    async def _should_send_instant(
-        self, 
-        user: Dict[str, Any], 
-        news: Dict[str, Any]
-    ) -> bool:
-        """Prüft ob sofortige Benachrichtigung gesendet werden soll"""
-        if news['severity'] == 'critical' and user.get('instant_for_critical', True):
-            return True
-        if user.get('digest_frequency') == 'instant':
-            return True
-        return False
+    @staticmethod
+    def _news_areas(news: Dict[str, Any]) -> List[str]:
+        """Ordnet eine News den notify_areas zu (Titel, Zusammenfassung, Keywords)"""
+        text = " ".join([
+            news.get('title') or '',
+            news.get('summary') or '',
+            " ".join(news.get('keywords') or []),
+        ]).lower()
+        return [
+            area for area, keywords in NOTIFY_AREA_KEYWORDS.items()
+            if any(keyword in text for keyword in keywords)
+        ]
     
-    async def _create_notification(
-        self, 
-        conn: asyncpg.Connection,
+    def _build_notification_email(
+        self,
+        notification: Dict[str, Any],
         user: Dict[str, Any],
         news: Dict[str, Any]
-    ) -> int:
-        """Erstellt einen Notification-Eintrag in der Datenbank"""
-        confirmation_token = secrets.token_urlsafe(32)
+    ) -> MailMessage:
+        """Baut die E-Mail-Benachrichtigung für eine Notification"""
+        confirm_url = f"{self.frontend_url}/legal/confirm/{notification['confirmation_token']}"
+        dismiss_url = f"{self.frontend_url}/legal/dismiss/{notification['confirmation_token']}"
         
-        action_deadline = None
-        if news['severity'] == 'critical':
-            action_deadline = datetime.now() + timedelta(days=7)
-        elif news['severity'] == 'warning':
-            action_deadline = datetime.now() + timedelta(days=14)
-        
-        notification_id = await conn.fetchval("""
-            INSERT INTO legal_change_notifications (
-                user_id, legal_news_id, notification_type, severity,
-                status, confirmation_token, action_required, action_deadline
-            ) VALUES ($1, $2, 'email', $3, 'pending', $4, $5, $6)
-            RETURNING id
-        """, 
-            user['id'], 
-            news['id'], 
-            news['severity'],
-            confirmation_token,
-            news['severity'] in ('critical', 'warning'),
-            action_deadline
+        return MailMessage(
+            to=user['email'],
+            subject=self._get_email_subject(news),
+            html_body=self._get_notification_email_template(user, news, confirm_url, dismiss_url),
+            text_body=self._get_notification_email_text(user, news, confirm_url, dismiss_url),
+            sender=f"{self.sender_name} <{self.sender_email}>",
+            tag="legal_change",
         )
-        
-        return notification_id
     
-    async def _send_notification_email(
-        self,
-        conn: asyncpg.Connection,
-        notification_id: int,
-        user: Dict[str, Any],
-        news: Dict[str, Any]
-    ) -> bool:
-        """Versendet die E-Mail-Benachrichtigung"""
-        try:
-            notification = await conn.fetchrow(
-                "SELECT * FROM legal_change_notifications WHERE id = $1",
-                notification_id
-            )
-            
-            confirm_url = f"{self.frontend_url}/legal/confirm/{notification['confirmation_token']}"
-            dismiss_url = f"{self.frontend_url}/legal/dismiss/{notification['confirmation_token']}"
-            
-            subject = self._get_email_subject(news)
-            html_body = self._get_notification_email_template(user, news, confirm_url, dismiss_url)
-            text_body = self._get_notification_email_text(user, news, confirm_url, dismiss_url)
-            
-            sent = await self._send_email(user['email'], subject, html_body, text_body)
-            
-            if sent:
+    async def _send_notification_batch(self, outbox: List[Tuple[int, MailMessage]]) -> int:
+        """Versendet gesammelte Benachrichtigungen als Batch und markiert sie als gesendet"""
+        batch = await mail_transport.send_batch([message for _, message in outbox])
+        sent_ids = [
+            notification_id
+            for (notification_id, _), ok in zip(outbox, batch["results"])
+            if ok
+        ]
+        
+        if sent_ids:
+            async with self.db_pool.acquire() as conn:
                 await conn.execute("""
                     UPDATE legal_change_notifications
                     SET status = 'sent', sent_at = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                """, notification_id)
-                
-            return sent
-            
-        except Exception as e:
-            logger.error(f"Error sending notification email: {e}")
-            return False
+                    WHERE id = ANY($1::int[])
+                """, sent_ids)
+        
+        return len(sent_ids)
     
     def _get_email_subject(self, news: Dict[str, Any]) -> str:
         """Generiert den E-Mail-Betreff basierend auf Severity"""
@@ -241,7 +274,7 @@ class LegalNewsNotificationService:
         color = severity_colors.get(news['severity'], '#6c757d')
         label = severity_labels.get(news['severity'], 'Information')
         
-        template = Template("""
+        template = cached_template("legal_change_notification", """
 <!DOCTYPE html>
 <html>
 <head>
@@ -400,32 +433,14 @@ Complyo GmbH | datenschutz@complyo.tech
         html_body: str, 
         text_body: str
     ) -> bool:
-        """Sendet E-Mail"""
-        if self.demo_mode:
-            logger.info(f"[DEMO] Would send email to {to_email}: {subject}")
-            return True
-            
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(text_body, 'plain', 'utf-8'))
-            msg.attach(MIMEText(html_body, 'html', 'utf-8'))
-            
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.smtp_username, self.smtp_password)
-                server.sendmail(self.sender_email, to_email, msg.as_string())
-            
-            logger.info(f"Email sent successfully to {to_email}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"SMTP error sending email to {to_email}: {str(e)}")
-            return False
+        """Sendet E-Mail über den gemeinsamen Mail-Transport"""
+        return await mail_transport.send(MailMessage(
+            to=to_email,
+            subject=subject,
+            html_body=html_body,
+            text_body=text_body,
+            sender=f"{self.sender_name} <{self.sender_email}>",
+        ))
     
     async def confirm_notification(self, token: str) -> Dict[str, Any]:
         """Bestätigt eine Benachrichtigung (User hat zur Kenntnis genommen)"""
@@ -531,17 +546,69 @@ Complyo GmbH | datenschutz@complyo.tech
                     AND ulns.email_enabled = TRUE
                     AND u.is_active = TRUE
                 """)
-                
-                for user in users:
-                    pending = await self.get_pending_notifications(user['id'])
-                    if pending:
-                        results["users_processed"] += 1
-                        
         except Exception as e:
             logger.error(f"Error in send_daily_digest: {e}")
             results["errors"].append(str(e))
+            return results
+        
+        digests: List[MailMessage] = []
+        for user in users:
+            pending = await self.get_pending_notifications(user['id'])
+            if pending:
+                results["users_processed"] += 1
+                digests.append(self._build_digest_email(user, pending))
+        
+        if digests:
+            try:
+                batch = await mail_transport.send_batch(digests)
+                results["emails_sent"] = batch["sent"]
+            except Exception as e:
+                logger.error(f"Error sending daily digests: {e}")
+                results["errors"].append(str(e))
             
         return results
+    
+    def _build_digest_email(self, user: Dict[str, Any], pending: List[Dict[str, Any]]) -> MailMessage:
+        """Tägliche Zusammenfassung aller offenen Benachrichtigungen eines Users"""
+        template = cached_template("legal_daily_digest", """
+<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Ihre Legal Updates - Complyo</title></head>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <h2 style="color: #333;">Complyo Legal Updates</h2>
+    <p>{{ count }} offene Gesetzesänderung(en) warten auf Ihre Prüfung:</p>
+    <ul>
+    {% for item in items %}
+        <li style="margin-bottom: 10px;">
+            <strong>{{ item.title }}</strong><br>
+            <span style="font-size: 12px; color: #666;">{{ item.source }}{% if item.action_deadline %} · Frist: {{ item.action_deadline.strftime('%d.%m.%Y') }}{% endif %}</span>
+        </li>
+    {% endfor %}
+    </ul>
+    <p><a href="{{ frontend_url }}/dashboard" style="color: #667eea; font-weight: bold;">Zum Dashboard</a></p>
+    <p style="font-size: 12px; color: #666;">
+        <a href="{{ frontend_url }}/settings/notifications" style="color: #667eea;">Benachrichtigungseinstellungen ändern</a>
+    </p>
+</body>
+</html>
+        """)
+        
+        lines = "\n".join(f"- {item['title']} ({item['source']})" for item in pending)
+        text_body = (
+            f"COMPLYO LEGAL UPDATES\n\n"
+            f"{len(pending)} offene Gesetzesänderung(en):\n{lines}\n\n"
+            f"Zum Dashboard: {self.frontend_url}/dashboard\n"
+            f"Benachrichtigungseinstellungen: {self.frontend_url}/settings/notifications\n"
+        )
+        
+        return MailMessage(
+            to=user['email'],
+            subject=f"Ihre Legal Updates: {len(pending)} offene Gesetzesänderung(en)",
+            html_body=template.render(items=pending, count=len(pending), frontend_url=self.frontend_url),
+            text_body=text_body,
+            sender=f"{self.sender_name} <{self.sender_email}>",
+            tag="legal_digest",
+        )
 
     # ------------------------------------------------------------------
     # NEW: Rescan-Required Notification
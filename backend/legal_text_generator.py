@@ -16,13 +16,13 @@ import json
 import hashlib
 import logging
 import asyncpg
-import aiohttp
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 from legal_disclaimer import DISCLAIMER_LONG, DISCLAIMER_HTML
+from llm_gateway import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +60,6 @@ class LegalTextGenerator:
     Ersetzt eRecht24 vollständig.
     """
 
-    OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
     MODEL = "anthropic/claude-3.5-sonnet"
     TEMPLATE_VERSION = "1.0"
 
@@ -338,42 +337,25 @@ class LegalTextGenerator:
     async def _call_ai(self, prompt: str) -> str:
         if not self.api_key:
             return self._fallback_template(prompt)
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://complyo.tech",
-            "X-Title": "Complyo Legal Text Generator",
-        }
-        payload = {
-            "model": self.MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "Du bist ein Experte für deutsches und europäisches Compliance-Recht. "
-                        "Generiere vollständige, strukturierte Rechtstexte im HTML-Format. "
-                        "Nutze semantische Tags (h1, h2, h3, p, ul, li). Keine CSS-Inline-Styles. "
-                        "Beginne direkt mit dem HTML-Code, ohne Markdown-Wrapper."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": 0.2,
-            "max_tokens": 4000,
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.OPENROUTER_URL,
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=90),
-            ) as resp:
-                if resp.status != 200:
-                    err = await resp.text()
-                    logger.error(f"OpenRouter Fehler {resp.status}: {err}")
-                    return self._fallback_template(prompt)
-                data = await resp.json()
-                return data["choices"][0]["message"]["content"]
+        response = await llm_gateway.complete(
+            prompt,
+            system_message=(
+                "Du bist ein Experte für deutsches und europäisches Compliance-Recht. "
+                "Generiere vollständige, strukturierte Rechtstexte im HTML-Format. "
+                "Nutze semantische Tags (h1, h2, h3, p, ul, li). Keine CSS-Inline-Styles. "
+                "Beginne direkt mit dem HTML-Code, ohne Markdown-Wrapper."
+            ),
+            model=self.MODEL,
+            temperature=0.2,
+            max_tokens=4000,
+            timeout=90,
+            title="Complyo Legal Text Generator",
+            api_key=self.api_key,
+        )
+        if not response.success:
+            logger.error(f"OpenRouter Fehler {response.status}: {response.error}")
+            return self._fallback_template(prompt)
+        return response.content
 
     def _build_prompt(
         self,
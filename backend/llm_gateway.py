@@ -0,0 +1,359 @@
+"""
+LLM Gateway
+Zentraler, geteilter HTTP-Client für alle OpenRouter/LLM-Calls
+
+Features:
+- Ein langlebiger httpx.AsyncClient mit Keep-Alive-Pool (kein TLS-Handshake pro Call)
+- Globales und modellbezogenes Concurrency-Limit
+- Token-Bucket-Rate-Limit; 429 mit Retry-After pausiert den Bucket
+- Einheitliche Retry- und Fallback-Kette (Modell → Fallback-Modelle)
+- Prometheus-Histogramme für Latenz und Tokens je Modell
+
+Konfiguration über Umgebungsvariablen:
+- LLM_MAX_CONCURRENCY        Parallele Requests gesamt (Default: 8)
+- LLM_PER_MODEL_CONCURRENCY  Parallele Requests je Modell (Default: 4)
+- LLM_REQUESTS_PER_MINUTE    Token-Bucket-Rate (Default: 60)
+- LLM_MAX_CONNECTIONS        Größe des Keep-Alive-Pools (Default: 20)
+
+Usage:
+    from llm_gateway import llm_gateway
+
+    response = await llm_gateway.complete(prompt, system_message="...", model="anthropic/claude-3.5-sonnet")
+    if response.success:
+        print(response.content)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from metrics import llm_request_seconds, llm_tokens, openrouter_requests_total
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+@dataclass
+class LLMResponse:
+    """Ergebnis eines Gateway-Calls (inkl. Fallback-Info)"""
+    success: bool
+    content: Optional[str]
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    error: Optional[str] = None
+    status: Optional[int] = None
+    response_time_ms: int = 0
+    attempts: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class LLMError(Exception):
+    """Alle Versuche (inkl. Fallback-Modelle) fehlgeschlagen"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """Einfacher Token-Bucket; pause() blockiert bis zu einem Zeitpunkt (Retry-After)"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 6.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def pause(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        # Nachfüllen erst ab Ende der Pause, sonst wäre die Pausenzeit als Burst gutgeschrieben
+        self._tokens = 0.0
+        self._updated = self._blocked_until
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After als Sekunden oder HTTP-Datum"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """
+    Prozessweites Gateway zu OpenRouter
+
+    Alle LLM-Clients (Fix-Engine, Legal-Monitor, Klassifizierer, AI-Act,
+    Rechtstexte, Patches) teilen sich Verbindungspool, Limits und Metriken.
+    """
+
+    def __init__(
+        self,
+        api_url: str = OPENROUTER_URL,
+        max_concurrency: Optional[int] = None,
+        per_model_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_url = api_url
+        self.transport = transport
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.per_model_concurrency = per_model_concurrency or int(os.getenv("LLM_PER_MODEL_CONCURRENCY", "4"))
+        self.requests_per_minute = requests_per_minute or float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._model_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._bucket: Optional[TokenBucket] = None
+
+        # Statistik für Health-Endpoint
+        self._requests = 0
+        self._rate_limited = 0
+        self._failures = 0
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            # Client/Semaphoren eines anderen Loops sind nicht nutzbar
+            logger.info("LLMGateway: neuer Event-Loop erkannt, Client wird neu initialisiert")
+            self._client = None
+            self._model_semaphores = {}
+            self._semaphore = None
+
+        if self._client is None:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                transport=self.transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            if self._bucket is None:
+                self._bucket = TokenBucket(self.requests_per_minute)
+
+    def _model_semaphore(self, model: str) -> asyncio.Semaphore:
+        sem = self._model_semaphores.get(model)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_model_concurrency)
+            self._model_semaphores[model] = sem
+        return sem
+
+    async def close(self):
+        """Schließt den Verbindungspool (z.B. beim Shutdown)"""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        self._semaphore = None
+        self._model_semaphores = {}
+        logger.info("🔒 LLMGateway geschlossen")
+
+    # -------------------------------------------------------------------------
+    # Calls
+    # -------------------------------------------------------------------------
+
+    async def complete(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """Convenience: Prompt (+ optionale System-Nachricht) → chat()"""
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        return await self.chat(messages, **kwargs)
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        timeout: float = 60.0,
+        retries: int = 3,
+        fallback_models: Sequence[str] = (),
+        title: str = "Complyo",
+        api_key: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Chat-Completion mit Retry- und Fallback-Kette
+
+        - 429: wartet Retry-After (bzw. Exponential Backoff) und pausiert den Bucket
+        - 5xx/Timeout/Netzwerkfehler: Retry mit Backoff
+        - übrige 4xx: kein Retry, direkt nächstes Fallback-Modell
+
+        Wirft keine Exceptions — Fehler stehen in LLMResponse.error.
+        """
+        api_key = api_key if api_key is not None else os.getenv("OPENROUTER_API_KEY", "")
+        if not api_key:
+            return LLMResponse(success=False, content=None, model=model, error="OPENROUTER_API_KEY nicht konfiguriert")
+
+        self._ensure_started()
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://complyo.tech",
+            "X-Title": title,
+        }
+
+        start_time = time.time()
+        attempts = 0
+        last_error = None
+        last_status = None
+
+        for current_model in [model, *fallback_models]:
+            payload = {
+                "model": current_model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            }
+            for attempt in range(max(1, retries)):
+                attempts += 1
+                delay = None
+                try:
+                    response = await self._post(current_model, headers, payload, timeout)
+                except httpx.TimeoutException:
+                    last_error, last_status = "Timeout bei AI-API-Call", None
+                    delay = 1.0
+                except httpx.HTTPError as e:
+                    last_error, last_status = f"Exception: {e}", None
+                    delay = 1.0
+                else:
+                    last_status = response.status_code
+                    if response.status_code == 200:
+                        result = self._parse_success(response, current_model)
+                        result.response_time_ms = int((time.time() - start_time) * 1000)
+                        result.attempts = attempts
+                        if result.success:
+                            return result
+                        last_error = result.error
+                        break
+
+                    if response.status_code == 429:
+                        self._rate_limited += 1
+                        last_error = "Rate limit erreicht"
+                        delay = _retry_after_seconds(response.headers.get("Retry-After"))
+                        if delay is None:
+                            delay = 2 ** attempt
+                        # Bucket pausiert alle Calls — kein zusätzlicher Sleep nötig
+                        self._bucket.pause(delay)
+                        delay = 0.0
+                    elif response.status_code >= 500:
+                        last_error = f"API Error {response.status_code}: {response.text[:200]}"
+                        delay = 1.0 * (attempt + 1)
+                    else:
+                        last_error = f"API Error {response.status_code}: {response.text[:200]}"
+                        break
+
+                if attempt < retries - 1:
+                    await asyncio.sleep(delay + random.uniform(0, 0.25))
+
+            if fallback_models:
+                logger.warning(f"⚠️ LLM-Modell {current_model} fehlgeschlagen: {last_error}")
+
+        self._failures += 1
+        openrouter_requests_total.labels(status="error").inc()
+        return LLMResponse(
+            success=False,
+            content=None,
+            model=model,
+            error=last_error or "Unknown error",
+            status=last_status,
+            response_time_ms=int((time.time() - start_time) * 1000),
+            attempts=attempts,
+        )
+
+    async def _post(self, model: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: float) -> httpx.Response:
+        await self._bucket.acquire()
+        async with self._semaphore, self._model_semaphore(model):
+            self._requests += 1
+            started = time.perf_counter()
+            try:
+                return await self._client.post(self.api_url, headers=headers, json=payload, timeout=timeout)
+            finally:
+                llm_request_seconds.labels(model=model).observe(time.perf_counter() - started)
+
+    def _parse_success(self, response: httpx.Response, model: str) -> LLMResponse:
+        try:
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            return LLMResponse(success=False, content=None, model=model, error=f"Ungültige API-Antwort: {e}", status=200)
+
+        usage = data.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        llm_tokens.labels(model=model, kind="prompt").observe(prompt_tokens)
+        llm_tokens.labels(model=model, kind="completion").observe(completion_tokens)
+        openrouter_requests_total.labels(status="success").inc()
+
+        return LLMResponse(
+            success=True,
+            content=content,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            status=200,
+        )
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        return {
+            "status": "up" if self._client is not None else "idle",
+            "requests": self._requests,
+            "rate_limited": self._rate_limited,
+            "failures": self._failures,
+            "max_concurrency": self.max_concurrency,
+            "per_model_concurrency": self.per_model_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+        }
+
+
+# Globale Instanz
+llm_gateway = LLMGateway()
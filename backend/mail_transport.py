@@ -0,0 +1,361 @@
+"""
+Mail-Transport
+Asynchroner SMTP-Versand mit Connection-Pool, Outbound-Queue und Batch-API
+
+Statt pro E-Mail eine blockierende smtplib.SMTP-Verbindung (Connect + STARTTLS
++ Login) im Event-Loop aufzubauen:
+- aiosmtplib mit einem Pool wiederverwendeter, eingeloggter Verbindungen;
+  Recycling nach N Mails oder Leerlauf, kaputte Verbindungen werden verworfen
+- send():       wartet auf die Zustellung (inkl. Retries), liefert True/False
+- enqueue():    Fire-and-forget über die Outbound-Queue; eine feste Anzahl
+                Worker arbeitet sie ab, volle Queue → Mail wird abgewiesen
+- send_batch(): viele Mails mit begrenzter Parallelität über den Pool
+                (Digests, Legal-Change-Fan-out)
+- Globales Rate-Limit (Mails/Sekunde) und Retries mit exponentiellem Backoff
+- Template-Cache: Jinja2-Templates werden je (Name, Sprache) einmal kompiliert
+- Demo-Modus ohne SMTP-Zugangsdaten: Mails werden nur geloggt
+
+Konfiguration über Umgebungsvariablen:
+- SMTP_HOST / SMTP_PORT / SMTP_USERNAME / SMTP_PASSWORD / SENDER_EMAIL / SENDER_NAME
+- MAIL_POOL_SIZE              Max. parallele SMTP-Verbindungen (Default: 3)
+- MAIL_MAX_PER_CONNECTION     Mails je Verbindung bis zum Reconnect (Default: 100)
+- MAIL_IDLE_TIMEOUT           Leerlauf in s, nach dem neu verbunden wird (Default: 60)
+- MAIL_RATE_PER_SECOND        Max. Mails pro Sekunde, 0 = unbegrenzt (Default: 10)
+- MAIL_MAX_RETRIES            Wiederholungen je Mail (Default: 3)
+- MAIL_QUEUE_SIZE             Max. Mails in der Outbound-Queue (Default: 5000)
+- MAIL_WORKERS                Worker für Queue und max. parallele Batch-Sends
+                              (Default: MAIL_POOL_SIZE)
+
+Usage:
+    from mail_transport import MailMessage, mail_transport
+
+    await mail_transport.send(MailMessage(to="a@b.de", subject="Hallo", text_body="..."))
+    result = await mail_transport.send_batch(messages)
+"""
+
+import asyncio
+import logging
+import os
+import ssl
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jinja2 import Template
+
+try:
+    import aiosmtplib
+    AIOSMTPLIB_AVAILABLE = True
+except ImportError:
+    aiosmtplib = None
+    AIOSMTPLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MailMessage:
+    to: str
+    subject: str
+    text_body: str = ""
+    html_body: Optional[str] = None
+    attachments: List[Tuple[str, bytes]] = field(default_factory=list)  # (Dateiname, Inhalt)
+    sender: Optional[str] = None  # Default: "SENDER_NAME <SENDER_EMAIL>"
+    tag: str = "default"  # nur für Logs/Statistik
+
+
+def build_mime(message: MailMessage, default_sender: str) -> EmailMessage:
+    """MailMessage → MIME (text/plain + optional text/html + Anhänge)"""
+    mime = EmailMessage()
+    mime["From"] = message.sender or default_sender
+    mime["To"] = message.to
+    mime["Subject"] = message.subject
+    mime.set_content(message.text_body or "", charset="utf-8")
+    if message.html_body:
+        mime.add_alternative(message.html_body, subtype="html", charset="utf-8")
+    for filename, content in message.attachments:
+        mime.add_attachment(content, maintype="application", subtype="octet-stream", filename=filename)
+    return mime
+
+
+# ----------------------------------------------------------------------
+# Template-Cache
+# ----------------------------------------------------------------------
+
+_templates: Dict[Tuple[str, str], Template] = {}
+
+
+def cached_template(name: str, source: str, language: str = "de") -> Template:
+    """Kompiliert ein Jinja2-Template einmal je (Name, Sprache)"""
+    key = (name, language)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = Template(source)
+    return template
+
+
+# ----------------------------------------------------------------------
+# SMTP-Verbindungspool
+# ----------------------------------------------------------------------
+
+@dataclass
+class _PooledConnection:
+    client: Any
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SMTPPool:
+    """Pool eingeloggter SMTP-Verbindungen"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        size: int = 3,
+        max_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        connect: Optional[Callable[[], Any]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_per_connection = max_per_connection
+        self.idle_timeout = idle_timeout
+        self._connect_override = connect
+        self._idle: List[_PooledConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connects = 0
+
+    async def _connect(self) -> Any:
+        self.connects += 1
+        if self._connect_override is not None:
+            return await self._connect_override()
+        if not AIOSMTPLIB_AVAILABLE:
+            raise RuntimeError("aiosmtplib nicht installiert")
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.port == 465,
+            start_tls=self.port != 465,
+            tls_context=ssl.create_default_context(),
+            timeout=30,
+        )
+        await client.connect()
+        await client.login(self.username, self.password)
+        return client
+
+    @staticmethod
+    async def _close(connection: _PooledConnection):
+        try:
+            await connection.client.quit()
+        except Exception:
+            pass
+
+    async def send(self, mime: EmailMessage):
+        """Sendet über eine (wiederverwendete) Verbindung; Fehler verwerfen die Verbindung"""
+        async with self._slots:
+            connection = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if time.monotonic() - candidate.last_used < self.idle_timeout:
+                    connection = candidate
+                    break
+                await self._close(candidate)
+            if connection is None:
+                connection = _PooledConnection(client=await self._connect())
+
+            try:
+                await connection.client.send_message(mime)
+            except Exception:
+                await self._close(connection)
+                raise
+
+            connection.sent += 1
+            connection.last_used = time.monotonic()
+            if connection.sent >= self.max_per_connection:
+                await self._close(connection)
+            else:
+                self._idle.append(connection)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._close(connection)
+
+
+# ----------------------------------------------------------------------
+# Transport (Queue, Rate-Limit, Retries, Batch)
+# ----------------------------------------------------------------------
+
+class MailTransport:
+    """Gemeinsamer asynchroner Mailversand für alle Services"""
+
+    def __init__(self, pool: Optional[SMTPPool] = None):
+        self.smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
+        self.smtp_username = os.getenv("SMTP_USERNAME", "")
+        self.smtp_password = os.getenv("SMTP_PASSWORD", "")
+        self.default_sender = (
+            f"{os.getenv('SENDER_NAME', 'Complyo Compliance')} <{os.getenv('SENDER_EMAIL', 'noreply@complyo.tech')}>"
+        )
+        self.rate_per_second = float(os.getenv("MAIL_RATE_PER_SECOND", "10"))
+        self.max_retries = int(os.getenv("MAIL_MAX_RETRIES", "3"))
+        self.retry_base_delay = 1.0
+        self.queue_size = int(os.getenv("MAIL_QUEUE_SIZE", "5000"))
+        self.demo_mode = pool is None and not all([self.smtp_username, self.smtp_password])
+
+        self.pool = pool or SMTPPool(
+            self.smtp_host,
+            self.smtp_port,
+            self.smtp_username,
+            self.smtp_password,
+            size=int(os.getenv("MAIL_POOL_SIZE", "3")),
+            max_per_connection=int(os.getenv("MAIL_MAX_PER_CONNECTION", "100")),
+            idle_timeout=float(os.getenv("MAIL_IDLE_TIMEOUT", "60")),
+        )
+        self.workers = max(1, int(os.getenv("MAIL_WORKERS", "0")) or self.pool.size)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._closing = False
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._next_slot = 0.0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+
+    # ------------------------------------------------------------------
+    # Versand
+    # ------------------------------------------------------------------
+
+    async def send(self, message: MailMessage) -> bool:
+        """Sendet eine Mail (mit Retries) und wartet auf das Ergebnis"""
+        if self.demo_mode:
+            logger.info(f"[DEMO] Email to {message.to}: {message.subject}")
+            return True
+
+        mime = build_mime(message, self.default_sender)
+        for attempt in range(self.max_retries + 1):
+            await self._throttle()
+            try:
+                await self.pool.send(mime)
+                self._sent += 1
+                logger.info(f"Email sent successfully to {message.to}")
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self._failed += 1
+                    logger.error(f"SMTP error sending email to {message.to}: {e}")
+                    return False
+                self._retried += 1
+                delay = self.retry_base_delay * (2 ** attempt)
+                logger.warning(f"SMTP error for {message.to} (Versuch {attempt + 1}), retry in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+        return False
+
+    async def send_batch(self, messages: List[MailMessage]) -> Dict[str, Any]:
+        """
+        Sendet viele Mails über den Pool, höchstens MAIL_WORKERS gleichzeitig
+        (Rate-Limit gilt global). Liefert {'sent', 'failed', 'results'} —
+        results[i] gehört zu messages[i].
+        """
+        results: List[bool] = [False] * len(messages)
+        cursor = iter(range(len(messages)))
+
+        async def worker():
+            for i in cursor:
+                results[i] = await self.send(messages[i])
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(messages)))))
+        sent = sum(1 for ok in results if ok)
+        return {"sent": sent, "failed": len(results) - sent, "results": results}
+
+    def enqueue(self, message: MailMessage) -> bool:
+        """Fire-and-forget: Mail in die Outbound-Queue (False wenn voll oder beim Shutdown)"""
+        if self._closing:
+            self._failed += 1
+            logger.error(f"Mail-Transport wird beendet, Mail an {message.to} verworfen")
+            return False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.create_task(self._drain()))
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self._failed += 1
+            logger.error(f"Mail-Queue voll ({self.queue_size}), Mail an {message.to} verworfen")
+            return False
+
+    async def _drain(self):
+        """Queue-Worker: eine Mail nach der anderen, Parallelität = Anzahl Worker"""
+        while True:
+            message = await self._queue.get()
+            try:
+                await self.send(message)
+            except Exception as e:
+                logger.error(f"Mail-Worker Fehler für {message.to}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _throttle(self):
+        """Globales Rate-Limit: reserviert den nächsten freien Sende-Slot"""
+        if self.rate_per_second <= 0:
+            return
+        if self._rate_lock is None:
+            self._rate_lock = asyncio.Lock()
+        async with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate_per_second
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    # ------------------------------------------------------------------
+    # Lifecycle + Monitoring
+    # ------------------------------------------------------------------
+
+    async def close(self, timeout: float = 10.0):
+        """
+        Queue inkl. laufender Sends abarbeiten (max. timeout s), danach
+        verbleibende Worker abbrechen und SMTP-Verbindungen schließen
+        """
+        self._closing = True
+        if self._queue is not None and self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                dropped = self._queue.qsize()
+                self._failed += dropped
+                logger.warning(f"Mail-Queue beim Shutdown nicht leer ({dropped} Mails verworfen, laufende Sends abgebrochen)")
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        await self.pool.close()
+        self._closing = False
+
+    def health(self) -> Dict[str, Any]:
+        """Status für /health und Monitoring"""
+        return {
+            "status": "demo" if self.demo_mode else "up",
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self._sent,
+            "failed": self._failed,
+            "retried": self._retried,
+            "smtp_connects": self.pool.connects,
+            "pool_size": self.pool.size,
+            "workers": len([worker for worker in self._workers if not worker.done()]),
+        }
+
+
+# Globale Instanz
+mail_transport = MailTransport()
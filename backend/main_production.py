@@ -48,10 +48,12 @@ _openrouter_requests_total = _PCounter("complyo_openrouter_total", "OpenRouter A
 _redis_health_gauge = _PGauge("complyo_redis_health", "Redis health (1=up, 0=down)")
 _postgres_health_gauge = _PGauge("complyo_postgres_health", "Postgres health (1=up, 0=down)")
 _5xx_errors_total = _PCounter("complyo_5xx_total", "5xx errors", ["endpoint"])
-from compliance_engine.scanner import ComplianceScanner
+from compliance_engine.scan_coordinator import scan_coordinator, REVALIDATE_MAX_AGE as SCAN_REVALIDATE_MAX_AGE
 from compliance_engine.workflow_engine import workflow_engine, UserSkillLevel
 from compliance_engine.workflow_integration import WorkflowIntegration
-from compliance_engine.pdf_generator import pdf_generator
+from compliance_engine.pdf_generator import render_compliance_report
+from cpu_executor import cpu_executor
+from mail_transport import mail_transport
 from compliance_engine.score_calculator import ScoreCalculator
 from compliance_engine.deep_scanner import DeepScanner
 from compliance_engine.data_validator import DataValidator
@@ -405,6 +407,10 @@ async def startup_event():
     import widget_routes
     widget_routes.db_pool = db_pool
     print("✅ Widget routes initialized with database pool")
+
+    # Prebuild + precompress widget bundles (served from memory)
+    from widget_asset_registry import widget_asset_registry
+    widget_asset_registry.build_all()
     
     # Initialize Public routes with db_pool
     import public_routes
@@ -628,6 +634,25 @@ async def startup_event():
     cookie_compliance_routes.db_service = db_service
     cookie_compliance_routes.redis_client = _async_redis
     
+    # Consent-Logs gepuffert und gebündelt schreiben
+    from consent_ingestion import consent_ingestion
+    await consent_ingestion.start(db_pool, _async_redis)
+
+    # Scan-Ergebnisse prozessübergreifend teilen (Re-Checks nutzen frische Scans)
+    scan_coordinator.redis = _async_redis
+
+    # TCF Vendor-Erkennung über den Domain-Index aus tcf_vendors
+    from compliance_engine.tcf_vendor_analyzer import tcf_vendor_analyzer
+    tcf_vendor_analyzer.db_pool = db_pool
+
+    # GVL-Snapshot im Hintergrund vorladen (Vendor-Liste für die CMP-Oberfläche)
+    from compliance_engine.gvl_snapshot import gvl_snapshot_service
+    asyncio.create_task(gvl_snapshot_service.get())
+
+    # GeoIP-Range-Tabelle für den Banner-Geo-Check laden (ohne DB im Hot Path)
+    from geo_resolver import geo_resolver
+    asyncio.create_task(cpu_executor.run("geoip_load", geo_resolver.load, isolated=False))
+
     # Set global references for ab_test_routes
     import ab_test_routes
     ab_test_routes.db_pool = db_pool
@@ -705,6 +730,39 @@ async def shutdown_event():
         print("✅ Background worker stopped")
     except Exception as e:
         print(f"⚠️ Background worker stop failed: {e}")
+
+    # Flush buffered consent logs before the DB pool closes
+    try:
+        from consent_ingestion import consent_ingestion
+        await consent_ingestion.stop()
+    except Exception as e:
+        print(f"⚠️ Consent ingestion flush failed: {e}")
+
+    # Close shared LLM connection pool
+    try:
+        from llm_gateway import llm_gateway
+        await llm_gateway.close()
+    except Exception as e:
+        print(f"⚠️ LLM gateway close failed: {e}")
+
+    # Close shared Playwright browser pool
+    try:
+        from compliance_engine.browser_pool import browser_pool
+        await browser_pool.close()
+    except Exception as e:
+        print(f"⚠️ Browser pool close failed: {e}")
+
+    # Stop CPU executor worker processes
+    try:
+        cpu_executor.shutdown()
+    except Exception as e:
+        print(f"⚠️ CPU executor shutdown failed: {e}")
+
+    # Drain outbound mail queue and close pooled SMTP connections
+    try:
+        await mail_transport.close()
+    except Exception as e:
+        print(f"⚠️ Mail transport close failed: {e}")
     
     await close_db()
     await db_service.close()
@@ -781,6 +839,43 @@ async def health_check():
     # Stripe
     checks["stripe"] = {"status": "configured" if os.getenv("STRIPE_SECRET_KEY") else "missing"}
 
+    # Shared Playwright browser pool
+    from compliance_engine.browser_pool import browser_pool
+    checks["browser_pool"] = browser_pool.health()
+
+    # Shared LLM gateway
+    from llm_gateway import llm_gateway
+    checks["llm_gateway"] = llm_gateway.health()
+
+    # Consent ingestion pipeline
+    from consent_ingestion import consent_ingestion
+    checks["consent_ingestion"] = consent_ingestion.health()
+
+    # Render decisions / rendered-HTML cache
+    from compliance_engine.render_service import render_service
+    checks["render_service"] = render_service.health()
+
+    # Single-flight / scan result cache
+    checks["scan_coordinator"] = scan_coordinator.health()
+
+    # GVL snapshot (version / source)
+    from compliance_engine.gvl_snapshot import gvl_snapshot_service
+    checks["gvl_snapshot"] = gvl_snapshot_service.health()
+
+    # Local GeoIP range table + LRU
+    from geo_resolver import geo_resolver
+    checks["geo_resolver"] = geo_resolver.health()
+
+    # Off-loop CPU executor
+    checks["cpu_executor"] = cpu_executor.health()
+
+    # Pooled SMTP transport + outbound queue
+    checks["mail_transport"] = mail_transport.health()
+
+    # Fix-job queue worker
+    from background_worker import background_worker_health
+    checks["fix_job_worker"] = background_worker_health()
+
     overall = "healthy" if checks["database"]["status"] == "up" else "degraded"
     return {
         "status": overall,
@@ -906,9 +1001,8 @@ async def validate_fix_live(validate_request: ValidateFixRequest, request: Reque
         # TODO: Import LiveValidator when created
         # For now, basic validation
         
-        # Re-scan website
-        async with ComplianceScanner() as scanner:
-            scan_result = await scanner.scan_website(validate_request.website_url)
+        # Re-scan website (a scan from the last seconds is reused)
+        scan_result = await scan_coordinator.scan(validate_request.website_url, max_age=SCAN_REVALIDATE_MAX_AGE)
         
         # Check if the specific issue is resolved
         # (simplified - would need more sophisticated matching)
@@ -1123,11 +1217,10 @@ async def analyze_website_v2(request: AnalyzeRequest, current_user: dict = Depen
     Performs a real, in-depth compliance scan of a website.
     """
     try:
-        async with ComplianceScanner() as scanner:
-            scan_result = await asyncio.wait_for(
-                scanner.scan_website(request.url),
-                timeout=120.0
-            )
+        scan_result = await asyncio.wait_for(
+            scan_coordinator.scan(request.url),
+            timeout=120.0
+        )
         
         if scan_result.get("error"):
             raise HTTPException(status_code=400, detail=scan_result.get("error_message", "Scan failed"))
@@ -1650,7 +1743,7 @@ async def download_report(scan_id: str, current_user: dict = Depends(get_current
         else:
             report_data = scan_dict
 
-        report_bytes = pdf_generator.generate_compliance_report(report_data)
+        report_bytes = await cpu_executor.run("pdf_report", render_compliance_report, report_data)
         
         return StreamingResponse(io.BytesIO(report_bytes), media_type="application/pdf", headers={
             "Content-Disposition": f"attachment; filename=complyo-report-{scan_id}.pdf"
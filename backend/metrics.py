@@ -2,7 +2,7 @@
 Shared Prometheus metrics for Complyo backend.
 Import from here in routes to avoid circular imports with main_production.
 """
-from prometheus_client import Counter as _C, Gauge as _G
+from prometheus_client import Counter as _C, Gauge as _G, Histogram as _H
 
 scan_requests_total = _C("complyo_scans_total_v2", "Scan requests", ["status"])
 fix_requests_total = _C("complyo_fixes_total_v2", "Fix generation requests", ["status"])
@@ -10,3 +10,39 @@ openrouter_requests_total = _C("complyo_openrouter_total_v2", "OpenRouter API ca
 redis_health_gauge = _G("complyo_redis_health_v2", "Redis health (1=up, 0=down)")
 postgres_health_gauge = _G("complyo_postgres_health_v2", "Postgres health (1=up, 0=down)")
 errors_5xx_total = _C("complyo_5xx_total_v2", "5xx errors", ["endpoint"])
+
+# Consent-Ingestion-Pipeline
+consent_ingest_queue_depth = _G("complyo_consent_ingest_queue_depth", "Gepufferte Consent-Logs (In-Memory)")
+consent_ingest_flush_seconds = _H("complyo_consent_ingest_flush_seconds", "Dauer eines Consent-Batch-Flushes")
+consent_ingest_records_total = _C("complyo_consent_ingest_records_total", "Consent-Logs nach Ergebnis", ["result"])
+
+# LLM Gateway (OpenRouter)
+llm_request_seconds = _H("complyo_llm_request_seconds", "LLM-Request-Latenz je Modell", ["model"],
+                         buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 90, 120))
+llm_tokens = _H("complyo_llm_tokens", "Tokens je LLM-Call", ["model", "kind"],
+                buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000))
+
+# Fix-Job-Queue (BackgroundWorker)
+fix_job_duration_seconds = _H("complyo_fix_job_duration_seconds", "Laufzeit eines Fix-Jobs im Worker",
+                              buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300))
+fix_jobs_processed_total = _C("complyo_fix_jobs_processed_total", "Fix-Jobs nach Ergebnis", ["result"])
+
+# Principal-Cache (get_current_user)
+principal_cache_lookups_total = _C("complyo_principal_cache_lookups_total", "Principal-Lookups nach Stufe", ["result"])
+
+# CPU-Executor (bcrypt, PDF, HTML-Parsing)
+cpu_task_seconds = _H("complyo_cpu_task_seconds", "Laufzeit CPU-lastiger Aufgaben außerhalb des Event-Loops",
+                      ["task_type", "mode"], buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+cpu_executor_pending = _G("complyo_cpu_executor_pending", "Laufende/wartende Aufgaben im CPU-Executor")
+
+# RenderService (Smart-Fetch / Browser-Rendering)
+render_requests_total = _C("complyo_render_requests_total", "Smart-Fetch-Anfragen nach Ergebnis", ["result"])
+
+# ScanCoordinator (Single-Flight / Scan-Ergebnis-Cache)
+scan_coordinator_requests_total = _C("complyo_scan_coordinator_requests_total", "Koordinierte Scans nach Profil und Quelle", ["profile", "source"])
+
+# GVL-Snapshot (IAB TCF Global Vendor List)
+gvl_snapshot_version = _G("complyo_gvl_snapshot_version", "Geladene GVL-Version (vendorListVersion)")
+
+# Geo-Resolver (Banner Geo-Check)
+geoip_lookups_total = _C("complyo_geoip_lookups_total", "Geo-Auflösungen nach Quelle", ["source"])
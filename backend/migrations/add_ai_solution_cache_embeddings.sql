@@ -0,0 +1,18 @@
+-- Migration: Gespeicherte Embeddings für den semantischen AI-Solution-Cache
+-- Datum: 2026-10-16
+-- Beschreibung: ai_solution_cache_service.py berechnet die Hashing-Vektoren
+--               (float32, AI_CACHE_VECTOR_DIM) einmal in store_solution() und
+--               legt sie hier ab. Kategorie-Indizes werden daraus ohne
+--               Neuberechnung aufgebaut und über updated_at inkrementell
+--               nachgeladen. Fehlende Embeddings älterer Zeilen werden beim
+--               ersten Laden nachgetragen.
+
+BEGIN;
+
+ALTER TABLE ai_solution_cache ADD COLUMN IF NOT EXISTS title_embedding BYTEA;
+ALTER TABLE ai_solution_cache ADD COLUMN IF NOT EXISTS description_embedding BYTEA;
+
+CREATE INDEX IF NOT EXISTS idx_ai_solution_cache_category_updated
+    ON ai_solution_cache (category, updated_at);
+
+COMMIT;
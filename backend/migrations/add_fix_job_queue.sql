@@ -0,0 +1,37 @@
+-- Migration: Fix-Job-Queue (Leases, Retries, Dead-Letter, NOTIFY)
+-- Datum: 2026-10-16
+-- Beschreibung: Ersetzt das 5s-Polling des BackgroundWorkers durch LISTEN/NOTIFY
+--               und atomares Claiming mit FOR UPDATE SKIP LOCKED
+
+-- 1. Queue-Spalten
+ALTER TABLE fix_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE fix_jobs ADD COLUMN IF NOT EXISTS max_attempts INTEGER NOT NULL DEFAULT 3;
+ALTER TABLE fix_jobs ADD COLUMN IF NOT EXISTS run_after TIMESTAMP NOT NULL DEFAULT NOW();
+ALTER TABLE fix_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP;
+ALTER TABLE fix_jobs ADD COLUMN IF NOT EXISTS worker_id TEXT;
+ALTER TABLE fix_jobs ADD COLUMN IF NOT EXISTS dead_lettered_at TIMESTAMP;
+
+-- 2. Indizes für das Claiming (nur offene Jobs)
+CREATE INDEX IF NOT EXISTS idx_fix_jobs_pending_run_after
+    ON fix_jobs(run_after, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_fix_jobs_processing_lease
+    ON fix_jobs(lease_expires_at) WHERE status = 'processing';
+
+-- 3. Worker wecken, sobald ein Job angelegt oder erneut eingeplant wird
+CREATE OR REPLACE FUNCTION notify_fix_job_ready()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status = 'pending' THEN
+        PERFORM pg_notify('fix_jobs', NEW.job_id::TEXT);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fix_jobs_notify ON fix_jobs;
+CREATE TRIGGER trg_fix_jobs_notify
+    AFTER INSERT OR UPDATE OF status ON fix_jobs
+    FOR EACH ROW EXECUTE FUNCTION notify_fix_job_ready();
+
+COMMENT ON COLUMN fix_jobs.lease_expires_at IS 'Sichtbarkeits-Timeout: abgelaufene processing-Jobs werden erneut vergeben';
+COMMENT ON COLUMN fix_jobs.dead_lettered_at IS 'Gesetzt, wenn max_attempts erschöpft sind (status = failed)';
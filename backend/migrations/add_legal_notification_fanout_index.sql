@@ -0,0 +1,7 @@
+-- Migration: Index für den mengenbasierten Legal-Change-Fan-out
+-- Datum: 2026-10-16
+-- Grund: legal_notification_service.process_new_legal_changes sucht News ohne
+--        Notifications (NOT EXISTS über legal_news_id) bei jedem Cron-Lauf.
+
+CREATE INDEX IF NOT EXISTS idx_legal_change_notifications_news_user
+    ON legal_change_notifications(legal_news_id, user_id);
@@ -0,0 +1,41 @@
+-- Migration: Conditional GET und Bulk-Insert für die Legal-News-Ingestion
+-- Datum: 2026-10-16
+-- Grund: news_service.fetch_all_feeds sendet If-None-Match/If-Modified-Since
+--        und schreibt neue Items mit INSERT ... ON CONFLICT DO NOTHING.
+
+ALTER TABLE rss_feed_sources ADD COLUMN IF NOT EXISTS etag VARCHAR(500);
+ALTER TABLE rss_feed_sources ADD COLUMN IF NOT EXISTS last_modified VARCHAR(100);
+
+BEGIN;
+
+-- Vorhandene URL-Duplikate zusammenführen (ältester Eintrag bleibt), dann eindeutig machen.
+-- legal_change_notifications.legal_news_id ist ON DELETE CASCADE — Benachrichtigungen
+-- (inkl. Bestätigungen) der Duplikate werden vorher auf den verbleibenden Eintrag umgehängt.
+CREATE TEMP TABLE legal_news_duplicates ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY url) AS keep_id
+    FROM legal_news
+    WHERE url IS NOT NULL AND url <> ''
+) d
+WHERE id <> keep_id;
+
+DO $$
+BEGIN
+    IF to_regclass('legal_change_notifications') IS NOT NULL THEN
+        UPDATE legal_change_notifications n
+        SET legal_news_id = d.keep_id
+        FROM legal_news_duplicates d
+        WHERE n.legal_news_id = d.id;
+    END IF;
+END $$;
+
+DELETE FROM legal_news a
+USING legal_news_duplicates d
+WHERE a.id = d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_legal_news_url
+    ON legal_news(url)
+    WHERE url IS NOT NULL AND url <> '';
+
+COMMIT;
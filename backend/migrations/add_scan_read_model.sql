@@ -0,0 +1,292 @@
+-- Migration: Read-Model für Scan-Ergebnisse (Dashboard / Risiko-Radar)
+-- Datum: 2026-10-16
+-- Beschreibung: Dashboard und Risiko-Radar lasen bisher bei jedem Aufruf die
+--               komplette scan_history (DISTINCT ON, url ILIKE '%domain%',
+--               JSON-Blob in Python). Jetzt pflegt ein Trigger bei jedem Insert:
+--               - scan_history.domain (normalisiert, indiziert)
+--               - website_latest_scan: neuester Scan je User + Website
+--               - scan_daily_rollups: Tageswerte je User + Website
+
+-- 1. Hilfsfunktionen (auch für das Backfill unten)
+CREATE OR REPLACE FUNCTION scan_domain(url TEXT)
+RETURNS TEXT AS $$
+    SELECT NULLIF(
+        regexp_replace(
+            regexp_replace(lower(btrim(COALESCE(url, ''))), '^[a-z][a-z0-9+.-]*://', ''),
+            '^www\.|[:/?#].*$', '', 'g'
+        ),
+        ''
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Säulen-Scores: Liste [{pillar, score}], Objekt oder *_score-Felder des Scan-Outputs
+CREATE OR REPLACE FUNCTION scan_pillar_scores(scan_data JSONB)
+RETURNS JSONB AS $$
+    SELECT CASE jsonb_typeof(scan_data->'pillar_scores')
+        WHEN 'array' THEN (
+            SELECT COALESCE(jsonb_object_agg(p->>'pillar', p->'score'), '{}'::jsonb)
+            FROM jsonb_array_elements(scan_data->'pillar_scores') AS p
+            WHERE jsonb_typeof(p) = 'object' AND p->>'pillar' IS NOT NULL
+        )
+        WHEN 'object' THEN scan_data->'pillar_scores'
+        ELSE jsonb_strip_nulls(jsonb_build_object(
+            'accessibility', scan_data->'accessibility_score',
+            'gdpr', scan_data->'gdpr_score',
+            'legal', scan_data->'legal_score',
+            'cookies', scan_data->'cookie_score'
+        ))
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Issues je Kategorie: {"datenschutz": 3, ...}
+CREATE OR REPLACE FUNCTION scan_issue_counts(scan_data JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(category, n), '{}'::jsonb)
+    FROM (
+        SELECT COALESCE(NULLIF(lower(issue->>'category'), ''), 'other') AS category, COUNT(*) AS n
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(scan_data->'issues') = 'array' THEN scan_data->'issues' ELSE '[]'::jsonb END
+        ) AS issue
+        WHERE jsonb_typeof(issue) = 'object'
+        GROUP BY 1
+    ) counts;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Texte der ersten 20 Issues (Risiko-Radar klassifiziert nur diese)
+CREATE OR REPLACE FUNCTION scan_top_issues(scan_data JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(left(issue_text, 200) ORDER BY ord), '[]'::jsonb)
+    FROM (
+        SELECT ord, CASE jsonb_typeof(issue)
+                WHEN 'object' THEN COALESCE(issue->>'description', issue->>'message', issue::text)
+                ELSE issue #>> '{}'
+            END AS issue_text
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(scan_data->'issues') = 'array' THEN scan_data->'issues' ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS i(issue, ord)
+        WHERE ord <= 20
+    ) texts;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 2. Normalisierte Domain an scan_history
+ALTER TABLE scan_history ADD COLUMN IF NOT EXISTS domain VARCHAR(255);
+UPDATE scan_history SET domain = scan_domain(url) WHERE domain IS NULL;
+CREATE INDEX IF NOT EXISTS idx_scan_history_domain_timestamp
+    ON scan_history(domain, scan_timestamp DESC);
+
+-- 3. Neuester Scan je User + Website (Schlüssel wie im Dashboard: website_id, sonst URL)
+CREATE TABLE IF NOT EXISTS website_latest_scan (
+    user_id INTEGER NOT NULL DEFAULT 0,         -- 0 = anonymer Scan
+    scan_key TEXT NOT NULL,
+    website_id INTEGER,
+    url VARCHAR(500) NOT NULL,
+    domain VARCHAR(255),
+    scan_history_id INTEGER NOT NULL,
+    scan_id VARCHAR(100),
+    compliance_score INTEGER NOT NULL,
+    total_risk_euro INTEGER DEFAULT 0,
+    critical_issues INTEGER DEFAULT 0,
+    warning_issues INTEGER DEFAULT 0,
+    total_issues INTEGER DEFAULT 0,
+    pillar_scores JSONB NOT NULL DEFAULT '{}'::jsonb,
+    issue_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    top_issues JSONB NOT NULL DEFAULT '[]'::jsonb,
+    scan_timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, scan_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_website_latest_scan_domain
+    ON website_latest_scan(domain, scan_timestamp DESC);
+
+-- 4. Tageswerte je User + Website
+CREATE TABLE IF NOT EXISTS scan_daily_rollups (
+    day DATE NOT NULL,
+    user_id INTEGER NOT NULL DEFAULT 0,
+    scan_key TEXT NOT NULL,
+    domain VARCHAR(255),
+    scan_count INTEGER NOT NULL DEFAULT 0,
+    score_sum BIGINT NOT NULL DEFAULT 0,
+    min_score INTEGER,
+    max_score INTEGER,
+    -- Stand des letzten Scans des Tages
+    last_scan_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_compliance_score INTEGER,
+    last_critical_issues INTEGER,
+    last_total_risk_euro INTEGER,
+    pillar_scores JSONB NOT NULL DEFAULT '{}'::jsonb,
+    issue_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (user_id, scan_key, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scan_daily_rollups_user_day
+    ON scan_daily_rollups(user_id, day DESC);
+
+-- 5. Trigger: Read-Model bei jedem Scan-Insert fortschreiben
+CREATE OR REPLACE FUNCTION scan_history_set_domain()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.domain := scan_domain(NEW.url);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_scan_history_domain ON scan_history;
+CREATE TRIGGER trg_scan_history_domain
+    BEFORE INSERT OR UPDATE OF url ON scan_history
+    FOR EACH ROW EXECUTE FUNCTION scan_history_set_domain();
+
+CREATE OR REPLACE FUNCTION refresh_scan_read_model()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_user INTEGER := COALESCE(NEW.user_id, 0);
+    v_key TEXT := COALESCE(NEW.website_id::text, NEW.url);
+    v_ts TIMESTAMP WITH TIME ZONE := COALESCE(NEW.scan_timestamp, CURRENT_TIMESTAMP);
+    v_pillars JSONB := scan_pillar_scores(NEW.scan_data);
+    v_counts JSONB := scan_issue_counts(NEW.scan_data);
+BEGIN
+    INSERT INTO website_latest_scan (
+        user_id, scan_key, website_id, url, domain, scan_history_id, scan_id,
+        compliance_score, total_risk_euro, critical_issues, warning_issues, total_issues,
+        pillar_scores, issue_counts, top_issues, scan_timestamp, updated_at
+    ) VALUES (
+        v_user, v_key, NEW.website_id, NEW.url, NEW.domain, NEW.id, NEW.scan_id,
+        NEW.compliance_score, NEW.total_risk_euro, NEW.critical_issues, NEW.warning_issues, NEW.total_issues,
+        v_pillars, v_counts, scan_top_issues(NEW.scan_data), v_ts, CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (user_id, scan_key) DO UPDATE SET
+        website_id = EXCLUDED.website_id,
+        url = EXCLUDED.url,
+        domain = EXCLUDED.domain,
+        scan_history_id = EXCLUDED.scan_history_id,
+        scan_id = EXCLUDED.scan_id,
+        compliance_score = EXCLUDED.compliance_score,
+        total_risk_euro = EXCLUDED.total_risk_euro,
+        critical_issues = EXCLUDED.critical_issues,
+        warning_issues = EXCLUDED.warning_issues,
+        total_issues = EXCLUDED.total_issues,
+        pillar_scores = EXCLUDED.pillar_scores,
+        issue_counts = EXCLUDED.issue_counts,
+        top_issues = EXCLUDED.top_issues,
+        scan_timestamp = EXCLUDED.scan_timestamp,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE website_latest_scan.scan_timestamp <= EXCLUDED.scan_timestamp;
+
+    INSERT INTO scan_daily_rollups (
+        day, user_id, scan_key, domain, scan_count, score_sum, min_score, max_score,
+        last_scan_at, last_compliance_score, last_critical_issues, last_total_risk_euro,
+        pillar_scores, issue_counts
+    ) VALUES (
+        v_ts::date, v_user, v_key, NEW.domain, 1, NEW.compliance_score, NEW.compliance_score, NEW.compliance_score,
+        v_ts, NEW.compliance_score, NEW.critical_issues, NEW.total_risk_euro,
+        v_pillars, v_counts
+    )
+    ON CONFLICT (user_id, scan_key, day) DO UPDATE SET
+        scan_count = scan_daily_rollups.scan_count + 1,
+        score_sum = scan_daily_rollups.score_sum + EXCLUDED.score_sum,
+        min_score = LEAST(scan_daily_rollups.min_score, EXCLUDED.min_score),
+        max_score = GREATEST(scan_daily_rollups.max_score, EXCLUDED.max_score),
+        last_scan_at = GREATEST(scan_daily_rollups.last_scan_at, EXCLUDED.last_scan_at),
+        last_compliance_score = CASE WHEN EXCLUDED.last_scan_at >= scan_daily_rollups.last_scan_at
+            THEN EXCLUDED.last_compliance_score ELSE scan_daily_rollups.last_compliance_score END,
+        last_critical_issues = CASE WHEN EXCLUDED.last_scan_at >= scan_daily_rollups.last_scan_at
+            THEN EXCLUDED.last_critical_issues ELSE scan_daily_rollups.last_critical_issues END,
+        last_total_risk_euro = CASE WHEN EXCLUDED.last_scan_at >= scan_daily_rollups.last_scan_at
+            THEN EXCLUDED.last_total_risk_euro ELSE scan_daily_rollups.last_total_risk_euro END,
+        pillar_scores = CASE WHEN EXCLUDED.last_scan_at >= scan_daily_rollups.last_scan_at
+            THEN EXCLUDED.pillar_scores ELSE scan_daily_rollups.pillar_scores END,
+        issue_counts = CASE WHEN EXCLUDED.last_scan_at >= scan_daily_rollups.last_scan_at
+            THEN EXCLUDED.issue_counts ELSE scan_daily_rollups.issue_counts END;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_scan_history_read_model ON scan_history;
+CREATE TRIGGER trg_scan_history_read_model
+    AFTER INSERT ON scan_history
+    FOR EACH ROW EXECUTE FUNCTION refresh_scan_read_model();
+
+-- Gelöschter neuester Scan (z.B. Website entfernt) → vorherigen Scan nachziehen
+CREATE OR REPLACE FUNCTION remove_scan_from_read_model()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM website_latest_scan WHERE scan_history_id = OLD.id;
+    IF FOUND THEN
+        INSERT INTO website_latest_scan (
+            user_id, scan_key, website_id, url, domain, scan_history_id, scan_id,
+            compliance_score, total_risk_euro, critical_issues, warning_issues, total_issues,
+            pillar_scores, issue_counts, top_issues, scan_timestamp
+        )
+        SELECT COALESCE(sh.user_id, 0), COALESCE(sh.website_id::text, sh.url), sh.website_id, sh.url, sh.domain, sh.id, sh.scan_id,
+               sh.compliance_score, sh.total_risk_euro, sh.critical_issues, sh.warning_issues, sh.total_issues,
+               scan_pillar_scores(sh.scan_data), scan_issue_counts(sh.scan_data), scan_top_issues(sh.scan_data),
+               sh.scan_timestamp
+        FROM scan_history sh
+        WHERE sh.user_id IS NOT DISTINCT FROM OLD.user_id
+          AND COALESCE(sh.website_id::text, sh.url) = COALESCE(OLD.website_id::text, OLD.url)
+          AND sh.id <> OLD.id
+        ORDER BY sh.scan_timestamp DESC
+        LIMIT 1
+        ON CONFLICT (user_id, scan_key) DO NOTHING;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_scan_history_read_model_delete ON scan_history;
+CREATE TRIGGER trg_scan_history_read_model_delete
+    AFTER DELETE ON scan_history
+    FOR EACH ROW EXECUTE FUNCTION remove_scan_from_read_model();
+
+-- 6. Backfill aus der bestehenden Historie
+INSERT INTO website_latest_scan (
+    user_id, scan_key, website_id, url, domain, scan_history_id, scan_id,
+    compliance_score, total_risk_euro, critical_issues, warning_issues, total_issues,
+    pillar_scores, issue_counts, top_issues, scan_timestamp
+)
+SELECT DISTINCT ON (COALESCE(user_id, 0), COALESCE(website_id::text, url))
+    COALESCE(user_id, 0), COALESCE(website_id::text, url), website_id, url, domain, id, scan_id,
+    compliance_score, total_risk_euro, critical_issues, warning_issues, total_issues,
+    scan_pillar_scores(scan_data), scan_issue_counts(scan_data), scan_top_issues(scan_data),
+    scan_timestamp
+FROM scan_history
+WHERE scan_timestamp IS NOT NULL
+ORDER BY COALESCE(user_id, 0), COALESCE(website_id::text, url), scan_timestamp DESC
+ON CONFLICT (user_id, scan_key) DO NOTHING;
+
+WITH keyed AS (
+    SELECT scan_timestamp::date AS day, COALESCE(user_id, 0) AS user_id,
+           COALESCE(website_id::text, url) AS scan_key, domain, id, scan_timestamp,
+           compliance_score, critical_issues, total_risk_euro
+    FROM scan_history
+    WHERE scan_timestamp IS NOT NULL
+),
+totals AS (
+    SELECT day, user_id, scan_key, MAX(domain) AS domain, COUNT(*) AS scan_count,
+           SUM(compliance_score) AS score_sum, MIN(compliance_score) AS min_score,
+           MAX(compliance_score) AS max_score
+    FROM keyed
+    GROUP BY day, user_id, scan_key
+),
+last_of_day AS (
+    SELECT DISTINCT ON (day, user_id, scan_key) *
+    FROM keyed
+    ORDER BY day, user_id, scan_key, scan_timestamp DESC
+)
+INSERT INTO scan_daily_rollups (
+    day, user_id, scan_key, domain, scan_count, score_sum, min_score, max_score,
+    last_scan_at, last_compliance_score, last_critical_issues, last_total_risk_euro,
+    pillar_scores, issue_counts
+)
+SELECT t.day, t.user_id, t.scan_key, t.domain, t.scan_count, t.score_sum, t.min_score, t.max_score,
+       l.scan_timestamp, l.compliance_score, l.critical_issues, l.total_risk_euro,
+       scan_pillar_scores(sh.scan_data), scan_issue_counts(sh.scan_data)
+FROM totals t
+JOIN last_of_day l USING (day, user_id, scan_key)
+JOIN scan_history sh ON sh.id = l.id
+ON CONFLICT (user_id, scan_key, day) DO NOTHING;
+
+COMMENT ON TABLE website_latest_scan IS 'Read-Model: neuester Scan je User + Website (Trigger auf scan_history)';
+COMMENT ON TABLE scan_daily_rollups IS 'Read-Model: Tageswerte je User + Website inkl. Säulen-Scores und Issues je Kategorie';
+COMMENT ON COLUMN scan_history.domain IS 'Normalisierte Domain (ohne Schema, www., Port, Pfad)';
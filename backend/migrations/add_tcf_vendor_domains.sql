@@ -0,0 +1,13 @@
+-- Migration: Domains je TCF-Vendor für den Vendor-Domain-Index
+-- Datum: 2026-10-16
+-- Beschreibung: Die Vendor-Erkennung (compliance_engine/tcf_vendor_analyzer.py)
+--               ordnet Script-Hosts über einen Domain-Index Vendors zu. Die
+--               Domains kommen aus der GVL (urls[], deviceStorageDisclosureUrl,
+--               Device-Storage-Disclosure) und werden von
+--               cronjobs/tcf_gvl_sync.py geschrieben.
+
+BEGIN;
+
+ALTER TABLE tcf_vendors ADD COLUMN IF NOT EXISTS domains TEXT[] NOT NULL DEFAULT '{}';
+
+COMMIT;
@@ -1,22 +1,50 @@
 """
 RSS Feed News Service für Complyo
 Parst RSS-Feeds von Rechts- und Datenschutz-Quellen
+
+Ingestion-Pipeline (fetch_all_feeds):
+- Alle fälligen Feeds werden parallel per aiohttp geladen (begrenzte Parallelität)
+- Conditional GET mit ETag/Last-Modified: 304 → Feed wird übersprungen
+- Parsen/HTML-Bereinigung außerhalb des Event-Loops (CPU-Executor)
+- Dedupe gegen ein einmal pro Lauf geladenes Set aus URLs und Titel-Hashes
+- Neue Items in einem INSERT ... ON CONFLICT DO NOTHING
+- DB-Verbindungen werden nur kurz gehalten (nicht während der HTTP-Phase)
+
+Konfiguration über Umgebungsvariablen:
+- NEWS_FETCH_CONCURRENCY   Parallel geladene Feeds (Default: 8)
+- NEWS_FETCH_TIMEOUT       Timeout je Feed in s (Default: 30)
 """
 
 import feedparser
 import asyncio
+import aiohttp
 import asyncpg
+import hashlib
+import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 import re
 from bs4 import BeautifulSoup
 import logging
 
+from cpu_executor import cpu_executor
+
 logger = logging.getLogger(__name__)
 
+FEED_USER_AGENT = 'Mozilla/5.0 (compatible; ComplyoBot/1.0; +https://complyo.tech)'
+MAX_ITEMS_PER_FEED = 20  # Nur die neuesten 20 Items
+
+
+def title_hash(title: str, source: str) -> str:
+    """Dedupe-Schlüssel für Titel + Quelle (identisch zu md5(title || '|' || source) in Postgres)"""
+    return hashlib.md5(f"{title}|{source}".encode("utf-8")).hexdigest()
+
+
 class NewsService:
     def __init__(self, db_pool: asyncpg.Pool):
         self.db_pool = db_pool
+        self.fetch_concurrency = int(os.getenv("NEWS_FETCH_CONCURRENCY", "8"))
+        self.fetch_timeout = float(os.getenv("NEWS_FETCH_TIMEOUT", "30"))
         
     async def fetch_all_feeds(self) -> Dict[str, Any]:
         """Fetcht alle aktiven RSS-Feeds"""
@@ -25,7 +53,8 @@ class NewsService:
                 # Hole aktive Feed-Quellen
                 feeds = await conn.fetch(
                     """
-                    SELECT id, name, url, category, keywords, last_fetch, fetch_frequency_hours
+                    SELECT id, name, url, category, keywords, last_fetch, fetch_frequency_hours,
+                           etag, last_modified
                     FROM rss_feed_sources
                     WHERE is_active = TRUE
                     """
@@ -34,134 +63,230 @@ class NewsService:
                 results = {
                     "total_feeds": len(feeds),
                     "processed": 0,
+                    "not_modified": 0,
                     "new_items": 0,
                     "errors": []
                 }
                 
+                # Prüfen ob Update nötig (basierend auf fetch_frequency)
+                due_feeds = []
                 for feed in feeds:
-                    try:
-                        # Prüfen ob Update nötig (basierend auf fetch_frequency)
-                        if feed['last_fetch']:
-                            time_since_fetch = datetime.now() - feed['last_fetch']
-                            if time_since_fetch.total_seconds() < feed['fetch_frequency_hours'] * 3600:
-                                logger.info(f"⏭️ Skipping {feed['name']} - fetched {time_since_fetch.total_seconds()/3600:.1f}h ago")
-                                continue
-                        
-                        logger.info(f"📡 Fetching feed: {feed['name']}")
-                        new_items = await self._fetch_and_parse_feed(
-                            feed['id'],
-                            feed['name'], 
-                            feed['url'],
-                            feed['category'],
-                            feed['keywords']
-                        )
-                        
-                        results['processed'] += 1
-                        results['new_items'] += new_items
-                        
-                        # Update last_fetch timestamp
-                        await conn.execute(
-                            "UPDATE rss_feed_sources SET last_fetch = $1 WHERE id = $2",
-                            datetime.now(), feed['id']
-                        )
-                        
-                    except Exception as e:
-                        error_msg = f"Error fetching {feed['name']}: {str(e)}"
-                        logger.error(error_msg)
-                        results['errors'].append(error_msg)
+                    if feed['last_fetch']:
+                        time_since_fetch = datetime.now() - feed['last_fetch']
+                        if time_since_fetch.total_seconds() < feed['fetch_frequency_hours'] * 3600:
+                            logger.info(f"⏭️ Skipping {feed['name']} - fetched {time_since_fetch.total_seconds()/3600:.1f}h ago")
+                            continue
+                    due_feeds.append(feed)
                 
-                return results
+                if not due_feeds:
+                    return results
                 
-        except Exception as e:
-            logger.error(f"Error in fetch_all_feeds: {e}")
-            raise
-    
-    async def _fetch_and_parse_feed(
-        self, 
-        feed_id: int,
-        source_name: str, 
-        feed_url: str, 
-        category: str,
-        keywords: List[str]
-    ) -> int:
-        """Parst einen einzelnen RSS-Feed und speichert relevante Items"""
-        try:
-            # Fetch RSS-Feed mit User-Agent (viele Seiten blockieren feedparser ohne UA)
-            import requests
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (compatible; ComplyoBot/1.0; +https://complyo.tech)'
-            }
-            
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: requests.get(feed_url, headers=headers, timeout=30)
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"❌ HTTP {response.status_code} for {source_name}")
-                return 0
-            
-            # Parse RSS-Feed
-            feed = await asyncio.get_event_loop().run_in_executor(
-                None, feedparser.parse, response.text
-            )
+                seen_urls, seen_titles = await self._load_seen(conn, [feed['name'] for feed in due_feeds])
             
-            if feed.bozo:
-                logger.warning(f"⚠️ Feed parsing warning for {source_name}: {feed.bozo_exception}")
-            
-            new_items = 0
+            # HTTP-Phase ohne gehaltene DB-Verbindung
+            semaphore = asyncio.Semaphore(self.fetch_concurrency)
+            timeout = aiohttp.ClientTimeout(total=self.fetch_timeout)
+            async with aiohttp.ClientSession(headers={'User-Agent': FEED_USER_AGENT}, timeout=timeout) as session:
+                fetched = await asyncio.gather(
+                    *(self._fetch_feed(session, semaphore, feed) for feed in due_feeds),
+                    return_exceptions=True
+                )
             
-            for entry in feed.entries[:20]:  # Nur die neuesten 20 Items
-                try:
-                    # Extrahiere Daten
-                    title = entry.get('title', 'Kein Titel')
-                    link = entry.get('link', '')
-                    
-                    # Summary/Content extrahieren und HTML entfernen
-                    summary = self._extract_text(
-                        entry.get('summary', entry.get('description', ''))
-                    )
-                    content = self._extract_text(
-                        entry.get('content', [{}])[0].get('value', '') if 'content' in entry else summary
-                    )
-                    
-                    # Published Date parsen
-                    published_date = self._parse_date(entry)
-                    
-                    # Relevanz prüfen (Keyword-Filter)
-                    if not self._is_relevant(title, summary, keywords):
-                        continue
-                    
-                    # News-Typ und Severity bestimmen
-                    news_type, severity = self._classify_news(title, summary, keywords)
-                    
-                    # In Datenbank speichern (nur wenn noch nicht vorhanden)
-                    saved = await self._save_news_item(
-                        title=title,
-                        summary=summary[:1000],  # Limit summary length
-                        content=content,
-                        url=link,
-                        source=source_name,
-                        source_feed=category,
-                        published_date=published_date,
-                        news_type=news_type,
-                        severity=severity,
-                        keywords=keywords
-                    )
-                    
-                    if saved:
-                        new_items += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing entry from {source_name}: {e}")
+            new_rows = []
+            feed_updates = []
+            for feed, outcome in zip(due_feeds, fetched):
+                if isinstance(outcome, Exception):
+                    error_msg = f"Error fetching {feed['name']}: {str(outcome)}"
+                    logger.error(error_msg)
+                    results['errors'].append(error_msg)
                     continue
+                
+                status, etag, last_modified, items = outcome
+                results['processed'] += 1
+                feed_updates.append((feed['id'], etag, last_modified))
+                
+                if status == 304:
+                    results['not_modified'] += 1
+                    logger.info(f"⏭️ {feed['name']}: nicht geändert (304)")
+                    continue
+                
+                for item in items:
+                    key = title_hash(item['title'], feed['name'])
+                    if (item['url'] and item['url'] in seen_urls) or key in seen_titles:
+                        continue
+                    if item['url']:
+                        seen_urls.add(item['url'])
+                    seen_titles.add(key)
+                    new_rows.append((feed, item))
             
-            logger.info(f"✅ {source_name}: {new_items} neue Items gespeichert")
-            return new_items
+            async with self.db_pool.acquire() as conn:
+                results['new_items'] = await self._insert_news(conn, new_rows)
+                await self._mark_fetched(conn, feed_updates)
             
+            logger.info(
+                f"✅ Feeds: {results['processed']} geladen ({results['not_modified']} unverändert), "
+                f"{results['new_items']} neue Items"
+            )
+            return results
+                
         except Exception as e:
-            logger.error(f"Error fetching feed {source_name}: {e}")
+            logger.error(f"Error in fetch_all_feeds: {e}")
+            raise
+    
+    async def _load_seen(self, conn: asyncpg.Connection, sources: List[str]) -> Tuple[Set[str], Set[str]]:
+        """Lädt einmal pro Lauf bekannte URLs und Titel-Hashes der betroffenen Quellen"""
+        rows = await conn.fetch(
+            """
+            SELECT url, md5(title || '|' || source) AS title_hash
+            FROM legal_news
+            WHERE source = ANY($1::text[])
+            """,
+            sources
+        )
+        return (
+            {row['url'] for row in rows if row['url']},
+            {row['title_hash'] for row in rows},
+        )
+    
+    async def _fetch_feed(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        feed: Dict[str, Any]
+    ) -> Tuple[int, Optional[str], Optional[str], List[Dict[str, Any]]]:
+        """
+        Lädt einen Feed per Conditional GET und parst relevante Items
+        
+        Returns:
+            (HTTP-Status, ETag, Last-Modified, Items) — bei 304 ohne Items
+        """
+        headers = {}
+        if feed['etag']:
+            headers['If-None-Match'] = feed['etag']
+        if feed['last_modified']:
+            headers['If-Modified-Since'] = feed['last_modified']
+        
+        async with semaphore:
+            logger.info(f"📡 Fetching feed: {feed['name']}")
+            async with session.get(feed['url'], headers=headers) as response:
+                if response.status == 304:
+                    return 304, feed['etag'], feed['last_modified'], []
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                body = await response.read()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        
+        items = await cpu_executor.run(
+            "feed_parse", self._parse_feed, feed['name'], body, feed['keywords'], isolated=False
+        )
+        return 200, etag, last_modified, items
+    
+    def _parse_feed(self, source_name: str, body: bytes, keywords: List[str]) -> List[Dict[str, Any]]:
+        """Parst einen RSS-Feed und liefert die relevanten Items (CPU, läuft im Executor)"""
+        feed = feedparser.parse(body)
+        
+        if feed.bozo:
+            logger.warning(f"⚠️ Feed parsing warning for {source_name}: {feed.bozo_exception}")
+        
+        items = []
+        for entry in feed.entries[:MAX_ITEMS_PER_FEED]:
+            try:
+                # Extrahiere Daten
+                title = entry.get('title', 'Kein Titel')
+                link = entry.get('link', '')
+                
+                # Summary/Content extrahieren und HTML entfernen
+                summary = self._extract_text(
+                    entry.get('summary', entry.get('description', ''))
+                )
+                
+                # Relevanz prüfen (Keyword-Filter)
+                if not self._is_relevant(title, summary, keywords):
+                    continue
+                
+                content = self._extract_text(
+                    entry.get('content', [{}])[0].get('value', '') if 'content' in entry else summary
+                )
+                
+                # News-Typ und Severity bestimmen
+                news_type, severity = self._classify_news(title, summary, keywords)
+                
+                items.append({
+                    "title": title,
+                    "summary": summary[:1000],  # Limit summary length
+                    "content": content,
+                    "url": link,
+                    "published_date": self._parse_date(entry),
+                    "news_type": news_type,
+                    "severity": severity,
+                })
+                
+            except Exception as e:
+                logger.error(f"Error processing entry from {source_name}: {e}")
+                continue
+        
+        return items
+    
+    async def _insert_news(
+        self,
+        conn: asyncpg.Connection,
+        rows: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> int:
+        """Schreibt neue Items in einem Statement; Duplikate (URL) überspringt die DB"""
+        if not rows:
             return 0
+        
+        columns = {name: [] for name in (
+            "title", "summary", "content", "url", "source", "source_feed",
+            "published_date", "news_type", "severity", "feed_id"
+        )}
+        for feed, item in rows:
+            for name in ("title", "summary", "content", "url", "published_date", "news_type", "severity"):
+                columns[name].append(item[name])
+            columns["source"].append(feed['name'])
+            columns["source_feed"].append(feed['category'])
+            columns["feed_id"].append(feed['id'])
+        
+        inserted = await conn.fetch(
+            """
+            INSERT INTO legal_news (
+                title, summary, content, url, source, source_feed,
+                published_date, news_type, severity, keywords
+            )
+            SELECT 
+                n.title, n.summary, n.content, n.url, n.source, n.source_feed,
+                n.published_date, n.news_type, n.severity, f.keywords
+            FROM unnest(
+                $1::text[], $2::text[], $3::text[], $4::text[], $5::text[],
+                $6::text[], $7::timestamp[], $8::text[], $9::text[], $10::int[]
+            ) AS n(title, summary, content, url, source, source_feed,
+                   published_date, news_type, severity, feed_id)
+            JOIN rss_feed_sources f ON f.id = n.feed_id
+            ON CONFLICT DO NOTHING
+            RETURNING id
+            """,
+            *columns.values()
+        )
+        return len(inserted)
+    
+    async def _mark_fetched(self, conn: asyncpg.Connection, updates: List[Tuple[int, Optional[str], Optional[str]]]):
+        """Setzt last_fetch und die Validatoren für den nächsten Conditional GET"""
+        if not updates:
+            return
+        
+        await conn.execute(
+            """
+            UPDATE rss_feed_sources f
+            SET last_fetch = $4, etag = u.etag, last_modified = u.last_modified
+            FROM unnest($1::int[], $2::text[], $3::text[]) AS u(id, etag, last_modified)
+            WHERE f.id = u.id
+            """,
+            [feed_id for feed_id, _, _ in updates],
+            [etag for _, etag, _ in updates],
+            [last_modified for _, _, last_modified in updates],
+            datetime.now()
+        )
     
     def _extract_text(self, html_content: str) -> str:
         """Extrahiert Text aus HTML"""
@@ -223,52 +348,6 @@ class NewsService:
         
         return ('info', 'info')
     
-    async def _save_news_item(
-        self,
-        title: str,
-        summary: str,
-        content: str,
-        url: str,
-        source: str,
-        source_feed: str,
-        published_date: datetime,
-        news_type: str,
-        severity: str,
-        keywords: List[str]
-    ) -> bool:
-        """Speichert News-Item in Datenbank (nur wenn noch nicht vorhanden)"""
-        try:
-            async with self.db_pool.acquire() as conn:
-                # Prüfe ob bereits vorhanden (gleiche URL oder gleicher Titel + Source)
-                exists = await conn.fetchval(
-                    """
-                    SELECT id FROM legal_news 
-                    WHERE url = $1 OR (title = $2 AND source = $3)
-                    """,
-                    url, title, source
-                )
-                
-                if exists:
-                    return False
-                
-                # Speichere neues Item
-                await conn.execute(
-                    """
-                    INSERT INTO legal_news (
-                        title, summary, content, url, source, source_feed,
-                        published_date, news_type, severity, keywords
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                    """,
-                    title, summary, content, url, source, source_feed,
-                    published_date, news_type, severity, keywords
-                )
-                
-                return True
-                
-        except Exception as e:
-            logger.error(f"Error saving news item: {e}")
-            return False
-    
     async def get_recent_news(
         self, 
         limit: int = 10,
@@ -4,6 +4,8 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 import asyncpg
 
+from principal_cache import principal_cache
+
 # Initialize Stripe
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
@@ -323,6 +325,7 @@ class StripeService:
                     """,
                     user_id, subscription['items']['data'][0]['price']['id']
                 )
+            await principal_cache.invalidate(user_id)
         except Exception as e:
             print(f"Error handling checkout completed: {e}")
             raise
@@ -374,6 +377,7 @@ class StripeService:
                         "UPDATE users SET plan = $2 WHERE id = $1",
                         sub_record['user_id'], plan_name
                     )
+                    await principal_cache.invalidate(sub_record['user_id'])
         except Exception as e:
             print(f"Error handling subscription update: {e}")
             raise
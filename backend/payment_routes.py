@@ -7,6 +7,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
+from principal_cache import principal_cache
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/payment", tags=["Payment"])
@@ -149,6 +151,8 @@ async def create_checkout(request: Request, data: CreateCheckoutRequest):
             # Module aktivieren
             await _activate_modules(conn, user_id, active_modules, mock_subscription_id)
 
+        await principal_cache.invalidate(user_id)
+
         logger.info(f"✅ DEV_MODE: User {user_id} → {plan_type} {active_modules}")
         success_url = f"{FRONTEND_URL}/dashboard?payment=success&session_id={mock_session_id}&dev_mode=true"
         return CheckoutResponse(checkout_url=success_url, session_id=mock_session_id)
@@ -363,6 +367,7 @@ async def _handle_checkout_completed(session: Dict[str, Any]):
             # Module aktivieren
             await _activate_modules(conn, user_id, active_modules, subscription_id)
 
+        await principal_cache.invalidate(user_id)
         logger.info(f"✅ User {user_id} → {plan_type}, Module: {active_modules}")
 
     except Exception as e:
@@ -432,6 +437,7 @@ async def _handle_subscription_cancelled(subscription: Dict[str, Any]):
                 user_id, sub_id
             )
 
+        await principal_cache.invalidate(user_id)
         logger.info(f"User {user_id} → free (Subscription {sub_id} cancelled)")
 
     except Exception as e:
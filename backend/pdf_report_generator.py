@@ -533,4 +533,9 @@ class ComplianceReportGenerator:
         return recommendations[:5]  # Limit to 5 recommendations per priority
 
 # Global PDF generator instance
-pdf_generator = ComplianceReportGenerator()
\ No newline at end of file
+pdf_generator = ComplianceReportGenerator()
+
+
+def render_compliance_report(analysis_data: Dict[str, Any], lead_data: Dict[str, Any]) -> bytes:
+    """Picklebarer Einstieg für den CPU-Executor (läuft im Worker-Prozess)"""
+    return pdf_generator.generate_compliance_report(analysis_data, lead_data)
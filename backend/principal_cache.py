@@ -0,0 +1,180 @@
+"""
+Principal-Cache
+Kurzlebiger Cache für den authentifizierten User (get_current_user)
+
+Statt pro API-Call users + user_limits + user_modules abzufragen:
+- Pro Prozess ein LRU mit kurzer TTL, Schlüssel (user_id, jti)
+- Optional Redis als zweite Stufe (prozessübergreifend, Schlüssel je user_id)
+- Bei Miss genau eine Abfrage (AuthService.get_user_by_id, ein JOIN)
+- invalidate(user_id) nach Modul-, Plan- und Session-Änderungen; eine
+  Generationsnummer je User verhindert, dass ein parallel laufender Load
+  veraltete Daten nach der Invalidierung zurückschreibt
+- Innerhalb eines Requests wird der Principal zusätzlich auf request.state
+  gehalten (siehe dependencies.get_current_user)
+
+Konfiguration über Umgebungsvariablen:
+- PRINCIPAL_CACHE_TTL        Sekunden im Prozess-LRU (Default: 15)
+- PRINCIPAL_CACHE_REDIS_TTL  Sekunden in Redis, 0 = Redis aus (Default: 60)
+- PRINCIPAL_CACHE_SIZE       Max. Einträge im Prozess-LRU (Default: 10000)
+"""
+
+import copy
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from metrics import principal_cache_lookups_total
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "principal:"
+
+PrincipalLoader = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    return str(value)
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+class PrincipalCache:
+    """Zweistufiger Cache (Prozess-LRU + optional Redis) für User-Principals"""
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        redis_ttl: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ):
+        self.ttl = ttl if ttl is not None else float(os.getenv("PRINCIPAL_CACHE_TTL", "15"))
+        self.redis_ttl = redis_ttl if redis_ttl is not None else int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL", "60"))
+        self.max_size = max_size if max_size is not None else int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+        self.redis = None  # wird von dependencies.init_redis gesetzt
+
+        self._entries: "OrderedDict[Tuple[int, Optional[str]], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._hits_local = 0
+        self._hits_redis = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    async def get_or_load(self, user_id: int, jti: Optional[str], loader: PrincipalLoader) -> Optional[Dict[str, Any]]:
+        """Principal aus dem Cache oder über loader (eine DB-Abfrage); liefert immer eine Kopie"""
+        key = (user_id, jti)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits_local += 1
+                principal_cache_lookups_total.labels(result="local").inc()
+                return copy.deepcopy(user)
+            del self._entries[key]
+
+        generation = self._generations.get(user_id, 0)
+
+        user = await self._redis_get(user_id)
+        if user is not None:
+            self._hits_redis += 1
+            principal_cache_lookups_total.labels(result="redis").inc()
+        else:
+            self._misses += 1
+            principal_cache_lookups_total.labels(result="miss").inc()
+            user = await loader()
+            if user is None:
+                return None
+            if self._generations.get(user_id, 0) == generation:
+                await self._redis_set(user_id, user)
+
+        if self._generations.get(user_id, 0) == generation:
+            self._store(key, user)
+        return copy.deepcopy(user)
+
+    def _store(self, key: Tuple[int, Optional[str]], user: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(user))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Invalidierung
+    # ------------------------------------------------------------------
+
+    async def invalidate(self, user_id: Union[int, str]):
+        """Verwirft alle Einträge eines Users (Modul-/Plan-Änderung, Logout-All)"""
+        try:
+            uid = int(user_id)
+        except (TypeError, ValueError):
+            logger.warning(f"Principal cache invalidation skipped for non-numeric user_id={user_id!r}")
+            return
+
+        self._generations[uid] = self._generations.get(uid, 0) + 1
+        for key in [key for key in self._entries if key[0] == uid]:
+            del self._entries[key]
+
+        if self.redis is not None and self.redis_ttl > 0:
+            try:
+                await self.redis.delete(f"{REDIS_KEY_PREFIX}{uid}")
+            except Exception as e:
+                logger.warning(f"Principal cache Redis invalidation failed for user_id={uid}: {e}")
+
+    def clear(self):
+        self._entries.clear()
+        self._generations.clear()
+
+    # ------------------------------------------------------------------
+    # Redis-Stufe (best effort)
+    # ------------------------------------------------------------------
+
+    async def _redis_get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.redis is None or self.redis_ttl <= 0:
+            return None
+        try:
+            raw = await self.redis.get(f"{REDIS_KEY_PREFIX}{user_id}")
+            return json.loads(raw, object_hook=_decode) if raw else None
+        except Exception as e:
+            logger.warning(f"Principal cache Redis read failed: {e}")
+            return None
+
+    async def _redis_set(self, user_id: int, user: Dict[str, Any]):
+        if self.redis is None or self.redis_ttl <= 0:
+            return
+        try:
+            await self.redis.setex(f"{REDIS_KEY_PREFIX}{user_id}", self.redis_ttl, json.dumps(user, default=_encode))
+        except Exception as e:
+            logger.warning(f"Principal cache Redis write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Metriken
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits_local + self._hits_redis + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits_local": self._hits_local,
+            "hits_redis": self._hits_redis,
+            "misses": self._misses,
+            "hit_ratio": round((self._hits_local + self._hits_redis) / lookups, 4) if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache()
@@ -15,7 +15,7 @@ import aiohttp
 import ipaddress
 import socket
 from datetime import datetime
-from compliance_engine.scanner import ComplianceScanner
+from compliance_engine.scan_coordinator import scan_coordinator
 from compliance_engine.priority_engine import priority_engine
 from compliance_engine.solution_generator import solution_generator
 from ai_review_engine import run_ai_review_pass
@@ -49,6 +49,7 @@ def set_db_pool(pool):
 class AnalyzeRequest(BaseModel):
     url: str
     legal_update_id: Optional[int] = None
+    force_refresh: bool = False  # Scan-Cache umgehen (z.B. direkt nach einer Änderung)
 
 class IssueLocation(BaseModel):
     area: str
@@ -157,21 +158,17 @@ async def analyze_website_public(request: AnalyzeRequest, http_request: Request,
             except Exception as e:
                 logger.warning(f"Legal Update Cache refresh fehlgeschlagen (non-critical): {e}")
         
-        # Perform compliance scan and crawl in parallel
+        # Perform compliance scan, then extract the structure from the same parsed page
         try:
             crawler = WebsiteCrawler(timeout=10)
-            async with ComplianceScanner() as scanner:
-                scan_result, website_structure = await asyncio.gather(
-                    scanner.scan_website(url),
-                    crawler.crawl_website(url),
-                    return_exceptions=True
-                )
-            
-            if isinstance(scan_result, Exception):
-                raise scan_result
-            
-            if isinstance(website_structure, Exception):
-                logger.warning(f"Crawler failed (non-critical): {website_structure}")
+            outcome = await scan_coordinator.run(
+                url, bypass_cache=bool(legal_update_id) or request.force_refresh
+            )
+            scan_result = outcome.result
+            try:
+                website_structure = await crawler.crawl_website(url, page=outcome.page)
+            except Exception as crawl_error:
+                logger.warning(f"Crawler failed (non-critical): {crawl_error}")
                 website_structure = {}
 
             if scan_result.get("error"):
@@ -1703,8 +1700,7 @@ async def analyze_website_preview(request: AnalyzeRequest, http_request: Request
         
         # Perform compliance scan
         try:
-            async with ComplianceScanner() as scanner:
-                scan_result = await scanner.scan_website(url)
+            scan_result = await scan_coordinator.scan(url)
             
             if scan_result.get("error"):
                 # Fallback zu Mock
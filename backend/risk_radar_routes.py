@@ -16,6 +16,7 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Query
 
 from legal_disclaimer import DISCLAIMER_SHORT, DISCLAIMER_LONG
+from scan_read_model import latest_scan_for_domain
 
 logger = logging.getLogger(__name__)
 
@@ -47,10 +48,10 @@ async def get_risk_radar_score(
 ):
     """
     Aggregierter Risiko-Score mit Kategorien.
-    Nutzt risk_calculator + scan_history für domainspezifische Scores.
+    Nutzt das Read-Model website_latest_scan (neuester Scan je Domain).
     """
-    from dependencies import get_db_pool
-    db_pool = await get_db_pool()
+    from dependencies import get_db
+    db_pool = await get_db()
 
     categories = {
         "dsgvo": {"score": 0, "label": "DSGVO", "issues": []},
@@ -66,31 +67,18 @@ async def get_risk_radar_score(
     try:
         async with db_pool.acquire() as conn:
             if domain:
-                scan_row = await conn.fetchrow(
-                    """
-                    SELECT id, compliance_score, issues, created_at
-                    FROM scan_history
-                    WHERE url ILIKE $1 OR url ILIKE $2
-                    ORDER BY created_at DESC LIMIT 1
-                    """,
-                    f"%{domain}%",
-                    f"{domain}%",
-                )
+                # Read-Model (website_latest_scan) statt ILIKE über die ganze scan_history
+                scan_row = await latest_scan_for_domain(conn, domain, user_id)
                 if scan_row:
                     overall_score = max(0, 100 - int(scan_row["compliance_score"] or 0))
-                    last_updated = scan_row["created_at"]
+                    last_updated = scan_row["scan_timestamp"]
 
                     import json as _json
-                    raw_issues = scan_row.get("issues") or "[]"
-                    if isinstance(raw_issues, str):
-                        issues_list = _json.loads(raw_issues)
-                    else:
-                        issues_list = raw_issues or []
-
-                    for issue in issues_list[:20]:
-                        issue_text = (
-                            issue.get("description") or issue.get("message") or str(issue)
-                        )
+                    issues_list = scan_row["top_issues"] or "[]"
+                    if isinstance(issues_list, str):
+                        issues_list = _json.loads(issues_list)
+
+                    for issue_text in issues_list:
                         cat = _classify_law_category(issue_text)
                         if cat in categories:
                             categories[cat]["score"] = min(100, categories[cat]["score"] + 15)
@@ -137,8 +125,8 @@ async def get_early_warnings(
     Abmahnfallen-Frühwarnungen aus der Update-Pipeline.
     Klassifiziert durch ai_legal_classifier mit Severity-Filter.
     """
-    from dependencies import get_db_pool
-    db_pool = await get_db_pool()
+    from dependencies import get_db
+    db_pool = await get_db()
 
     try:
         min_idx = SEVERITY_ORDER.index(severity_min.lower())
@@ -0,0 +1,90 @@
+"""
+Scan-Read-Model
+Lesezugriffe auf die per Trigger gepflegten Scan-Tabellen
+
+Statt bei jedem Dashboard-/Risiko-Radar-Aufruf die komplette scan_history zu
+lesen (DISTINCT ON, url ILIKE, JSON-Blobs), schreibt ein Trigger bei jedem
+Scan-Insert (migrations/add_scan_read_model.sql):
+- website_latest_scan: neuester Scan je User + Website (scan_key = website_id, sonst URL)
+- scan_daily_rollups: Tageswerte je User + Website inkl. Säulen-Scores und
+  Issues je Kategorie (Stand des letzten Scans des Tages)
+- scan_history.domain: normalisierte, indizierte Domain
+
+Usage:
+    from scan_read_model import latest_scans_for_user, latest_scan_for_domain
+
+    async with db_pool.acquire() as conn:
+        latest = await latest_scans_for_user(conn, user_id)
+"""
+
+import re
+from datetime import date
+from typing import Any, List, Optional
+
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://")
+
+
+def normalize_domain(value: str) -> str:
+    """Domain wie scan_history.domain: ohne Schema, www., Port und Pfad (vgl. SQL scan_domain)"""
+    value = _SCHEME.sub("", value.strip().lower())
+    if value.startswith("www."):
+        value = value[4:]
+    return re.split(r"[:/?#]", value, maxsplit=1)[0]
+
+
+async def latest_scans_for_user(conn, user_id: int) -> List[Any]:
+    """Neuester Scan je Website des Users"""
+    return await conn.fetch("""
+        SELECT scan_key, website_id, url, domain, compliance_score, critical_issues,
+               warning_issues, total_risk_euro, pillar_scores, issue_counts, scan_timestamp
+        FROM website_latest_scan
+        WHERE user_id = $1
+    """, user_id)
+
+
+async def latest_scan_for_domain(conn, domain: str, user_id: Optional[int] = None) -> Optional[Any]:
+    """Neuester Scan einer Domain (optional nur eines Users); exakter Index-Lookup"""
+    return await conn.fetchrow("""
+        SELECT compliance_score, top_issues, pillar_scores, issue_counts, scan_timestamp
+        FROM website_latest_scan
+        WHERE domain = $1 AND ($2::int IS NULL OR user_id = $2)
+        ORDER BY scan_timestamp DESC LIMIT 1
+    """, normalize_domain(domain), user_id)
+
+
+async def scan_count_since(conn, user_id: int, day: date) -> int:
+    """Anzahl Scans des Users ab (einschließlich) `day`"""
+    return await conn.fetchval(
+        "SELECT COALESCE(SUM(scan_count), 0) FROM scan_daily_rollups WHERE user_id = $1 AND day >= $2",
+        user_id, day
+    ) or 0
+
+
+async def scans_before(conn, user_id: int, day: date) -> List[Any]:
+    """Stand je Website vor `day` (letzter Scan des letzten Tages davor)"""
+    return await conn.fetch("""
+        SELECT DISTINCT ON (scan_key)
+            scan_key,
+            last_compliance_score AS compliance_score,
+            last_critical_issues AS critical_issues
+        FROM scan_daily_rollups
+        WHERE user_id = $1 AND day < $2
+        ORDER BY scan_key, day DESC
+    """, user_id, day)
+
+
+async def issue_category_counts(conn, user_id: int, limit: int = 10) -> List[Any]:
+    """
+    Aktuelle Issues je Kategorie: Summe über den neuesten Scan je Website
+
+    Frühere Scans zählen nicht mit — ein behobenes Issue verschwindet aus der
+    Verteilung, statt sich über die Historie aufzusummieren.
+    """
+    return await conn.fetch("""
+        SELECT counts.key AS category, SUM(counts.value::int) AS count
+        FROM website_latest_scan s, jsonb_each_text(s.issue_counts) AS counts
+        WHERE s.user_id = $1
+        GROUP BY counts.key
+        ORDER BY count DESC
+        LIMIT $2
+    """, user_id, limit)
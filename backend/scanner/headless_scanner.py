@@ -24,15 +24,14 @@ from urllib.parse import urlparse
 import logging
 
 from compliance_engine.privacy_transfer_findings import detect_transfers
+from compliance_engine.browser_pool import browser_pool, PLAYWRIGHT_AVAILABLE
+from compliance_engine.service_signatures import DomainSuffixIndex, SignatureMatcher
 
 logger = logging.getLogger(__name__)
 
-# Check if playwright is available
-try:
-    from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+if PLAYWRIGHT_AVAILABLE:
+    from playwright.async_api import BrowserContext, Page
+else:
     logger.warning("Playwright not available. Headless scanning disabled.")
 
 
@@ -142,6 +141,23 @@ class HeadlessCookieScanner:
         'shopify': ['_shopify_s', '_shopify_y', 'cart_currency'],
         'matomo': ['_pk_id', '_pk_ses', '_pk_ref'],
     }
+    COOKIE_SIGNATURES = SignatureMatcher(COOKIE_PATTERNS, literal=True)
+
+    # Request-Domain → Service (Suffix-Match: 'facebook.net' deckt 'connect.facebook.net' ab)
+    REQUEST_DOMAIN_SERVICES = {
+        'google-analytics.com': 'google_analytics',
+        'googletagmanager.com': 'google_tag_manager',
+        'facebook.net': 'facebook_pixel',
+        'connect.facebook.net': 'facebook_pixel',
+        'snap.licdn.com': 'linkedin_insight',
+        'analytics.tiktok.com': 'tiktok_pixel',
+        'static.hotjar.com': 'hotjar',
+        'widget.intercom.io': 'intercom',
+        'youtube.com': 'youtube',
+        'player.vimeo.com': 'vimeo',
+        'maps.googleapis.com': 'google_maps',
+    }
+    REQUEST_DOMAIN_INDEX = DomainSuffixIndex(REQUEST_DOMAIN_SERVICES)
     
     # Known localStorage keys
     LOCAL_STORAGE_PATTERNS = {
@@ -158,12 +174,12 @@ class HeadlessCookieScanner:
         Initialisiert den Headless Scanner
         
         Args:
-            headless: Browser ohne GUI starten
+            headless: Browser ohne GUI starten (der BrowserPool startet immer headless)
             timeout: Timeout fuer Page-Load in ms
         """
         self.headless = headless
         self.timeout = timeout
-        self.browser: Optional[Browser] = None
+        self._started = False
         
     async def __aenter__(self):
         await self.start()
@@ -173,29 +189,18 @@ class HeadlessCookieScanner:
         await self.stop()
     
     async def start(self):
-        """Startet den Browser"""
+        """Stellt sicher, dass der gemeinsame BrowserPool laeuft"""
         if not PLAYWRIGHT_AVAILABLE:
             raise RuntimeError("Playwright ist nicht installiert. Bitte 'pip install playwright' und 'playwright install chromium' ausfuehren.")
         
-        self._playwright = await async_playwright().start()
-        self.browser = await self._playwright.chromium.launch(
-            headless=self.headless,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--no-sandbox',
-                '--disable-dev-shm-usage',
-            ]
-        )
-        logger.info("Headless Browser gestartet")
+        await browser_pool.start()
+        self._started = True
+        logger.info("Headless Scanner bereit (BrowserPool)")
     
     async def stop(self):
-        """Stoppt den Browser"""
-        if self.browser:
-            await self.browser.close()
-            self.browser = None
-        if hasattr(self, '_playwright'):
-            await self._playwright.stop()
-        logger.info("Headless Browser gestoppt")
+        """Gibt den Scanner frei — die Browser bleiben warm im Pool"""
+        self._started = False
+        logger.info("Headless Scanner gestoppt")
     
     async def scan_website(self, url: str, wait_time: int = 3000) -> Dict[str, Any]:
         """
@@ -208,7 +213,7 @@ class HeadlessCookieScanner:
         Returns:
             Umfassendes Scan-Ergebnis mit Cookies, Storage, Requests etc.
         """
-        if not self.browser:
+        if not self._started:
             await self.start()
         
         # Normalize URL
@@ -221,10 +226,11 @@ class HeadlessCookieScanner:
         # Tracking data
         third_party_requests: List[Dict[str, Any]] = []
         blocked_resources: List[str] = []
+        context = None
         
         try:
-            # Create new context with tracking
-            context = await self.browser.new_context(
+            # Isolierten Context aus dem gemeinsamen BrowserPool leihen
+            context = await browser_pool.acquire_context(
                 viewport={'width': 1920, 'height': 1080},
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                 locale='de-DE',
@@ -339,7 +345,6 @@ class HeadlessCookieScanner:
                 }
             }
             
-            await context.close()
             return result
             
         except Exception as e:
@@ -352,6 +357,10 @@ class HeadlessCookieScanner:
                 'detected_services': [],
                 'confidence': {},
             }
+        
+        finally:
+            if context is not None:
+                await browser_pool.release_context(context)
     
     async def _get_cookies(self, context: BrowserContext) -> List[Dict[str, Any]]:
         """Extrahiert alle Cookies"""
@@ -498,20 +507,20 @@ class HeadlessCookieScanner:
         """Kategorisiert einen Cookie nach Namen"""
         cookie_lower = cookie_name.lower()
         
-        for service, patterns in self.COOKIE_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.lower() in cookie_lower:
-                    # Map service to category
-                    if service in ['google_analytics', 'hotjar', 'matomo']:
-                        return 'analytics'
-                    elif service in ['google_ads', 'facebook', 'linkedin', 'tiktok']:
-                        return 'marketing'
-                    elif service in ['intercom', 'hubspot']:
-                        return 'functional'
-                    elif service in ['stripe', 'shopify', 'wordpress']:
-                        return 'necessary'
-                    else:
-                        return 'functional'
+        matches = self.COOKIE_SIGNATURES.match(cookie_name)
+        if matches:
+            # Map service to category
+            service = matches[0].service
+            if service in ['google_analytics', 'hotjar', 'matomo']:
+                return 'analytics'
+            elif service in ['google_ads', 'facebook', 'linkedin', 'tiktok']:
+                return 'marketing'
+            elif service in ['intercom', 'hubspot']:
+                return 'functional'
+            elif service in ['stripe', 'shopify', 'wordpress']:
+                return 'necessary'
+            else:
+                return 'functional'
         
         # Check common patterns
         if any(p in cookie_lower for p in ['session', 'csrf', 'token', 'auth']):
@@ -573,41 +582,26 @@ class HeadlessCookieScanner:
         
         # Check cookies
         for cookie in cookies:
-            for service, patterns in self.COOKIE_PATTERNS.items():
-                for pattern in patterns:
-                    if pattern.lower() in cookie['name'].lower():
-                        detected_services.add(service)
-                        confidence[service] = max(confidence.get(service, 0), 0.9)
-                        if service not in details:
-                            details[service] = {'evidence': [], 'category': self._get_service_category(service)}
-                        details[service]['evidence'].append(f"Cookie: {cookie['name']}")
-                        categories.add(self._get_service_category(service))
+            for match in self.COOKIE_SIGNATURES.match(cookie['name']):
+                service = match.service
+                detected_services.add(service)
+                confidence[service] = max(confidence.get(service, 0), 0.9)
+                if service not in details:
+                    details[service] = {'evidence': [], 'category': self._get_service_category(service)}
+                details[service]['evidence'].append(f"Cookie: {cookie['name']}")
+                categories.add(self._get_service_category(service))
         
         # Check requests
         request_domains = set(r['domain'] for r in requests)
-        domain_to_service = {
-            'google-analytics.com': 'google_analytics',
-            'googletagmanager.com': 'google_tag_manager',
-            'facebook.net': 'facebook_pixel',
-            'connect.facebook.net': 'facebook_pixel',
-            'snap.licdn.com': 'linkedin_insight',
-            'analytics.tiktok.com': 'tiktok_pixel',
-            'static.hotjar.com': 'hotjar',
-            'widget.intercom.io': 'intercom',
-            'youtube.com': 'youtube',
-            'player.vimeo.com': 'vimeo',
-            'maps.googleapis.com': 'google_maps',
-        }
-        
         for domain in request_domains:
-            for pattern, service in domain_to_service.items():
-                if pattern in domain:
-                    detected_services.add(service)
-                    confidence[service] = max(confidence.get(service, 0), 0.95)
-                    if service not in details:
-                        details[service] = {'evidence': [], 'category': self._get_service_category(service)}
-                    details[service]['evidence'].append(f"Request: {domain}")
-                    categories.add(self._get_service_category(service))
+            services = {service for _, service in self.REQUEST_DOMAIN_INDEX.lookup(domain)}
+            for service in services:
+                detected_services.add(service)
+                confidence[service] = max(confidence.get(service, 0), 0.95)
+                if service not in details:
+                    details[service] = {'evidence': [], 'category': self._get_service_category(service)}
+                details[service]['evidence'].append(f"Request: {domain}")
+                categories.add(self._get_service_category(service))
         
         # Check iframes
         for iframe in iframes:
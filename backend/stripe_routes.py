@@ -30,6 +30,7 @@ from datetime import datetime
 import uuid
 
 from database_service import DatabaseService
+from principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -158,6 +159,7 @@ async def create_checkout_session(
                     """,
                     request.plan, user_id, _websites_max
                 )
+                await principal_cache.invalidate(user_id)
                 
                 # Unlock Domain falls vorhanden
                 if request.domain:
@@ -398,6 +400,7 @@ async def verify_checkout_session(
             """,
             plan, user_id, websites_max
         )
+        await principal_cache.invalidate(user_id)
         await conn.execute(
             """
             INSERT INTO subscriptions
@@ -530,6 +533,7 @@ async def handle_checkout_completed(session):
                 """,
                 plan, user_id, websites_max
             )
+            await principal_cache.invalidate(user_id)
 
             # Unlock Domain falls vorhanden
             if domain:
@@ -648,6 +652,7 @@ async def handle_subscription_deleted(subscription):
                 """,
                 user_id
             )
+            await principal_cache.invalidate(user_id)
             
             # Update subscription status
             await conn.execute(
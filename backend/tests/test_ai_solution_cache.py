@@ -0,0 +1,225 @@
+"""
+Tests: AI Solution Cache
+Exact-Match-Fast-Path, semantischer Vektor-Index und Success-Rate-Filter
+
+Kein echter DB-Server nötig — asyncpg wird durch einen In-Memory-Fake ersetzt.
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+import ai_solution_cache_service
+from ai_solution_cache_service import AISolutionCache, vector_from_bytes
+from knowledge.hashing_vectorizer import embed_text
+
+
+class FakeConn:
+    """Minimaler In-Memory-Ersatz für die ai_solution_cache-Queries"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.category_loads = 0
+        self.embedding_writes = 0
+        self.clock = datetime(2026, 10, 16, tzinfo=timezone.utc)
+
+    def tick(self):
+        self.clock += timedelta(seconds=1)
+        return self.clock
+
+    async def fetchrow(self, query, *args):
+        if "WHERE issue_fingerprint = $1\n                      AND success_rate" in query:
+            fingerprint, min_rate = args
+            for row in self.rows:
+                if row["issue_fingerprint"] == fingerprint and row["success_rate"] >= min_rate:
+                    return row
+            return None
+        if "INSERT INTO ai_solution_cache" in query:
+            category, title, description, fingerprint, solution, model, title_emb, desc_emb = args
+            row = {
+                "id": uuid.uuid4(), "category": category, "issue_title": title,
+                "issue_description": description, "issue_fingerprint": fingerprint,
+                "ai_solution": solution, "usage_count": 1, "success_rate": 0.8,
+                "title_embedding": title_emb, "description_embedding": desc_emb, "updated_at": self.tick(),
+            }
+            self.rows.append(row)
+            return row
+        if "SET success_rate" in query:
+            fingerprint, success = args
+            for row in self.rows:
+                if row["issue_fingerprint"] == fingerprint:
+                    row["success_rate"] = min(row["success_rate"] + 0.1, 1.0) if success else max(row["success_rate"] - 0.2, 0.0)
+                    row["updated_at"] = self.tick()
+                    return row
+            return None
+        raise AssertionError(query)
+
+    async def fetch(self, query, *args):
+        if "WHERE category = $1" in query:
+            self.category_loads += 1
+            rows = [r for r in self.rows if r["category"] == args[0]]
+            if len(args) > 1:
+                rows = [r for r in rows if r["updated_at"] >= args[1]]
+            await asyncio.sleep(0)
+            return rows
+        if "WHERE id = ANY($1)" in query:
+            ids, min_rate = args
+            return [r for r in self.rows if r["id"] in ids and r["success_rate"] >= min_rate]
+        raise AssertionError(query)
+
+    async def execute(self, query, *args):
+        for row in self.rows:
+            if row["id"] == args[0]:
+                row["usage_count"] += 1
+
+    async def executemany(self, query, args):
+        assert "SET title_embedding" in query
+        by_id = {row["id"]: row for row in self.rows}
+        for title_emb, desc_emb, row_id in args:
+            by_id[row_id].update(title_embedding=title_emb, description_embedding=desc_emb)
+            self.embedding_writes += 1
+
+
+class FakePool:
+    def __init__(self, rows=None):
+        self.conn = FakeConn(rows or [])
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def make_row(cache, category, title, description, usage_count=1, success_rate=0.8):
+    return {
+        "id": uuid.uuid4(), "category": category, "issue_title": title,
+        "issue_description": description,
+        "issue_fingerprint": cache._generate_fingerprint(category, title, description),
+        "ai_solution": f"Lösung für {title}", "usage_count": usage_count, "success_rate": success_rate,
+        "title_embedding": None, "description_embedding": None,
+        "updated_at": datetime(2026, 10, 1, tzinfo=timezone.utc),
+    }
+
+
+def test_embed_text_is_normalized_and_deterministic():
+    """Test: Vektoren sind L2-normalisiert und über Aufrufe stabil"""
+    a = embed_text("Cookie-Banner fehlt")
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert np.array_equal(a, embed_text("Cookie-Banner fehlt"))
+    assert not embed_text("").any()
+
+
+@pytest.mark.asyncio
+async def test_exact_match_fast_path():
+    """Test: Identisches Issue → Exact-Hit ohne Kategorie-Index"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    pool.conn.rows.append(make_row(cache, "datenschutz", "Datenschutzerklärung fehlt", "Keine DSE gefunden"))
+
+    result = await cache.get_cached_solution("datenschutz", "Datenschutzerklärung fehlt", "Keine DSE gefunden")
+    assert result["match_type"] == "exact"
+    assert pool.conn.category_loads == 0
+
+
+@pytest.mark.asyncio
+async def test_semantic_match_finds_rarely_used_solution():
+    """Test: Ähnliches Issue wird auch außerhalb der Top-30 nach Usage gefunden"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    for i in range(40):
+        pool.conn.rows.append(make_row(cache, "cookies", f"Tracking-Skript {i} ohne Einwilligung", "Skript lädt vor Consent", usage_count=100))
+    target = make_row(cache, "cookies", "Google Analytics wird ohne Cookie-Einwilligung geladen",
+                      "Das Google Analytics Skript wird vor der Einwilligung geladen", usage_count=0)
+    pool.conn.rows.append(target)
+
+    result = await cache.get_cached_solution(
+        "cookies",
+        "Google Analytics wird ohne Cookie-Einwilligung geladen!",
+        "Das Google Analytics Skript wird vor der Einwilligung geladen.",
+    )
+    assert result["match_type"] == "fuzzy"
+    assert result["solution"] == target["ai_solution"]
+
+
+@pytest.mark.asyncio
+async def test_low_success_rate_is_filtered():
+    """Test: Lösungen unter min_success_rate werden nicht ausgeliefert"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    pool.conn.rows.append(make_row(cache, "impressum", "Impressum unvollständig", "Telefonnummer fehlt", success_rate=0.3))
+
+    assert await cache.get_cached_solution("impressum", "Impressum unvollständig!", "Telefonnummer fehlt.") is None
+
+
+@pytest.mark.asyncio
+async def test_stored_solution_joins_loaded_index():
+    """Test: store_solution nimmt neue Lösung ohne Neuladen in den Index auf"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    assert await cache.get_cached_solution("barrierefreiheit", "Alt-Texte fehlen", "Bilder ohne alt") is None
+    assert pool.conn.category_loads == 1
+
+    await cache.store_solution("barrierefreiheit", "Alt-Texte fehlen bei Bildern", "Bilder ohne alt Attribut", "Fix")
+    result = await cache.get_cached_solution("barrierefreiheit", "Alt-Texte fehlen bei Bildern!", "Bilder ohne alt Attribut.")
+
+    assert result["solution"] == "Fix"
+    assert pool.conn.category_loads == 1
+
+
+@pytest.mark.asyncio
+async def test_negative_feedback_updates_index_filter():
+    """Test: Negatives Feedback senkt Success-Rate auch im geladenen Index"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    await cache.get_cached_solution("cookies", "x", "y")
+    await cache.store_solution("cookies", "Consent-Banner ohne Ablehnen-Button", "Kein Ablehnen", "Fix")
+
+    for _ in range(2):
+        await cache.update_success_rate("cookies", "Consent-Banner ohne Ablehnen-Button", "Kein Ablehnen", success=False)
+    assert await cache.get_cached_solution("cookies", "Consent-Banner ohne Ablehnen-Button!", "Kein Ablehnen.") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_requests_build_index_once_and_store_embeddings():
+    """Test: Parallele kalte Requests → ein Aufbau; fehlende Embeddings werden nachgetragen"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    for i in range(3):
+        pool.conn.rows.append(make_row(cache, "cookies", f"Tracking-Skript {i}", "ohne Einwilligung"))
+
+    await asyncio.gather(*(cache.get_cached_solution("cookies", "Pixel", "vor Consent") for _ in range(5)))
+
+    assert pool.conn.category_loads == 1
+    assert pool.conn.embedding_writes == 3
+    stored = vector_from_bytes(pool.conn.rows[0]["title_embedding"])
+    assert np.array_equal(stored, embed_text("Tracking-Skript 0"))
+
+
+@pytest.mark.asyncio
+async def test_expired_index_refreshes_only_changed_rows(monkeypatch):
+    """Test: Nach der TTL werden nur seit dem Watermark geänderte Zeilen nachgeladen"""
+    pool = FakePool()
+    cache = AISolutionCache(pool)
+    for i in range(3):
+        row = make_row(cache, "impressum", f"Alte Lösung {i}", "bereits indexiert")
+        row["updated_at"] -= timedelta(days=i)
+        pool.conn.rows.append(row)
+    await cache.get_cached_solution("impressum", "x", "y")
+
+    # Ein anderer Worker speichert eine Lösung
+    other = AISolutionCache(pool)
+    await other.store_solution("impressum", "Telefonnummer im Impressum fehlt", "Kein Telefon", "Fix B")
+
+    monkeypatch.setattr(ai_solution_cache_service, "INDEX_TTL_SECONDS", 0)
+    seen = []
+    original = ai_solution_cache_service._embed_rows
+    monkeypatch.setattr(ai_solution_cache_service, "_embed_rows", lambda rows: seen.extend(rows) or original(rows))
+
+    result = await cache.get_cached_solution("impressum", "Telefonnummer im Impressum fehlt!", "Kein Telefon.")
+    assert result["solution"] == "Fix B"
+    # Die Zeile genau auf dem Watermark wird zur Sicherheit erneut gelesen
+    assert [row["ai_solution"] for row in seen] == ["Lösung für Alte Lösung 0", "Fix B"]
+    assert len(cache._indexes["impressum"]) == 4
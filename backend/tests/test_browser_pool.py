@@ -0,0 +1,174 @@
+"""
+Tests: BrowserPool
+Warme Browser, Concurrency-Limit, Recycling und Health-Checks
+
+Playwright wird durch Fakes ersetzt — kein echter Chromium nötig.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+import compliance_engine.browser_pool as bp
+
+
+# ---------------------------------------------------------------------------
+# Fakes
+# ---------------------------------------------------------------------------
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        ctx = FakeContext(self)
+        self.contexts.append(ctx)
+        return ctx
+
+    async def close(self):
+        await asyncio.sleep(0)
+        self.closed = True
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launched = []
+
+    async def launch(self, **kwargs):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+    async def stop(self):
+        pass
+
+
+class FakeAsyncPlaywright:
+    def __init__(self, pw):
+        self.pw = pw
+
+    async def start(self):
+        return self.pw
+
+
+def make_pool(**kwargs):
+    pw = FakePlaywright()
+    pool = bp.BrowserPool(**kwargs)
+    patcher = patch.object(bp, "async_playwright", lambda: FakeAsyncPlaywright(pw), create=True)
+    return pool, pw, patcher
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_browser_is_reused_across_contexts():
+    """Test: Mehrere Ausleihen nacheinander starten nur einen Browser"""
+    pool, pw, patcher = make_pool(size=2, contexts_per_browser=2)
+    with patch.object(bp, "PLAYWRIGHT_AVAILABLE", True), patcher:
+        for _ in range(5):
+            async with pool.context() as ctx:
+                assert isinstance(ctx, FakeContext)
+        assert len(pw.chromium.launched) == 1
+        assert all(c.closed for c in pw.chromium.launched[0].contexts)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited():
+    """Test: Mehr parallele Ausleihen als Slots warten auf freie Contexts"""
+    pool, pw, patcher = make_pool(size=1, contexts_per_browser=2)
+    active = 0
+    peak = 0
+
+    async def borrow():
+        nonlocal active, peak
+        async with pool.context():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    with patch.object(bp, "PLAYWRIGHT_AVAILABLE", True), patcher:
+        await asyncio.gather(*(borrow() for _ in range(6)))
+
+    assert peak == 2
+    assert len(pw.chromium.launched) == 1
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_after_max_pages():
+    """Test: Browser wird nach N Contexts geschlossen und ersetzt"""
+    pool, pw, patcher = make_pool(size=1, contexts_per_browser=1, max_contexts_per_browser_lifetime=3)
+    with patch.object(bp, "PLAYWRIGHT_AVAILABLE", True), patcher:
+        for _ in range(4):
+            async with pool.context():
+                pass
+
+    assert len(pw.chromium.launched) == 2
+    assert pw.chromium.launched[0].closed
+    assert pool.health()["recycled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnected_browser_is_replaced():
+    """Test: Health-Check verwirft getrennte Browser"""
+    pool, pw, patcher = make_pool(size=1, contexts_per_browser=1)
+    with patch.object(bp, "PLAYWRIGHT_AVAILABLE", True), patcher:
+        async with pool.context():
+            pass
+        pw.chromium.launched[0].connected = False
+        async with pool.context():
+            pass
+
+    assert len(pw.chromium.launched) == 2
+    assert pool.health()["healthy_browsers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slot_released_when_body_raises():
+    """Test: Exceptions im Scan geben den Slot trotzdem frei"""
+    pool, pw, patcher = make_pool(size=1, contexts_per_browser=1)
+    with patch.object(bp, "PLAYWRIGHT_AVAILABLE", True), patcher:
+        with pytest.raises(ValueError):
+            async with pool.context():
+                raise ValueError("boom")
+        await asyncio.wait_for(pool.acquire_context(), timeout=1)
+
+    assert pool.health()["active_contexts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_releases_close_each_retired_browser_once():
+    """Test: Gleichzeitige Rückgaben wählen ausgemusterte Browser unter dem Lock aus"""
+    pool, pw, patcher = make_pool(size=3, contexts_per_browser=1, max_contexts_per_browser_lifetime=1)
+    with patch.object(bp, "PLAYWRIGHT_AVAILABLE", True), patcher:
+        contexts = await asyncio.gather(*(pool.acquire_context() for _ in range(3)))
+        await asyncio.gather(*(pool.release_context(c) for c in contexts))
+
+    assert len(pw.chromium.launched) == 3
+    assert all(b.closed for b in pw.chromium.launched)
+    assert pool.health()["recycled"] == 3
@@ -0,0 +1,223 @@
+"""
+Tests: Consent-Ingestion-Pipeline
+Batch-Flush, Stat-Voraggregation, Backpressure, Spool und Shutdown-Flush
+
+Kein echter DB-/Redis-Server nötig — asyncpg und Redis werden durch Fakes ersetzt.
+"""
+
+import json
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+from consent_ingestion import (
+    ConsentIngestionPipeline,
+    ConsentQueueFull,
+    ConsentRecord,
+    SPOOL_KEY,
+    aggregate_stats,
+)
+
+
+# ---------------------------------------------------------------------------
+# Fakes
+# ---------------------------------------------------------------------------
+
+class FakeConn:
+    def __init__(self, fail=False, fail_single=False):
+        self.fail = fail
+        self.fail_single = fail_single
+        self.calls = []
+
+    async def executemany(self, query, args):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.calls.append((query, list(args)))
+
+    async def execute(self, query, *args):
+        if self.fail_single:
+            raise RuntimeError("db down")
+        self.calls.append((query, args))
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self, fail=False, fail_single=False):
+        self.conn = FakeConn(fail=fail, fail_single=fail_single)
+        self.fetchrow = AsyncMock(return_value={"id": 5})
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def lpop(self, key, count):
+        items = self.lists.get(key, [])
+        popped, self.lists[key] = items[:count], items[count:]
+        return popped or None
+
+
+def make_record(site_id="site-a", analytics=False, marketing=False, functional=False, day="2026-10-16"):
+    return ConsentRecord(
+        site_id=site_id,
+        visitor_id="visitor-1",
+        consent_categories={"necessary": True, "analytics": analytics, "marketing": marketing, "functional": functional},
+        services_accepted=None,
+        ip_address_hash=None,
+        device_fingerprint=None,
+        user_agent="Chrome/120",
+        revision_id=1,
+        language="de",
+        banner_shown=True,
+        day=day,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_stats_are_preaggregated_per_site_and_day():
+    """Test: Mehrere Klicks derselben Site/Tag ergeben genau eine Stat-Zeile"""
+    records = [
+        make_record(analytics=True, marketing=True, functional=True),
+        make_record(),
+        make_record(analytics=True),
+        make_record(site_id="site-b"),
+    ]
+    stats = aggregate_stats(records)
+
+    assert set(stats) == {("site-a", "2026-10-16"), ("site-b", "2026-10-16")}
+    # total, all, partial, rejected, analytics, marketing, functional
+    assert stats[("site-a", "2026-10-16")] == [3, 1, 1, 1, 2, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_false_when_not_started():
+    """Test: Ohne gestartete Pipeline schreibt der Aufrufer direkt"""
+    pipeline = ConsentIngestionPipeline()
+    assert await pipeline.submit(make_record()) is False
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_one_batch_and_one_upsert_per_site_day():
+    """Test: Flush = ein executemany für Logs, ein Upsert je (site, day)"""
+    pool = FakePool()
+    pipeline = ConsentIngestionPipeline(flush_interval=60)
+    await pipeline.start(pool)
+    for _ in range(3):
+        await pipeline.submit(make_record())
+
+    assert await pipeline.flush() is True
+    insert_call, stats_call = pool.conn.calls
+    assert len(insert_call[1]) == 3
+    assert len(stats_call[1]) == 1
+    assert stats_call[1][0][2] == 3  # total_impressions delta
+    assert pipeline.health()["queue_depth"] == 0
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_raises_without_spool():
+    """Test: Backpressure — voller Puffer ohne Redis → ConsentQueueFull"""
+    pipeline = ConsentIngestionPipeline(max_queue=2, flush_interval=60)
+    await pipeline.start(FakePool())
+    await pipeline.submit(make_record())
+    await pipeline.submit(make_record())
+
+    with pytest.raises(ConsentQueueFull):
+        await pipeline.submit(make_record())
+    assert pipeline.health()["rejected"] == 1
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_spools_to_redis_and_replays():
+    """Test: Voller Puffer → Redis-Spool, später zurück in den Puffer"""
+    redis = FakeRedis()
+    pipeline = ConsentIngestionPipeline(max_queue=1, flush_interval=60)
+    await pipeline.start(FakePool(), redis)
+    await pipeline.submit(make_record())
+    assert await pipeline.submit(make_record(site_id="site-b")) is True
+    assert len(redis.lists[SPOOL_KEY]) == 1
+
+    await pipeline.flush()
+    await pipeline._replay_spool()
+    assert pipeline.health()["queue_depth"] == 1
+    assert redis.lists[SPOOL_KEY] == []
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_records():
+    """Test: DB-Fehler beim Flush → Datensätze gehen nicht verloren"""
+    pipeline = ConsentIngestionPipeline(flush_interval=60)
+    await pipeline.start(FakePool(fail=True))
+    await pipeline.submit(make_record())
+
+    assert await pipeline.flush() is False
+    assert pipeline.health()["queue_depth"] == 1
+    pipeline.db_pool = FakePool()
+    await pipeline.stop()
+    assert pipeline.health()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_spools_when_db_unavailable():
+    """Test: Shutdown-Flush bei DB-Ausfall sichert Reste im Redis-Spool"""
+    redis = FakeRedis()
+    pipeline = ConsentIngestionPipeline(flush_interval=60)
+    await pipeline.start(FakePool(fail=True), redis)
+    await pipeline.submit(make_record())
+    await pipeline.submit(make_record())
+
+    await pipeline.stop()
+    spooled = [json.loads(item) for item in redis.lists[SPOOL_KEY]]
+    assert len(spooled) == 2
+    assert spooled[0]["site_id"] == "site-a"
+
+
+@pytest.mark.asyncio
+async def test_stop_without_spool_writes_records_individually():
+    """Test: Shutdown ohne Redis → Batch scheitert, Datensätze werden einzeln geschrieben"""
+    pool = FakePool(fail=True)
+    pipeline = ConsentIngestionPipeline(flush_interval=60)
+    await pipeline.start(pool)
+    await pipeline.submit(make_record())
+    await pipeline.submit(make_record(site_id="site-b"))
+
+    await pipeline.stop()
+    inserted = [args[0] for query, args in pool.conn.calls if "cookie_consent_logs" in query]
+    assert inserted == ["site-a", "site-b"]
+    assert pipeline.health()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_keeps_records_when_nothing_can_be_written():
+    """Test: Weder DB noch Redis → Datensätze bleiben im Puffer statt still verworfen"""
+    pipeline = ConsentIngestionPipeline(flush_interval=60)
+    await pipeline.start(FakePool(fail=True, fail_single=True))
+    await pipeline.submit(make_record())
+
+    await pipeline.stop()
+    assert pipeline.health()["queue_depth"] == 1
+
+
+@pytest.mark.asyncio
+async def test_revision_lookup_is_cached():
+    """Test: Banner-Config-ID wird pro Site nur einmal abgefragt"""
+    pool = FakePool()
+    pipeline = ConsentIngestionPipeline()
+    assert await pipeline.resolve_revision(pool, "site-a") == 5
+    assert await pipeline.resolve_revision(pool, "site-a") == 5
+    pool.fetchrow.assert_awaited_once()
@@ -0,0 +1,75 @@
+"""
+Tests: CPU-Executor
+Prozess-Pool, Thread-Fallback, begrenzte Warteschlange und Fehlerweitergabe
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from cpu_executor import CPUExecutor, CPUExecutorBusy
+
+
+@pytest.mark.asyncio
+async def test_process_pool_runs_picklable_task():
+    """Test: Modul-Level-Funktionen laufen im Prozess-Pool"""
+    executor = CPUExecutor(processes=1, threads=1, max_pending=2, queue_timeout=5)
+    try:
+        assert await executor.run("sum", sum, [1, 2, 3]) == 6
+        assert executor.health()["thread_fallbacks"] == 0
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unpicklable_task_falls_back_to_threads():
+    """Test: Lambdas können nicht in den Prozess-Pool → Thread-Fallback, Ergebnis stimmt"""
+    executor = CPUExecutor(processes=1, threads=1, max_pending=2, queue_timeout=5)
+    try:
+        assert await executor.run("lambda", lambda x: x * 2, 21) == 42
+        assert executor.health()["thread_fallbacks"] == 1
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_not_isolated_runs_off_loop_thread():
+    """Test: isolated=False läuft im Thread-Pool, nicht im Event-Loop-Thread"""
+    executor = CPUExecutor(processes=0, threads=1)
+    loop_thread = threading.get_ident()
+    try:
+        worker_thread = await executor.run("ident", threading.get_ident, isolated=False)
+        assert worker_thread != loop_thread
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_rejects_when_full():
+    """Test: Volle Warteschlange → CPUExecutorBusy nach queue_timeout"""
+    executor = CPUExecutor(processes=0, threads=1, max_pending=1, queue_timeout=0.05)
+    release = threading.Event()
+    try:
+        blocking = asyncio.create_task(executor.run("block", release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(CPUExecutorBusy):
+            await executor.run("second", sum, [1])
+        release.set()
+        assert await blocking is True
+        assert executor.health()["rejected"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_task_errors_propagate():
+    """Test: Fehler der Aufgabe werden an den Aufrufer weitergereicht"""
+    executor = CPUExecutor(processes=0, threads=1)
+    try:
+        with pytest.raises(ValueError):
+            await executor.run("int", int, "keine Zahl")
+        assert executor.health()["pending"] == 0
+    finally:
+        executor.shutdown()
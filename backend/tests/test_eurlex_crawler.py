@@ -0,0 +1,104 @@
+"""
+Tests: EUR-Lex Korpus-Updater
+Artikel-Extraktion, Conditional GET, Änderungserkennung und gezieltes Reindexing
+
+Kein Netz nötig — EUR-Lex wird über httpx.MockTransport simuliert.
+"""
+
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from cronjobs import eurlex_crawler
+from cronjobs.eurlex_crawler import ArticleExtractor, crawl_eurlex
+
+OJ_HTML = """<html><head><style>p { color: red }</style></head><body>
+<p class="doc-ti">VERORDNUNG (EU) 2016/679</p>
+<p class="normal">Erwägungsgrund (1) — gehört zu keinem Artikel</p>
+<p class="ti-art">Artikel 1</p><p class="sti-art">Gegenstand und Ziele</p>
+<p class="normal">(1) Diese Verordnung enthält Vorschriften &amp; Regeln.</p>
+<table><tr><td><p>a)</p></td><td><p>erster Punkt</p></td></tr></table>
+<p class="ti-art">Artikel 2</p><p class="sti-art">Sachlicher Anwendungsbereich</p>
+<p class="normal">ART2</p>
+<p class="doc-ti">ANHANG</p><p class="normal">Anhangtext</p>
+</body></html>"""
+
+
+def extract(html, chunk_size=17):
+    extractor = ArticleExtractor()
+    for i in range(0, len(html), chunk_size):
+        extractor.feed(html[i:i + chunk_size])
+    extractor.close()
+    return extractor.articles
+
+
+def test_extractor_keeps_whole_articles_across_chunks():
+    """Test: Artikel werden auch bei zerstückeltem Stream vollständig erkannt"""
+    articles = extract(OJ_HTML.replace("ART2", "Gilt für Verarbeitung."))
+
+    assert [a["title"] for a in articles] == ["Artikel 1", "Artikel 2"]
+    assert articles[0]["subtitle"] == "Gegenstand und Ziele"
+    assert articles[0]["paragraphs"] == ["(1) Diese Verordnung enthält Vorschriften & Regeln.", "a) erster Punkt"]
+    assert articles[1]["paragraphs"] == ["Gilt für Verarbeitung."]
+
+
+@pytest.fixture()
+def eurlex(monkeypatch):
+    monkeypatch.setattr(eurlex_crawler, "EUR_LEX_ACTS", {"GDPR": {"celex": "32016R0679", "de_id": "DSGVO"}})
+    monkeypatch.setattr(eurlex_crawler, "LANGUAGES", ["DE", "EN"])
+    monkeypatch.setattr(eurlex_crawler, "REQUEST_DELAY", 0)
+    site = {"art2": "Gilt für Verarbeitung.", "etag": '"v1"', "requests": []}
+
+    def handler(request):
+        site["requests"].append(request)
+        if request.headers.get("If-None-Match") == site["etag"]:
+            return httpx.Response(304)
+        return httpx.Response(200, text=OJ_HTML.replace("ART2", site["art2"]), headers={"ETag": site["etag"]})
+
+    site["client"] = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return site
+
+
+@pytest.mark.asyncio
+async def test_only_changed_files_are_rewritten_and_reindexed(tmp_path, eurlex):
+    """Test: 304 und identische Artikel → kein Schreiben; Änderung → Datei + Reindex"""
+    laws_dir = tmp_path / "laws"
+    (laws_dir / "en").mkdir(parents=True)
+    curated = laws_dir / "en" / "GDPR.md"
+    curated.write_text("---\nlaw_id: GDPR\n---\n# Handgepflegt\n", encoding="utf-8")
+    retriever = AsyncMock()
+    retriever.refresh_index.return_value = {"new": 1, "skipped": 0, "total": 1}
+
+    async with eurlex["client"]() as client:
+        first = await crawl_eurlex(laws_dir, client, retriever)
+    de_file = laws_dir / "de" / "GDPR.md"
+    assert first["changed"] == 1 and first["skipped"] == 1
+    assert "## Artikel 2 — Sachlicher Anwendungsbereich" in de_file.read_text(encoding="utf-8")
+    assert curated.read_text(encoding="utf-8").endswith("# Handgepflegt\n")
+    retriever.refresh_index.assert_awaited_once_with(paths=[de_file])
+
+    # Zweiter Lauf: ETag gleich → 304, nichts zu tun
+    retriever.refresh_index.reset_mock()
+    async with eurlex["client"]() as client:
+        second = await crawl_eurlex(laws_dir, client, retriever)
+    assert second["not_modified"] == 1 and second["changed"] == 0
+    assert eurlex["requests"][-1].headers["If-None-Match"] == '"v1"'
+    retriever.refresh_index.assert_not_awaited()
+
+    # Neues ETag, gleicher Inhalt → keine Neuschreibung
+    eurlex["etag"] = '"v2"'
+    mtime = de_file.stat().st_mtime_ns
+    async with eurlex["client"]() as client:
+        third = await crawl_eurlex(laws_dir, client, retriever)
+    assert third["unchanged"] == 1
+    assert de_file.stat().st_mtime_ns == mtime
+
+    # Geänderter Artikel → Datei neu, gezieltes Reindexing
+    eurlex["etag"] = '"v3"'
+    eurlex["art2"] = "Gilt für Verarbeitung und Übermittlung."
+    async with eurlex["client"]() as client:
+        fourth = await crawl_eurlex(laws_dir, client, retriever)
+    assert fourth["changed"] == 1
+    assert "Übermittlung" in de_file.read_text(encoding="utf-8")
+    retriever.refresh_index.assert_awaited_once_with(paths=[de_file])
@@ -0,0 +1,279 @@
+"""
+Tests: Fix-Job-Queue (BackgroundWorker)
+Atomares Claiming mit Lease, Concurrency-Limit, Retries/Dead-Letter und NOTIFY-Wakeup
+
+Kein echter DB-Server nötig — fix_jobs wird durch einen In-Memory-Fake ersetzt.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import background_worker as bw
+from background_worker import BackgroundWorker
+
+
+class FakeConn:
+    """In-Memory-Ersatz für die fix_jobs-Queries des Workers"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.listeners = {}
+        self.progress_writes = 0
+
+    def _job(self, job_id):
+        return next(j for j in self.jobs if j["job_id"] == job_id)
+
+    async def fetch(self, query, *args):
+        assert query == bw.CLAIM_JOBS_QUERY
+        limit, worker_id, lease = args
+        now = time.time()
+        due = [
+            j for j in self.jobs
+            if (j["status"] == "pending" and j["run_after"] <= now)
+            or (j["status"] == "processing" and j["lease_expires_at"] < now)
+        ][:limit]
+        for j in due:
+            j.update(status="processing", attempts=j["attempts"] + 1, worker_id=worker_id,
+                     lease_expires_at=now + lease, progress_percent=10)
+        return [dict(j) for j in due]
+
+    async def fetchrow(self, query, *args):
+        if query == bw.NEXT_DUE_QUERY:
+            pending = [j["run_after"] for j in self.jobs if j["status"] == "pending"]
+            return {"seconds": min(pending) - time.time() if pending else None}
+        return None
+
+    async def execute(self, query, *args):
+        if query == bw.DEAD_LETTER_EXPIRED_QUERY:
+            return "UPDATE 0"
+        if "status = 'completed'" in query:
+            result, job_id, worker_id = args
+            job = self._job(job_id)
+            if job["worker_id"] != worker_id or job["status"] != "processing":
+                return "UPDATE 0"
+            job.update(status="completed", progress_percent=100, result=result)
+            return "UPDATE 1"
+        if "status = 'pending'" in query and "run_after" in query and "make_interval" in query:
+            error, job_id, delay, worker_id = args
+            self._job(job_id).update(status="pending", worker_id=None, run_after=time.time() + delay,
+                                     error_message=error)
+            return "UPDATE 1"
+        if "dead_lettered_at = NOW()" in query:
+            error, job_id, worker_id = args
+            self._job(job_id).update(status="failed", dead_lettered=True, error_message=error)
+            return "UPDATE 1"
+        if query == bw.RELEASE_LEASES_QUERY:
+            job_ids, worker_id = args
+            for job_id in job_ids:
+                self._job(job_id).update(status="pending", worker_id=None, attempts=0)
+            return f"UPDATE {len(job_ids)}"
+        return "UPDATE 0"
+
+    async def executemany(self, query, rows):
+        assert query == bw.PROGRESS_QUERY
+        for job_id, percent, step, worker_id in rows:
+            self.progress_writes += 1
+            self._job(job_id)["progress_percent"] = percent
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+
+class _Acquire:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __await__(self):
+        async def get():
+            return self.conn
+        return get().__await__()
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    def __init__(self, jobs):
+        self.conn = FakeConn(jobs)
+
+    def acquire(self):
+        return _Acquire(self.conn)
+
+    async def release(self, conn):
+        pass
+
+
+class FakeEngine:
+    def __init__(self, delay=0.0, fail_times=0):
+        self.delay = delay
+        self.fail_times = fail_times
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+
+    async def generate_fix(self, issue, context, user_skill="intermediate"):
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.fail_times:
+                raise RuntimeError("AI down")
+            return SimpleNamespace(ai_model_used="m", generation_time_ms=1, fallback_used=False)
+        finally:
+            self.running -= 1
+
+    def to_dict(self, fix_result):
+        return {"model": fix_result.ai_model_used}
+
+
+def make_job(job_id, max_attempts=3):
+    return {
+        "job_id": job_id, "user_id": 1, "scan_id": None, "issue_id": "i",
+        "issue_data": '{"title": "Impressum fehlt"}', "created_at": None,
+        "status": "pending", "attempts": 0, "max_attempts": max_attempts,
+        "run_after": 0.0, "lease_expires_at": 0.0, "worker_id": None, "progress_percent": 0,
+    }
+
+
+def make_worker(pool, engine, **kwargs):
+    kwargs.setdefault("concurrency", 2)
+    kwargs.setdefault("progress_interval", 0.01)
+    kwargs.setdefault("poll_interval", 60)
+    return BackgroundWorker(pool, engine=engine, **kwargs)
+
+
+async def drain(worker):
+    while worker._active:
+        await asyncio.gather(*list(worker._active.values()))
+
+
+@pytest.mark.asyncio
+async def test_claimed_job_completes():
+    """Test: Job wird geclaimt, verarbeitet und als completed markiert"""
+    pool = FakePool([make_job("a")])
+    worker = make_worker(pool, FakeEngine())
+    worker.is_running = True
+
+    await worker.process_pending_jobs()
+    await drain(worker)
+
+    job = pool.conn.jobs[0]
+    assert job["status"] == "completed"
+    assert job["progress_percent"] == 100
+    assert worker.stats["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limits_claims():
+    """Test: Nur so viele Jobs werden geclaimt, wie Slots frei sind"""
+    pool = FakePool([make_job(str(i)) for i in range(5)])
+    engine = FakeEngine(delay=0.02)
+    worker = make_worker(pool, engine, concurrency=2)
+    worker.is_running = True
+
+    await worker.process_pending_jobs()
+    assert len(worker._active) == 2
+    await worker.process_pending_jobs()
+    assert len(worker._active) == 2
+
+    await drain(worker)
+    assert engine.peak == 2
+    assert sum(j["status"] == "pending" for j in pool.conn.jobs) == 3
+
+
+@pytest.mark.asyncio
+async def test_two_workers_never_claim_same_job():
+    """Test: Zweiter Worker bekommt bereits geleaste Jobs nicht"""
+    pool = FakePool([make_job("a")])
+    first = make_worker(pool, FakeEngine(delay=0.02))
+    second = make_worker(pool, FakeEngine())
+    first.is_running = second.is_running = True
+
+    await first.process_pending_jobs()
+    await second.process_pending_jobs()
+    assert second._active == {}
+    await drain(first)
+    assert second.engine.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_dead_lettered():
+    """Test: Fehler → Retry mit Backoff, nach max_attempts Dead-Letter"""
+    pool = FakePool([make_job("a", max_attempts=2)])
+    worker = make_worker(pool, FakeEngine(fail_times=5), retry_base_seconds=0.01)
+    worker.is_running = True
+
+    await worker.process_pending_jobs()
+    await drain(worker)
+    job = pool.conn.jobs[0]
+    assert job["status"] == "pending"
+    assert job["run_after"] > time.time() - 1
+
+    await asyncio.sleep(0.02)
+    await worker.process_pending_jobs()
+    await drain(worker)
+    assert job["status"] == "failed"
+    assert job.get("dead_lettered")
+    assert worker.stats["retried"] == 1
+    assert worker.stats["dead_lettered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_progress_updates_are_coalesced():
+    """Test: Mehrere Fortschrittsmeldungen → ein gebündelter Write"""
+    pool = FakePool([make_job("a")])
+    worker = make_worker(pool, FakeEngine())
+    worker._job_ids["a"] = "a"
+    for percent in (20, 30, 40):
+        worker.report_progress("a", percent, "läuft")
+
+    await worker._flush_progress()
+    assert pool.conn.progress_writes == 1
+    assert pool.conn.jobs[0]["progress_percent"] == 40
+
+
+@pytest.mark.asyncio
+async def test_notify_wakes_worker_without_polling():
+    """Test: NOTIFY startet einen neuen Job sofort, obwohl poll_interval groß ist"""
+    pool = FakePool([])
+    worker = make_worker(pool, FakeEngine(), poll_interval=60)
+    task = asyncio.create_task(worker.start())
+    await asyncio.sleep(0.01)
+    assert "fix_jobs" in pool.conn.listeners
+
+    pool.conn.jobs.append(make_job("late"))
+    pool.conn.listeners["fix_jobs"](None, 0, "fix_jobs", "late")
+    for _ in range(50):
+        if pool.conn.jobs[0]["status"] == "completed":
+            break
+        await asyncio.sleep(0.01)
+
+    await worker.stop()
+    task.cancel()
+    assert pool.conn.jobs[0]["status"] == "completed"
+    assert worker.stats["notifications"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_releases_unfinished_jobs():
+    """Test: Beim Shutdown abgebrochene Jobs werden sofort wieder freigegeben"""
+    pool = FakePool([make_job("slow")])
+    worker = make_worker(pool, FakeEngine(delay=5))
+    worker.is_running = True
+    await worker.process_pending_jobs()
+    await asyncio.sleep(0)
+
+    await worker.stop(grace_seconds=0.01)
+    job = pool.conn.jobs[0]
+    assert job["status"] == "pending"
+    assert job["attempts"] == 0
@@ -0,0 +1,75 @@
+"""
+Tests: Geo-Resolver
+Range-Tabelle mit Binärsuche, Header-Reihenfolge und LRU ohne Datenbankzugriff
+"""
+
+import ipaddress
+
+from geo_resolver import GeoResolver
+
+
+def _resolver(tmp_path, **kwargs):
+    table = tmp_path / "ip-country.csv"
+    table.write_text(
+        "start,end,country\n"
+        "1.0.0.0,1.0.0.255,AU\n"
+        "1.0.1.0,1.0.3.255,AU\n"
+        "16777216,16777471,AU\n"  # Integer-Format (IP2Location), doppelt zu oben
+        "81.0.0.0,81.255.255.255,DE\n"
+        "2a00:1450::,2a00:1450:ffff:ffff:ffff:ffff:ffff:ffff,IE\n"
+        "::ffff:93.0.0.0,::ffff:93.255.255.255,FR\n"
+    )
+    resolver = GeoResolver(db_path=str(table), cache_size=2, default_country="DE", **kwargs)
+    resolver.load()
+    return resolver
+
+
+def test_range_table_binary_search_merges_adjacent_ranges(tmp_path):
+    """Test: Benachbarte Bereiche desselben Landes werden zusammengefasst, IPv4-mapped landet in IPv4"""
+    resolver = _resolver(tmp_path)
+    table = resolver.table
+
+    assert len(table) == 4
+    assert table.lookup(ipaddress.ip_address("1.0.2.7")) == "AU"
+    assert table.lookup(ipaddress.ip_address("1.0.4.0")) is None
+    assert table.lookup(ipaddress.ip_address("93.184.216.34")) == "FR"
+    assert table.lookup(ipaddress.ip_address("::ffff:81.2.3.4")) == "DE"
+    assert table.lookup(ipaddress.ip_address("2a00:1450:4001::1")) == "IE"
+
+
+def test_header_order_and_trusted_proxies(tmp_path):
+    """Test: Länder-Header vor IP-Headern; mit TRUSTED_PROXIES nur vom vertrauten Peer"""
+    resolver = _resolver(tmp_path, country_headers=["CF-IPCountry"],
+                         ip_headers=["CF-Connecting-IP", "X-Forwarded-For"], trusted_proxies=["10.0.0.1"])
+
+    assert resolver.resolve({"CF-IPCountry": "at"}, "10.0.0.1").country_code == "AT"
+    result = resolver.resolve({"CF-IPCountry": "XX", "X-Forwarded-For": "1.0.1.9, 10.0.0.1"}, "10.0.0.1")
+    assert (result.country_code, result.source) == ("AU", "table")
+    # Nicht vertrauter Peer: Header werden ignoriert, Peer-IP zählt
+    assert resolver.resolve({"CF-IPCountry": "AT"}, "81.1.1.1").country_code == "DE"
+    assert resolver.resolve({}, "192.168.1.5").source == "default"
+
+
+def test_headers_ignored_without_trusted_proxies(tmp_path, caplog):
+    """Test: Ohne TRUSTED_PROXIES zählen weder Länder- noch Client-IP-Header; load() warnt"""
+    with caplog.at_level("WARNING", logger="geo_resolver"):
+        resolver = _resolver(tmp_path, country_headers=["CF-IPCountry"], ip_headers=["X-Forwarded-For"],
+                             trusted_proxies=[])
+    assert "TRUSTED_PROXIES" in caplog.text
+
+    result = resolver.resolve({"CF-IPCountry": "AT", "X-Forwarded-For": "1.0.1.9"}, "81.1.1.1")
+    assert (result.country_code, result.source) == ("DE", "table")
+
+
+def test_lru_caches_hashed_ips_without_plain_addresses(tmp_path):
+    """Test: Wiederholte Besucher kommen aus dem LRU; Schlüssel sind gesalzene Hashes, Größe begrenzt"""
+    resolver = _resolver(tmp_path, country_headers=[], trusted_proxies=[])
+
+    assert resolver.resolve({}, "81.1.1.1").cached is False
+    assert resolver.resolve({}, "81.1.1.1").source == "cache"
+    resolver.resolve({}, "1.0.0.1")
+    resolver.resolve({}, "93.1.1.1")
+
+    assert len(resolver._cache) == 2
+    assert all(isinstance(key, bytes) and len(key) == 8 for key in resolver._cache)
+    assert resolver.health()["lookups"] == {"header": 0, "cache": 1, "table": 3, "default": 0}
@@ -0,0 +1,142 @@
+"""
+Tests: Git-Batch-Commit
+Hunk-Anwendung mit Offset/Fuzz, ein Commit für alle Dateien über die
+Git Data API und Retry bei Secondary Rate Limits
+
+Lokaler aiohttp-Testserver statt api.github.com.
+"""
+
+import base64
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from git_service import GitHubClient, PatchError, apply_unified_diff
+
+TEMPLATE = "".join(f"line {i}\n" for i in range(1, 21))
+
+DIFF = """--- a/header.html
++++ b/header.html
+@@ -3,3 +3,3 @@
+ line 3
+-line 4
++line 4 fixed
+ line 5
+"""
+
+
+def test_hunk_applies_with_offset_and_fuzz():
+    """Test: Versetzter Hunk wird gefunden, abweichender Kontext per Fuzz toleriert"""
+    shifted = "intro\nintro\n" + TEMPLATE
+    assert "line 4 fixed\nline 5\n" in apply_unified_diff(shifted, DIFF)
+
+    drifted = TEMPLATE.replace("line 3\n", "line three\n")
+    assert "line three\nline 4 fixed\n" in apply_unified_diff(drifted, DIFF)
+
+    with pytest.raises(PatchError):
+        apply_unified_diff(TEMPLATE.replace("line 4\n", "other\n"), DIFF)
+
+
+def test_multiple_hunks_and_line_endings():
+    """Test: Mehrere Hunks inkl. reiner Einfügung, CRLF und Dateiende bleiben erhalten"""
+    diff = """@@ -1,2 +1,3 @@
+ line 1
++<a href="#main">Skip</a>
+ line 2
+@@ -19,2 +20,2 @@
+ line 19
+-line 20
++line 20 <!-- fixed -->
+"""
+    patched = apply_unified_diff(TEMPLATE.replace("\n", "\r\n"), diff)
+    lines = patched.split("\r\n")
+    assert lines[1] == '<a href="#main">Skip</a>'
+    assert lines[-2] == "line 20 <!-- fixed -->"
+    assert patched.endswith("\r\n")
+
+
+def test_new_file_keeps_trailing_newline():
+    """Test: Diff gegen leeren Inhalt erzeugt eine Datei mit abschließendem Zeilenumbruch"""
+    assert apply_unified_diff("", "@@ -0,0 +1,2 @@\n+new\n+two\n") == "new\ntwo\n"
+
+
+@pytest_asyncio.fixture
+async def github():
+    calls = []
+    state = {"throttled": False}
+    files = {f"templates/page{i}.html": TEMPLATE for i in range(3)}
+
+    async def handler(request):
+        path = request.path
+        calls.append((request.method, path))
+        if request.method == "GET" and path.endswith("/git/ref/heads/fix"):
+            return web.json_response({"object": {"sha": "head"}})
+        if request.method == "GET" and path.endswith("/git/commits/head"):
+            return web.json_response({"tree": {"sha": "tree0"}})
+        if request.method == "GET" and path.endswith("/git/trees/tree0"):
+            assert request.query["recursive"] == "1"
+            modes = {name: "100755" if name.endswith("1.html") else "100644" for name in files}
+            return web.json_response({
+                "sha": "tree0",
+                "tree": [{"path": name, "mode": mode, "type": "blob"} for name, mode in modes.items()],
+                "truncated": False,
+            })
+        if request.method == "GET" and "/contents/" in path:
+            name = path.split("/contents/", 1)[1]
+            if name not in files:
+                return web.json_response({"message": "Not Found"}, status=404)
+            return web.json_response({"sha": "blob", "content": base64.b64encode(files[name].encode()).decode()})
+        if request.method == "POST" and path.endswith("/git/trees"):
+            if not state["throttled"]:
+                state["throttled"] = True
+                return web.json_response(
+                    {"message": "You have exceeded a secondary rate limit"}, status=403, headers={"Retry-After": "0"}
+                )
+            state["tree"] = await request.json()
+            return web.json_response({"sha": "tree1"}, status=201)
+        if request.method == "POST" and path.endswith("/git/commits"):
+            state["commit"] = await request.json()
+            return web.json_response({"sha": "commit1"}, status=201)
+        if request.method == "PATCH" and path.endswith("/git/refs/heads/fix"):
+            state["ref"] = await request.json()
+            return web.json_response({"object": {"sha": "commit1"}})
+        return web.json_response({"message": "unexpected"}, status=500)
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield str(server.make_url("")).rstrip("/"), calls, state
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_commit_files_creates_single_commit(github):
+    """Test: Alle Patches → ein Tree, ein Commit, ein Ref-Update; fehlende Datei wird übersprungen"""
+    base_url, calls, state = github
+    patches = [{"file_path": f"templates/page{i}.html", "unified_diff": DIFF} for i in range(3)]
+    patches.append({"file_path": "templates/missing.html", "unified_diff": DIFF})
+
+    client = GitHubClient("token")
+    client.API_BASE = base_url
+    async with client:
+        result = await client.commit_files("acme", "site", "fix", patches, "fix(a11y): test")
+
+    assert result.success
+    assert result.commit_sha == "commit1"
+    assert sorted(result.files_changed) == [f"templates/page{i}.html" for i in range(3)]
+    assert result.files_skipped == ["templates/missing.html"]
+
+    writes = [call for call in calls if call[0] in ("POST", "PATCH", "PUT")]
+    # Tree-POST einmal wegen Secondary Rate Limit wiederholt
+    assert [method for method, _ in writes] == ["POST", "POST", "POST", "PATCH"]
+    assert state["tree"]["base_tree"] == "tree0"
+    assert all("line 4 fixed" in entry["content"] for entry in state["tree"]["tree"])
+    modes = {entry["path"]: entry["mode"] for entry in state["tree"]["tree"]}
+    assert modes["templates/page1.html"] == "100755" and modes["templates/page0.html"] == "100644"
+    assert state["commit"]["parents"] == ["head"]
+    assert state["ref"] == {"sha": "commit1"}
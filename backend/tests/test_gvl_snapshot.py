@@ -0,0 +1,109 @@
+"""
+Tests: GVL-Snapshot-Service
+Versionierter Snapshot mit Bitset-Lookups, vorkomprimierter Vendor-Liste und Datei-Fallback
+"""
+
+import gzip
+import json
+
+import pytest
+
+from compliance_engine.gvl_snapshot import GVLSnapshotService, VendorDomainIndex, build_snapshot, known_vendor_entries
+
+
+def _gvl(version, vendor_count=3):
+    vendors = {
+        str(i): {
+            "id": i,
+            "name": f"Vendor {i}",
+            "purposes": [1, 3] if i % 2 else [1],
+            "legIntPurposes": [] if i % 2 else [7],
+            "urls": [{"langId": "en", "privacy": f"https://www.vendor{i}.co.uk/privacy"}],
+        }
+        for i in range(1, vendor_count + 1)
+    }
+    vendors["2"]["deletedDate"] = "2026-01-01T00:00:00Z"
+    return {"vendorListVersion": version, "tcfPolicyVersion": 5, "purposes": {"1": {"name": "Store"}}, "vendors": vendors}
+
+
+def test_snapshot_lookups_skip_deleted_vendors():
+    """Test: Vendor-Lookup, Purpose → Bitset und Domain → Vendor über die aktiven Vendors"""
+    snapshot = build_snapshot(_gvl(120, vendor_count=5), "remote")
+
+    assert sorted(snapshot.vendors) == [1, 3, 4, 5]
+    assert snapshot.vendors_for_purpose(3).to_list() == [1, 3, 5]
+    assert snapshot.vendors_for_purpose(7, legitimate_interest=True).to_list() == [4]
+    assert snapshot.domain_index.match("cdn.vendor3.co.uk") == [(3, "Vendor 3")]
+    with pytest.raises(TypeError):
+        snapshot.vendors[1]["name"] = "changed"
+
+
+def test_known_vendor_domains_map_to_one_vendor():
+    """Test: Jede kuratierte Domain gehört zu genau einem Vendor — Lookup unabhängig von der Reihenfolge"""
+    domains = [d for _, _, ds in known_vendor_entries() for d in ds]
+    assert len(domains) == len(set(domains))
+    assert VendorDomainIndex(known_vendor_entries()).match("ssl.google-analytics.com") == [(754, "Google Analytics")]
+
+
+def test_vendor_list_is_precompressed_with_version_etag():
+    """Test: Vendor-Liste einmal serialisiert; gzip/identity nach Accept-Encoding, 304 bei passendem ETag"""
+    body = build_snapshot(_gvl(120), "remote").vendor_list
+    assert body.etag.startswith('"gvl-120-')
+
+    status, headers, content = body.negotiate("", "gzip, br;q=0")
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    payload = json.loads(gzip.decompress(content))
+    assert payload["vendor_list_version"] == 120
+    assert [v["vendor_id"] for v in payload["vendors"]] == [1, 3]
+
+    status, headers, content = body.negotiate(f'W/{body.etag}', "gzip")
+    assert (status, content) == (304, b"")
+
+
+@pytest.mark.asyncio
+async def test_service_falls_back_to_file_and_rebuilds_only_on_new_version(tmp_path, monkeypatch):
+    """Test: Ohne Netz lokale Datei; gleiche Version → gleicher Snapshot; neue Version wird gespeichert"""
+    fallback = tmp_path / "vendor-list.json"
+    fallback.write_text(json.dumps(_gvl(100)))
+    service = GVLSnapshotService(url="http://gvl.invalid", fallback_file=str(fallback), refresh_interval=3600)
+
+    async def offline():
+        raise OSError("offline")
+    monkeypatch.setattr(service, "_fetch_remote", offline)
+    first = await service.get()
+    assert (first.version, first.source) == (100, "file")
+    assert await service.get() is first
+
+    async def remote(version):
+        return json.dumps(_gvl(version)).encode()
+
+    monkeypatch.setattr(service, "_fetch_remote", lambda: remote(100))
+    assert await service.refresh() is first
+
+    monkeypatch.setattr(service, "_fetch_remote", lambda: remote(101))
+    second = await service.refresh()
+    assert (second.version, second.source) == (101, "remote")
+    assert json.loads(fallback.read_text())["vendorListVersion"] == 101
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_is_retried_before_full_interval(tmp_path, monkeypatch):
+    """Test: Nach Datei-Fallback oder Fehler kurzes Retry-Intervall, nach Remote-Erfolg volles Intervall"""
+    fallback = tmp_path / "vendor-list.json"
+    fallback.write_text(json.dumps(_gvl(100)))
+    service = GVLSnapshotService(url="http://gvl.invalid", fallback_file=str(fallback),
+                                 refresh_interval=3600, retry_interval=0)
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        if len(fetches) < 3:
+            raise OSError("offline")
+        return json.dumps(_gvl(101)).encode()
+    monkeypatch.setattr(service, "_fetch_remote", fetch)
+
+    assert (await service.get()).source == "file"
+    assert (await service.get()).version == 100  # Fehler, alte Version behalten
+    assert (await service.get()).source == "remote"
+    await service.get()
+    assert len(fetches) == 3
@@ -0,0 +1,89 @@
+"""
+Tests: Hybrid-Validator (gebündelter Modus)
+Ein KI-Call für alle unsicheren Felder, JSON-Antwort je Feld, Seiten-Cache
+
+Kein API-Key nötig — der KI-Client wird durch einen Fake ersetzt.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from compliance_engine import hybrid_validator
+from compliance_engine.hybrid_validator import HybridValidator
+
+IMPRESSUM_TEXT = (
+    "Impressum Angaben gemäß § 5 DDG. Kontakt: E-Mail: info@beispiel-firma.de "
+    "Verantwortlich für den Inhalt ist die Geschäftsleitung."
+)
+
+
+def make_validator(response_payload):
+    validator = HybridValidator()
+    validator.ai_client = SimpleNamespace(messages=SimpleNamespace(create=AsyncMock(
+        return_value=SimpleNamespace(content=[SimpleNamespace(text=json.dumps(response_payload))])
+    )))
+    return validator
+
+
+@pytest.fixture(autouse=True)
+def clear_page_cache():
+    hybrid_validator._page_cache.clear()
+    yield
+    hybrid_validator._page_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_uncertain_fields_share_one_ai_call():
+    """Test: Alle unsicheren Felder gehen in einen Prompt, Antwort wird je Feld übernommen"""
+    validator = make_validator({
+        "firmenname": {"found": True, "value": "Beispiel Firma", "confidence": 0.9, "reasoning": "Kopfzeile"},
+        "adresse": {"found": False, "value": None, "confidence": 0.95, "reasoning": "Keine Anschrift"},
+    })
+
+    analysis = await validator.validate_page("impressum", IMPRESSUM_TEXT, "https://beispiel.de/impressum")
+
+    create = validator.ai_client.messages.create
+    assert create.await_count == 1
+    prompt = create.await_args.kwargs["messages"][0]["content"]
+    uncertain = [r["field"] for r in analysis["results"] if r["method"] == "ai"]
+    assert len(uncertain) > 2
+    assert all(f'"{field}"' in prompt for field in uncertain)
+
+    by_field = {r["field"]: r for r in analysis["results"]}
+    assert by_field["firmenname"]["found"] is True
+    assert by_field["firmenname"]["value"] == "Beispiel Firma"
+    assert by_field["adresse"]["found"] is False
+    assert by_field["email"]["method"] == "pattern"
+    # Felder ohne Eintrag in der KI-Antwort fallen auf das Pattern-Ergebnis zurück
+    assert by_field["telefon"]["ai_reasoning"].startswith("Parse error")
+    assert analysis["statistics"]["ai_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_page_result_is_cached_by_content_hash():
+    """Test: Gleicher Seiteninhalt → kein zweiter KI-Call, URL wird übernommen"""
+    payload = {name: {"found": False, "value": None, "confidence": 0.9, "reasoning": "-"}
+               for name in HybridValidator().analyzer.datenschutz_patterns}
+    validator = make_validator(payload)
+
+    first = await validator.validate_page("datenschutz", "Kurzer Text", "https://a.de/datenschutz")
+    second = await validator.validate_page("datenschutz", "Kurzer Text", "https://b.de/datenschutz")
+
+    assert validator.ai_client.messages.create.await_count == 1
+    assert second["url"] == "https://b.de/datenschutz"
+    assert second["results"] == first["results"]
+
+
+@pytest.mark.asyncio
+async def test_failed_ai_call_is_not_cached():
+    """Test: KI-Fehler → Pattern-Fallback, Ergebnis wird nicht gecacht"""
+    validator = HybridValidator()
+    validator.ai_client = SimpleNamespace(messages=SimpleNamespace(create=AsyncMock(side_effect=RuntimeError("timeout"))))
+
+    analysis = await validator.validate_page("datenschutz", "Kurzer Text", "https://a.de/datenschutz")
+
+    assert all(r["ai_reasoning"].startswith("KI-Error") for r in analysis["results"] if r["method"] == "ai")
+    assert hybrid_validator._page_cache == {}
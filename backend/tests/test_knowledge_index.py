@@ -0,0 +1,190 @@
+"""
+Tests: Knowledge Embedding Index
+Persistenter NumPy-Index, inkrementelles Reparsing und Top-k-Retrieval
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import knowledge.embedding_index as ei
+import knowledge.knowledge_retriever as kr
+from knowledge.embedding_backends import EmbeddingBackend, HashingEmbeddingBackend
+from knowledge.knowledge_retriever import KnowledgeRetriever
+
+
+def write_doc(root, name, title, body, relevance=0.5, language="de"):
+    path = root / "updates" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        f"---\ntitle: {title}\nrelevance_score: {relevance}\nlanguage: {language}\n"
+        f"law_areas: [dsgvo]\ndate: 2026-01-01\n---\n{body}\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+@pytest.fixture()
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setattr(ei, "INDEX_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(ei, "_INDEXES", {})
+    write_doc(tmp_path, "cookies.md", "Cookie Banner", "Cookie Einwilligung nach TTDSG")
+    write_doc(tmp_path, "impressum.md", "Impressum", "Impressumspflicht nach DDG")
+    return tmp_path
+
+
+class FakeBackend(EmbeddingBackend):
+    """Vektor je Stichwort im Text; protokolliert jeden Batch-Request"""
+
+    name = "fake:1"
+
+    def __init__(self, vectors, batch_size=64):
+        self.vectors = vectors
+        self.batch_size = batch_size
+        self.requests = []
+
+    async def embed(self, texts):
+        self.requests.append(list(texts))
+        return [next((v for key, v in self.vectors.items() if key in text), None) for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_keyword_retrieval_without_embeddings(vault):
+    """Test: Ohne Embeddings greift das Keyword-Scoring"""
+    retriever = KnowledgeRetriever(vault_root=vault, backend=FakeBackend({}))
+    results = await retriever.retrieve("Cookie Einwilligung", top_k=1)
+    assert results[0]["title"] == "Cookie Banner"
+    assert results[0]["date"] == "2026-01-01"
+
+
+@pytest.mark.asyncio
+async def test_refresh_builds_normalized_matrix(vault):
+    """Test: refresh_index bettet per Batch ein, compact() speichert eine normalisierte float32-Matrix"""
+    backend = FakeBackend({"Cookie": [3.0, 4.0, 0.0], "Impressum": [0.0, 0.0, 2.0]})
+    retriever = KnowledgeRetriever(vault_root=vault, backend=backend)
+    stats = await retriever.refresh_index()
+
+    assert stats == {"new": 2, "skipped": 0, "total": 2}
+    assert len(backend.requests) == 1 and len(backend.requests[0]) == 2
+    retriever.index.compact()
+    matrix = np.load(vault / "_meta" / "index" / "vectors.npy")
+    assert matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    assert not (vault / "_meta" / "index" / "vectors.log").exists()
+
+
+@pytest.mark.asyncio
+async def test_embedding_retrieval_ranks_by_cosine(vault):
+    """Test: Query-Vektor wird per Matrix-Produkt gegen alle Dokumente gerankt"""
+    retriever = KnowledgeRetriever(vault_root=vault, backend=FakeBackend({
+        "Cookie": [1.0, 0.0],
+        "Impressum": [0.0, 1.0],
+        "Anbieterkennzeichnung": [0.1, 1.0],
+    }))
+    await retriever.refresh_index()
+
+    results = await retriever.retrieve("Anbieterkennzeichnung", top_k=2)
+    assert [r["title"] for r in results] == ["Impressum", "Cookie Banner"]
+
+    hybrid = await retriever.search_hybrid("Anbieterkennzeichnung", top_k=1)
+    assert hybrid[0]["doc_id"] == "impressum.md"
+    assert hybrid[0]["match_type"] == "embedding"
+
+
+@pytest.mark.asyncio
+async def test_only_changed_files_are_reparsed(vault, monkeypatch):
+    """Test: Unveränderte Dateien werden nicht erneut geparst"""
+    parsed = []
+    original = kr._parse_md_file
+
+    def counting_parse(path):
+        parsed.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(kr, "_parse_md_file", counting_parse)
+    retriever = KnowledgeRetriever(vault_root=vault)
+    await retriever.retrieve("Cookie")
+    assert sorted(parsed) == ["cookies.md", "impressum.md"]
+
+    parsed.clear()
+    await retriever.retrieve("Cookie")
+    assert parsed == []
+
+    path = write_doc(vault, "cookies.md", "Cookie Banner v2", "Neue Cookie Regeln")
+    os.utime(path, (1, 1))
+    await retriever.retrieve("Cookie")
+    assert parsed == ["cookies.md"]
+
+
+@pytest.mark.asyncio
+async def test_index_persists_across_processes(vault, monkeypatch):
+    """Test: Neuer Prozess lädt Manifest + Log bzw. nach Kompaktierung die mmap-Matrix"""
+    backend = FakeBackend({"Cookie": [1.0, 0.0]})
+    await KnowledgeRetriever(vault_root=vault, backend=backend).refresh_index()
+
+    monkeypatch.setattr(ei, "_INDEXES", {})
+    monkeypatch.setattr(kr, "_parse_md_file", lambda path: pytest.fail("reparsed"))
+    retriever = KnowledgeRetriever(vault_root=vault, backend=backend)
+    stats = retriever.get_stats()
+
+    assert stats["total_documents"] == 2
+    assert stats["cached_embeddings"] == 1
+    assert retriever.index.log_records == 1
+
+    retriever.index.compact()
+    monkeypatch.setattr(ei, "_INDEXES", {})
+    retriever = KnowledgeRetriever(vault_root=vault, backend=backend)
+    assert retriever.get_stats()["cached_embeddings"] == 1
+    assert isinstance(retriever.index.matrix, np.memmap)
+
+
+@pytest.mark.asyncio
+async def test_refresh_embeds_only_changed_docs_in_batches(vault, monkeypatch):
+    """Test: Nur neue/geänderte Content-Hashes gehen ans Backend, in Batches; Vektoren werden angehängt"""
+    for i in range(3):
+        write_doc(vault, f"cookie-{i}.md", f"Cookie {i}", f"Cookie Hinweis {i}")
+    backend = FakeBackend({"Cookie": [1.0, 0.0], "Impressum": [0.0, 1.0]}, batch_size=2)
+    retriever = KnowledgeRetriever(vault_root=vault, backend=backend)
+    await retriever.refresh_index()
+    assert [len(r) for r in backend.requests] == [2, 2, 1]
+
+    vectors_file = vault / "_meta" / "index" / "vectors.npy"
+    retriever.index.compact()
+    compacted_mtime = vectors_file.stat().st_mtime_ns
+
+    backend.requests.clear()
+    path = write_doc(vault, "impressum.md", "Impressum", "Impressumspflicht nach DDG, neu")
+    os.utime(path, (1, 1))
+    stats = await retriever.refresh_index()
+    assert len(backend.requests) == 1 and len(backend.requests[0]) == 1
+    assert "neu" in backend.requests[0][0]
+    assert stats["new"] == 1
+
+    # Sync nach Dateiänderung schreibt den Index neu; das neue Embedding landet nur im Log
+    synced_mtime = vectors_file.stat().st_mtime_ns
+    assert synced_mtime >= compacted_mtime
+    assert retriever.index.log_records == 1
+    assert int(retriever.index.has_vector.sum()) == 5
+
+
+@pytest.mark.asyncio
+async def test_background_compaction_and_backend_switch(vault, monkeypatch):
+    """Test: Log-Schwelle erreicht → Kompaktierung im Hintergrund; Backendwechsel verwirft Vektoren"""
+    monkeypatch.setattr(ei, "COMPACT_MIN_RECORDS", 1)
+    retriever = KnowledgeRetriever(vault_root=vault, backend=FakeBackend({"Cookie": [1.0, 0.0]}))
+    await retriever.refresh_index()
+    await retriever.index.compaction_task
+    assert retriever.index.log_records == 0
+    assert (vault / "_meta" / "index" / "vectors.npy").exists()
+
+    hashing = KnowledgeRetriever(vault_root=vault, backend=HashingEmbeddingBackend(dim=64))
+    stats = await hashing.refresh_index()
+    assert stats["new"] == 2
+    assert hashing.index.model == "hashing:64"
+    assert hashing.index.dim == 64
+
+    results = await hashing.retrieve("Impressumspflicht DDG", top_k=1)
+    assert results[0]["title"] == "Impressum"
+    with pytest.raises(TypeError):
+        EmbeddingBackend()
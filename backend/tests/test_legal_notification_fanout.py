@@ -0,0 +1,92 @@
+"""
+Tests: Legal-Change-Fan-out
+Mengenbasiertes Anlegen der Notifications und Batch-Versand der Sofort-Mails
+
+Kein Postgres nötig — Pool/Connection und Mail-Transport werden gemockt.
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from legal_notification_service import LegalNewsNotificationService
+
+
+def make_pool(fetch_results):
+    conn = MagicMock()
+    conn.fetch = AsyncMock(side_effect=fetch_results)
+    conn.execute = AsyncMock(return_value="UPDATE 1")
+    conn.transaction.return_value.__aenter__ = AsyncMock(return_value=None)
+    conn.transaction.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    return pool, conn
+
+
+NEWS = {
+    "id": 5,
+    "title": "BfDI: Neue Orientierungshilfe zu Cookie-Bannern",
+    "summary": "Einwilligung muss gleichwertig ablehnbar sein",
+    "content": "",
+    "keywords": ["DSGVO"],
+    "severity": "critical",
+    "source": "BfDI",
+    "url": "https://bfdi.example/news",
+    "published_date": datetime(2026, 10, 1),
+}
+
+
+def test_news_areas_from_title_summary_keywords():
+    """Test: Themen werden aus Titel, Zusammenfassung und Keywords erkannt"""
+    assert LegalNewsNotificationService._news_areas(NEWS) == ["dsgvo", "cookie"]
+    assert LegalNewsNotificationService._news_areas({"title": "Allgemeines"}) == []
+
+
+@pytest.mark.asyncio
+async def test_fan_out_is_one_statement_and_batches_instant_mails():
+    """Test: Ein INSERT ... SELECT für die ganze Matrix, nur Sofort-Mails gehen raus"""
+    fan_out_rows = [
+        {"created": 3, "id": 11, "user_id": 1, "legal_news_id": 5, "confirmation_token": "tok-a", "email": "a@example.com"},
+        {"created": 3, "id": 12, "user_id": 2, "legal_news_id": 5, "confirmation_token": "tok-b", "email": "b@example.com"},
+    ]
+    pool, conn = make_pool([[NEWS], fan_out_rows])
+    service = LegalNewsNotificationService(pool)
+
+    with patch("legal_notification_service.mail_transport") as transport:
+        transport.send_batch = AsyncMock(return_value={"sent": 1, "failed": 1, "results": [True, False]})
+        results = await service.process_new_legal_changes()
+
+    assert results == {"processed": 1, "notifications_created": 3, "emails_sent": 1, "errors": []}
+    assert conn.fetch.await_count == 2
+
+    sql, news_ids, severities, ranks, areas, deadlines = conn.fetch.await_args_list[1].args
+    assert "INSERT INTO legal_change_notifications" in sql
+    assert (news_ids, severities, ranks, areas) == ([5], ["critical"], [4], ["dsgvo,cookie"])
+
+    messages = transport.send_batch.await_args.args[0]
+    assert [m.to for m in messages] == ["a@example.com", "b@example.com"]
+    assert "/legal/confirm/tok-a" in messages[0].text_body
+
+    update_sql, sent_ids = conn.execute.await_args.args
+    assert "ANY($1::int[])" in update_sql
+    assert sent_ids == [11]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_without_instant_recipients_sends_nothing():
+    """Test: Nur Digest-Empfänger → Notifications angelegt, keine Mails"""
+    fan_out_rows = [{"created": 4, "id": None, "user_id": None, "legal_news_id": None,
+                     "confirmation_token": None, "email": None}]
+    pool, conn = make_pool([[NEWS], fan_out_rows])
+    service = LegalNewsNotificationService(pool)
+
+    with patch("legal_notification_service.mail_transport") as transport:
+        transport.send_batch = AsyncMock()
+        results = await service.process_new_legal_changes()
+
+    assert results["notifications_created"] == 4
+    assert results["emails_sent"] == 0
+    transport.send_batch.assert_not_awaited()
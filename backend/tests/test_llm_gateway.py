@@ -0,0 +1,160 @@
+"""
+Tests: LLM Gateway
+Geteilter Client, Retry/Fallback-Kette, 429 Retry-After und Concurrency-Limits
+
+Kein Netzwerk nötig — OpenRouter wird über httpx.MockTransport simuliert.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm_gateway import LLMGateway, TokenBucket, _retry_after_seconds
+
+
+def ok_response(content="ok", prompt_tokens=10, completion_tokens=5):
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+    })
+
+
+def make_gateway(handler, **kwargs):
+    kwargs.setdefault("requests_per_minute", 6000)
+    return LLMGateway(transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_success_returns_content_and_tokens():
+    """Test: 200 → Inhalt und Token-Usage im Ergebnis"""
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return ok_response("hallo")
+
+    gateway = make_gateway(handler)
+    result = await gateway.complete("prompt", system_message="sys", model="m1", api_key="key")
+    await gateway.close()
+
+    assert result.success and result.content == "hallo"
+    assert result.total_tokens == 15
+    assert seen[0]["messages"][0] == {"role": "system", "content": "sys"}
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_across_calls():
+    """Test: Mehrere Calls teilen sich einen httpx-Client"""
+    gateway = make_gateway(lambda request: ok_response())
+    await gateway.complete("a", model="m1", api_key="key")
+    client = gateway._client
+    await gateway.complete("b", model="m1", api_key="key")
+    assert gateway._client is client
+    await gateway.close()
+
+
+@pytest.mark.asyncio
+async def test_missing_api_key_fails_without_request():
+    """Test: Ohne API-Key kein HTTP-Call"""
+    calls = []
+    gateway = make_gateway(lambda request: calls.append(request) or ok_response())
+    result = await gateway.complete("prompt", model="m1", api_key="")
+    assert not result.success
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_429_respects_retry_after_and_pauses_bucket(monkeypatch):
+    """Test: 429 mit Retry-After pausiert den Bucket, danach Erfolg"""
+    responses = [httpx.Response(429, headers={"Retry-After": "0.05"}), ok_response()]
+    gateway = make_gateway(lambda request: responses.pop(0))
+
+    result = await gateway.complete("prompt", model="m1", api_key="key")
+    await gateway.close()
+
+    assert result.success
+    assert result.attempts == 2
+    assert gateway.health()["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_error_falls_back_to_next_model():
+    """Test: 4xx beim Primärmodell → ohne Retry direkt Fallback-Modell"""
+    models = []
+
+    def handler(request):
+        model = json.loads(request.content)["model"]
+        models.append(model)
+        return httpx.Response(400, text="bad model") if model == "primary" else ok_response()
+
+    gateway = make_gateway(handler)
+    result = await gateway.complete("prompt", model="primary", fallback_models=["backup"], api_key="key")
+    await gateway.close()
+
+    assert result.success and result.model == "backup"
+    assert models == ["primary", "backup"]
+
+
+@pytest.mark.asyncio
+async def test_all_models_failing_returns_error():
+    """Test: Alle Versuche fehlgeschlagen → success=False mit Fehlertext"""
+    gateway = make_gateway(lambda request: httpx.Response(401, text="unauthorized"))
+    result = await gateway.complete("prompt", model="m1", fallback_models=["m2"], api_key="key")
+    await gateway.close()
+
+    assert not result.success
+    assert "401" in result.error
+    assert result.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_per_model_concurrency_is_limited():
+    """Test: Höchstens per_model_concurrency parallele Requests je Modell"""
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return ok_response()
+
+    gateway = make_gateway(handler, max_concurrency=10, per_model_concurrency=2)
+    await asyncio.gather(*(gateway.complete("p", model="m1", api_key="key") for _ in range(6)))
+    await gateway.close()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_throttles_after_capacity():
+    """Test: Leerer Bucket verzögert den nächsten Call"""
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)
+    loop = asyncio.get_running_loop()
+    await bucket.acquire()
+    started = loop.time()
+    await bucket.acquire()
+    assert loop.time() - started >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_pause_does_not_credit_pause_time():
+    """Test: Nach pause() startet der Bucket leer — kein Burst nach Ablauf der Pause"""
+    bucket = TokenBucket(rate_per_minute=600, capacity=5)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    bucket.pause(0.2)
+    await bucket.acquire()
+    await bucket.acquire()
+    assert loop.time() - started >= 0.35
+
+
+def test_retry_after_parsing():
+    """Test: Retry-After in Sekunden, ungültige Werte → None"""
+    assert _retry_after_seconds("3") == 3.0
+    assert _retry_after_seconds(None) is None
+    assert _retry_after_seconds("garbage") is None
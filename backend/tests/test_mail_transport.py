@@ -0,0 +1,180 @@
+"""
+Tests: Mail-Transport
+Verbindungs-Wiederverwendung, Retries, Batch-Versand und Outbound-Queue
+
+Kein SMTP-Server nötig — Verbindungen werden durch Fakes ersetzt.
+"""
+
+import asyncio
+
+import pytest
+
+from mail_transport import MailMessage, MailTransport, SMTPPool, build_mime, cached_template
+
+
+class FakeSMTP:
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self.closed = False
+
+    async def send_message(self, mime):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("connection reset")
+        self.sent.append(mime["To"])
+
+    async def quit(self):
+        self.closed = True
+
+
+def make_transport(connections, size=1, max_per_connection=100):
+    async def connect():
+        client = FakeSMTP()
+        connections.append(client)
+        return client
+
+    pool = SMTPPool("smtp.test", 587, "user", "pw", size=size,
+                    max_per_connection=max_per_connection, connect=connect)
+    transport = MailTransport(pool=pool)
+    transport.rate_per_second = 0
+    transport.retry_base_delay = 0
+    return transport
+
+
+def message(to="a@example.com"):
+    return MailMessage(to=to, subject="Test", text_body="Hallo", html_body="<p>Hallo</p>")
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused_and_recycled():
+    """Test: Mehrere Mails über eine Verbindung, Reconnect nach max_per_connection"""
+    connections = []
+    transport = make_transport(connections, max_per_connection=2)
+
+    for i in range(3):
+        assert await transport.send(message(f"u{i}@example.com"))
+
+    assert len(connections) == 2
+    assert connections[0].sent == ["u0@example.com", "u1@example.com"]
+    assert connections[0].closed
+    await transport.close()
+    assert connections[1].closed
+
+
+@pytest.mark.asyncio
+async def test_failed_connection_is_dropped_and_retried():
+    """Test: SMTP-Fehler verwirft die Verbindung, Retry über eine neue Verbindung"""
+    connections = []
+    transport = make_transport(connections)
+
+    async def flaky_connect():
+        client = FakeSMTP(fail_times=1 if not connections else 0)
+        connections.append(client)
+        return client
+
+    transport.pool._connect_override = flaky_connect
+    assert await transport.send(message())
+    assert len(connections) == 2
+    assert transport.health()["retried"] == 1
+
+    transport.max_retries = 0
+    connections[1].fail_times = 1
+    assert not await transport.send(message())
+    assert transport.health()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_send_batch_reports_per_message_results():
+    """Test: Batch-Versand nutzt den Pool parallel und liefert Ergebnisse je Mail"""
+    connections = []
+    transport = make_transport(connections, size=2)
+
+    result = await transport.send_batch([message(f"u{i}@example.com") for i in range(5)])
+
+    assert result["sent"] == 5 and result["failed"] == 0
+    assert result["results"] == [True] * 5
+    assert len(connections) <= 2
+    assert sorted(to for c in connections for to in c.sent) == [f"u{i}@example.com" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_drained_on_close():
+    """Test: Fire-and-forget-Mails werden beim Shutdown noch zugestellt"""
+    connections = []
+    transport = make_transport(connections)
+
+    assert transport.enqueue(message("queued@example.com"))
+    await transport.close()
+
+    assert connections[0].sent == ["queued@example.com"]
+    assert transport.health()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_and_batch_concurrency_is_bounded_by_workers():
+    """Test: Queue-Worker und send_batch senden höchstens MAIL_WORKERS Mails gleichzeitig"""
+    transport = make_transport([], size=2)
+    transport.workers = 2
+    transport.queue_size = 3
+    active, peak = 0, 0
+    release = asyncio.Event()
+
+    async def send(message):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await release.wait()
+        active -= 1
+        return True
+
+    transport.send = send
+    accepted = [transport.enqueue(message(f"q{i}@example.com")) for i in range(6)]
+    await asyncio.sleep(0)
+    assert accepted == [True] * 3 + [False] * 3
+    assert transport.enqueue(message("later@example.com"))  # Worker haben zwei Mails übernommen
+    assert peak == 2
+
+    batch = asyncio.create_task(transport.send_batch([message(f"b{i}@example.com") for i in range(10)]))
+    await asyncio.sleep(0.01)
+    assert peak == 4  # 2 Queue-Worker + 2 Batch-Worker
+    release.set()
+    assert (await batch)["sent"] == 10
+    await transport.close()
+    assert peak == 4
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_sends_still_running_after_timeout():
+    """Test: Shutdown wartet max. timeout auf laufende Sends und bricht sie dann ab"""
+    transport = make_transport([])
+    started = asyncio.Event()
+
+    async def hanging_send(message):
+        started.set()
+        await asyncio.Event().wait()
+
+    transport.send = hanging_send
+    transport.enqueue(message("slow@example.com"))
+    transport.enqueue(message("waiting@example.com"))
+    await started.wait()
+    workers = list(transport._workers)
+
+    await transport.close(timeout=0.01)
+
+    assert all(worker.done() for worker in workers)
+    assert transport.health()["failed"] == 1 and transport.health()["workers"] == 0
+
+
+def test_mime_and_template_cache():
+    """Test: MIME enthält Text, HTML und Anhang; Templates werden je Sprache gecacht"""
+    mail = MailMessage(to="a@example.com", subject="Report", text_body="Text",
+                       html_body="<b>HTML</b>", attachments=[("report.pdf", b"%PDF")])
+    mime = build_mime(mail, "Complyo <noreply@complyo.tech>")
+
+    assert mime["From"] == "Complyo <noreply@complyo.tech>"
+    assert [part.get_filename() for part in mime.iter_attachments()] == ["report.pdf"]
+
+    de = cached_template("greeting_test", "Hallo {{ name }}", "de")
+    assert cached_template("greeting_test", "ignored", "de") is de
+    assert cached_template("greeting_test", "Hello {{ name }}", "en").render(name="A") == "Hello A"
@@ -0,0 +1,106 @@
+"""
+Tests: Legal-News-Ingestion
+Paralleles Laden, Conditional GET (304), Dedupe und Bulk-Insert
+
+Lokaler aiohttp-Testserver statt echter Feeds; der DB-Pool wird gemockt.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from news_service import NewsService, title_hash
+
+RSS = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>DSGVO: Neues Bu\xc3\x9fgeld gegen Shop</title><link>https://news.test/1</link>
+<description>&lt;p&gt;Die Aufsicht verh\xc3\xa4ngt ein Bu\xc3\x9fgeld wegen DSGVO-Versto\xc3\x9f.&lt;/p&gt;</description></item>
+<item><title>Schon bekannt: DSGVO Leitfaden</title><link>https://news.test/known</link>
+<description>DSGVO Hinweis</description></item>
+<item><title>Fu\xc3\x9fball-Ergebnisse</title><link>https://news.test/sport</link>
+<description>Nichts zum Thema</description></item>
+</channel></rss>"""
+
+
+@pytest_asyncio.fixture
+async def feed_server():
+    requests = []
+
+    async def feed(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(body=RSS, headers={"ETag": '"v1"', "Last-Modified": "Mon, 12 Oct 2026 08:00:00 GMT"})
+
+    async def broken(request):
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get("/feed.xml", feed)
+    app.router.add_get("/broken.xml", broken)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, requests
+    await server.close()
+
+
+def make_pool(feeds, known_rows, inserted_ids):
+    conn = MagicMock()
+    conn.fetch = AsyncMock(side_effect=[feeds, known_rows, [{"id": i} for i in inserted_ids]])
+    conn.execute = AsyncMock(return_value="UPDATE 1")
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    return pool, conn
+
+
+def feed_row(feed_id, name, url, etag=None, last_fetch=None):
+    return {"id": feed_id, "name": name, "url": url, "category": "Datenschutz",
+            "keywords": ["DSGVO"], "last_fetch": last_fetch, "fetch_frequency_hours": 4,
+            "etag": etag, "last_modified": None}
+
+
+@pytest.mark.asyncio
+async def test_fetch_dedupes_and_bulk_inserts(feed_server):
+    """Test: Feeds parallel laden, bekannte/irrelevante Items filtern, ein INSERT für alles"""
+    server, requests = feed_server
+    feeds = [
+        feed_row(1, "Quelle A", str(server.make_url("/feed.xml"))),
+        feed_row(2, "Quelle B", str(server.make_url("/broken.xml"))),
+        feed_row(3, "Quelle C", "https://unused.test", last_fetch=datetime.now() - timedelta(hours=1)),
+    ]
+    known = [{"url": "https://news.test/known", "title_hash": title_hash("x", "Quelle A")}]
+    pool, conn = make_pool(feeds, known, inserted_ids=[101])
+
+    results = await NewsService(pool).fetch_all_feeds()
+
+    assert results["processed"] == 1
+    assert results["new_items"] == 1
+    assert len(results["errors"]) == 1 and "HTTP 500" in results["errors"][0]
+
+    insert_sql, titles, *rest = conn.fetch.await_args_list[2].args
+    assert "ON CONFLICT DO NOTHING" in insert_sql
+    assert titles == ["DSGVO: Neues Bußgeld gegen Shop"]
+    assert rest[2] == ["https://news.test/1"]  # url
+    assert rest[8] == [1]  # feed_id
+
+    update_sql, ids, etags, last_modified, _ = conn.execute.await_args.args
+    assert (ids, etags) == ([1], ['"v1"'])
+
+
+@pytest.mark.asyncio
+async def test_not_modified_feed_is_skipped(feed_server):
+    """Test: Gespeichertes ETag → If-None-Match, 304 → kein Parsen, kein Insert"""
+    server, requests = feed_server
+    pool, conn = make_pool([feed_row(1, "Quelle A", str(server.make_url("/feed.xml")), etag='"v1"')], [], [])
+
+    results = await NewsService(pool).fetch_all_feeds()
+
+    assert requests[0]["If-None-Match"] == '"v1"'
+    assert results["not_modified"] == 1
+    assert results["new_items"] == 0
+    assert conn.fetch.await_count == 2  # Feeds + bekannte Items, kein INSERT
@@ -0,0 +1,86 @@
+"""
+Tests: ParsedPage (Parse-once-Dokumentmodell)
+Tag-Index, Link-Auflösung, Caching und Wiederverwendung über ParsedPage.of(soup)
+"""
+
+import pytest
+
+from compliance_engine.parsed_page import ParsedPage
+from compliance_engine.scanner import ComplianceScanner
+from website_crawler import WebsiteCrawler
+
+HTML = """
+<html><head><title>Shop</title><script src="/app.js"></script><script>var x = 1;</script></head>
+<body>
+  <h1>Willkommen</h1>
+  <a href="/impressum">Impressum</a>
+  <h2>Angebote</h2>
+  <iframe src="https://www.youtube.com/embed/abc"></iframe>
+  <a href="https://facebook.com/complyo">Facebook</a>
+  <a name="anker">kein Link</a>
+  <form action="/kontakt"><input name="mail"></form>
+</body></html>
+"""
+
+
+def make_page():
+    return ParsedPage("https://example.de/shop/", HTML)
+
+
+def test_tag_index_keeps_document_order():
+    """Test: tags() liefert Tags (auch mehrerer Namen) in Dokumentreihenfolge"""
+    page = make_page()
+
+    assert [tag.name for tag in page.tags("h2", "h1")] == ["h1", "h2"]
+    assert [heading.level for heading in page.headings] == [1, 2]
+    assert page.has("form") and not page.has("video")
+    assert page.first("title").get_text() == "Shop"
+
+
+def test_links_and_resources_are_resolved():
+    """Test: Links ohne href werden ignoriert, URLs und Domains sind aufgelöst"""
+    page = make_page()
+
+    assert [link.url for link in page.links] == ["https://example.de/impressum", "https://facebook.com/complyo"]
+    assert page.links[1].domain == "facebook.com"
+    assert [script.url for script in page.external_scripts] == ["https://example.de/app.js"]
+    assert len(page.inline_scripts) == 1
+    assert page.src_domains == {"example.de", "www.youtube.com"}
+
+
+def test_of_reuses_page_and_caches_markup():
+    """Test: ParsedPage.of(soup) liefert dasselbe Modell, Markup wird nur einmal serialisiert"""
+    page = make_page()
+
+    assert ParsedPage.of(page.soup) is page
+    assert page.markup is page.markup
+    assert "youtube.com/embed" in page.markup_lower
+
+    foreign = ParsedPage("", HTML).soup
+    assert ParsedPage.of(foreign, "https://example.de/").url == "https://example.de/"
+
+
+@pytest.mark.asyncio
+async def test_scanner_helpers_use_shared_page():
+    """Test: Scanner-Helfer arbeiten auf dem geteilten Modell"""
+    page = make_page()
+    issues = await ComplianceScanner()._check_social_media_plugins(page.url, page.soup)
+
+    assert issues
+    assert page.embedded_resources[0].domain == "example.de"
+
+
+@pytest.mark.asyncio
+async def test_website_crawler_skips_fetch_with_page(monkeypatch):
+    """Test: WebsiteCrawler nutzt eine übergebene Seite statt erneut zu laden"""
+    crawler = WebsiteCrawler()
+
+    async def no_fetch(url):
+        raise AssertionError("should not fetch")
+
+    monkeypatch.setattr(crawler, "_fetch_html", no_fetch)
+    monkeypatch.setattr("website_crawler.validate_url", lambda url: url)
+    structure = await crawler.crawl_website("https://example.de/shop/", page=make_page())
+
+    assert structure["url"] == "https://example.de/shop/"
+    assert not structure.get("crawl_failed")
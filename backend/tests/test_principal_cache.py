@@ -0,0 +1,110 @@
+"""
+Tests: Principal-Cache
+Prozess-LRU mit TTL, Redis-Stufe, Invalidierung und Hit-Ratio
+
+Kein Redis/DB nötig — Loader und Redis werden durch Fakes ersetzt.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from principal_cache import PrincipalCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+def make_loader(calls, user_id=7):
+    async def load():
+        calls.append(user_id)
+        return {"id": user_id, "plan_type": "pro", "active_modules": ["cookie"],
+                "created_at": datetime(2025, 1, 2, 3, 4, 5)}
+    return load
+
+
+@pytest.mark.asyncio
+async def test_local_hit_returns_copy():
+    """Test: Zweiter Lookup kommt aus dem LRU, Mutationen wirken nicht auf den Cache"""
+    cache = PrincipalCache(ttl=60, redis_ttl=0)
+    calls = []
+
+    first = await cache.get_or_load(7, "jti-a", make_loader(calls))
+    first["active_modules"].append("hacked")
+    second = await cache.get_or_load(7, "jti-a", make_loader(calls))
+
+    assert calls == [7]
+    assert second["active_modules"] == ["cookie"]
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_lru_eviction():
+    """Test: Abgelaufene Einträge werden neu geladen, LRU hält max_size ein"""
+    cache = PrincipalCache(ttl=0, redis_ttl=0, max_size=1)
+    calls = []
+
+    await cache.get_or_load(7, None, make_loader(calls))
+    await cache.get_or_load(7, None, make_loader(calls))
+    await cache.get_or_load(8, None, make_loader(calls, user_id=8))
+
+    assert calls == [7, 7, 8]
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_shared_between_processes():
+    """Test: Ein zweiter Prozess (eigenes LRU) bekommt den Principal aus Redis inkl. datetime"""
+    redis = FakeRedis()
+    calls = []
+    worker_a = PrincipalCache(ttl=60, redis_ttl=60)
+    worker_b = PrincipalCache(ttl=60, redis_ttl=60)
+    worker_a.redis = worker_b.redis = redis
+
+    await worker_a.get_or_load(7, "jti-a", make_loader(calls))
+    user = await worker_b.get_or_load(7, "jti-b", make_loader(calls))
+
+    assert calls == [7]
+    assert user["created_at"] == datetime(2025, 1, 2, 3, 4, 5)
+    assert worker_b.stats()["hits_redis"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_all_tokens_and_inflight_load():
+    """Test: invalidate() leert alle jti-Einträge und verwirft einen parallel laufenden Load"""
+    cache = PrincipalCache(ttl=60, redis_ttl=60)
+    cache.redis = FakeRedis()
+    calls = []
+
+    await cache.get_or_load(7, "jti-a", make_loader(calls))
+    await cache.get_or_load(7, "jti-b", make_loader(calls))
+    await cache.invalidate("7")
+    assert cache.stats()["entries"] == 0
+    assert cache.redis.store == {}
+
+    release = asyncio.Event()
+
+    async def slow_load():
+        await release.wait()
+        return {"id": 7, "plan_type": "stale"}
+
+    pending = asyncio.create_task(cache.get_or_load(7, "jti-a", slow_load))
+    await asyncio.sleep(0)
+    await cache.invalidate(7)
+    release.set()
+
+    assert (await pending)["plan_type"] == "stale"
+    assert cache.stats()["entries"] == 0
+    assert cache.redis.store == {}
@@ -0,0 +1,124 @@
+"""
+Tests: RenderService
+Domain-Entscheidungscache, Single-Flight, HTML-Cache und gelernte statische Domains
+
+Playwright wird durch einen Fake-Renderer ersetzt — kein echter Chromium nötig.
+"""
+
+import asyncio
+
+import pytest
+
+import compliance_engine.browser_renderer as br
+import compliance_engine.render_service as rs
+from compliance_engine.render_service import RenderService
+
+SPA_HTML = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+RENDERED_HTML = "<html><body><main>" + "Impressum Angaben gemäß § 5 DDG " * 40 + "</main></body></html>"
+
+
+class FakeRenderer:
+    renders = 0
+    html = RENDERED_HTML
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def render_page(self, url):
+        FakeRenderer.renders += 1
+        await asyncio.sleep(0.01)
+        return {"html": FakeRenderer.html, "success": True, "rendering_type": "client",
+                "metadata": {"url": url, "rendering_type": "client"}}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    FakeRenderer.renders = 0
+    FakeRenderer.html = RENDERED_HTML
+    detections = []
+    original = rs.detect_client_rendering
+
+    def counting_detect(html):
+        detections.append(html)
+        return original(html)
+
+    monkeypatch.setattr(rs, "detect_client_rendering", counting_detect)
+    svc = RenderService(renderer_factory=FakeRenderer)
+    svc.detections = detections
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_concurrent_renders_share_one_browser_run(service):
+    """Test: Parallele Fetches derselben URL → ein Render, Rest wartet mit"""
+    results = await asyncio.gather(*(service.fetch("https://spa.test/", SPA_HTML) for _ in range(3)))
+
+    assert FakeRenderer.renders == 1
+    assert all(html == RENDERED_HTML for html, _ in results)
+    assert service.health()["joined"] == 2
+    assert service.health()["inflight_renders"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rendered_html_cached_by_url_and_etag(service):
+    """Test: Gleiche URL + ETag → Cache-Hit; neues ETag → neuer Render"""
+    await service.fetch("https://spa.test/", SPA_HTML, etag='"a"')
+    html, metadata = await service.fetch("https://spa.test/", SPA_HTML, etag='"a"')
+    assert metadata["render_cache"] == "hit"
+    assert html == RENDERED_HTML
+    assert FakeRenderer.renders == 1
+
+    await service.fetch("https://spa.test/", SPA_HTML, etag='"b"')
+    assert FakeRenderer.renders == 2
+
+
+@pytest.mark.asyncio
+async def test_decision_cached_per_domain(service):
+    """Test: Detection läuft einmal je Domain, weitere Seiten nutzen die Entscheidung"""
+    await service.fetch("https://spa.test/", SPA_HTML)
+    _, metadata = await service.fetch("https://spa.test/impressum", SPA_HTML)
+
+    assert len(service.detections) == 1
+    assert metadata["used_browser"] is True
+    assert service.health()["decision_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_domain_learned_static_when_render_adds_nothing(service):
+    """Test: Render ohne Mehrinhalt → Domain wird bis TTL-Ablauf statisch gefetcht"""
+    static = "<html><body><div id='root'>" + "Text " * 5 + "</div><script></script></body></html>"
+    FakeRenderer.html = static
+    await service.fetch("https://static.test/", static)
+    html, metadata = await service.fetch("https://static.test/datenschutz", static)
+
+    assert FakeRenderer.renders == 1
+    assert metadata["used_browser"] is False
+    assert "learned" in metadata["detection_reason"]
+    assert html == static
+
+
+@pytest.mark.asyncio
+async def test_browser_unavailable_falls_back_to_static(monkeypatch):
+    """Test: Browser nicht startbar → statisches HTML, used_browser=False"""
+    class Broken:
+        async def __aenter__(self):
+            raise RuntimeError("playwright missing")
+
+        async def __aexit__(self, *exc):
+            return False
+
+    html, metadata = await RenderService(renderer_factory=Broken).fetch("https://spa.test/", SPA_HTML)
+    assert html == SPA_HTML
+    assert metadata["used_browser"] is False
+    assert "playwright missing" in metadata["browser_error"]
+
+
+def test_nextjs_detected_without_parsing(monkeypatch):
+    """Test: Next.js-Marker werden per String-Check erkannt, ohne HTML zu parsen"""
+    monkeypatch.setattr(br, "BeautifulSoup", lambda *a, **k: pytest.fail("parsed"))
+    needs_browser, reason = br.detect_client_rendering('<script id="__NEXT_DATA__">{}</script>')
+    assert needs_browser is True
+    assert "Next.js" in reason
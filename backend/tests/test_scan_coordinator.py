@@ -0,0 +1,132 @@
+"""
+Tests: ScanCoordinator
+Single-Flight, TTL-Cache, Bypass, Fehlerbehandlung und Redis-Persistenz
+
+Der echte Scanner wird durch einen Fake-Runner ersetzt — kein Netzwerk nötig.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from compliance_engine.scan_coordinator import ScanCoordinator, normalize_url
+
+
+class FakeRunner:
+    def __init__(self, result=None):
+        self.calls = 0
+        self.result = result or {"compliance_score": 80, "issues": [], "scan_timestamp": datetime(2025, 1, 1, 12)}
+
+    async def __call__(self, url):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return dict(self.result, url=url), object()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+def runner():
+    return FakeRunner()
+
+
+@pytest.fixture
+def coordinator(runner):
+    return ScanCoordinator(ttl=60, max_size=10, runners={"compliance": runner})
+
+
+def test_normalize_url():
+    """Test: Schema, Host-Schreibweise, Default-Port und Slash ergeben denselben Schlüssel"""
+    assert normalize_url("Example.com/") == "https://example.com"
+    assert normalize_url("https://EXAMPLE.com:443/#top") == "https://example.com"
+    assert normalize_url("http://example.com:8080/a/?x=1") == "http://example.com:8080/a?x=1"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_scan(coordinator, runner):
+    """Test: Parallele Scans derselben URL → ein Lauf, jeder Aufrufer bekommt eine eigene Kopie"""
+    outcomes = await asyncio.gather(*(coordinator.run(u) for u in ("example.com", "https://example.com/", "https://EXAMPLE.com")))
+
+    assert runner.calls == 1
+    assert sorted(o.source for o in outcomes) == ["fresh", "joined", "joined"]
+    outcomes[0].result["issues"].append("mutated")
+    assert outcomes[1].result["issues"] == []
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_within_ttl_and_bypass(coordinator, runner):
+    """Test: Zweiter Scan kommt aus dem Cache, bypass_cache und max_age erzwingen einen neuen Lauf"""
+    first = await coordinator.run("https://example.com")
+    second = await coordinator.run("https://example.com")
+    assert (first.source, second.source) == ("fresh", "cache")
+    assert first.page is not None and second.page is None
+    assert runner.calls == 1
+
+    bypassed = await coordinator.run("https://example.com", bypass_cache=True)
+    assert bypassed.source == "fresh"
+    assert runner.calls == 2
+
+    await asyncio.sleep(0.02)
+    stale = await coordinator.run("https://example.com", max_age=0.01)
+    assert stale.source == "fresh"
+    assert runner.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_bypass_starts_new_scan_while_one_is_running(coordinator, runner):
+    """Test: bypass_cache wartet nicht auf einen laufenden Scan; spätere Aufrufer teilen den neueren"""
+    running = asyncio.create_task(coordinator.run("https://example.com"))
+    await asyncio.sleep(0)
+
+    bypassed = asyncio.create_task(coordinator.run("https://example.com", bypass_cache=True))
+    await asyncio.sleep(0)
+    joined = await coordinator.run("https://example.com")
+
+    assert [t.source for t in (await running, await bypassed, joined)] == ["fresh", "fresh", "joined"]
+    assert joined.page is not None
+    assert runner.calls == 2
+    assert coordinator.health()["inflight_scans"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_but_not_cached():
+    """Test: Fehlgeschlagene Scans landen nicht im Cache"""
+    runner = FakeRunner({"error": True, "error_message": "unreachable"})
+    coordinator = ScanCoordinator(ttl=60, runners={"compliance": runner})
+
+    await coordinator.scan("https://down.test")
+    await coordinator.scan("https://down.test")
+
+    assert runner.calls == 2
+    assert coordinator.health()["cached_results"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_result_reused_by_other_process(runner):
+    """Test: Ein anderer Worker liest das persistierte Ergebnis (inkl. datetime) aus Redis"""
+    redis = FakeRedis()
+    writer = ScanCoordinator(ttl=60, runners={"compliance": runner})
+    writer.redis = redis
+    await writer.scan("https://example.com")
+
+    reader = ScanCoordinator(ttl=60, runners={"compliance": runner})
+    reader.redis = redis
+    outcome = await reader.run("https://example.com", max_age=30)
+
+    assert outcome.source == "persisted"
+    assert outcome.page is None
+    assert outcome.result["scan_timestamp"] == datetime(2025, 1, 1, 12)
+    assert runner.calls == 1
@@ -0,0 +1,147 @@
+"""
+Tests: Scan-Read-Model
+Lesezugriffe auf website_latest_scan / scan_daily_rollups statt scan_history
+
+Die Query-Tests mocken die Verbindung. Trigger und Backfill aus
+migrations/add_scan_read_model.sql laufen gegen eine echte Datenbank
+(DATABASE_URL, in CI der Postgres-Service) in einem temporären Schema;
+ohne erreichbare Datenbank wird dieser Test übersprungen.
+"""
+
+import asyncio
+import json
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import asyncpg
+import pytest
+import pytest_asyncio
+
+from scan_read_model import (
+    issue_category_counts,
+    latest_scan_for_domain,
+    latest_scans_for_user,
+    normalize_domain,
+    scan_count_since,
+    scans_before,
+)
+
+MIGRATION = Path(__file__).resolve().parent.parent / "migrations" / "add_scan_read_model.sql"
+
+# scan_history wie init_scan_history.sql, ohne Fremdschlüssel
+SCAN_HISTORY_DDL = """
+    CREATE TABLE scan_history (
+        id SERIAL PRIMARY KEY,
+        scan_id VARCHAR(100) UNIQUE NOT NULL,
+        website_id INTEGER,
+        user_id INTEGER,
+        url VARCHAR(500) NOT NULL,
+        scan_data JSONB NOT NULL,
+        compliance_score INTEGER NOT NULL,
+        total_risk_euro INTEGER DEFAULT 0,
+        critical_issues INTEGER DEFAULT 0,
+        warning_issues INTEGER DEFAULT 0,
+        total_issues INTEGER DEFAULT 0,
+        scan_timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def test_normalize_domain_matches_sql():
+    """Test: Gleiche Normalisierung wie scan_domain() in der Migration"""
+    assert normalize_domain("https://WWW.Shop.example.de:443/impressum?x=1") == "shop.example.de"
+    assert normalize_domain("example.de/") == "example.de"
+    assert normalize_domain("http://wwwshop.de") == "wwwshop.de"
+
+
+@pytest.mark.asyncio
+async def test_domain_lookup_is_exact_and_normalized():
+    """Test: Exakter Lookup auf die normalisierte Domain statt ILIKE über scan_history"""
+    conn = MagicMock()
+    conn.fetchrow = AsyncMock(return_value=None)
+
+    await latest_scan_for_domain(conn, "https://www.example.de/impressum", 7)
+
+    sql, domain, user_id = conn.fetchrow.call_args.args
+    assert "website_latest_scan" in sql
+    assert "scan_history" not in sql and "ILIKE" not in sql
+    assert (domain, user_id) == ("example.de", 7)
+
+
+@pytest.mark.asyncio
+async def test_dashboard_queries_read_rollups():
+    """Test: Scan-Zählung und Vorwochen-Stand kommen aus den Tages-Rollups"""
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=None)
+    conn.fetch = AsyncMock(return_value=[])
+
+    assert await scan_count_since(conn, 7, date(2026, 10, 1)) == 0
+    await scans_before(conn, 7, date(2026, 10, 9))
+
+    for call in (conn.fetchval.call_args, conn.fetch.call_args):
+        assert "scan_daily_rollups" in call.args[0]
+        assert "scan_history" not in call.args[0]
+    assert conn.fetch.call_args.args[1:] == (7, date(2026, 10, 9))
+
+
+@pytest_asyncio.fixture
+async def db():
+    try:
+        conn = await asyncpg.connect(os.environ["DATABASE_URL"], timeout=3)
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Keine Test-Datenbank erreichbar: {e}")
+    schema = f"scan_read_model_test_{os.getpid()}"
+    await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}; SET search_path TO {schema}")
+    try:
+        await conn.execute(SCAN_HISTORY_DDL)
+        yield conn
+    finally:
+        await conn.execute(f"DROP SCHEMA {schema} CASCADE")
+        await conn.close()
+
+
+async def _insert_scan(conn, scan_id, url, day, hour, score, categories, website_id=None, user_id=7):
+    issues = [{"category": c, "description": f"{c} issue"} for c in categories]
+    return await conn.fetchval("""
+        INSERT INTO scan_history (scan_id, website_id, user_id, url, scan_data, compliance_score,
+                                  critical_issues, total_issues, scan_timestamp)
+        VALUES ($1, $2, $3, $4, $5::jsonb, $6, $7, $7, $8)
+        RETURNING id
+    """, scan_id, website_id, user_id, url, json.dumps({"issues": issues, "gdpr_score": score}),
+        score, len(issues), datetime(2026, 10, day, hour, tzinfo=timezone.utc))
+
+
+@pytest.mark.asyncio
+async def test_migration_backfills_and_triggers_maintain_read_model(db):
+    """Test: Backfill der Historie, Trigger bei Insert/Delete, Kategorien nur aus dem neuesten Scan"""
+    await _insert_scan(db, "s1", "https://example.de", 1, 9, 50, ["datenschutz", "datenschutz", "cookies"], website_id=1)
+    await _insert_scan(db, "s2", "https://example.de", 1, 15, 60, ["datenschutz", "cookies"], website_id=1)
+    await db.execute(MIGRATION.read_text())
+
+    # Backfill: neuester Scan je Website, ein Tages-Rollup mit beiden Scans
+    [latest] = await latest_scans_for_user(db, 7)
+    assert (latest["scan_key"], latest["domain"], latest["compliance_score"]) == ("1", "example.de", 60)
+    rollup = await db.fetchrow("SELECT * FROM scan_daily_rollups WHERE user_id = 7")
+    assert (rollup["scan_count"], rollup["min_score"], rollup["max_score"], rollup["last_compliance_score"]) == (2, 50, 60, 60)
+
+    # Trigger: neuer Scan derselben Website und einer zweiten Website ohne website_id
+    newest = await _insert_scan(db, "s3", "https://example.de", 3, 9, 80, ["cookies"], website_id=1)
+    await _insert_scan(db, "s4", "https://WWW.Shop.example.de/impressum", 3, 10, 70, ["impressum"])
+
+    assert await scan_count_since(db, 7, date(2026, 10, 1)) == 4
+    assert [dict(r) for r in await scans_before(db, 7, date(2026, 10, 3))] == [
+        {"scan_key": "1", "compliance_score": 60, "critical_issues": 2}
+    ]
+    shop = await latest_scan_for_domain(db, "shop.example.de", 7)
+    assert shop["compliance_score"] == 70
+    assert json.loads(shop["top_issues"]) == ["impressum issue"]
+    assert {r["category"]: r["count"] for r in await issue_category_counts(db, 7)} == {"cookies": 1, "impressum": 1}
+
+    # Gelöschter neuester Scan → vorheriger Scan der Website rückt nach
+    await db.execute("DELETE FROM scan_history WHERE id = $1", newest)
+    assert (await latest_scan_for_domain(db, "example.de", 7))["compliance_score"] == 60
+    assert {r["category"]: r["count"] for r in await issue_category_counts(db, 7)} == {
+        "datenschutz": 1, "cookies": 1, "impressum": 1
+    }
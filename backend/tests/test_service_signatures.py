@@ -0,0 +1,55 @@
+"""
+Tests: Service-Signaturen
+Kompilierter Multi-Pattern-Matcher, Konfidenz und Suffix-Trie für Request-Domains
+"""
+
+from compliance_engine.service_signatures import DomainSuffixIndex, SignatureMatcher
+from cookie_scanner_service import CookieScanner
+
+
+def test_overlapping_literals_are_all_found():
+    """Test: Literale, die an derselben Position beginnen, werden alle erkannt"""
+    matcher = SignatureMatcher({"ga": ["_ga", "_gat", "_gid"], "tm": [r"GTM-[A-Z0-9]+"]})
+
+    matches = {match.service: match for match in matcher.match("document.cookie = '_GAT=1'; gtm-ab12")}
+
+    assert matches["ga"].patterns == ["_ga", "_gat"]
+    assert matches["ga"].confidence == 0.75
+    assert matches["tm"].confidence == 0.60
+
+
+def test_literal_mode_escapes_metacharacters():
+    """Test: Im Literal-Modus sind Punkte/Klammern keine Regex-Metazeichen"""
+    matcher = SignatureMatcher({"svc": ["a.b", "x(y"]}, literal=True)
+
+    assert matcher.match("axb") == []
+    assert matcher.match("A.B x(y")[0].patterns == ["a.b", "x(y"]
+
+
+def test_matches_previous_per_pattern_search():
+    """Test: Single-Pass-Ergebnis entspricht der bisherigen re.search-Schleife"""
+    import re
+
+    content = (
+        "<script src='https://www.googletagmanager.com/gtag/js?id=G-1'></script>"
+        "gtag('config', 'G-XYZ'); _pk_id static.hotjar.com _hjSession cf_clearance PHPSESSID"
+    )
+    expected = {
+        service
+        for service, entry in CookieScanner.DETECTION_PATTERNS.items()
+        if any(re.search(p, content, re.IGNORECASE) for p in entry["patterns"])
+    }
+
+    detected = CookieScanner()._detect_services(content, [], [], [], [])
+
+    assert detected["services"] == expected
+    assert detected["confidence"]["hotjar"] == 0.75
+
+
+def test_domain_suffix_index():
+    """Test: Suffix-Match auf Label-Grenzen, Port wird ignoriert"""
+    index = DomainSuffixIndex({"facebook.net": "facebook_pixel", "connect.facebook.net": "facebook_pixel"})
+
+    assert [s for s, _ in index.lookup("connect.facebook.net:443")] == ["facebook.net", "connect.facebook.net"]
+    assert index.lookup("facebook.net.evil.com") == []
+    assert index.lookup("notfacebook.net") == []
@@ -0,0 +1,161 @@
+"""
+Tests: Site-Crawler
+URL-Normalisierung, Frontier-Reihenfolge, robots.txt, Sitemap-Indizes und Parallelität
+
+Kein Netzwerk nötig — aiohttp wird durch eine Fake-Session ersetzt.
+"""
+
+import asyncio
+import gzip
+
+import pytest
+
+from compliance_engine.site_crawler import SiteCrawler, normalize_url
+
+
+class FakeResponse:
+    def __init__(self, status, body, content_type):
+        self.status = status
+        self._body = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.headers = {"Content-Type": content_type}
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Liefert Antworten aus einem Dict {url: (status, body, content_type)}"""
+
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requested = []
+        self.active = 0
+        self.peak = 0
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        session = self
+
+        class _Ctx:
+            async def __aenter__(self):
+                session.active += 1
+                session.peak = max(session.peak, session.active)
+                try:
+                    await asyncio.sleep(session.delay)
+                finally:
+                    session.active -= 1
+                status, body, content_type = session.routes.get(url, (404, "", "text/html"))
+                return FakeResponse(status, body, content_type)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Ctx()
+
+
+def html(*links):
+    return (200, "<html><body>" + "".join(f'<a href="{l}">x</a>' for l in links) + "</body></html>", "text/html; charset=utf-8")
+
+
+async def collect(crawler, url):
+    return [page async for page in crawler.crawl(url)]
+
+
+def test_normalize_url_dedups_variants():
+    """Test: Fragment, Default-Port, Tracking-Parameter, Query-Reihenfolge und Trailing Slash"""
+    expected = "https://example.de/kontakt?a=1&b=2"
+    assert normalize_url("HTTPS://Example.de:443/kontakt/?b=2&a=1&utm_source=x#top") == expected
+    assert normalize_url("kontakt?a=1&b=2", base="https://example.de/") == expected
+    assert normalize_url("mailto:info@example.de") is None
+    assert normalize_url("https://example.de") == "https://example.de/"
+
+
+@pytest.mark.asyncio
+async def test_link_crawl_is_breadth_first_and_deduplicated():
+    """Test: BFS nach Tiefe, Dokumentreihenfolge, Duplikate und fremde Hosts ignoriert"""
+    session = FakeSession({
+        "https://example.de/": html("/b", "/a", "/a#x", "https://other.de/", "/datei.pdf"),
+        "https://example.de/a": html("/c"),
+        "https://example.de/b": html("/"),
+        "https://example.de/c": html(),
+    })
+    pages = await collect(SiteCrawler(session, max_pages=10, concurrency=1, use_sitemaps=False, respect_robots=False), "https://example.de")
+
+    assert [p.url for p in pages] == [
+        "https://example.de/", "https://example.de/b", "https://example.de/a", "https://example.de/c",
+    ]
+    assert [p.depth for p in pages] == [0, 1, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_max_depth_and_max_pages_are_respected():
+    """Test: Tiefe und Seitenlimit begrenzen den Crawl"""
+    session = FakeSession({
+        "https://example.de/": html(*[f"/p{i}" for i in range(10)]),
+        **{f"https://example.de/p{i}": html(f"/p{i}/deep") for i in range(10)},
+    })
+    pages = await collect(SiteCrawler(session, max_pages=5, max_depth=1, use_sitemaps=False, respect_robots=False), "https://example.de/")
+
+    assert len(pages) == 5
+    assert all(p.depth <= 1 for p in pages)
+    assert not any("deep" in url for url in session.requested)
+
+
+@pytest.mark.asyncio
+async def test_robots_disallow_and_sitemap_index_recursion():
+    """Test: robots.txt-Disallow wird beachtet, Sitemap-Index wird rekursiv aufgelöst"""
+    child = ('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+             '<url><loc>https://example.de/shop</loc></url>'
+             '<url><loc>https://example.de/intern/geheim</loc></url></urlset>')
+    session = FakeSession({
+        "https://example.de/robots.txt": (200, "User-agent: *\nDisallow: /intern/\nSitemap: https://example.de/sm-index.xml\n", "text/plain"),
+        "https://example.de/sm-index.xml": (200, '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                                                 '<sitemap><loc>https://example.de/sm-1.xml.gz</loc></sitemap></sitemapindex>', "application/xml"),
+        "https://example.de/sm-1.xml.gz": (200, gzip.compress(child.encode()), "application/gzip"),
+        "https://example.de/": html(),
+        "https://example.de/shop": html(),
+        "https://example.de/intern/geheim": html(),
+    })
+    crawler = SiteCrawler(session, max_pages=10)
+    pages = await collect(crawler, "https://example.de/")
+
+    assert [p.url for p in pages] == ["https://example.de/", "https://example.de/shop"]
+    assert [p.source for p in pages] == ["seed", "sitemap"]
+    assert crawler.stats["skipped_robots"] == 1
+    assert "https://example.de/intern/geheim" not in session.requested
+
+
+@pytest.mark.asyncio
+async def test_fetches_run_concurrently_up_to_limit():
+    """Test: Seiten werden parallel geladen, aber höchstens concurrency gleichzeitig"""
+    session = FakeSession({
+        "https://example.de/": html(*[f"/p{i}" for i in range(8)]),
+        **{f"https://example.de/p{i}": html() for i in range(8)},
+    }, delay=0.01)
+    pages = await collect(SiteCrawler(session, max_pages=20, concurrency=3, use_sitemaps=False, respect_robots=False), "https://example.de/")
+
+    assert len(pages) == 9
+    assert session.peak == 3
+
+
+@pytest.mark.asyncio
+async def test_non_html_and_errors_are_skipped():
+    """Test: Nicht-HTML-Antworten und Fehlerstatus liefern keine Seite"""
+    session = FakeSession({
+        "https://example.de/": html("/feed", "/kaputt", "/ok"),
+        "https://example.de/feed": (200, "{}", "application/json"),
+        "https://example.de/ok": html(),
+    })
+    crawler = SiteCrawler(session, use_sitemaps=False, respect_robots=False)
+    pages = await collect(crawler, "https://example.de/")
+
+    assert [p.url for p in pages] == ["https://example.de/", "https://example.de/ok"]
+    assert crawler.stats["skipped_non_html"] == 1
+    assert crawler.stats["failed"] == 1
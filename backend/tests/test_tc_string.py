@@ -0,0 +1,121 @@
+"""
+Tests: TC String Decoder und Vendor-Domain-Index
+Bit-genaues Decoding (Range-/Bitfeld-Kodierung, Segmente) und Erkennung über tcf_vendors
+"""
+
+import base64
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bs4 import BeautifulSoup
+
+from compliance_engine.gvl_snapshot import build_snapshot
+from compliance_engine.tc_string import IdBitset, TCStringError, decode_tc_string
+from compliance_engine.tcf_vendor_analyzer import TCFVendorAnalyzer
+
+
+class _BitWriter:
+    def __init__(self):
+        self.bits = ""
+
+    def int(self, value, n):
+        self.bits += format(value, f"0{n}b")
+        return self
+
+    def bitfield(self, ids, n):
+        self.bits += "".join("1" if i in ids else "0" for i in range(1, n + 1))
+        return self
+
+    def ranges(self, ranges):
+        self.int(len(ranges), 12)
+        for start, end in ranges:
+            self.int(int(start != end), 1).int(start, 16)
+            if start != end:
+                self.int(end, 16)
+        return self
+
+    def encode(self):
+        bits = self.bits + "0" * (-len(self.bits) % 8)
+        data = int(bits, 2).to_bytes(len(bits) // 8, "big")
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _core(vendor_consents_ranges, vendor_li_ids, max_li=20):
+    w = _BitWriter()
+    w.int(2, 6).int(16_000_000_000, 36).int(16_000_000_100, 36)
+    w.int(300, 12).int(7, 12).int(1, 6).int(3, 6).int(4, 6)  # CMP 300, v7, Screen 1, "DE"
+    w.int(150, 12).int(4, 6).int(0, 1).int(0, 1)
+    w.bitfield({1}, 12).bitfield({1, 3, 4}, 24).bitfield({2, 7}, 24).int(0, 1)
+    w.int(3, 6).int(4, 6)  # Publisher CC "DE"
+    max_consent = max(end for _, end in vendor_consents_ranges)
+    w.int(max_consent, 16).int(1, 1).ranges(vendor_consents_ranges)
+    w.int(max_li, 16).int(0, 1).bitfield(vendor_li_ids, max_li)
+    w.int(1, 12).int(2, 6).int(1, 2).ranges([(10, 12)])  # Purpose 2 → Consent für 10–12
+    return w.encode()
+
+
+def test_decodes_core_range_and_bitfield_sections():
+    """Test: Header, Purposes, Range- und Bitfeld-Vendorsektion, Publisher Restrictions"""
+    tc = decode_tc_string(_core([(1, 850), (900, 900)], {4, 17}))
+
+    assert (tc.cmp_id, tc.cmp_version, tc.consent_language, tc.publisher_cc) == (300, 7, "DE", "DE")
+    assert tc.created.timestamp() == 1_600_000_000 and tc.tcf_version == "2.2"
+    assert tc.purpose_consents.to_list() == [1, 3, 4]
+    assert tc.purpose_legitimate_interests.to_list() == [2, 7]
+    assert len(tc.vendor_consents) == 851 and 850 in tc.vendor_consents and 851 not in tc.vendor_consents
+    assert tc.vendor_legitimate_interests.to_list() == [4, 17]
+    assert tc.vendors_restricted(2, 1).to_list() == [10, 11, 12]
+
+
+def test_decodes_disclosed_vendors_and_publisher_tc_segments():
+    """Test: Segmente werden über SegmentType zugeordnet, Vektoren als Bitsets verglichen"""
+    disclosed = _BitWriter().int(1, 3).int(900, 16).int(0, 1).bitfield(set(range(1, 801)), 900).encode()
+    publisher = _BitWriter().int(3, 3).bitfield({1}, 24).bitfield({7}, 24).int(2, 6).bitfield({2}, 2).bitfield(set(), 2).encode()
+
+    tc = decode_tc_string(".".join([_core([(1, 850)], set()), disclosed, publisher]))
+
+    assert (tc.vendor_consents - tc.disclosed_vendors) == IdBitset.from_ids(range(801, 851))
+    assert tc.publisher_tc.purpose_consents.to_list() == [1]
+    assert tc.publisher_tc.custom_purpose_consents.to_list() == [2]
+
+
+def test_rejects_truncated_and_invalid_strings():
+    """Test: Abgeschnittene/ungültige Strings → TCStringError bzw. valid=False"""
+    with pytest.raises(TCStringError):
+        decode_tc_string(_core([(1, 850)], set())[:20])
+    with pytest.raises(TCStringError):
+        decode_tc_string("BOEFEAyOEFEAyAHABDENAI4AAAB9vABAASA")  # TCF v1
+
+    parsed = TCFVendorAnalyzer().parse_tc_string_basic("C$$")
+    assert parsed["valid"] is False and parsed["error"]
+
+
+@pytest.mark.asyncio
+async def test_domain_index_from_tcf_vendors_drives_detection_and_consent_audit():
+    """Test: Vendor aus tcf_vendors.domains wird per Subdomain erkannt und gegen den TC String geprüft"""
+    conn = MagicMock()
+    conn.fetch = AsyncMock(return_value=[{"vendor_id": 17, "name": "Example Ads", "domains": ["exampleads.com"]}])
+    pool = MagicMock()
+
+    @asynccontextmanager
+    async def acquire():
+        yield conn
+    pool.acquire = acquire
+
+    analyzer = TCFVendorAnalyzer()
+    analyzer.db_pool = pool
+    analyzer.snapshot = build_snapshot({"vendorListVersion": 150, "vendors": {"17": {"name": "Example Ads"}}, "purposes": {}}, "test")
+    analyzer.gvl_data = analyzer.snapshot.gvl
+    html = """
+        <script src="https://cdn.eu.exampleads.com/tag.js"></script>
+        <script src="https://connect.facebook.net/en_US/fbevents.js"></script>
+    """
+
+    vendors = await analyzer.analyze_vendors_on_page(BeautifulSoup(html, "html.parser"), html)
+    assert [(v["vendor_id"], v["vendor_name"]) for v in vendors] == [("17", "Example Ads"), ("45", "Facebook")]
+
+    report = await analyzer.generate_vendor_report(vendors, _core([(1, 3)], {17}))
+    assert [v["consent_status"] for v in report["vendors"]] == ["legitimate_interest", "no_consent"]
+    assert report["consent_audit"]["detected_without_consent"] == [45]
+    assert report["consent_audit"]["unknown_vendor_ids"] == [1, 2, 3]
@@ -0,0 +1,103 @@
+"""
+Tests für die Widget Asset Registry
+Deckt ab: Bundle-Build, 304/ETag, Encoding-Auswahl, versionierte URLs, Rebuild bei Dateiänderung
+"""
+
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import widget_asset_registry as war
+from widget_asset_registry import BundleSpec, WidgetAssetRegistry
+
+
+@pytest.fixture()
+def widget_dir(tmp_path):
+    (tmp_path / "a.js").write_text("console.log('a');", encoding="utf-8")
+    (tmp_path / "b.js").write_text("console.log('b');", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture()
+def registry(widget_dir, monkeypatch):
+    monkeypatch.setattr(war, "RELOAD_CHECK_INTERVAL", 0)
+    specs = {
+        "combo": BundleSpec(
+            name="combo",
+            files=("a.js", "b.js"),
+            cache_control="public, max-age=300",
+            combine=lambda src: src["a.js"] + "\n" + src["b.js"],
+        ),
+    }
+    return WidgetAssetRegistry(widget_dir=str(widget_dir), specs=specs)
+
+
+@pytest.fixture()
+def client(registry):
+    app = FastAPI()
+
+    @app.get("/combo.js")
+    async def combo(request: Request):
+        return registry.build_response(request, registry.get("combo"))
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_bundle_is_combined_and_precompressed(registry):
+    """Test: Bundle enthält beide Dateien, gzip-Variante ist vorberechnet"""
+    bundle = registry.get("combo")
+    assert bundle.identity == b"console.log('a');\nconsole.log('b');"
+    assert gzip.decompress(bundle.gzip) == bundle.identity
+    assert registry.get("combo") is bundle
+
+
+def test_missing_source_returns_none(registry, widget_dir):
+    """Test: Fehlende Quelldatei → kein Bundle"""
+    os.remove(widget_dir / "b.js")
+    assert registry.get("combo") is None
+    assert registry.get("unknown") is None
+
+
+def test_rebuild_on_file_change(registry, widget_dir):
+    """Test: Änderung einer Quelldatei führt zu neuem Hash"""
+    old_hash = registry.get("combo").content_hash
+    (widget_dir / "b.js").write_text("console.log('changed b');", encoding="utf-8")
+    assert registry.get("combo").content_hash != old_hash
+
+
+def test_if_none_match_returns_304(client, registry):
+    """Test: Passender ETag → 304 ohne Body"""
+    etag = registry.get("combo").etag
+    response = client.get("/combo.js", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_gzip_served_when_accepted(client):
+    """Test: gzip wird bei Accept-Encoding: gzip ausgeliefert"""
+    response = client.get("/combo.js", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "console.log('b')" in response.text
+
+
+def test_identity_when_no_encoding_accepted(client):
+    """Test: Ohne Accept-Encoding unkomprimiert"""
+    response = client.get("/combo.js", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+
+
+def test_versioned_url_is_immutable(client, registry):
+    """Test: ?v=<hash> wird immutable ausgeliefert, veralteter Hash nicht"""
+    url = registry.versioned_url("combo", "/combo.js")
+    response = client.get(url)
+    assert "immutable" in response.headers["Cache-Control"]
+
+    stale = client.get("/combo.js?v=deadbeef")
+    assert stale.headers["Cache-Control"] == "public, max-age=300"
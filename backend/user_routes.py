@@ -3,27 +3,24 @@ User Routes - User Profile & Domain Locks
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import logging
 from passlib.context import CryptContext as _CryptContext
 
+from dependencies import get_current_user
+from principal_cache import principal_cache
+
 _pwd_context = _CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/user", tags=["user"])
-security = HTTPBearer()
 
 # Global references (set in main_production.py)
 db_pool = None
 auth_service = None
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user from Authorization header"""
-    from auth_routes import get_current_user as auth_get_user
-    return await auth_get_user(credentials)
 
 @router.get("/domain-locks")
 async def get_domain_locks(current_user: dict = Depends(get_current_user)):
@@ -229,8 +226,9 @@ async def update_user_profile(request: UpdateProfileRequest, current_user: dict
             params.append(user_id)
             query = f"UPDATE users SET {', '.join(updates)}, updated_at = NOW() WHERE id = ${idx}"
             await conn.execute(query, *params)
+        await principal_cache.invalidate(user_id)
 
-            return {"success": True, "message": "Profil aktualisiert"}
+        return {"success": True, "message": "Profil aktualisiert"}
     except HTTPException:
         raise
     except Exception as e:
@@ -16,6 +16,8 @@ import re
 import logging
 import colorsys
 from ssrf_protection import validate_url, SSRFError
+from compliance_engine.parsed_page import ParsedPage
+from cpu_executor import cpu_executor
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +28,14 @@ class WebsiteCrawler:
         self.db_pool = db_pool
         self.cache_max_age_hours = 168  # 7 days
     
-    async def crawl_website(self, url: str) -> Dict[str, Any]:
+    async def crawl_website(self, url: str, page: Optional[ParsedPage] = None) -> Dict[str, Any]:
         """
         Hauptfunktion: Crawlt Website und extrahiert strukturierte Daten
         
         Args:
             url: URL der zu crawlenden Website
+            page: Bereits geladene und geparste Seite (z.B. ComplianceScanner.last_page) —
+                  dann entfällt der erneute Fetch + Parse
             
         Returns:
             Dict mit Website-Struktur, CMS-Info, Compliance-Status
@@ -50,13 +54,18 @@ class WebsiteCrawler:
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            # Fetch HTML
-            html_content = await self._fetch_html(url)
-            if not html_content:
-                return self._get_fallback_structure(url)
-            
-            # Parse HTML
-            soup = BeautifulSoup(html_content, 'lxml')
+            if page is not None:
+                # Wiederverwendung des vom Scanner geparsten Dokuments
+                html_content = page.html
+                soup = page.soup
+            else:
+                # Fetch HTML
+                html_content = await self._fetch_html(url)
+                if not html_content:
+                    return self._get_fallback_structure(url)
+                
+                # Parse HTML
+                soup = (await cpu_executor.run("html_parse", ParsedPage, url, html_content, isolated=False)).soup
             
             # Extrahiere alle Informationen
             structure = {
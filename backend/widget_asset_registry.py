@@ -0,0 +1,265 @@
+"""
+Complyo Widget Asset Registry
+
+Baut die ausgelieferten Widget-Bundles einmalig (Startup bzw. bei
+Dateiänderung) und hält sie vorkomprimiert im Speicher:
+- Identity-, gzip- und (falls verfügbar) brotli-Variante
+- Content-Hash als ETag → If-None-Match wird mit 304 beantwortet
+- Versionierte URLs (?v=<hash>) dürfen ein Jahr immutable gecacht werden
+
+Die Widget-Endpoints sind der meistaufgerufene Pfad (jeder Seitenaufruf
+jeder Kunden-Website) — pro Request findet daher kein Datei-IO und keine
+Komprimierung mehr statt.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Widget directory
+WIDGET_DIR = os.path.join(os.path.dirname(__file__), 'widgets')
+
+# Wie oft (Sekunden) die Quelldateien auf Änderungen geprüft werden
+RELOAD_CHECK_INTERVAL = float(os.getenv("WIDGET_RELOAD_CHECK_INTERVAL", "5"))
+
+# Cache-Policy für versionierte URLs (Inhalt ändert sich nie)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _combine_compliance_bundle(sources: Dict[str, str]) -> str:
+    """Cookie Compliance Bundle: Content Blocker vor Cookie Banner"""
+    return f"""/**
+ * Complyo Cookie Compliance Widget - Combined Bundle
+ * Version: 2.0.0
+ * © 2025 Complyo - All rights reserved
+ */
+
+/* ========== Content Blocker (loads first to block before page renders) ========== */
+{sources['content_blocker.js']}
+
+/* ========== Cookie Banner ========== */
+{sources['cookie_banner_v2.js']}
+"""
+
+
+@dataclass(frozen=True)
+class BundleSpec:
+    """Definition eines ausgelieferten Bundles"""
+    name: str
+    files: Tuple[str, ...]
+    cache_control: str
+    extra_headers: Dict[str, str] = field(default_factory=dict)
+    combine: Optional[Callable[[Dict[str, str]], str]] = None
+
+
+@dataclass
+class WidgetBundle:
+    """Gebautes, vorkomprimiertes Bundle"""
+    spec: BundleSpec
+    identity: bytes
+    gzip: bytes
+    brotli: Optional[bytes]
+    content_hash: str
+    signature: Tuple[Tuple[str, float, int], ...]
+    built_at: float = field(default_factory=time.time)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.content_hash}"'
+
+
+BUNDLE_SPECS: Dict[str, BundleSpec] = {
+    'cookie-compliance': BundleSpec(
+        name='cookie-compliance',
+        files=('content_blocker.js', 'cookie_banner_v2.js'),
+        # Unversionierte URL: kurz cachen + per ETag revalidieren, damit
+        # Fixes schnell ausgerollt werden
+        cache_control='public, max-age=300, stale-while-revalidate=3600',
+        extra_headers={'X-Complyo-Version': '2.0.0'},
+        combine=_combine_compliance_bundle,
+    ),
+    'cookie-consent': BundleSpec(
+        name='cookie-consent',
+        files=('cookie_consent.js',),
+        cache_control='public, max-age=86400, stale-while-revalidate=3600',
+    ),
+    'accessibility': BundleSpec(
+        name='accessibility',
+        files=('accessibility-v6.js',),
+        cache_control='public, max-age=86400, stale-while-revalidate=3600',
+        extra_headers={'X-Complyo-Widget-Version': '6.1.0'},
+    ),
+}
+
+
+class WidgetAssetRegistry:
+    """
+    In-Memory-Registry aller Widget-Bundles
+
+    Bundles werden beim ersten Zugriff bzw. via build_all() gebaut und neu
+    gebaut, sobald sich mtime/Größe einer Quelldatei ändern.
+    """
+
+    def __init__(self, widget_dir: str = WIDGET_DIR, specs: Optional[Dict[str, BundleSpec]] = None):
+        self.widget_dir = widget_dir
+        self.specs = specs if specs is not None else BUNDLE_SPECS
+        self._bundles: Dict[str, WidgetBundle] = {}
+        self._last_check: Dict[str, float] = {}
+
+    # -------------------------------------------------------------------------
+    # Build
+    # -------------------------------------------------------------------------
+
+    def build_all(self) -> Dict[str, str]:
+        """Baut alle Bundles (Startup). Gibt name → content_hash zurück."""
+        hashes = {}
+        for name in self.specs:
+            bundle = self.get(name)
+            if bundle:
+                hashes[name] = bundle.content_hash
+        logger.info(f"✅ Widget bundles built: {hashes}")
+        return hashes
+
+    def get(self, name: str) -> Optional[WidgetBundle]:
+        """Liefert das aktuelle Bundle oder None wenn Quelldateien fehlen"""
+        spec = self.specs.get(name)
+        if spec is None:
+            return None
+
+        bundle = self._bundles.get(name)
+        now = time.monotonic()
+        if bundle is not None and now - self._last_check.get(name, 0) < RELOAD_CHECK_INTERVAL:
+            return bundle
+
+        signature = self._signature(spec)
+        self._last_check[name] = now
+        if signature is None:
+            return None
+        if bundle is not None and bundle.signature == signature:
+            return bundle
+
+        bundle = self._build(spec, signature)
+        self._bundles[name] = bundle
+        logger.info(f"📦 Widget bundle '{name}' built ({len(bundle.identity)} bytes, v={bundle.content_hash})")
+        return bundle
+
+    def _signature(self, spec: BundleSpec) -> Optional[Tuple[Tuple[str, float, int], ...]]:
+        signature = []
+        for filename in spec.files:
+            try:
+                st = os.stat(os.path.join(self.widget_dir, filename))
+            except OSError:
+                return None
+            signature.append((filename, st.st_mtime, st.st_size))
+        return tuple(signature)
+
+    def _build(self, spec: BundleSpec, signature) -> WidgetBundle:
+        sources = {}
+        for filename in spec.files:
+            with open(os.path.join(self.widget_dir, filename), 'r', encoding='utf-8') as f:
+                sources[filename] = f.read()
+
+        text = spec.combine(sources) if spec.combine else sources[spec.files[0]]
+        identity = text.encode('utf-8')
+
+        return WidgetBundle(
+            spec=spec,
+            identity=identity,
+            gzip=gzip.compress(identity, compresslevel=9),
+            brotli=brotli.compress(identity, quality=11) if brotli else None,
+            content_hash=hashlib.sha256(identity).hexdigest()[:16],
+            signature=signature,
+        )
+
+    # -------------------------------------------------------------------------
+    # HTTP
+    # -------------------------------------------------------------------------
+
+    def versioned_url(self, name: str, path: str) -> Optional[str]:
+        """Content-gehashte URL, z.B. /api/widgets/accessibility.js?v=ab12..."""
+        bundle = self.get(name)
+        if bundle is None:
+            return None
+        return f"{path}?v={bundle.content_hash}"
+
+    def build_response(self, request: Request, bundle: WidgetBundle) -> Response:
+        """
+        Baut die HTTP-Antwort für ein Bundle
+
+        - If-None-Match mit passendem ETag → 304 ohne Body
+        - ?v=<aktueller hash> → immutable, 1 Jahr cachebar
+        - Encoding nach Accept-Encoding: br > gzip > identity
+        """
+        version = request.query_params.get('v')
+        cache_control = IMMUTABLE_CACHE_CONTROL if version == bundle.content_hash else bundle.spec.cache_control
+
+        headers = {
+            'Cache-Control': cache_control,
+            'Access-Control-Allow-Origin': '*',
+            'ETag': bundle.etag,
+            'Vary': 'Accept-Encoding',
+            **bundle.spec.extra_headers,
+        }
+
+        if _etag_matches(request.headers.get('If-None-Match', ''), bundle.content_hash):
+            return Response(status_code=304, headers=headers)
+
+        accept_encoding = request.headers.get('Accept-Encoding', '')
+        encodings = _parse_accept_encoding(accept_encoding)
+        if bundle.brotli is not None and 'br' in encodings:
+            headers['Content-Encoding'] = 'br'
+            body = bundle.brotli
+        elif 'gzip' in encodings:
+            headers['Content-Encoding'] = 'gzip'
+            body = bundle.gzip
+        else:
+            body = bundle.identity
+
+        return Response(content=body, media_type='application/javascript', headers=headers)
+
+
+def _parse_accept_encoding(header: str) -> List[str]:
+    """Liste akzeptierter Encodings (q=0 wird ignoriert)"""
+    encodings = []
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        if params.replace(' ', '').lower() in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        encodings.append(token)
+    return encodings
+
+
+def _etag_matches(if_none_match: str, content_hash: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        # Proxies hängen teils Encoding-Suffixe an (z.B. "hash-gzip")
+        if tag.strip('"').split('-')[0] == content_hash:
+            return True
+    return False
+
+
+# Globale Instanz
+widget_asset_registry = WidgetAssetRegistry()
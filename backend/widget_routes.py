@@ -4,15 +4,11 @@ Endpoints for serving and managing widgets
 """
 
 from fastapi import APIRouter, HTTPException, Request, BackgroundTasks, Depends
-from fastapi.responses import FileResponse, Response, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
-import os
 from datetime import datetime
 import time
-import gzip
-import io
-import hashlib
 import asyncpg
 import json
 import logging
@@ -21,6 +17,7 @@ from accessibility_patch_generator import AccessibilityPatchGenerator
 import aiohttp
 from accessibility_fix_saver import AccessibilityFixSaver
 from dependencies import get_current_user, get_db
+from widget_asset_registry import widget_asset_registry
 
 router = APIRouter()
 
@@ -32,10 +29,6 @@ def set_db_pool(pool):
     global db_pool
     return pool
 
-# Widget directory
-WIDGET_DIR = os.path.join(os.path.dirname(__file__), 'widgets')
-
-
 class WidgetTrackingEvent(BaseModel):
     siteId: str
     event: str
@@ -56,37 +49,12 @@ async def serve_cookie_consent_widget(request: Request):
     """
     Serve the Cookie Consent Widget JavaScript (Legacy v1)
     """
-    widget_path = os.path.join(WIDGET_DIR, 'cookie_consent.js')
+    bundle = widget_asset_registry.get('cookie-consent')
     
-    if not os.path.exists(widget_path):
+    if bundle is None:
         raise HTTPException(status_code=404, detail="Widget not found")
     
-    # Read widget content
-    with open(widget_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    headers = {
-        'Cache-Control': 'public, max-age=86400, stale-while-revalidate=3600',
-        'Access-Control-Allow-Origin': '*',
-        'ETag': f'"{hashlib.md5(content.encode()).hexdigest()}"',
-        'Vary': 'Accept-Encoding',
-    }
-
-    accept_encoding = request.headers.get('Accept-Encoding', '')
-    if 'gzip' in accept_encoding:
-        compressed = gzip.compress(content.encode('utf-8'))
-        headers['Content-Encoding'] = 'gzip'
-        return Response(
-            content=compressed,
-            media_type='application/javascript',
-            headers=headers,
-        )
-
-    return Response(
-        content=content,
-        media_type='application/javascript',
-        headers=headers,
-    )
+    return widget_asset_registry.build_response(request, bundle)
 
 @router.get("/api/widgets/privacy-manager.js")
 @router.get("/api/widgets/cookie-compliance.js")  # Legacy support
@@ -101,63 +69,21 @@ async def serve_cookie_compliance_widget(request: Request, site_id: Optional[str
     
     Query params:
     - site_id: Optional site identifier for custom configuration
+    - v: Content hash (from /api/widgets/manifest.json) for long-term caching
     
     Note: Also available at /privacy-manager.js to avoid ad-blocker issues
     """
     try:
-        # Load both widgets
-        banner_path = os.path.join(WIDGET_DIR, 'cookie_banner_v2.js')
-        blocker_path = os.path.join(WIDGET_DIR, 'content_blocker.js')
+        # Bundle wird einmalig gebaut und vorkomprimiert im Speicher gehalten
+        bundle = widget_asset_registry.get('cookie-compliance')
         
-        if not os.path.exists(banner_path) or not os.path.exists(blocker_path):
+        if bundle is None:
             raise HTTPException(status_code=404, detail="Widget files not found")
         
-        # Read widgets
-        with open(banner_path, 'r', encoding='utf-8') as f:
-            banner_code = f.read()
-        
-        with open(blocker_path, 'r', encoding='utf-8') as f:
-            blocker_code = f.read()
-        
-        # Combine widgets
-        combined_code = f"""/**
- * Complyo Cookie Compliance Widget - Combined Bundle
- * Version: 2.0.0
- * © 2025 Complyo - All rights reserved
- */
-
-/* ========== Content Blocker (loads first to block before page renders) ========== */
-{blocker_code}
-
-/* ========== Cookie Banner ========== */
-{banner_code}
-"""
-        
-        # Return combined widget
-        headers = {
-            'Cache-Control': 'no-cache, no-store, must-revalidate',
-            'Access-Control-Allow-Origin': '*',
-            'X-Complyo-Version': '2.0.0',
-            'ETag': f'"{hashlib.md5(combined_code.encode()).hexdigest()}"',
-            'Vary': 'Accept-Encoding',
-        }
-
-        accept_encoding = request.headers.get('Accept-Encoding', '')
-        if 'gzip' in accept_encoding:
-            compressed = gzip.compress(combined_code.encode('utf-8'))
-            headers['Content-Encoding'] = 'gzip'
-            return Response(
-                content=compressed,
-                media_type='application/javascript',
-                headers=headers,
-            )
-
-        return Response(
-            content=combined_code,
-            media_type='application/javascript',
-            headers=headers,
-        )
+        return widget_asset_registry.build_response(request, bundle)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error serving cookie compliance widget: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to serve widget: {str(e)}")
@@ -168,40 +94,33 @@ async def serve_accessibility_widget(request: Request, version: str = "6"):
     """
     Serve the Accessibility Widget JavaScript (v6 only)
     """
-    widget_filename = 'accessibility-v6.js'
-    
-    widget_path = os.path.join(WIDGET_DIR, widget_filename)
-    
-    if not os.path.exists(widget_path):
-        raise HTTPException(status_code=404, detail=f"Widget {widget_filename} not found")
+    bundle = widget_asset_registry.get('accessibility')
     
-    # Read widget content
-    with open(widget_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Widget accessibility-v6.js not found")
     
-    # Return as JavaScript with correct MIME type
-    headers = {
-        'Cache-Control': 'public, max-age=86400, stale-while-revalidate=3600',
-        'Access-Control-Allow-Origin': '*',
-        'X-Complyo-Widget-Version': '6.1.0',
-        'ETag': f'"{hashlib.md5(content.encode()).hexdigest()}"',
-        'Vary': 'Accept-Encoding',
-    }
+    return widget_asset_registry.build_response(request, bundle)
 
-    accept_encoding = request.headers.get('Accept-Encoding', '')
-    if 'gzip' in accept_encoding:
-        compressed = gzip.compress(content.encode('utf-8'))
-        headers['Content-Encoding'] = 'gzip'
-        return Response(
-            content=compressed,
-            media_type='application/javascript',
-            headers=headers,
-        )
 
-    return Response(
-        content=content,
-        media_type='application/javascript',
-        headers=headers,
+@router.get("/api/widgets/manifest.json")
+async def get_widget_manifest():
+    """
+    Content-gehashte Widget-URLs (immutable cachebar)
+    """
+    paths = {
+        'cookie-compliance': '/api/widgets/privacy-manager.js',
+        'cookie-consent': '/api/widgets/cookie-consent.js',
+        'accessibility': '/api/widgets/accessibility.js',
+    }
+    widgets = {}
+    for name, path in paths.items():
+        url = widget_asset_registry.versioned_url(name, path)
+        if url:
+            widgets[name] = url
+    
+    return JSONResponse(
+        content={"success": True, "widgets": widgets},
+        headers={'Cache-Control': 'public, max-age=60', 'Access-Control-Allow-Origin': '*'},
     )
 
 